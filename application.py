@@ -169,10 +169,24 @@ class Application:
                 f"Total Plugins: {summary['total_plugins']}",
                 f"Successful: {summary['successful']}",
                 f"Failed: {summary['failed']}",
+                f"Timed Out: {summary.get('timed_out', 0)}",
                 f"Total Changes: {summary['total_changes']}",
+                f"Duration: {summary.get('duration_ms', 0):.0f} ms "
+                f"(plugins: {summary.get('plugin_duration_ms', 0):.0f} ms, "
+                f"lock wait: {summary.get('lock_wait_ms', 0):.0f} ms)",
                 f"Backup File: {backup_file.name}",
             ]
             
+            # Time budget usage (run deadline and each plugin's budget)
+            budget = summary.get("budget")
+            if budget:
+                summary_items.append("")
+                summary_items.append("Time Budgets:")
+                for item in [budget] + budget["children"]:
+                    limit = f"{item['budget_s']:.0f} s ({item['used_pct']:.0f}%)" if item["budget_s"] is not None else "unlimited"
+                    flag = " - TIMED OUT" if item["timed_out"] else ""
+                    summary_items.append(f"  {item['name']}: {item['used_ms'] / 1000:.1f} s / {limit}{flag}")
+            
             UI.print_summary_box("Optimization Summary", summary_items)
             
             # Cleanup old backups
@@ -77,6 +77,22 @@ REM 6) Power plan (GUID-based, locale-safe)
 REM ------------------------------------------------
 echo [6/%CHECKS_TOTAL%] Güç planı kontrol ediliyor...
 set /a TOTAL_COUNT+=1
+REM Python + modules\power_scheme.py varsa optimizer ile aynı ayrıştırmayı kullan
+REM (plan + USB/PCIe ayarları; çıkış: 0=uygun, 1=farklı, 2=okunamadı -> findstr yoluna düş)
+set "POWER_RC=2"
+if exist "modules\power_scheme.py" (
+    python --version >nul 2>&1
+    if not errorlevel 1 (
+        python -m modules.power_scheme --check
+        set "POWER_RC=!errorlevel!"
+    )
+)
+if "!POWER_RC!"=="0" goto :PowerDone
+if "!POWER_RC!"=="1" (
+    set /a FAILED_COUNT+=1
+    call :AddFail "Güç planı/ayarları (hedeften farklı)"
+    goto :PowerDone
+)
 set "POWER_SCHEME="
 for /f "tokens=*" %%i in ('powercfg /getactivescheme 2^>nul') do set "POWER_SCHEME=%%i"
 if "!POWER_SCHEME!"=="" (
@@ -94,6 +110,7 @@ if "!POWER_SCHEME!"=="" (
         echo    [OK] High Performance (GUID) aktif
     )
 )
+:PowerDone
 echo.
 
 REM ------------------------------------------------
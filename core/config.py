@@ -77,6 +77,16 @@ class BackupConfig:
     compress: bool = False
 
 
+@dataclass
+class ExecutionConfig:
+    """Plugin execution configuration"""
+    parallel: bool = False  # Run independent plugins concurrently (dependency DAG)
+    max_workers: int = 4
+    run_timeout: Optional[float] = 1800.0  # Seconds for the whole run (None = no deadline)
+    plugin_timeout: Optional[float] = 600.0  # Default seconds per plugin (OptimizerPlugin.timeout overrides)
+    backup_timeout: Optional[float] = 300.0  # Seconds for capturing plugin state before the run
+
+
 @dataclass
 class LoggingConfig:
     """Logging configuration"""
@@ -98,6 +108,7 @@ class Config:
     privacy: PrivacyConfig = field(default_factory=PrivacyConfig)
     backup: BackupConfig = field(default_factory=BackupConfig)
     logging: LoggingConfig = field(default_factory=LoggingConfig)
+    execution: ExecutionConfig = field(default_factory=ExecutionConfig)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert config to dictionary"""
@@ -110,6 +121,7 @@ class Config:
             "security": asdict(self.security),
             "backup": asdict(self.backup),
             "logging": asdict(self.logging),
+            "execution": asdict(self.execution),
         }
     
     @classmethod
@@ -132,6 +144,8 @@ class Config:
             config.backup = BackupConfig(**data["backup"])
         if "logging" in data:
             config.logging = LoggingConfig(**data["logging"])
+        if "execution" in data:
+            config.execution = ExecutionConfig(**data["execution"])
         return config
 
 
@@ -5,10 +5,10 @@ Windows Uygulamaları Kaldırma/Kapatma
 Gereksiz Microsoft uygulamalarını kaldırır veya devre dışı bırakır
 """
 
-import subprocess
-import winreg
-import json
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from modules.powershell_host import get_powershell_host, ps_array, ps_quote
+from modules.registry_backend import REG_DWORD, get_registry_backend
 
 
 class AppsRemover:
@@ -72,21 +72,24 @@ class AppsRemover:
     def __init__(self):
         self.changes = []
         self.apps_backup = {}
+        # Tek Get-AppxPackage envanteri (Name -> PackageFullName). None = henüz alınmadı / alınamadı
+        self._inventory: Optional[Dict[str, str]] = None
+        # Bu çalışmada devre dışı bırakılanlar (HKCU işareti diğer profillere de yazılabilsin)
+        self.disabled_apps: List[str] = []
     
     def remove_app(self, app_name: str) -> bool:
         """Uygulamayı kaldır"""
         try:
-            # PowerShell komutu ile uygulamayı kaldır
-            cmd = f'Get-AppxPackage -Name "{app_name}" | Remove-AppxPackage -ErrorAction SilentlyContinue'
-            result = subprocess.run(
-                ["powershell", "-Command", cmd],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            # PowerShell komutu ile uygulamayı kaldır (envanterde varsa tam paket adıyla, yeniden arama yok)
+            full_name = (self._inventory or {}).get(app_name)
+            if full_name:
+                cmd = f'Remove-AppxPackage -Package {ps_quote(full_name)} -ErrorAction SilentlyContinue'
+            else:
+                cmd = f'Get-AppxPackage -Name "{app_name}" | Remove-AppxPackage -ErrorAction SilentlyContinue'
+            result = get_powershell_host().run(cmd, timeout=30)
             
             # Başarılı olup olmadığını kontrol et
-            if result.returncode == 0 or "Remove-AppxPackage" in result.stdout:
+            if result.ok or "Remove-AppxPackage" in result.output:
                 self.changes.append({
                     "type": "app_remove",
                     "app": app_name,
@@ -98,28 +101,79 @@ class AppsRemover:
             print(f"      ⚠️  {app_name}: {e}")
             return False
     
+    def remove_apps(self, app_names: List[str]) -> Dict[str, bool]:
+        """
+        Uygulamaları tek bir PowerShell script'i ile toplu kaldır.
+        Paket başına durum döner: {app_name: kaldırıldı_mı}. Yüklü olmayanlar sonuçta yer almaz.
+        Envanter (backup_apps) alındıysa paketler PackageFullName ile doğrudan kaldırılır;
+        uygulama başına Get-AppxPackage araması sadece envanter yokken yapılır.
+        """
+        if self._inventory is not None:
+            app_names = [app for app in app_names if app in self._inventory]
+        if not app_names:
+            return {}
+
+        if self._inventory is not None:
+            full_names = [self._inventory[app] for app in app_names]
+            cmd = (
+                f'$names = {ps_array(app_names)}; $full = {ps_array(full_names)}; '
+                '$res = for ($i = 0; $i -lt $names.Count; $i++) { '
+                '$ok = $true; $err = $null; '
+                'try { Remove-AppxPackage -Package $full[$i] -ErrorAction Stop } '
+                'catch { $ok = $false; $err = $_.Exception.Message }; '
+                '[pscustomobject]@{ Name = $names[$i]; Found = $true; Removed = $ok; Error = $err } }; '
+                'ConvertTo-Json -InputObject @($res) -Depth 3'
+            )
+        else:
+            cmd = (
+                f'$res = foreach ($n in {ps_array(app_names)}) {{ '
+                '$pkgs = @(Get-AppxPackage -Name $n -ErrorAction SilentlyContinue); '
+                '$ok = $true; $err = $null; '
+                'if ($pkgs.Count -gt 0) { '
+                'try { $pkgs | Remove-AppxPackage -ErrorAction Stop } '
+                'catch { $ok = $false; $err = $_.Exception.Message } }; '
+                '[pscustomobject]@{ Name = $n; Found = ($pkgs.Count -gt 0); Removed = $ok; Error = $err } }; '
+                'ConvertTo-Json -InputObject @($res) -Depth 3'
+            )
+        rows = get_powershell_host().run_json(cmd, timeout=max(60, 30 * len(app_names)))
+        if isinstance(rows, dict):
+            rows = [rows]
+        if not isinstance(rows, list):
+            # Toplu script çalışmadıysa paket paket dene
+            return {app: self.remove_app(app) for app in app_names}
+
+        statuses: Dict[str, bool] = {}
+        for row in rows:
+            if not isinstance(row, dict) or not row.get("Found"):
+                continue
+            name = row.get("Name")
+            removed = bool(row.get("Removed"))
+            statuses[name] = removed
+            if removed:
+                self.changes.append({
+                    "type": "app_remove",
+                    "app": name,
+                    "action": "removed"
+                })
+            elif row.get("Error"):
+                print(f"      ⚠️  {name}: {row.get('Error')}")
+        return statuses
+    
     def disable_app(self, app_name: str) -> bool:
         """Uygulamayı devre dışı bırak (kaldırmadan)"""
         try:
             # PowerShell komutu ile uygulamayı devre dışı bırak
             cmd = f'Get-AppxPackage -Name "{app_name}" | Set-AppxPackage -DisableDevelopmentMode -ErrorAction SilentlyContinue'
-            result = subprocess.run(
-                ["powershell", "-Command", cmd],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            get_powershell_host().run(cmd, timeout=30)
             
             # Alternatif: Kayıt defteri ile devre dışı bırak
             try:
-                key = winreg.CreateKey(
-                    winreg.HKEY_CURRENT_USER,
-                    f"SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Appx\\AppxAllUserStore\\Deprovisioned\\{app_name}"
-                )
-                winreg.SetValueEx(key, "Disabled", 0, winreg.REG_DWORD, 1)
-                winreg.CloseKey(key)
+                key_path, value_name, value_type, value_data = self._deprovision_value(app_name)
+                get_registry_backend().write_value("HKCU", key_path.split("\\", 1)[1],
+                                                   value_name, value_type, value_data)
             except:
                 pass
+            self.disabled_apps.append(app_name)
             
             self.changes.append({
                 "type": "app_disable",
@@ -131,26 +185,47 @@ class AppsRemover:
             print(f"      ⚠️  {app_name}: {e}")
             return False
     
+    @staticmethod
+    def _deprovision_value(app_name: str):
+        """(key_path, value_name, value_type, value_data): uygulamanın HKCU devre dışı işareti"""
+        return (f"HKCU\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Appx\\AppxAllUserStore\\Deprovisioned\\{app_name}",
+                "Disabled", REG_DWORD, 1)
+    
+    def hkcu_optimizations(self) -> List[tuple]:
+        """Bu çalışmada yazılan HKCU değerleri (çok kullanıcılı dağıtım için)"""
+        return [self._deprovision_value(app) for app in self.disabled_apps]
+    
     def backup_apps(self) -> Dict[str, str]:
         """Mevcut uygulamaları yedekle"""
         try:
             cmd = 'Get-AppxPackage | Select-Object Name, PackageFullName | ConvertTo-Json'
-            result = subprocess.run(
-                ["powershell", "-Command", cmd],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if result.returncode == 0:
-                apps = json.loads(result.stdout)
+            apps = get_powershell_host().run_json(cmd, timeout=30)
+            if apps is not None:
                 if isinstance(apps, dict):
                     apps = [apps]
-                return {app["Name"]: app["PackageFullName"] for app in apps if isinstance(app, dict)}
+                self._inventory = {app["Name"]: app["PackageFullName"] for app in apps if isinstance(app, dict)}
+                return dict(self._inventory)
         except:
             pass
+        self._inventory = None
         return {}
     
+    def _target_apps(self) -> List[str]:
+        """Kaldırma hedefleri (korunacaklar hariç, APPS_TO_REMOVE sırasıyla)"""
+        keep = set(self.APPS_TO_KEEP)
+        return [app for app in self.APPS_TO_REMOVE if app not in keep]
+    
+    def installed_targets(self) -> List[str]:
+        """
+        Envanterden yüklü hedefleri küme kesişimi ile bul.
+        Envanter alınamadıysa tüm hedefler döner (toplu script yüklü olmayanları zaten atlar).
+        """
+        targets = self._target_apps()
+        if self._inventory is None:
+            return targets
+        installed = set(targets) & set(self._inventory)
+        return [app for app in targets if app in installed]
+    
     def optimize(self, remove_mode: bool = True) -> List[str]:
         """
         Uygulamaları optimize et
@@ -162,35 +237,31 @@ class AppsRemover:
         
         print("   📋 Gereksiz uygulamalar kontrol ediliyor...")
         
-        # Yedekle
+        # Yedekle (tek envanter; yüklü kontrolü bunun üzerinden yapılır)
         self.apps_backup = self.backup_apps()
+        installed = self.installed_targets()
+        if not installed:
+            return changes
         
-        for app in self.APPS_TO_REMOVE:
-            if app in self.APPS_TO_KEEP:
-                continue  # Korunacak uygulamaları atla
-            
+        if remove_mode:
+            # Tek toplu script ile kaldır
             try:
-                # Uygulamanın yüklü olup olmadığını kontrol et
-                check_cmd = f'Get-AppxPackage -Name "{app}" -ErrorAction SilentlyContinue'
-                check_result = subprocess.run(
-                    ["powershell", "-Command", check_cmd],
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
-                
-                if check_result.returncode == 0 and app in check_result.stdout:
-                    # Uygulama yüklü, kaldır veya devre dışı bırak
-                    if remove_mode:
-                        if self.remove_app(app):
-                            changes.append(f"Uygulama kaldırıldı: {app}")
-                            print(f"      ✅ {app} kaldırıldı")
-                    else:
-                        if self.disable_app(app):
-                            changes.append(f"Uygulama devre dışı: {app}")
-                            print(f"      ✅ {app} devre dışı bırakıldı")
+                statuses = self.remove_apps(installed)
             except Exception as e:
-                print(f"      ⚠️  {app}: {str(e)}")
+                print(f"      ⚠️  Toplu kaldırma: {e}")
+                statuses = {}
+            for app in installed:
+                if statuses.get(app):
+                    changes.append(f"Uygulama kaldırıldı: {app}")
+                    print(f"      ✅ {app} kaldırıldı")
+        else:
+            for app in installed:
+                try:
+                    if self.disable_app(app):
+                        changes.append(f"Uygulama devre dışı: {app}")
+                        print(f"      ✅ {app} devre dışı bırakıldı")
+                except Exception as e:
+                    print(f"      ⚠️  {app}: {str(e)}")
         
         return changes
 
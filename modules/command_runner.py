@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sınırlı Eşzamanlı Komut Çalıştırıcı (asyncio)
+
+sc / schtasks / powercfg / taskkill gibi kısa ömürlü komutlar birbirinden bağımsız
+olduğunda sırayla beklemek yerine paralel çalıştırılır.
+
+- max_concurrency: aynı anda en fazla kaç proses çalışacağı
+- Komut başına timeout; süre aşılırsa tüm proses ağacı öldürülür
+- Geçerli süre bütçesi (modules.deadline) varsa timeout kalan süreyle sınırlanır,
+  bütçe bitmişse komut başlatılmaz; bütçe iptal edilirse çalışan proses ağacı öldürülür
+- Yapılandırılmış sonuç: CommandResult (exit code, süre, stdout/stderr)
+- Zincirler (chain): zincir içindeki komutlar sırayla, zincirler birbirine paralel
+  (örn. servis başına `sc stop` -> `sc config`)
+- executor enjekte edilebilir: Linux'ta gerçek proses başlatmadan zamanlama
+  davranışını ölçmek için SimulatedExecutor kullanılabilir.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import locale
+import os
+import signal
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from modules.deadline import current_budget
+
+
+@dataclass
+class CommandResult:
+    """Tek bir komutun sonucu"""
+    args: List[str]
+    returncode: Optional[int] = None
+    stdout: str = ""
+    stderr: str = ""
+    duration_ms: float = 0.0
+    timed_out: bool = False
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and self.error is None
+
+
+# executor(args, timeout) -> CommandResult
+Executor = Callable[[List[str], float], Awaitable[CommandResult]]
+
+
+def _decode(data: Optional[bytes]) -> str:
+    if not data:
+        return ""
+    return data.decode(locale.getpreferredencoding(False) or "utf-8", errors="replace")
+
+
+def _kill_tree(pid: int) -> None:
+    """Proses ağacını öldür (Windows: taskkill /T, POSIX: process group)"""
+    if os.name == "nt":
+        try:
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)],
+                           capture_output=True, timeout=10, check=False)
+        except Exception:
+            pass
+    else:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except Exception:
+            pass
+
+
+async def subprocess_executor(args: List[str], timeout: float) -> CommandResult:
+    """Varsayılan executor: gerçek prosesi başlatır"""
+    kwargs: Dict[str, object] = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True  # killpg ile tüm ağacı öldürebilmek için
+
+    start = time.perf_counter()
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            **kwargs,
+        )
+    except (OSError, ValueError) as e:
+        return CommandResult(args=list(args), error=str(e),
+                             duration_ms=(time.perf_counter() - start) * 1000)
+
+    # Bütçe iptal edilirse (adımın süresi doldu) proses ağacı beklemeden öldürülür
+    budget = current_budget()
+    token = budget.on_cancel(lambda: _kill_tree(proc.pid)) if budget is not None else 0
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        _kill_tree(proc.pid)
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=5)
+        except Exception:
+            stdout, stderr = b"", b""
+        return CommandResult(
+            args=list(args),
+            returncode=proc.returncode,
+            stdout=_decode(stdout),
+            stderr=_decode(stderr),
+            duration_ms=(time.perf_counter() - start) * 1000,
+            timed_out=True,
+        )
+    finally:
+        if budget is not None:
+            budget.discard(token)
+
+    return CommandResult(
+        args=list(args),
+        returncode=proc.returncode,
+        stdout=_decode(stdout),
+        stderr=_decode(stderr),
+        duration_ms=(time.perf_counter() - start) * 1000,
+        timed_out=budget is not None and budget.cancelled,
+    )
+
+
+class SimulatedExecutor:
+    """
+    Sahte executor: proses başlatmaz, komut başına belirlenen süre kadar bekler.
+    Linux'ta runner'ın paralellik/zamanlama davranışını ölçmek için.
+    """
+
+    def __init__(self, durations: Optional[Dict[str, float]] = None,
+                 default_duration: float = 0.05, returncodes: Optional[Dict[str, int]] = None):
+        # anahtar: komutun ilk elemanı (örn. "sc") veya tam komut " ".join(args)
+        self.durations = durations or {}
+        self.default_duration = default_duration
+        self.returncodes = returncodes or {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls: List[List[str]] = []
+
+    def _lookup(self, table: Dict, args: List[str], default):
+        full = " ".join(args)
+        if full in table:
+            return table[full]
+        if args and args[0] in table:
+            return table[args[0]]
+        return default
+
+    async def __call__(self, args: List[str], timeout: float) -> CommandResult:
+        self.calls.append(list(args))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        start = time.perf_counter()
+        try:
+            duration = self._lookup(self.durations, args, self.default_duration)
+            if duration > timeout:
+                await asyncio.sleep(timeout)
+                return CommandResult(args=list(args), timed_out=True,
+                                     duration_ms=(time.perf_counter() - start) * 1000)
+            await asyncio.sleep(duration)
+            return CommandResult(
+                args=list(args),
+                returncode=self._lookup(self.returncodes, args, 0),
+                duration_ms=(time.perf_counter() - start) * 1000,
+            )
+        finally:
+            self.in_flight -= 1
+
+
+class CommandRunner:
+    """
+    Komutları sınırlı eşzamanlılıkla çalıştırır.
+    Senkron API (run / run_many / run_chains) içeride asyncio.run kullanır.
+    """
+
+    def __init__(self, max_concurrency: int = 4, default_timeout: float = 30.0,
+                 executor: Optional[Executor] = None):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.default_timeout = default_timeout
+        self.executor: Executor = executor or subprocess_executor
+
+        # İstatistikler
+        self._stats_lock = threading.Lock()
+        self.commands_run = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.busy_ms = 0.0  # komut sürelerinin toplamı (paralellikten kazancı görmek için)
+
+    def _record(self, result: CommandResult) -> None:
+        with self._stats_lock:
+            self.commands_run += 1
+            self.busy_ms += result.duration_ms
+            if result.timed_out:
+                self.timeouts += 1
+            elif not result.ok:
+                self.failures += 1
+
+    async def _run_one(self, sem: asyncio.Semaphore, args: Sequence[str],
+                       timeout: Optional[float]) -> CommandResult:
+        args = [str(a) for a in args]
+        timeout = timeout if timeout is not None else self.default_timeout
+        budget = current_budget()
+        async with sem:
+            if budget is not None and budget.expired:
+                result = CommandResult(args=args, timed_out=True, error=f"süre bütçesi doldu ({budget.name})")
+            else:
+                try:
+                    result = await self.executor(args, budget.clamp(timeout) if budget is not None else timeout)
+                except Exception as e:
+                    result = CommandResult(args=args, error=str(e))
+        self._record(result)
+        return result
+
+    async def _run_chain(self, sem: asyncio.Semaphore, chain: Sequence[Sequence[str]],
+                         timeout: Optional[float]) -> List[CommandResult]:
+        # Semafor komut başına alınır; zincir beklerken slot tutmaz
+        return [await self._run_one(sem, args, timeout) for args in chain]
+
+    async def run_chains_async(self, chains: Sequence[Sequence[Sequence[str]]],
+                               timeout: Optional[float] = None) -> List[List[CommandResult]]:
+        sem = asyncio.Semaphore(self.max_concurrency)
+        return list(await asyncio.gather(*(self._run_chain(sem, chain, timeout) for chain in chains)))
+
+    def run_chains(self, chains: Sequence[Sequence[Sequence[str]]],
+                   timeout: Optional[float] = None) -> List[List[CommandResult]]:
+        """Zincirleri paralel, zincir içini sırayla çalıştır. Sonuçlar giriş sırasıyla döner."""
+        if not chains:
+            return []
+        return asyncio.run(self.run_chains_async(chains, timeout))
+
+    def run_many(self, commands: Sequence[Sequence[str]],
+                 timeout: Optional[float] = None) -> List[CommandResult]:
+        """Bağımsız komutları paralel çalıştır. Sonuçlar giriş sırasıyla döner."""
+        return [chain[0] for chain in self.run_chains([[cmd] for cmd in commands], timeout)]
+
+    def run(self, args: Sequence[str], timeout: Optional[float] = None) -> CommandResult:
+        """Tek komut çalıştır"""
+        return self.run_many([args], timeout)[0]
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            return {
+                "commands_run": self.commands_run,
+                "timeouts": self.timeouts,
+                "failures": self.failures,
+                "busy_ms": round(self.busy_ms, 1),
+            }
+
+
+# Global instance
+_runner: Optional[CommandRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_command_runner() -> CommandRunner:
+    """Paylaşılan runner'ı getir"""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = CommandRunner()
+        return _runner
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Çalışma Süresi Bütçeleri (deadline)
+
+Tek bir takılı proses (bcdedit, powercfg, Get-ScheduledTask...) bütün çalışmayı sonsuza
+kadar bekletebiliyordu. Bu modül çalışma -> aşama -> adım şeklinde iç içe süre
+bütçeleri tutar:
+- Alt bütçe üst bütçeden uzun olamaz (bitiş anı üstünkiyle sınırlanır)
+- Geçerli bütçe contextvar'da tutulur; CommandRunner / PowerShellHost / ServiceControl
+  her beklemede kendi timeout'unu kalan süreyle sınırlar (Budget.clamp), bütçe
+  bitmişse komutu hiç başlatmaz
+- Bütçe altında başlatılan prosesler kaydolur (on_cancel); bütçe iptal edilince
+  proses ağaçları öldürülür, alt bütçeler de iptal edilir
+- run_with_budget(): adımı ayrı thread'de çalıştırır, süre dolarsa bütçeyi iptal edip
+  (prosesler ölür, sonraki komutlar anında timed-out döner) sonraki adıma geçer
+- report(): bütçe başına kullanılan süre / oran (rapor ve JSON olaylar için)
+
+Kullanım:
+    run = Budget("run", 1800)
+    step = run.child("Servisler", 600)
+    outcome = run_with_budget(step, optimizer.optimize)
+    if outcome.timed_out: ...
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+# Süresi dolan adımın iptal sonrası toparlanması için beklenen süre (saniye)
+CANCEL_GRACE_S = 5.0
+_JOIN_SLICE_S = 0.25
+
+
+class DeadlineExceeded(Exception):
+    """Bütçe bitti / iptal edildi"""
+
+
+class Budget:
+    """
+    İç içe süre bütçesi. seconds=None -> kendi sınırı yok (üst bütçeyle sınırlı).
+    Thread-safe
+    """
+
+    def __init__(self, name: str, seconds: Optional[float] = None, parent: Optional["Budget"] = None):
+        self.name = name
+        self.seconds = seconds
+        self.parent = parent
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.children: List[Budget] = []
+        self.cancel_reason: Optional[str] = None
+
+        expires = self.started + seconds if seconds is not None else None
+        if parent is not None and parent.expires_at is not None:
+            expires = parent.expires_at if expires is None else min(expires, parent.expires_at)
+        self.expires_at = expires
+
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._next_token = 1
+
+    # --- Durum ---
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled or (self.parent is not None and self.parent.cancelled)
+
+    def remaining(self) -> Optional[float]:
+        """Kalan saniye (sınırsızsa None, bittiyse 0)"""
+        if self.cancelled:
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() == 0.0
+
+    def clamp(self, timeout: float) -> float:
+        """timeout'u kalan süreyle sınırla"""
+        remaining = self.remaining()
+        return timeout if remaining is None else min(timeout, remaining)
+
+    def check(self) -> None:
+        """Bütçe bittiyse DeadlineExceeded"""
+        if self.expired:
+            raise DeadlineExceeded(f"süre bütçesi doldu: {self.name}")
+
+    @property
+    def used_ms(self) -> float:
+        end = self.finished if self.finished is not None else time.monotonic()
+        return (end - self.started) * 1000
+
+    @property
+    def limit(self) -> Optional[float]:
+        """Başlangıçtan bitişe saniye (üst bütçe zaten bittiyse 0)"""
+        return None if self.expires_at is None else max(0.0, self.expires_at - self.started)
+
+    @property
+    def timed_out(self) -> bool:
+        return self.cancel_reason == "timeout" or (
+            self.expires_at is not None and (self.finished or time.monotonic()) >= self.expires_at
+        )
+
+    # --- Ağaç ---
+
+    def child(self, name: str, seconds: Optional[float] = None) -> "Budget":
+        """Alt bütçe (üst bütçenin kalan süresiyle sınırlı)"""
+        budget = Budget(name, seconds, parent=self)
+        with self._lock:
+            self.children.append(budget)
+            cancelled = self._cancelled
+        if cancelled:
+            budget.cancel(self.cancel_reason or "cancelled")
+        return budget
+
+    def finish(self) -> None:
+        """Bütçeyi kapat (used_ms sabitlenir)"""
+        if self.finished is None:
+            self.finished = time.monotonic()
+
+    # --- İptal ---
+
+    def on_cancel(self, callback: Callable[[], None]) -> int:
+        """İptalde çağrılacak fonksiyonu kaydet (örn. proses ağacını öldür); token döner"""
+        with self._lock:
+            if not self.cancelled:
+                token = self._next_token
+                self._next_token += 1
+                self._callbacks[token] = callback
+                return token
+        callback()  # zaten iptal edilmiş: hemen çalıştır
+        return 0
+
+    def discard(self, token: int) -> None:
+        with self._lock:
+            self._callbacks.pop(token, None)
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Bütçeyi ve alt bütçeleri iptal et; kayıtlı prosesleri öldür"""
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            self.cancel_reason = reason
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+            children = list(self.children)
+        self.finish()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+        for budget in children:
+            budget.cancel(reason)
+
+    # --- Rapor ---
+
+    def report(self) -> Dict[str, Any]:
+        """Kullanılan süre / bütçe (alt bütçelerle birlikte)"""
+        limit = self.limit
+        used_ms = self.used_ms
+        used_pct = None
+        if limit is not None:
+            used_pct = round(min(used_ms / (limit * 1000), 1.0) * 100, 1) if limit > 0 else 100.0
+        return {
+            "name": self.name,
+            "budget_s": round(limit, 1) if limit is not None else None,
+            "used_ms": round(used_ms, 1),
+            "used_pct": used_pct,
+            "timed_out": self.timed_out,
+            "children": [budget.report() for budget in self.children],
+        }
+
+    def summary(self) -> str:
+        """Tek satır: 'ad: 12.3 s / 600 s (%2)'"""
+        used_s = self.used_ms / 1000
+        if self.expires_at is None:
+            return f"{self.name}: {used_s:.1f} s (sınırsız)"
+        limit = self.limit
+        pct = min(used_s / limit, 1.0) * 100 if limit > 0 else 100.0
+        return f"{self.name}: {used_s:.1f} s / {limit:.0f} s (%{pct:.0f})" + (" ⏱️ SÜRE DOLDU" if self.timed_out else "")
+
+    def __repr__(self) -> str:
+        return f"Budget({self.name!r}, remaining={self.remaining()})"
+
+
+# Geçerli bütçe (asyncio görevlerine otomatik, thread'lere copy_context()/activate ile taşınır)
+_current: "contextvars.ContextVar[Optional[Budget]]" = contextvars.ContextVar("deadline_budget", default=None)
+
+
+def current_budget() -> Optional[Budget]:
+    return _current.get()
+
+
+@contextmanager
+def activate(budget: Optional[Budget]) -> Iterator[Optional[Budget]]:
+    """Blok boyunca geçerli bütçeyi değiştir"""
+    token = _current.set(budget)
+    try:
+        yield budget
+    finally:
+        _current.reset(token)
+
+
+@dataclass
+class BudgetOutcome:
+    """run_with_budget() sonucu"""
+    value: Any = None
+    error: Optional[BaseException] = None
+    timed_out: bool = False
+    finished: bool = True   # süre dolduktan sonra thread bekleme payında bitti mi
+    # Thread gerçekten bittiğinde set edilir (bırakılan thread için sonradan)
+    done: threading.Event = field(default_factory=threading.Event)
+
+    @property
+    def abandoned(self) -> bool:
+        """Thread hâlâ çalışıyor (süresi doldu, bekleme payında bitmedi)"""
+        return not self.done.is_set()
+
+
+def run_with_budget(budget: Budget, func: Callable[..., Any], *args: Any,
+                    grace_s: float = CANCEL_GRACE_S,
+                    on_exit: Optional[Callable[[], None]] = None, **kwargs: Any) -> BudgetOutcome:
+    """
+    func'ı bütçe geçerliyken ayrı thread'de çalıştır.
+
+    Süre dolarsa bütçe iptal edilir (kayıtlı proses ağaçları öldürülür); thread'in
+    toparlanması için grace_s kadar beklenir, hâlâ bitmediyse bırakılır (daemon) ve
+    çağıran sonraki adıma geçer. Bırakılan thread'in sonraki komutları bütçe bittiği
+    için başlatılmadan timed-out döner; ama saf Python kısmı (kayıt defteri yazımı vb.)
+    sürebilir. Bu yüzden:
+    - on_exit thread gerçekten bittiğinde tam bir kez çağrılır: zamanında bittiyse
+      dönmeden önce bu thread'de, bırakıldıysa daha sonra o thread'in içinde
+      (örn. kaynak kilitlerini ancak o zaman bırakmak için)
+    - outcome.done / outcome.abandoned ile bırakılan thread'in bitişi beklenebilir
+    """
+    outcome = BudgetOutcome(finished=False)
+    context = contextvars.copy_context()
+    exit_lock = threading.Lock()
+    state = {"returned": False}
+
+    def target() -> None:
+        try:
+            with activate(budget):
+                outcome.value = func(*args, **kwargs)
+        except BaseException as e:
+            outcome.error = e
+        finally:
+            outcome.finished = True
+            with exit_lock:
+                outcome.done.set()
+                late = state["returned"]
+            if late and on_exit is not None:
+                on_exit()
+
+    thread = threading.Thread(target=context.run, args=(target,), name=f"budget-{budget.name}", daemon=True)
+    thread.start()
+    try:
+        # Kısa dilimlerle bekle: Ctrl+C (KeyboardInterrupt) ana thread'e ulaşabilsin
+        while not outcome.done.is_set() and not budget.expired:
+            remaining = budget.remaining()
+            outcome.done.wait(_JOIN_SLICE_S if remaining is None else min(_JOIN_SLICE_S, remaining))
+        if not outcome.done.is_set():
+            budget.cancel("timeout")
+            outcome.done.wait(grace_s)
+            outcome.timed_out = True
+        else:
+            outcome.timed_out = budget.timed_out
+    except KeyboardInterrupt:
+        budget.cancel("interrupted")
+        raise
+    finally:
+        with exit_lock:
+            state["returned"] = True
+            ended = outcome.done.is_set()
+        if ended and on_exit is not None:
+            on_exit()
+    if isinstance(outcome.error, DeadlineExceeded):
+        outcome.timed_out = True
+    budget.finish()
+    return outcome
@@ -5,8 +5,9 @@ Windows Özellikleri Optimizasyonu
 Gereksiz Windows özelliklerini kapatır
 """
 
-import subprocess
-import json
+from typing import Dict, List, Optional
+
+from modules.powershell_host import get_powershell_host, ps_array
 
 class FeaturesOptimizer:
     """Windows özellikleri optimizasyonu"""
@@ -37,19 +38,56 @@ class FeaturesOptimizer:
         self.features_backup = {}
         # Kullanıcı tercihleri / mod ayarı (optimize.py tarafından set edilebilir)
         self.disable_wsl2: bool = False
+        # Tek Get-WindowsOptionalFeature envanteri (FeatureName -> State). None = henüz alınmadı / alınamadı
+        self._feature_states: Optional[Dict[str, str]] = None
+    
+    @staticmethod
+    def is_disabled_state(state: Optional[str]) -> bool:
+        """Disabled / DisabledWithPayloadRemoved durumları"""
+        return (state or "").strip().lower().startswith("disabled")
+    
+    @staticmethod
+    def is_enabled_state(state: Optional[str]) -> bool:
+        """Enabled / EnablePending durumları"""
+        return (state or "").strip().lower().startswith("enable")
+    
+    def query_feature_states(self, refresh: bool = False) -> Optional[Dict[str, str]]:
+        """
+        Tüm opsiyonel özellikleri tek seferde listele (FeatureName -> State).
+        Servicing stack başlangıç maliyeti her çağrıda ödendiği için sonuç cache'lenir.
+        """
+        if self._feature_states is not None and not refresh:
+            return self._feature_states
+        
+        cmd = (
+            'Get-WindowsOptionalFeature -Online | '
+            "Select-Object FeatureName, @{n='State';e={$_.State.ToString()}} | "
+            'ConvertTo-Json -Depth 2'
+        )
+        try:
+            rows = get_powershell_host().run_json(cmd, timeout=120)
+        except Exception:
+            rows = None
+        if isinstance(rows, dict):
+            rows = [rows]
+        if not isinstance(rows, list):
+            self._feature_states = None
+            return None
+        
+        self._feature_states = {
+            row["FeatureName"]: str(row.get("State") or "")
+            for row in rows
+            if isinstance(row, dict) and row.get("FeatureName")
+        }
+        return self._feature_states
     
     def disable_feature(self, feature_name):
         """Windows özelliğini devre dışı bırak"""
         try:
             cmd = f'Disable-WindowsOptionalFeature -Online -FeatureName "{feature_name}" -NoRestart'
-            result = subprocess.run(
-                ["powershell", "-Command", cmd],
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
+            result = get_powershell_host().run(cmd, timeout=60)
             
-            if result.returncode == 0 or "NoRestart" in result.stdout:
+            if result.ok or "NoRestart" in result.output:
                 self.changes.append({
                     "type": "feature_disable",
                     "feature": feature_name
@@ -60,26 +98,39 @@ class FeaturesOptimizer:
             print(f"      ⚠️  {feature_name}: {e}")
             return False
     
+    def disable_features(self, feature_names: List[str]) -> Dict[str, bool]:
+        """
+        Özellikleri tek bir servicing işlemi ile devre dışı bırak.
+        Toplu işlem başarısız olursa özellik özellik denenir. {feature: başarılı_mı} döner.
+        """
+        if not feature_names:
+            return {}
+        
+        cmd = f'Disable-WindowsOptionalFeature -Online -FeatureName {ps_array(feature_names)} -NoRestart | Out-Null'
+        try:
+            result = get_powershell_host().run(cmd, timeout=max(120, 60 * len(feature_names)))
+        except Exception:
+            result = None
+        
+        if result is None or not result.ok:
+            return {feature: self.disable_feature(feature) for feature in feature_names}
+        
+        for feature in feature_names:
+            self.changes.append({
+                "type": "feature_disable",
+                "feature": feature
+            })
+        return {feature: True for feature in feature_names}
+    
     def backup_features(self):
         """Mevcut özellik durumlarını yedekle (sadece dokunabileceğimiz özellikler)"""
-        states = {}
-        feature_names = sorted(set(self.FEATURES_TO_DISABLE + self.WSL_FEATURES + self.FEATURES_TO_KEEP))
-        for feature in feature_names:
-            try:
-                cmd = f'(Get-WindowsOptionalFeature -Online -FeatureName "{feature}" -ErrorAction SilentlyContinue).State'
-                result = subprocess.run(
-                    ["powershell", "-NoProfile", "-ExecutionPolicy", "Bypass", "-Command", cmd],
-                    capture_output=True,
-                    text=True,
-                    timeout=20
-                )
-                if result.returncode == 0:
-                    state = (result.stdout or "").strip()
-                    if state:
-                        states[feature] = state
-            except:
-                pass
-        return states
+        feature_names = set(self.FEATURES_TO_DISABLE + self.WSL_FEATURES + self.FEATURES_TO_KEEP)
+        all_states = self.query_feature_states() or {}
+        return {
+            feature: all_states[feature]
+            for feature in sorted(feature_names)
+            if all_states.get(feature)
+        }
     
     def optimize(self):
         """Windows özelliklerini optimize et"""
@@ -90,17 +141,29 @@ class FeaturesOptimizer:
         features = list(self.FEATURES_TO_DISABLE)
         if getattr(self, "disable_wsl2", False):
             features.extend(self.WSL_FEATURES)
+        features = [f for f in features if f not in self.FEATURES_TO_KEEP]  # Korunacak özellikleri atla
+
+        # Zaten kapalı olanları ve sistemde olmayanları atla (envanter alınamadıysa hepsini dene)
+        states = self.query_feature_states()
+        if states is not None:
+            features = [
+                f for f in features
+                if f in states and not self.is_disabled_state(states[f])
+            ]
+        if not features:
+            return changes
+
+        try:
+            statuses = self.disable_features(features)
+        except Exception as e:
+            print(f"      ⚠️  Toplu devre dışı bırakma: {e}")
+            statuses = {}
 
         for feature in features:
-            if feature in self.FEATURES_TO_KEEP:
-                continue  # Korunacak özellikleri atla
-            
-            try:
-                if self.disable_feature(feature):
-                    changes.append(f"Özellik devre dışı: {feature}")
-                    print(f"      ✅ {feature} devre dışı bırakıldı")
-            except Exception as e:
-                print(f"      ⚠️  {feature}: {str(e)}")
+            if statuses.get(feature):
+                changes.append(f"Özellik devre dışı: {feature}")
+                print(f"      ✅ {feature} devre dışı bırakıldı")
         
+        # Durumlar değişti; sonraki sorgu yeniden listelesin
+        self._feature_states = None
         return changes
-
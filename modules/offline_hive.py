@@ -0,0 +1,917 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Çevrimdışı Kayıt Defteri Hive Okuyucu/Yazıcı (REGF, saf Python)
+
+Windows imajlarını ve kullanıcı profillerini açmadan (boot etmeden) servis etmek için:
+SOFTWARE / SYSTEM / NTUSER.DAT dosyaları doğrudan açılır, anahtar aranır/oluşturulur,
+DWORD / SZ (ve diğer küçük) değerler yazılır. winreg gerektirmez, Linux'ta çalışır.
+
+Yazma sırasında hive geçerli tutulur:
+- Hücre tahsisi: boş hücrelerde first-fit (gerekirse bölünür), yer yoksa yeni hbin eklenir
+- Alt anahtar listeleri: büyük harf ada göre sıralı 'lh' (hash'li) liste, çok büyükse 'ri'
+- Yeni anahtar ebeveynin güvenlik tanımlayıcısını (sk) paylaşır, referans sayısı artırılır
+- Kaydederken sıra numaraları eşitlenir, base block checksum'ı yeniden hesaplanır
+
+Kirli hive (primary != secondary sıra numarası, bekleyen .LOG kayıtları) açılmaz.
+
+İmaj servis etme (RegistryOptimizer planı, tek geçiş):
+    python -m modules.offline_hive --image /mnt/img1 --image /mnt/img2 [--scheduler]
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from modules.tweak_catalog import same_value, tweak_ident
+
+
+# Değer tipleri (winreg.REG_* ile aynı sayılar)
+REG_NONE = 0
+REG_SZ = 1
+REG_EXPAND_SZ = 2
+REG_BINARY = 3
+REG_DWORD = 4
+REG_DWORD_BIG_ENDIAN = 5
+REG_MULTI_SZ = 7
+REG_QWORD = 11
+
+BASE_BLOCK_SIZE = 4096
+HBIN_HEADER_SIZE = 32
+HBIN_ALIGN = 4096
+NIL = 0xFFFFFFFF
+
+KEY_HIVE_ENTRY = 0x0004
+KEY_NO_DELETE = 0x0008
+KEY_COMP_NAME = 0x0020
+VALUE_COMP_NAME = 0x0001
+DATA_INLINE = 0x80000000
+MAX_CELL_DATA = 16344  # bundan büyük değerler 'db' (big data) hücresinde tutulur
+MAX_LH_ENTRIES = 1012  # tek listede en fazla bu kadar alt anahtar, fazlası 'ri' ile bölünür
+
+# nk alan ofsetleri (hücre verisinin başından)
+_NK_FLAGS, _NK_TIMESTAMP, _NK_PARENT = 2, 4, 16
+_NK_SUBKEY_COUNT, _NK_SUBKEY_LIST = 20, 28
+_NK_VALUE_COUNT, _NK_VALUE_LIST, _NK_SECURITY = 36, 40, 44
+_NK_MAX_SUBKEY_NAME, _NK_MAX_VALUE_NAME, _NK_MAX_VALUE_DATA = 52, 60, 64
+_NK_NAME_LEN, _NK_NAME = 72, 76
+# vk alan ofsetleri
+_VK_NAME_LEN, _VK_DATA_SIZE, _VK_DATA_OFFSET, _VK_TYPE, _VK_FLAGS, _VK_NAME = 2, 4, 8, 12, 16, 20
+
+
+class OfflineHiveError(ValueError):
+    """Geçersiz / desteklenmeyen hive"""
+
+
+def _filetime_now() -> int:
+    return int((time.time() + 11644473600) * 10_000_000)
+
+
+def _align(value: int, to: int) -> int:
+    return (value + to - 1) // to * to
+
+
+def lh_hash(name: str) -> int:
+    """'lh' listesi ad hash'i"""
+    h = 0
+    for ch in name.upper():
+        h = (h * 37 + ord(ch)) & 0xFFFFFFFF
+    return h
+
+
+def base_block_checksum(block: bytes) -> int:
+    """İlk 508 baytın 32-bit XOR'u (0 -> 1, 0xFFFFFFFF -> 0xFFFFFFFE)"""
+    checksum = 0
+    for (dword,) in struct.iter_unpack("<I", bytes(block[:508])):
+        checksum ^= dword
+    if checksum == 0xFFFFFFFF:
+        return 0xFFFFFFFE
+    return checksum or 1
+
+
+def _encode_name(name: str) -> Tuple[bytes, bool]:
+    """(bayt, sıkıştırılmış_mı) - Latin-1'e sığan adlar tek bayt saklanır"""
+    try:
+        return name.encode("latin-1"), True
+    except UnicodeEncodeError:
+        return name.encode("utf-16-le"), False
+
+
+def encode_value(vtype: int, data: Any) -> bytes:
+    """Python değerini kayıt defteri ham verisine çevir"""
+    if vtype in (REG_SZ, REG_EXPAND_SZ):
+        return (str(data) + "\x00").encode("utf-16-le")
+    if vtype == REG_DWORD:
+        return struct.pack("<I", int(data) & 0xFFFFFFFF)
+    if vtype == REG_DWORD_BIG_ENDIAN:
+        return struct.pack(">I", int(data) & 0xFFFFFFFF)
+    if vtype == REG_QWORD:
+        return struct.pack("<Q", int(data) & 0xFFFFFFFFFFFFFFFF)
+    if vtype == REG_MULTI_SZ:
+        return ("".join(str(s) + "\x00" for s in data) + "\x00").encode("utf-16-le")
+    return bytes(data or b"")
+
+
+def decode_value(vtype: int, raw: bytes) -> Any:
+    """Ham veriyi winreg.QueryValueEx ile aynı Python tipine çevir"""
+    if vtype in (REG_SZ, REG_EXPAND_SZ):
+        return raw[: len(raw) // 2 * 2].decode("utf-16-le", errors="replace").split("\x00", 1)[0]
+    if vtype == REG_DWORD and len(raw) >= 4:
+        return struct.unpack_from("<I", raw)[0]
+    if vtype == REG_DWORD_BIG_ENDIAN and len(raw) >= 4:
+        return struct.unpack_from(">I", raw)[0]
+    if vtype == REG_QWORD and len(raw) >= 8:
+        return struct.unpack_from("<Q", raw)[0]
+    if vtype == REG_MULTI_SZ:
+        text = raw[: len(raw) // 2 * 2].decode("utf-16-le", errors="replace")
+        return [s for s in text.split("\x00") if s]
+    return bytes(raw)
+
+
+# Varsayılan güvenlik tanımlayıcısı (yeni hive): Owner=Administrators, Group=SYSTEM,
+# DACL: Administrators + SYSTEM tam yetki (container inherit)
+_SID_ADMINS = bytes([1, 2, 0, 0, 0, 0, 0, 5]) + struct.pack("<II", 32, 544)
+_SID_SYSTEM = bytes([1, 1, 0, 0, 0, 0, 0, 5]) + struct.pack("<I", 18)
+
+
+def _default_security_descriptor() -> bytes:
+    def ace(sid: bytes) -> bytes:
+        return struct.pack("<BBHI", 0, 0x02, 8 + len(sid), 0xF003F) + sid  # KEY_ALL_ACCESS
+
+    aces = ace(_SID_ADMINS) + ace(_SID_SYSTEM)
+    dacl = struct.pack("<BBHHH", 2, 0, 8 + len(aces), 2, 0) + aces
+    owner_off = 20
+    group_off = owner_off + len(_SID_ADMINS)
+    dacl_off = group_off + len(_SID_SYSTEM)
+    header = struct.pack("<BBHIIII", 1, 0, 0x8004, owner_off, group_off, 0, dacl_off)
+    return header + _SID_ADMINS + _SID_SYSTEM + dacl
+
+
+def scan_bins(buf: bytes) -> List[List[int]]:
+    """hbin'leri ve hücre dizilimini doğrula; boş hücreleri [offset, size] olarak döner"""
+    free: List[List[int]] = []
+    pos = BASE_BLOCK_SIZE
+    end = len(buf)
+    while pos < end:
+        if buf[pos:pos + 4] != b"hbin":
+            raise OfflineHiveError(f"hbin imzası yok: 0x{pos:x}")
+        bin_size = struct.unpack_from("<I", buf, pos + 8)[0]
+        if bin_size < HBIN_ALIGN or bin_size % HBIN_ALIGN or pos + bin_size > end:
+            raise OfflineHiveError(f"Geçersiz hbin boyutu: 0x{pos:x}")
+        cell = pos + HBIN_HEADER_SIZE
+        while cell < pos + bin_size:
+            size = struct.unpack_from("<i", buf, cell)[0]
+            if size == 0 or abs(size) % 8 or cell + abs(size) > pos + bin_size:
+                raise OfflineHiveError(f"Geçersiz hücre: 0x{cell:x}")
+            if size > 0:
+                free.append([cell - BASE_BLOCK_SIZE, size])
+            cell += abs(size)
+        pos += bin_size
+    return free
+
+
+@dataclass
+class HiveValue:
+    """Tek değer (vk)"""
+    name: str
+    vtype: int
+    data: Any
+    offset: int
+
+
+class HiveKey:
+    """Tek anahtar (nk) görünümü; veri her erişimde hive'dan okunur"""
+
+    def __init__(self, hive: "OfflineHive", offset: int):
+        self.hive = hive
+        self.offset = offset
+
+    def _u32(self, field_offset: int) -> int:
+        return self.hive._u32(self.hive._data_pos(self.offset) + field_offset)
+
+    @property
+    def name(self) -> str:
+        return self.hive._nk_name(self.offset)
+
+    @property
+    def subkey_count(self) -> int:
+        return self._u32(_NK_SUBKEY_COUNT)
+
+    @property
+    def value_count(self) -> int:
+        return self._u32(_NK_VALUE_COUNT)
+
+    def subkeys(self) -> List["HiveKey"]:
+        return [HiveKey(self.hive, off) for off in self.hive._subkey_offsets(self.offset)]
+
+    def subkey(self, name: str) -> Optional["HiveKey"]:
+        off = self.hive._find_subkey(self.offset, name)
+        return HiveKey(self.hive, off) if off is not None else None
+
+    def values(self) -> List[HiveValue]:
+        return [self.hive._read_vk(off) for off in self.hive._value_offsets(self.offset)]
+
+    def value(self, name: str) -> Optional[HiveValue]:
+        off = self.hive._find_value(self.offset, name)
+        return self.hive._read_vk(off) if off is not None else None
+
+    def __repr__(self) -> str:
+        return f"HiveKey({self.name!r}, subkeys={self.subkey_count}, values={self.value_count})"
+
+
+class OfflineHive:
+    """REGF hive dosyası (bellekte; save() ile diske)"""
+
+    def __init__(self, data: bytes, path: Optional[str] = None):
+        self.path = path
+        self.modified = False
+        if len(data) < BASE_BLOCK_SIZE or data[:4] != b"regf":
+            raise OfflineHiveError(f"REGF imzası yok: {path or '<bytes>'}")
+
+        primary, secondary = struct.unpack_from("<II", data, 4)
+        if primary != secondary:
+            raise OfflineHiveError(
+                f"Hive kirli (bekleyen transaction log kayıtları): {path or '<bytes>'}"
+            )
+        major = struct.unpack_from("<I", data, 20)[0]
+        if major != 1:
+            raise OfflineHiveError(f"Desteklenmeyen hive sürümü: {major}")
+
+        bins_size = struct.unpack_from("<I", data, 40)[0]
+        if BASE_BLOCK_SIZE + bins_size > len(data):
+            raise OfflineHiveError(f"Hive dosyası kesik: {path or '<bytes>'}")
+        # hbin alanından sonrası (varsa dolgu) yok sayılır; yeni hbin'ler buraya eklenir
+        self._buf = bytearray(data[: BASE_BLOCK_SIZE + bins_size])
+        self.root_offset = struct.unpack_from("<I", data, 36)[0]
+        self.minor_version = struct.unpack_from("<I", data, 24)[0]
+
+        self._free: List[List[int]] = scan_bins(self._buf)  # [offset, size] boş hücreler
+
+    # --- Oluşturma / kaydetme ---
+
+    @classmethod
+    def open(cls, path: str) -> "OfflineHive":
+        with open(path, "rb") as f:
+            return cls(f.read(), path)
+
+    @classmethod
+    def new(cls, root_name: str = "ROOT", path: Optional[str] = None) -> "OfflineHive":
+        """Boş hive: kök anahtar + varsayılan güvenlik tanımlayıcısı"""
+        base = bytearray(BASE_BLOCK_SIZE)
+        base[0:4] = b"regf"
+        struct.pack_into("<IIQIIII", base, 4, 1, 1, _filetime_now(), 1, 5, 0, 1)
+        struct.pack_into("<III", base, 36, NIL, 0, 1)
+        name = os.path.basename(path or root_name)[:31].encode("utf-16-le")
+        base[48:48 + len(name)] = name
+        struct.pack_into("<I", base, 508, base_block_checksum(base))
+        hive = cls(bytes(base), path)
+
+        descriptor = _default_security_descriptor()
+        sk = hive._alloc(20 + len(descriptor))
+        root = hive._alloc(_NK_NAME + len(root_name.encode("latin-1")))
+        sk_pos = hive._data_pos(sk)
+        hive._buf[sk_pos:sk_pos + 2] = b"sk"
+        struct.pack_into("<IIII", hive._buf, sk_pos + 4, sk, sk, 1, len(descriptor))
+        hive._buf[sk_pos + 20:sk_pos + 20 + len(descriptor)] = descriptor
+
+        hive._write_nk(root, root_name, parent=NIL, security=sk, flags=KEY_HIVE_ENTRY | KEY_NO_DELETE)
+        hive.root_offset = root
+        struct.pack_into("<I", hive._buf, 36, root)
+        hive.modified = True
+        return hive
+
+    def to_bytes(self) -> bytes:
+        """Sıra numaralarını artır, checksum'ı yeniden hesapla"""
+        sequence = (self._u32(4) + 1) & 0xFFFFFFFF
+        struct.pack_into("<IIQ", self._buf, 4, sequence, sequence, _filetime_now())
+        struct.pack_into("<I", self._buf, 36, self.root_offset)
+        struct.pack_into("<I", self._buf, 40, len(self._buf) - BASE_BLOCK_SIZE)
+        struct.pack_into("<I", self._buf, 508, base_block_checksum(self._buf))
+        return bytes(self._buf)
+
+    def save(self, path: Optional[str] = None) -> str:
+        """Atomik yaz (geçici dosya + rename)"""
+        target = path or self.path
+        if not target:
+            raise OfflineHiveError("Kaydetmek için dosya yolu gerekli")
+        tmp = f"{target}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(tmp, target)
+        self.path = target
+        self.modified = False
+        return target
+
+    # --- Düşük seviye erişim ---
+
+    def _u16(self, pos: int) -> int:
+        return struct.unpack_from("<H", self._buf, pos)[0]
+
+    def _u32(self, pos: int) -> int:
+        return struct.unpack_from("<I", self._buf, pos)[0]
+
+    def _cell_pos(self, offset: int) -> int:
+        return BASE_BLOCK_SIZE + offset
+
+    def _data_pos(self, offset: int) -> int:
+        return BASE_BLOCK_SIZE + offset + 4
+
+    def _cell_size(self, offset: int) -> int:
+        return abs(struct.unpack_from("<i", self._buf, self._cell_pos(offset))[0])
+
+    def _cell_data(self, offset: int) -> bytes:
+        pos = self._data_pos(offset)
+        return bytes(self._buf[pos:pos + self._cell_size(offset) - 4])
+
+    def _alloc(self, length: int) -> int:
+        """length baytlık hücre ayır (first-fit, gerekirse bölerek); veri sıfırlanır"""
+        need = _align(length + 4, 8)
+        for idx, (offset, size) in enumerate(self._free):
+            if size < need:
+                continue
+            if size - need >= 8:
+                self._free[idx] = [offset + need, size - need]
+                struct.pack_into("<i", self._buf, self._cell_pos(offset + need), size - need)
+            else:
+                need = size
+                del self._free[idx]
+            break
+        else:
+            offset = self._append_bin(need)
+
+        pos = self._cell_pos(offset)
+        struct.pack_into("<i", self._buf, pos, -need)
+        self._buf[pos + 4:pos + need] = bytes(need - 4)
+        self.modified = True
+        return offset
+
+    def _append_bin(self, need: int) -> int:
+        bin_size = _align(need + HBIN_HEADER_SIZE, HBIN_ALIGN)
+        bin_offset = len(self._buf) - BASE_BLOCK_SIZE
+        header = bytearray(HBIN_HEADER_SIZE)
+        header[0:4] = b"hbin"
+        struct.pack_into("<IIQQ", header, 4, bin_offset, bin_size, 0, _filetime_now())
+        self._buf += header + bytes(bin_size - HBIN_HEADER_SIZE)
+        struct.pack_into("<I", self._buf, 40, len(self._buf) - BASE_BLOCK_SIZE)
+
+        cell = bin_offset + HBIN_HEADER_SIZE
+        rest = bin_size - HBIN_HEADER_SIZE - need
+        if rest:
+            struct.pack_into("<i", self._buf, self._cell_pos(cell + need), rest)
+            self._free.append([cell + need, rest])
+        return cell
+
+    def _free_cell(self, offset: int) -> None:
+        if offset in (0, NIL):
+            return
+        size = self._cell_size(offset)
+        struct.pack_into("<i", self._buf, self._cell_pos(offset), size)
+        self._free.append([offset, size])
+        self.modified = True
+
+    def _write_cell(self, data: bytes) -> int:
+        offset = self._alloc(len(data))
+        pos = self._data_pos(offset)
+        self._buf[pos:pos + len(data)] = data
+        return offset
+
+    # --- nk / listeler ---
+
+    def _nk_name(self, offset: int) -> str:
+        pos = self._data_pos(offset)
+        if self._buf[pos:pos + 2] != b"nk":
+            raise OfflineHiveError(f"nk imzası yok: 0x{offset:x}")
+        length = self._u16(pos + _NK_NAME_LEN)
+        raw = bytes(self._buf[pos + _NK_NAME:pos + _NK_NAME + length])
+        if self._u16(pos + _NK_FLAGS) & KEY_COMP_NAME:
+            return raw.decode("latin-1")
+        return raw.decode("utf-16-le", errors="replace")
+
+    def _write_nk(self, offset: int, name: str, parent: int, security: int, flags: int = 0) -> None:
+        raw, compressed = _encode_name(name)
+        pos = self._data_pos(offset)
+        self._buf[pos:pos + 2] = b"nk"
+        struct.pack_into("<HQ", self._buf, pos + _NK_FLAGS, flags | (KEY_COMP_NAME if compressed else 0),
+                         _filetime_now())
+        struct.pack_into("<I", self._buf, pos + _NK_PARENT, parent)
+        struct.pack_into("<IIII", self._buf, pos + _NK_SUBKEY_COUNT, 0, 0, NIL, NIL)
+        struct.pack_into("<IIII", self._buf, pos + _NK_VALUE_COUNT, 0, NIL, security, NIL)
+        struct.pack_into("<HH", self._buf, pos + _NK_NAME_LEN, len(raw), 0)
+        self._buf[pos + _NK_NAME:pos + _NK_NAME + len(raw)] = raw
+
+    def _list_offsets(self, list_offset: int) -> List[int]:
+        if list_offset in (0, NIL):
+            return []
+        pos = self._data_pos(list_offset)
+        sig = bytes(self._buf[pos:pos + 2])
+        count = self._u16(pos + 2)
+        if sig in (b"lf", b"lh"):
+            return [self._u32(pos + 4 + 8 * i) for i in range(count)]
+        if sig == b"li":
+            return [self._u32(pos + 4 + 4 * i) for i in range(count)]
+        if sig == b"ri":
+            offsets: List[int] = []
+            for i in range(count):
+                offsets.extend(self._list_offsets(self._u32(pos + 4 + 4 * i)))
+            return offsets
+        raise OfflineHiveError(f"Bilinmeyen alt anahtar listesi: {sig!r}")
+
+    def _subkey_offsets(self, key_offset: int) -> List[int]:
+        pos = self._data_pos(key_offset)
+        if self._u32(pos + _NK_SUBKEY_COUNT) == 0:
+            return []
+        return self._list_offsets(self._u32(pos + _NK_SUBKEY_LIST))
+
+    def _find_subkey(self, key_offset: int, name: str) -> Optional[int]:
+        wanted = name.lower()
+        for off in self._subkey_offsets(key_offset):
+            if self._nk_name(off).lower() == wanted:
+                return off
+        return None
+
+    def _free_subkey_list(self, list_offset: int) -> None:
+        if list_offset in (0, NIL):
+            return
+        pos = self._data_pos(list_offset)
+        if self._buf[pos:pos + 2] == b"ri":
+            for i in range(self._u16(pos + 2)):
+                self._free_cell(self._u32(pos + 4 + 4 * i))
+        self._free_cell(list_offset)
+
+    def _write_list(self, data: bytes, old: int = NIL) -> int:
+        """
+        Liste hücresi yaz: eski hücre yetiyorsa yerinde güncelle, yoksa %50 pay bırakarak
+        yeni hücre ayır (sonraki eklemeler yerinde yapılır). Eski hücreyi bırakmak çağırana ait.
+        """
+        if old not in (0, NIL) and self._cell_size(old) - 4 >= len(data):
+            offset = old
+            self.modified = True
+        else:
+            offset = self._alloc(len(data) + len(data) // 2)
+        pos = self._data_pos(offset)
+        self._buf[pos:pos + len(data)] = data
+        return offset
+
+    def _lh_bytes(self, offsets: Sequence[int]) -> bytes:
+        data = bytearray(b"lh" + struct.pack("<H", len(offsets)))
+        for off in offsets:
+            data += struct.pack("<II", off, lh_hash(self._nk_name(off)))
+        return bytes(data)
+
+    def _write_subkey_list(self, offsets: Sequence[int], old: int = NIL) -> int:
+        """Sıralı alt anahtar listesi; MAX_LH_ENTRIES üstünde 'ri' altında lh parçaları"""
+        if len(offsets) <= MAX_LH_ENTRIES:
+            is_leaf = old not in (0, NIL) and self._buf[self._data_pos(old):self._data_pos(old) + 2] != b"ri"
+            offset = self._write_list(self._lh_bytes(offsets), old if is_leaf else NIL)
+        else:
+            chunk = MAX_LH_ENTRIES // 2
+            leaves = [self._write_list(self._lh_bytes(offsets[i:i + chunk]))
+                      for i in range(0, len(offsets), chunk)]
+            offset = self._write_list(b"ri" + struct.pack("<H", len(leaves))
+                                      + b"".join(struct.pack("<I", o) for o in leaves))
+        if offset != old:
+            self._free_subkey_list(old)
+        return offset
+
+    def _insert_into_ri(self, ri: int, child: int) -> int:
+        """'ri' altında sadece ilgili lh parçasını güncelle (dolarsa ikiye böl)"""
+        key = self._nk_name(child).upper()
+        pos = self._data_pos(ri)
+        leaves = [self._u32(pos + 4 + 4 * i) for i in range(self._u16(pos + 2))]
+        index = len(leaves) - 1
+        for i, leaf in enumerate(leaves):
+            members = self._list_offsets(leaf)
+            if members and self._nk_name(members[-1]).upper() >= key:
+                index = i
+                break
+
+        leaf = leaves[index]
+        members = self._list_offsets(leaf) + [child]
+        members.sort(key=lambda off: self._nk_name(off).upper())
+        if len(members) <= MAX_LH_ENTRIES:
+            new_leaf = self._write_list(self._lh_bytes(members), leaf)
+            if new_leaf == leaf:
+                return ri
+            self._free_cell(leaf)
+            leaves[index] = new_leaf
+        else:
+            half = len(members) // 2
+            leaves[index:index + 1] = [self._write_list(self._lh_bytes(members[:half])),
+                                       self._write_list(self._lh_bytes(members[half:]))]
+            self._free_cell(leaf)
+        ri_bytes = b"ri" + struct.pack("<H", len(leaves)) + b"".join(struct.pack("<I", o) for o in leaves)
+        new_ri = self._write_list(ri_bytes, ri)
+        if new_ri != ri:
+            self._free_cell(ri)
+        return new_ri
+
+    def _add_subkey(self, parent: int, name: str) -> int:
+        if not name or "\\" in name or len(name) > 255:
+            raise OfflineHiveError(f"Geçersiz anahtar adı: {name!r}")
+        parent_pos = self._data_pos(parent)
+        security = self._u32(parent_pos + _NK_SECURITY)
+
+        offset = self._alloc(_NK_NAME + len(_encode_name(name)[0]))
+        self._write_nk(offset, name, parent=parent, security=security)
+        if security not in (0, NIL):
+            sk_pos = self._data_pos(security)
+            struct.pack_into("<I", self._buf, sk_pos + 12, self._u32(sk_pos + 12) + 1)
+
+        # Ebeveyn listesi: büyük harf ada göre sıralı (yer varsa yerinde güncellenir)
+        parent_pos = self._data_pos(parent)
+        old_list = self._u32(parent_pos + _NK_SUBKEY_LIST) if self._u32(parent_pos + _NK_SUBKEY_COUNT) else NIL
+        count = self._u32(parent_pos + _NK_SUBKEY_COUNT) + 1
+        if old_list != NIL and self._buf[self._data_pos(old_list):self._data_pos(old_list) + 2] == b"ri":
+            new_list = self._insert_into_ri(old_list, offset)
+        else:
+            offsets = self._subkey_offsets(parent) + [offset]
+            offsets.sort(key=lambda off: self._nk_name(off).upper())
+            new_list = self._write_subkey_list(offsets, old_list)
+
+        struct.pack_into("<I", self._buf, parent_pos + _NK_SUBKEY_COUNT, count)
+        struct.pack_into("<I", self._buf, parent_pos + _NK_SUBKEY_LIST, new_list)
+        struct.pack_into("<Q", self._buf, parent_pos + _NK_TIMESTAMP, _filetime_now())
+        max_name = self._u32(parent_pos + _NK_MAX_SUBKEY_NAME)
+        struct.pack_into("<I", self._buf, parent_pos + _NK_MAX_SUBKEY_NAME, max(max_name, len(name) * 2))
+        return offset
+
+    # --- vk ---
+
+    def _value_offsets(self, key_offset: int) -> List[int]:
+        pos = self._data_pos(key_offset)
+        count = self._u32(pos + _NK_VALUE_COUNT)
+        list_offset = self._u32(pos + _NK_VALUE_LIST)
+        if count == 0 or list_offset in (0, NIL):
+            return []
+        list_pos = self._data_pos(list_offset)
+        return [self._u32(list_pos + 4 * i) for i in range(count)]
+
+    def _vk_name(self, offset: int) -> str:
+        pos = self._data_pos(offset)
+        if self._buf[pos:pos + 2] != b"vk":
+            raise OfflineHiveError(f"vk imzası yok: 0x{offset:x}")
+        length = self._u16(pos + _VK_NAME_LEN)
+        raw = bytes(self._buf[pos + _VK_NAME:pos + _VK_NAME + length])
+        if self._u16(pos + _VK_FLAGS) & VALUE_COMP_NAME:
+            return raw.decode("latin-1")
+        return raw.decode("utf-16-le", errors="replace")
+
+    def _find_value(self, key_offset: int, name: str) -> Optional[int]:
+        wanted = name.lower()
+        for off in self._value_offsets(key_offset):
+            if self._vk_name(off).lower() == wanted:
+                return off
+        return None
+
+    def _read_raw(self, vk_offset: int) -> bytes:
+        pos = self._data_pos(vk_offset)
+        size = self._u32(pos + _VK_DATA_SIZE)
+        if size & DATA_INLINE:
+            return bytes(self._buf[pos + _VK_DATA_OFFSET:pos + _VK_DATA_OFFSET + min(size & 0x7FFFFFFF, 4)])
+        data_offset = self._u32(pos + _VK_DATA_OFFSET)
+        if size == 0 or data_offset in (0, NIL):
+            return b""
+        cell = self._cell_data(data_offset)
+        if size > MAX_CELL_DATA and self.minor_version >= 4 and cell[:2] == b"db":
+            count, list_offset = struct.unpack_from("<HI", cell, 2)
+            list_pos = self._data_pos(list_offset)
+            chunks = [self._cell_data(self._u32(list_pos + 4 * i))[:MAX_CELL_DATA] for i in range(count)]
+            return b"".join(chunks)[:size]
+        return cell[:size]
+
+    def _read_vk(self, offset: int) -> HiveValue:
+        vtype = self._u32(self._data_pos(offset) + _VK_TYPE)
+        return HiveValue(self._vk_name(offset), vtype, decode_value(vtype, self._read_raw(offset)), offset)
+
+    def _free_value_data(self, vk_offset: int) -> None:
+        pos = self._data_pos(vk_offset)
+        size = self._u32(pos + _VK_DATA_SIZE)
+        data_offset = self._u32(pos + _VK_DATA_OFFSET)
+        if size & DATA_INLINE or size == 0 or data_offset in (0, NIL):
+            return
+        cell = self._cell_data(data_offset)
+        if size > MAX_CELL_DATA and cell[:2] == b"db":
+            count, list_offset = struct.unpack_from("<HI", cell, 2)
+            list_pos = self._data_pos(list_offset)
+            for segment in [self._u32(list_pos + 4 * i) for i in range(count)]:
+                self._free_cell(segment)
+            self._free_cell(list_offset)
+        self._free_cell(data_offset)
+
+    def _store_value_data(self, vk_offset: int, vtype: int, raw: bytes) -> None:
+        if len(raw) > MAX_CELL_DATA:
+            raise OfflineHiveError(f"{len(raw)} baytlık değer desteklenmiyor (en fazla {MAX_CELL_DATA})")
+        if len(raw) <= 4:
+            size, data_field = len(raw) | DATA_INLINE, raw.ljust(4, b"\x00")
+        else:
+            size, data_field = len(raw), struct.pack("<I", self._write_cell(raw))
+        pos = self._data_pos(vk_offset)
+        struct.pack_into("<I", self._buf, pos + _VK_DATA_SIZE, size)
+        self._buf[pos + _VK_DATA_OFFSET:pos + _VK_DATA_OFFSET + 4] = data_field
+        struct.pack_into("<I", self._buf, pos + _VK_TYPE, vtype)
+
+    # --- Genel API ---
+
+    @property
+    def root(self) -> HiveKey:
+        return HiveKey(self, self.root_offset)
+
+    def _walk(self, key_path: str, create: bool) -> Optional[int]:
+        offset = self.root_offset
+        for part in [p for p in key_path.split("\\") if p]:
+            child = self._find_subkey(offset, part)
+            if child is None:
+                if not create:
+                    return None
+                child = self._add_subkey(offset, part)
+            offset = child
+        return offset
+
+    def open_key(self, key_path: str) -> Optional[HiveKey]:
+        """Kökten göreli yol ('Microsoft\\Windows\\...'); yoksa None"""
+        offset = self._walk(key_path, create=False)
+        return HiveKey(self, offset) if offset is not None else None
+
+    def create_key(self, key_path: str) -> HiveKey:
+        """Anahtarı (ara anahtarlar dahil) oluştur veya aç"""
+        return HiveKey(self, self._walk(key_path, create=True))
+
+    def get_value(self, key_path: str, name: str) -> Optional[HiveValue]:
+        key = self.open_key(key_path)
+        return key.value(name) if key is not None else None
+
+    def set_value(self, key_path: str, name: str, vtype: int, data: Any) -> None:
+        """Değeri yaz (anahtar yoksa oluşturulur)"""
+        raw = encode_value(vtype, data)
+        key = self._walk(key_path, create=True)
+        vk = self._find_value(key, name)
+        if vk is not None:
+            self._free_value_data(vk)
+            self._store_value_data(vk, vtype, raw)
+        else:
+            name_raw, compressed = _encode_name(name)
+            vk = self._alloc(_VK_NAME + len(name_raw))
+            pos = self._data_pos(vk)
+            self._buf[pos:pos + 2] = b"vk"
+            struct.pack_into("<H", self._buf, pos + _VK_NAME_LEN, len(name_raw))
+            struct.pack_into("<HH", self._buf, pos + _VK_FLAGS, VALUE_COMP_NAME if compressed else 0, 0)
+            self._buf[pos + _VK_NAME:pos + _VK_NAME + len(name_raw)] = name_raw
+            self._store_value_data(vk, vtype, raw)
+
+            key_pos = self._data_pos(key)
+            offsets = self._value_offsets(key) + [vk]
+            old_list = self._u32(key_pos + _NK_VALUE_LIST) if len(offsets) > 1 else NIL
+            new_list = self._write_list(b"".join(struct.pack("<I", o) for o in offsets), old_list)
+            if new_list != old_list:
+                self._free_cell(old_list)
+            struct.pack_into("<II", self._buf, key_pos + _NK_VALUE_COUNT, len(offsets), new_list)
+
+        key_pos = self._data_pos(key)
+        struct.pack_into("<Q", self._buf, key_pos + _NK_TIMESTAMP, _filetime_now())
+        max_name = self._u32(key_pos + _NK_MAX_VALUE_NAME)
+        max_data = self._u32(key_pos + _NK_MAX_VALUE_DATA)
+        struct.pack_into("<I", self._buf, key_pos + _NK_MAX_VALUE_NAME, max(max_name, len(name) * 2))
+        struct.pack_into("<I", self._buf, key_pos + _NK_MAX_VALUE_DATA, max(max_data, len(raw)))
+        self.modified = True
+
+    def set_dword(self, key_path: str, name: str, value: int) -> None:
+        self.set_value(key_path, name, REG_DWORD, value)
+
+    def set_sz(self, key_path: str, name: str, value: str) -> None:
+        self.set_value(key_path, name, REG_SZ, value)
+
+    def check(self) -> List[str]:
+        """Yapısal doğrulama: checksum, hbin/hücre dizilimi, kökten erişilen nk/vk/listeler"""
+        problems: List[str] = []
+        if self._u32(4) != self._u32(8):
+            problems.append("Sıra numaraları eşit değil")
+        if self._u32(508) != base_block_checksum(self._buf):
+            problems.append("Base block checksum hatalı")
+        if self._u32(40) != len(self._buf) - BASE_BLOCK_SIZE:
+            problems.append("hbin alanı boyutu uyuşmuyor")
+        try:
+            scan_bins(self._buf)
+        except OfflineHiveError as e:
+            problems.append(str(e))
+
+        stack = [self.root_offset]
+        seen = set()
+        while stack:
+            offset = stack.pop()
+            if offset in seen:
+                problems.append(f"Döngüsel anahtar: 0x{offset:x}")
+                continue
+            seen.add(offset)
+            try:
+                pos = self._data_pos(offset)
+                if struct.unpack_from("<i", self._buf, self._cell_pos(offset))[0] >= 0:
+                    problems.append(f"Boş hücrede anahtar: 0x{offset:x}")
+                children = self._subkey_offsets(offset)
+                if len(children) != self._u32(pos + _NK_SUBKEY_COUNT):
+                    problems.append(f"Alt anahtar sayısı uyuşmuyor: {self._nk_name(offset)}")
+                names = [self._nk_name(c).upper() for c in children]
+                if names != sorted(names):
+                    problems.append(f"Alt anahtar listesi sıralı değil: {self._nk_name(offset)}")
+                for vk in self._value_offsets(offset):
+                    self._read_vk(vk)
+                stack.extend(children)
+            except (OfflineHiveError, struct.error, IndexError) as e:
+                problems.append(f"0x{offset:x}: {e}")
+        return problems
+
+
+# --- İmaj servis etme ---
+
+# HKLM\<hive> -> imaj kökünden göreli dosya yolu
+SYSTEM_HIVES: Dict[str, Tuple[str, ...]] = {
+    "SOFTWARE": ("Windows", "System32", "config", "SOFTWARE"),
+    "SYSTEM": ("Windows", "System32", "config", "SYSTEM"),
+}
+# HKCU -> varsayılan kullanıcı profili (yeni oluşturulan kullanıcılar bunu kopyalar)
+DEFAULT_USER_HIVE: Tuple[str, ...] = ("Users", "Default", "NTUSER.DAT")
+
+
+def _find_case_insensitive(root: str, parts: Sequence[str]) -> Optional[str]:
+    """Bağlanmış NTFS imajlarında büyük/küçük harf farkını tolere et"""
+    current = root
+    for part in parts:
+        candidate = os.path.join(current, part)
+        if os.path.exists(candidate):
+            current = candidate
+            continue
+        try:
+            match = next((e for e in os.listdir(current) if e.lower() == part.lower()), None)
+        except OSError:
+            return None
+        if match is None:
+            return None
+        current = os.path.join(current, match)
+    return current
+
+
+@dataclass
+class ImageReport:
+    """Tek imajın servis raporu"""
+    root: str
+    compliant: int = 0
+    changed: int = 0
+    failed: List[Tuple[str, str]] = field(default_factory=list)   # (key_path\\value, hata)
+    skipped: List[str] = field(default_factory=list)              # çevrimdışı karşılığı olmayanlar
+    saved: List[str] = field(default_factory=list)                # kaydedilen hive dosyaları
+    duration_ms: float = 0.0
+
+
+class OfflineImage:
+    """
+    Bağlanmış (mount edilmiş) Windows imaj dizini. HKLM\\SOFTWARE, HKLM\\SYSTEM ve HKCU
+    (varsayılan kullanıcı) yolları ilgili hive dosyasına çevrilir; her hive bir kez açılır.
+    """
+
+    def __init__(self, root: str, user_hive: Optional[str] = None):
+        self.root = root
+        self.user_hive = user_hive
+        self._hives: Dict[str, Optional[OfflineHive]] = {}
+        self._control_set: Optional[str] = None
+
+    def _hive_path(self, name: str) -> Optional[str]:
+        if name == "HKCU":
+            return self.user_hive or _find_case_insensitive(self.root, DEFAULT_USER_HIVE)
+        return _find_case_insensitive(self.root, SYSTEM_HIVES[name])
+
+    def hive(self, name: str) -> Optional[OfflineHive]:
+        if name not in self._hives:
+            path = self._hive_path(name)
+            self._hives[name] = OfflineHive.open(path) if path else None
+        return self._hives[name]
+
+    def _current_control_set(self) -> str:
+        """Çevrimdışı CurrentControlSet yok: SYSTEM\\Select\\Current'tan çöz"""
+        if self._control_set is None:
+            system = self.hive("SYSTEM")
+            current = system.get_value("Select", "Current") if system else None
+            number = current.data if current and isinstance(current.data, int) else 1
+            self._control_set = f"ControlSet{number:03d}"
+        return self._control_set
+
+    def resolve(self, key_path: str) -> Optional[Tuple[str, str]]:
+        """'HKLM\\SOFTWARE\\X' -> ('SOFTWARE', 'X'); karşılığı yoksa None"""
+        hive_name, _, rest = key_path.partition("\\")
+        hive_name = hive_name.upper()
+        if hive_name == "HKCU":
+            return "HKCU", rest
+        if hive_name != "HKLM":
+            return None
+        top, _, rest = rest.partition("\\")
+        top = top.upper()
+        if top not in SYSTEM_HIVES:
+            return None
+        if top == "SYSTEM":
+            first, _, tail = rest.partition("\\")
+            if first.lower() == "currentcontrolset":
+                rest = self._current_control_set() + (f"\\{tail}" if tail else "")
+        return top, rest
+
+    def read_value(self, key_path: str, value_name: str):
+        """RegistryOptimizer._read_registry_value ile aynı sözleşme: (exists, type, data)"""
+        resolved = self.resolve(key_path)
+        hive = self.hive(resolved[0]) if resolved else None
+        if hive is None:
+            return (False, None, None)
+        value = hive.get_value(resolved[1], value_name)
+        if value is None:
+            return (False, None, None)
+        return (True, value.vtype, value.data)
+
+    def apply(self, optimizations: Iterable[Tuple[str, str, int, Any]], save: bool = True) -> ImageReport:
+        """Tek geçiş: farklı olanları yaz, değişen hive'ları bir kez kaydet"""
+        started = time.perf_counter()
+        report = ImageReport(root=self.root)
+        seen = set()
+        for key_path, value_name, value_type, value_data in optimizations:
+            ident = tweak_ident(key_path, value_name)
+            if ident in seen:
+                continue
+            seen.add(ident)
+            label = f"{key_path}\\{value_name}"
+            try:
+                resolved = self.resolve(key_path)
+                hive = self.hive(resolved[0]) if resolved else None
+                if hive is None:
+                    report.skipped.append(label)
+                    continue
+                current = hive.get_value(resolved[1], value_name)
+                if current is not None and same_value(current.vtype, current.data, value_type, value_data):
+                    report.compliant += 1
+                    continue
+                hive.set_value(resolved[1], value_name, value_type, value_data)
+                report.changed += 1
+            except (OfflineHiveError, OSError, struct.error, ValueError) as e:
+                report.failed.append((label, str(e)))
+
+        if save:
+            report.saved = self.save()
+        report.duration_ms = (time.perf_counter() - started) * 1000
+        return report
+
+    def save(self) -> List[str]:
+        return [hive.save() for hive in self._hives.values() if hive is not None and hive.modified]
+
+
+def service_image(root: str, optimizations: List[Tuple[str, str, int, Any]]) -> ImageReport:
+    """Tek imajı servis et (ProcessPoolExecutor için modül seviyesinde)"""
+    try:
+        return OfflineImage(root).apply(optimizations)
+    except (OfflineHiveError, OSError) as e:
+        return ImageReport(root=root, failed=[("<image>", str(e))])
+
+
+def service_images(roots: Sequence[str], optimizations: List[Tuple[str, str, int, Any]],
+                   max_workers: Optional[int] = None) -> List[ImageReport]:
+    """Birden fazla imajı paralel servis et (imaj başına bir proses). Sonuçlar giriş sırasıyla döner."""
+    if len(roots) <= 1 or max_workers == 1:
+        return [service_image(root, optimizations) for root in roots]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(service_image, roots, [optimizations] * len(roots)))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """`--image DIR` (tekrarlanabilir) [--scheduler] [--workers N]"""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    images: List[str] = []
+    workers: Optional[int] = None
+    idx = 0
+    while idx < len(argv):
+        if argv[idx] == "--image" and idx + 1 < len(argv):
+            images.append(argv[idx + 1])
+            idx += 2
+        elif argv[idx] == "--workers" and idx + 1 < len(argv):
+            workers = int(argv[idx + 1])
+            idx += 2
+        else:
+            idx += 1
+    if not images:
+        print("Kullanım: python -m modules.offline_hive --image DIR [--image DIR ...] [--scheduler] [--workers N]")
+        return 2
+
+    from modules.registry import RegistryOptimizer
+
+    optimizer = RegistryOptimizer()
+    optimizer.apply_scheduler_tweaks = "--scheduler" in argv
+    exit_code = 0
+    for report in optimizer.apply_offline(images, max_workers=workers):
+        print(f"   📀 {report.root}: {report.compliant} zaten uygun, {report.changed} değiştirildi, "
+              f"{len(report.failed)} başarısız, {len(report.skipped)} atlandı ({report.duration_ms:.0f} ms)")
+        for label, error in report.failed:
+            print(f"      ⚠️  {label}: {error}")
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,10 +13,11 @@ ama her zaman birebir aynı şekilde dönmeyebilir.
 from __future__ import annotations
 
 import os
-import subprocess
 from pathlib import Path
 from typing import Dict, List
 
+from modules.command_runner import get_command_runner
+
 
 class OneDriveOptimizer:
     def __init__(self):
@@ -47,7 +48,7 @@ class OneDriveOptimizer:
 
         # OneDrive prosesini kapat
         try:
-            subprocess.run(["taskkill", "/f", "/im", "OneDrive.exe"], capture_output=True, text=True, timeout=10, check=False)
+            get_command_runner().run(["taskkill", "/f", "/im", "OneDrive.exe"], timeout=10)
         except Exception:
             pass
 
@@ -60,8 +61,8 @@ class OneDriveOptimizer:
         ok = False
         for setup in setup_paths:
             try:
-                res = subprocess.run([str(setup), "/uninstall"], capture_output=True, text=True, timeout=120, check=False)
-                if res.returncode == 0:
+                res = get_command_runner().run([str(setup), "/uninstall"], timeout=120)
+                if res.ok:
                     ok = True
             except Exception:
                 continue
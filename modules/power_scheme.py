@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Güç Planı Motoru (powercfg)
+
+Aktif planı ve ilgili ayar indekslerini tek `powercfg /query` çağrısıyla okur,
+hedeften farklı olanları bulur ve sadece onları yazar (idempotent).
+Her ayar için önceki / sonraki değer raporlanır.
+
+Ayrıştırma dil bağımsızdır: satır etiketleri (örn. "Current AC Power Setting Index")
+yerelleştirildiği için sadece GUID'ler, girinti ve satır sonundaki hex değerler kullanılır.
+  - GUID satırı, girinti 0  -> güç planı
+  - GUID satırı, girinti 2  -> alt grup
+  - GUID satırı, girinti 4  -> ayar
+  - Ayar bloğundaki son iki hex değer -> AC, DC indeksleri
+
+check_changes.bat aynı veriyi `python -m modules.power_scheme --check` ile kullanır:
+çıkış kodu 0 = uygun, 1 = farklı, 2 = okunamadı.
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from modules.command_runner import CommandRunner, get_command_runner
+
+
+HIGH_PERFORMANCE_GUID = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+
+_GUID_RE = re.compile(r"([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})")
+_NAME_RE = re.compile(r"\((.*)\)\s*$")
+_HEX_TAIL_RE = re.compile(r"0x([0-9a-fA-F]+)\s*$")
+
+
+@dataclass(frozen=True)
+class PowerTarget:
+    """Hedef ayar (None = o güç kaynağına dokunma)"""
+    label: str
+    subgroup: str
+    setting: str
+    ac: Optional[int] = None
+    dc: Optional[int] = None
+
+
+# Uygulanan ayarlar (prize takılıyken)
+TARGET_SETTINGS: List[PowerTarget] = [
+    PowerTarget("USB selective suspend",
+                "2a737441-1930-4402-8d77-b2bebba308a3", "48e6b7a6-50f5-4782-a5d4-53bb8f07e226", ac=0),
+    PowerTarget("PCI Express Link State Power Management",
+                "501a4d13-42af-4429-9fd1-a8218c268e20", "ee12f906-d277-404b-b6da-e5fa1a576df5", ac=0),
+]
+
+
+@dataclass
+class PowerSchemeState:
+    """`powercfg /query` çıktısının ayrıştırılmış hali"""
+    scheme_guid: str
+    scheme_name: str = ""
+    # (subgroup, setting) -> (ac, dc)
+    settings: Dict[Tuple[str, str], Tuple[Optional[int], Optional[int]]] = field(default_factory=dict)
+
+    def value(self, subgroup: str, setting: str, mode: str) -> Optional[int]:
+        ac_dc = self.settings.get((subgroup.lower(), setting.lower()))
+        if ac_dc is None:
+            return None
+        return ac_dc[0] if mode == "AC" else ac_dc[1]
+
+
+@dataclass
+class SettingChange:
+    """Tek ayarın önce/sonra değeri"""
+    label: str
+    subgroup: str
+    setting: str
+    mode: str  # "AC" / "DC"
+    target: int
+    before: Optional[int]
+    after: Optional[int] = None
+
+    @property
+    def compliant(self) -> bool:
+        return self.after == self.target
+
+
+@dataclass
+class PowerReport:
+    """apply() / check() sonucu"""
+    scheme_before: Optional[str] = None
+    scheme_after: Optional[str] = None
+    scheme_target: str = HIGH_PERFORMANCE_GUID
+    scheme_name: str = ""
+    changes: List[SettingChange] = field(default_factory=list)  # hedeften farklı olanlar
+    compliant_settings: int = 0
+    errors: List[str] = field(default_factory=list)
+    readable: bool = True
+
+    @property
+    def scheme_changed(self) -> bool:
+        return self.scheme_before is not None and self.scheme_before != self.scheme_after
+
+    @property
+    def compliant(self) -> bool:
+        return (
+            self.readable
+            and (self.scheme_after or "").lower() == self.scheme_target.lower()
+            and all(c.compliant for c in self.changes)
+        )
+
+
+def parse_powercfg_query(text: str) -> Optional[PowerSchemeState]:
+    """`powercfg /query` çıktısını ayrıştır (dil bağımsız)"""
+    state: Optional[PowerSchemeState] = None
+    subgroup: Optional[str] = None
+    setting: Optional[str] = None
+    hex_values: List[int] = []
+
+    def flush():
+        if state is not None and subgroup and setting:
+            ac = hex_values[-2] if len(hex_values) >= 2 else None
+            dc = hex_values[-1] if len(hex_values) >= 2 else None
+            state.settings[(subgroup, setting)] = (ac, dc)
+
+    for raw in (text or "").splitlines():
+        line = raw.rstrip()
+        if not line.strip():
+            continue
+        indent = len(line) - len(line.lstrip(" "))
+        guid_match = _GUID_RE.search(line)
+        if guid_match:
+            guid = guid_match.group(1).lower()
+            name_match = _NAME_RE.search(line)
+            if state is None or indent == 0:
+                flush()
+                state = PowerSchemeState(scheme_guid=guid, scheme_name=name_match.group(1) if name_match else "")
+                subgroup = setting = None
+            elif indent <= 2:
+                flush()
+                subgroup, setting = guid, None
+            else:
+                flush()
+                setting = guid
+            hex_values = []
+            continue
+        hex_match = _HEX_TAIL_RE.search(line)
+        if hex_match and setting:
+            hex_values.append(int(hex_match.group(1), 16))
+
+    flush()
+    return state
+
+
+class PowerSchemeEngine:
+    """Tek okuma + sadece farklı olanları yazma"""
+
+    def __init__(self, runner: Optional[CommandRunner] = None,
+                 target_scheme: str = HIGH_PERFORMANCE_GUID,
+                 targets: Optional[List[PowerTarget]] = None,
+                 timeout: float = 15.0):
+        self.runner = runner or get_command_runner()
+        self.target_scheme = target_scheme.lower()
+        self.targets = list(TARGET_SETTINGS if targets is None else targets)
+        self.timeout = timeout
+
+    def read(self, scheme: Optional[str] = None) -> Optional[PowerSchemeState]:
+        """Planı ve tüm ayar indekslerini tek çağrıda oku (scheme=None -> aktif plan)"""
+        args = ["powercfg", "/query"] + ([scheme] if scheme else [])
+        result = self.runner.run(args, timeout=self.timeout)
+        if not result.ok:
+            return None
+        return parse_powercfg_query(result.stdout)
+
+    def diff(self, state: PowerSchemeState) -> Tuple[List[SettingChange], int]:
+        """Hedeften farklı ayarlar + zaten uygun olanların sayısı"""
+        changes: List[SettingChange] = []
+        compliant = 0
+        for target in self.targets:
+            for mode, wanted in (("AC", target.ac), ("DC", target.dc)):
+                if wanted is None:
+                    continue
+                current = state.value(target.subgroup, target.setting, mode)
+                if current == wanted:
+                    compliant += 1
+                    continue
+                changes.append(SettingChange(
+                    label=target.label, subgroup=target.subgroup, setting=target.setting,
+                    mode=mode, target=wanted, before=current,
+                ))
+        return changes, compliant
+
+    def check(self) -> PowerReport:
+        """Sadece oku ve karşılaştır (yazma yok)"""
+        report = PowerReport(scheme_target=self.target_scheme)
+        state = self.read()
+        if state is None:
+            report.readable = False
+            report.errors.append("powercfg /query okunamadı")
+            return report
+        report.scheme_before = report.scheme_after = state.scheme_guid
+        report.scheme_name = state.scheme_name
+        report.changes, report.compliant_settings = self.diff(state)
+        for change in report.changes:
+            change.after = change.before
+        return report
+
+    def apply(self) -> PowerReport:
+        """Hedef planı aktif et ve sadece farklı ayarları yaz; önce/sonra raporla"""
+        report = PowerReport(scheme_target=self.target_scheme)
+        active = self.read()
+        if active is None:
+            report.readable = False
+            report.errors.append("powercfg /query okunamadı")
+            return report
+        report.scheme_before = report.scheme_after = active.scheme_guid
+        report.scheme_name = active.scheme_name
+
+        # 1) Plan: farklıysa geçiş yap (plan yoksa aktif planda devam)
+        state = active
+        if active.scheme_guid != self.target_scheme:
+            switched = self.runner.run(["powercfg", "/setactive", self.target_scheme], timeout=self.timeout)
+            if switched.ok:
+                state = self.read(self.target_scheme) or active
+                report.scheme_after = state.scheme_guid
+                report.scheme_name = state.scheme_name
+            else:
+                report.errors.append(f"Plan aktif edilemedi: {self.target_scheme}")
+
+        # 2) Sadece farklı ayarları yaz
+        scheme = state.scheme_guid
+        report.changes, report.compliant_settings = self.diff(state)
+        if not report.changes:
+            return report
+
+        writes = [
+            ["powercfg", "/setacvalueindex" if c.mode == "AC" else "/setdcvalueindex",
+             scheme, c.subgroup, c.setting, str(c.target)]
+            for c in report.changes
+        ]
+        for change, result in zip(report.changes, self.runner.run_many(writes, timeout=self.timeout)):
+            if not result.ok:
+                report.errors.append(f"{change.label} ({change.mode}): {result.stderr.strip() or result.error or 'yazılamadı'}")
+
+        # Değerlerin etkinleşmesi için planı yeniden aktif et
+        self.runner.run(["powercfg", "/setactive", scheme], timeout=self.timeout)
+
+        # 3) Sonraki değerleri doğrula
+        after = self.read(scheme)
+        for change in report.changes:
+            change.after = after.value(change.subgroup, change.setting, change.mode) if after else None
+        return report
+
+
+def _fmt(value: Optional[int]) -> str:
+    return "?" if value is None else str(value)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """`--check`: aktif plan + ayarları raporla (check_changes.bat için)"""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if "--check" not in argv:
+        print("Kullanım: python -m modules.power_scheme --check")
+        return 2
+
+    report = PowerSchemeEngine().check()
+    if not report.readable:
+        print("   [!] Güç planı okunamadı")
+        return 2
+
+    ok = report.compliant
+    scheme_ok = (report.scheme_after or "") == report.scheme_target
+    print(f"   [{'OK' if scheme_ok else '!'}] Güç planı: {report.scheme_after} ({report.scheme_name})")
+    for change in report.changes:
+        print(f"   [!] {change.label} ({change.mode}): {_fmt(change.before)} (hedef {change.target})")
+    if report.compliant_settings:
+        print(f"   [OK] {report.compliant_settings} güç ayarı hedef değerde")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Kalıcı PowerShell Host Oturumu
+
+Her çağrıda yeni bir `powershell.exe` başlatmak (soğuk başlangıç) 300-1000 ms sürer.
+Bu modül çalışma boyunca tek bir PowerShell prosesi açık tutar ve komutları stdin
+üzerinden çerçeveli (framed) olarak gönderir, sonuçları JSON çerçeve olarak okur.
+
+Protokol (satır tabanlı):
+- İstek  (Python -> host): tek satır JSON  {"id": 7, "op": "run", "script": "..."}
+- Cevap  (host -> Python): "@@WO-PSHOST@@ " + tek satır JSON
+                           {"id": 7, "ok": true, "output": "...", "errors": [...]}
+  ok=false: exception, hata kaydı veya native komutun exit code'u != 0
+  (yani `powershell -Command` çıkış kodu ile aynı anlam)
+- Host açılınca id=0 ile {"ready": true} çerçevesi yollar.
+- {"op": "exit"} isteği host'u temiz şekilde kapatır.
+
+Marker ile başlamayan satırlar yok sayılır. Aynı protokolü konuşan herhangi bir
+program (örn. Linux'ta test için küçük bir Python scripti) `command` parametresiyle
+host olarak kullanılabilir.
+"""
+
+from __future__ import annotations
+
+import atexit
+import base64
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator, List, Optional
+
+from modules.deadline import current_budget
+
+FRAME_MARKER = "@@WO-PSHOST@@ "
+
+# Host tarafında çalışan döngü. -EncodedCommand ile verildiği için tırnak/kaçış derdi yok.
+_HOST_SCRIPT = r"""
+$ErrorActionPreference = 'Continue'
+$ProgressPreference = 'SilentlyContinue'
+[Console]::OutputEncoding = [System.Text.Encoding]::UTF8
+$__marker = '@@WO-PSHOST@@ '
+function __Send($obj) {
+    [Console]::Out.WriteLine($__marker + ($obj | ConvertTo-Json -Compress -Depth 3))
+    [Console]::Out.Flush()
+}
+__Send @{ id = 0; ok = $true; ready = $true }
+while ($true) {
+    $line = [Console]::In.ReadLine()
+    if ($line -eq $null) { break }
+    if (-not $line.Trim()) { continue }
+    try { $req = $line | ConvertFrom-Json } catch { continue }
+    if ($req.op -eq 'exit') { break }
+    $ok = $true
+    $errs = @()
+    $out = ''
+    try {
+        $global:LASTEXITCODE = 0
+        $sb = [ScriptBlock]::Create([string]$req.script)
+        $recs = @(& $sb 2>&1)
+        $errs = @($recs | Where-Object { $_ -is [System.Management.Automation.ErrorRecord] } |
+                  Select-Object -First 10 | ForEach-Object { $_.ToString() })
+        $out = ($recs | Where-Object { -not ($_ -is [System.Management.Automation.ErrorRecord]) } |
+                Out-String -Width 4096)
+        # `powershell -Command` çıkış kodu ile aynı anlam: hata kaydı veya native exit code != 0
+        if ($errs.Count -gt 0 -or $global:LASTEXITCODE -ne 0) { $ok = $false }
+    } catch {
+        $ok = $false
+        $errs = @($_.Exception.Message)
+    }
+    __Send @{ id = $req.id; ok = $ok; output = $out; errors = $errs }
+}
+"""
+
+
+class PowerShellHostError(RuntimeError):
+    """Host başlatılamadı / protokol bozuldu"""
+
+
+@dataclass
+class PowerShellResult:
+    """Tek bir komutun sonucu"""
+    ok: bool
+    output: str = ""
+    errors: List[str] = field(default_factory=list)
+    duration_ms: float = 0.0
+    timed_out: bool = False
+
+    def json(self) -> Optional[Any]:
+        """Çıktıyı JSON olarak parse et (başarısız/boş ise None)"""
+        if not self.ok:
+            return None
+        out = (self.output or "").strip()
+        if not out:
+            return None
+        try:
+            return json.loads(out)
+        except ValueError:
+            return None
+
+
+def ps_quote(value: str) -> str:
+    """PowerShell tek tırnaklı string literal'i üret ('' kaçışı ile)"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def ps_array(values) -> str:
+    """Python string listesini PowerShell dizi literal'ine çevir: @('a','b')"""
+    return "@(" + ",".join(ps_quote(v) for v in values) + ")"
+
+
+def _default_host_command() -> List[str]:
+    encoded = base64.b64encode(_HOST_SCRIPT.encode("utf-16-le")).decode("ascii")
+    return [
+        "powershell", "-NoProfile", "-NonInteractive", "-ExecutionPolicy", "Bypass",
+        "-EncodedCommand", encoded,
+    ]
+
+
+def _kill_process_tree(proc: subprocess.Popen) -> None:
+    """Prosesi ve alt proseslerini öldür"""
+    if proc.poll() is not None:
+        return
+    if os.name == "nt":
+        try:
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+                           capture_output=True, timeout=10, check=False)
+        except Exception:
+            pass
+    try:
+        proc.kill()
+    except Exception:
+        pass
+    try:
+        proc.wait(timeout=5)
+    except Exception:
+        pass
+
+
+class PowerShellHost:
+    """
+    Uzun ömürlü PowerShell host'u.
+
+    - Komut başına timeout (aşılırsa host öldürülür, sonraki çağrıda yeniden açılır)
+    - Geçerli süre bütçesi timeout'u sınırlar; bütçe iptal edilirse host öldürülür,
+      bütçe bitmişse komut gönderilmez
+    - Host çökerse otomatik yeniden başlatma (komut bir kez tekrar denenir)
+    - Host hiç açılamazsa tek seferlik `powershell -Command` çağrısına düşer
+    - Thread-safe: aynı anda tek komut işlenir
+    """
+
+    def __init__(self, command: Optional[List[str]] = None, startup_timeout: float = 30.0,
+                 fallback_to_oneshot: bool = True):
+        self.command = list(command) if command else _default_host_command()
+        self.startup_timeout = startup_timeout
+        self.fallback_to_oneshot = fallback_to_oneshot
+
+        self._proc: Optional[subprocess.Popen] = None
+        self._responses: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._lock = threading.RLock()
+        self._next_id = 1
+        self._unavailable = False
+        self._eof = False
+
+        # İstatistik (kaç soğuk başlangıç / komut)
+        self.starts = 0
+        self.commands_run = 0
+
+    # ---------- Lifecycle ----------
+    def is_alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self) -> None:
+        """Host prosesini başlat ve ready çerçevesini bekle"""
+        with self._lock:
+            if self.is_alive():
+                return
+            self._responses = queue.Queue()
+            self._eof = False
+            creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0) if os.name == "nt" else 0
+            try:
+                proc = subprocess.Popen(
+                    self.command,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                    encoding="utf-8",
+                    errors="replace",
+                    bufsize=1,
+                    creationflags=creationflags,
+                )
+            except OSError as e:
+                raise PowerShellHostError(f"PowerShell host başlatılamadı: {e}") from e
+
+            self._proc = proc
+            self.starts += 1
+            reader = threading.Thread(target=self._reader_loop, args=(proc, self._responses),
+                                      name="PowerShellHostReader", daemon=True)
+            reader.start()
+
+            frame = self._wait_frame(0, time.monotonic() + self.startup_timeout)
+            if frame is None or not frame.get("ready"):
+                _kill_process_tree(proc)
+                self._proc = None
+                raise PowerShellHostError("PowerShell host hazır sinyali vermedi")
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Host'u temiz şekilde kapat (gerekirse öldür)"""
+        with self._lock:
+            proc = self._proc
+            self._proc = None
+            if proc is None:
+                return
+            if proc.poll() is None:
+                try:
+                    proc.stdin.write(json.dumps({"op": "exit"}) + "\n")
+                    proc.stdin.flush()
+                    proc.stdin.close()
+                except Exception:
+                    pass
+                try:
+                    proc.wait(timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    _kill_process_tree(proc)
+
+    @staticmethod
+    def _reader_loop(proc: subprocess.Popen, responses: "queue.Queue[Optional[dict]]") -> None:
+        try:
+            for line in proc.stdout:
+                if not line.startswith(FRAME_MARKER):
+                    continue
+                try:
+                    frame = json.loads(line[len(FRAME_MARKER):])
+                except ValueError:
+                    continue
+                if isinstance(frame, dict):
+                    responses.put(frame)
+        except Exception:
+            pass
+        finally:
+            # EOF: host kapandı/çöktü
+            responses.put(None)
+
+    def _wait_frame(self, request_id: int, deadline: float) -> Optional[dict]:
+        """İlgili id'nin cevabını bekle. Host kapanırsa / süre dolarsa None."""
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                frame = self._responses.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if frame is None:
+                self._eof = True
+                return None
+            if frame.get("id") == request_id:
+                return frame
+            # Önceki (timeout olmuş) komutlardan kalan cevaplar: at
+
+    # ---------- Commands ----------
+    def run(self, script: str, timeout: float = 60.0, retries: int = 1) -> PowerShellResult:
+        """Script'i host içinde çalıştır"""
+        budget = current_budget()
+        with self._lock:
+            started = time.perf_counter()
+            attempt = 0
+            while True:
+                if budget is not None:
+                    if budget.expired:
+                        return PowerShellResult(ok=False, errors=[f"süre bütçesi doldu ({budget.name})"],
+                                                duration_ms=(time.perf_counter() - started) * 1000,
+                                                timed_out=True)
+                    timeout = budget.clamp(timeout)
+                if self._unavailable:
+                    return self._run_oneshot(script, timeout)
+                try:
+                    self.start()
+                except PowerShellHostError:
+                    if not self.fallback_to_oneshot:
+                        raise
+                    self._unavailable = True
+                    continue
+
+                request_id = self._next_id
+                self._next_id += 1
+                try:
+                    self._proc.stdin.write(json.dumps({"id": request_id, "op": "run", "script": script}) + "\n")
+                    self._proc.stdin.flush()
+                except (OSError, ValueError):
+                    frame = None
+                else:
+                    # Bütçe iptal edilirse takılı komutla birlikte host öldürülür
+                    proc = self._proc
+                    token = budget.on_cancel(lambda: _kill_process_tree(proc)) if budget is not None else 0
+                    try:
+                        frame = self._wait_frame(request_id, time.monotonic() + timeout)
+                    finally:
+                        if budget is not None:
+                            budget.discard(token)
+
+                duration_ms = (time.perf_counter() - started) * 1000
+                if frame is not None:
+                    self.commands_run += 1
+                    errors = frame.get("errors") or []
+                    if isinstance(errors, str):
+                        errors = [errors]
+                    return PowerShellResult(
+                        ok=bool(frame.get("ok")),
+                        output=frame.get("output") or "",
+                        errors=[str(e) for e in errors],
+                        duration_ms=duration_ms,
+                    )
+
+                if budget is not None and budget.cancelled:
+                    _kill_process_tree(self._proc)
+                    self._proc = None
+                    return PowerShellResult(ok=False, errors=[f"süre bütçesi doldu ({budget.name})"],
+                                            duration_ms=duration_ms, timed_out=True)
+
+                if not self._eof and self.is_alive():
+                    # Host yaşıyor ama cevap gelmedi -> timeout. Takılı komutu öldür.
+                    _kill_process_tree(self._proc)
+                    self._proc = None
+                    return PowerShellResult(ok=False, errors=[f"timeout ({timeout}s)"],
+                                            duration_ms=duration_ms, timed_out=True)
+
+                # Host çöktü -> yeniden başlat ve (bir kez) tekrar dene
+                _kill_process_tree(self._proc)
+                self._proc = None
+                if attempt >= retries:
+                    return PowerShellResult(ok=False, errors=["PowerShell host beklenmedik şekilde kapandı"],
+                                            duration_ms=duration_ms)
+                attempt += 1
+
+    def run_json(self, script: str, timeout: float = 60.0) -> Optional[Any]:
+        """Script'i çalıştır ve çıktıyı JSON olarak döndür (hata/boş ise None)"""
+        return self.run(script, timeout=timeout).json()
+
+    def _run_oneshot(self, script: str, timeout: float) -> PowerShellResult:
+        """Host kullanılamıyorsa eski yöntem: tek seferlik powershell prosesi"""
+        started = time.perf_counter()
+        try:
+            result = subprocess.run(
+                ["powershell", "-NoProfile", "-ExecutionPolicy", "Bypass", "-Command", script],
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+            )
+            return PowerShellResult(
+                ok=result.returncode == 0,
+                output=result.stdout or "",
+                errors=[result.stderr.strip()] if (result.stderr or "").strip() else [],
+                duration_ms=(time.perf_counter() - started) * 1000,
+            )
+        except subprocess.TimeoutExpired:
+            return PowerShellResult(ok=False, errors=[f"timeout ({timeout}s)"],
+                                    duration_ms=(time.perf_counter() - started) * 1000, timed_out=True)
+        except Exception as e:
+            return PowerShellResult(ok=False, errors=[str(e)],
+                                    duration_ms=(time.perf_counter() - started) * 1000)
+
+
+# Çalışma başına tek host
+_host: Optional[PowerShellHost] = None
+_host_lock = threading.Lock()
+# Paralel işler için ek host'lar: thread'e bağlı olan + boşta bekleyenler (tekrar kullanılır)
+_thread_host = threading.local()
+_idle_hosts: List[PowerShellHost] = []
+
+
+def get_powershell_host() -> PowerShellHost:
+    """
+    Paylaşılan PowerShell host'unu döndür (ilk komutta açılır).
+    Thread dedicated_powershell_host() içindeyse o thread'in kendi host'u döner.
+    """
+    global _host
+    dedicated = getattr(_thread_host, "host", None)
+    if dedicated is not None:
+        return dedicated
+    with _host_lock:
+        if _host is None:
+            # Yedekleme gibi paralel işlerden boşta kalan (açık) host varsa onu devral
+            _host = _idle_hosts.pop() if _idle_hosts else PowerShellHost()
+        return _host
+
+
+@contextmanager
+def dedicated_powershell_host() -> Iterator[PowerShellHost]:
+    """
+    Blok boyunca bu thread'in get_powershell_host() çağrılarına ayrı bir host ver.
+    Paylaşılan host tek komut işlediği için, aynı anda çalışan PowerShell ağırlıklı
+    işler (örn. yedekleme kaynakları) birbirini beklemez. Host ilk komutta açılır;
+    blok bitince boşta havuzuna döner ve shutdown_powershell_host() ile kapanır.
+    """
+    with _host_lock:
+        host = _idle_hosts.pop() if _idle_hosts else PowerShellHost()
+    previous = getattr(_thread_host, "host", None)
+    _thread_host.host = host
+    try:
+        yield host
+    finally:
+        _thread_host.host = previous
+        with _host_lock:
+            _idle_hosts.append(host)
+
+
+def shutdown_powershell_host() -> None:
+    """Paylaşılan host'u ve boşta bekleyen ek host'ları kapat"""
+    global _host
+    with _host_lock:
+        hosts = [_host] + _idle_hosts
+        _host = None
+        _idle_hosts.clear()
+    for host in hosts:
+        if host is not None:
+            host.close()
+
+
+atexit.register(shutdown_powershell_host)
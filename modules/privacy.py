@@ -5,72 +5,45 @@ Gizlilik Optimizasyonları
 Windows telemetri ve veri toplama özelliklerini kapatır
 """
 
-import subprocess
-import winreg
+from modules.registry_watcher import install_enforcer_task
+from modules.tweak_catalog import get_catalog, write_tweaks
+from modules.service_control import get_service_control
 
 class PrivacyOptimizer:
     """Gizlilik optimizasyonu"""
     
+    # Bu modülün uyguladığı katalog kategorileri (modules/tweak_catalog.py)
+    CATEGORIES = (
+        "telemetry", "advertising", "location", "cortana", "copilot", "activity_history",
+        "content_delivery", "background_apps", "error_reporting", "delivery_optimization", "widgets",
+    )
+    
     def __init__(self):
         self.changes = []
+        # Verilirse tüm kayıt defteri yazmaları bu batch'e eklenir (commit çağırana ait)
+        self.registry_batch = None
+    
+    def _apply_categories(self, *categories):
+        """
+        Katalogdaki kategorileri anahtar bazında toplu yaz (bu çalışmada zaten uygulananlar atlanır).
+        (yazılan sayısı, hatalar) döner. self.registry_batch varsa sadece kuyruğa ekler.
+        """
+        written, failed = write_tweaks(get_catalog().select(categories),
+                                       batch=self.registry_batch, source="privacy")
+        return len(written), [f"{t.key_path}\\{t.value}: {error}" for t, error in failed]
     
     def disable_telemetry(self):
         """Telemetriyi kalıcı olarak kapat - Windows'un tekrar açmasını engelle"""
         try:
-            import winreg
-            import subprocess
-            import tempfile
-            from pathlib import Path
-            
-            # Tüm telemetri kayıt defteri konumları
-            telemetry_paths = [
-                # Standart konumlar
-                ("HKLM", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Policies\\DataCollection", "AllowTelemetry"),
-                ("HKLM", "SOFTWARE\\Policies\\Microsoft\\Windows\\DataCollection", "AllowTelemetry"),
-                
-                # Ek konumlar (Windows'un tekrar açmasını engellemek için)
-                ("HKLM", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Policies\\DataCollection", "DoNotShowFeedbackNotifications"),
-                ("HKLM", "SOFTWARE\\Policies\\Microsoft\\Windows\\DataCollection", "DoNotShowFeedbackNotifications"),
-                ("HKLM", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Policies\\DataCollection", "MaxTelemetryAllowed"),
-                ("HKLM", "SOFTWARE\\Policies\\Microsoft\\Windows\\DataCollection", "MaxTelemetryAllowed"),
-                
-                # User level
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Privacy", "TailoredExperiencesWithDiagnosticDataEnabled"),
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Privacy", "AllowInputPersonalization"),
-            ]
-            
-            changes_count = 0
-            for hkey_name, key_path, value_name in telemetry_paths:
-                try:
-                    hkey = winreg.HKEY_LOCAL_MACHINE if hkey_name == "HKLM" else winreg.HKEY_CURRENT_USER
-                    
-                    # Anahtarı oluştur veya aç
-                    try:
-                        key = winreg.OpenKey(hkey, key_path, 0, winreg.KEY_WRITE)
-                    except FileNotFoundError:
-                        # Anahtar yoksa oluştur
-                        key_parts = key_path.split("\\")
-                        current_key = hkey
-                        for part in key_parts:
-                            try:
-                                current_key = winreg.OpenKey(current_key, part, 0, winreg.KEY_WRITE)
-                            except FileNotFoundError:
-                                current_key = winreg.CreateKey(current_key, part)
-                        key = winreg.OpenKey(hkey, key_path, 0, winreg.KEY_WRITE)
-                    
-                    # Değeri ayarla
-                    winreg.SetValueEx(key, value_name, 0, winreg.REG_DWORD, 0)
-                    winreg.CloseKey(key)
-                    changes_count += 1
-                except Exception as e:
-                    pass  # Bazı konumlar olmayabilir, devam et
+            # Tüm telemetri kayıt defteri konumları (katalog: "telemetry")
+            changes_count, _ = self._apply_categories("telemetry")
             
             # Telemetri servislerini de durdur
             telemetry_services = ["DiagTrack", "dmwappushservice", "wisvc"]
+            control = get_service_control()
             for service in telemetry_services:
                 try:
-                    subprocess.run(["sc", "stop", service], capture_output=True, timeout=5, check=False)
-                    subprocess.run(["sc", "config", service, "start=", "disabled"], capture_output=True, timeout=5, check=False)
+                    control.disable(service)
                 except:
                     pass
             
@@ -84,61 +57,16 @@ class PrivacyOptimizer:
         return False
     
     def _setup_telemetry_blocker_task(self):
-        """Telemetri blocker scheduled task oluştur"""
+        """Telemetri izleyicisini açılış görevi olarak kur (modules/registry_watcher.py)"""
         try:
-            import subprocess
-            import tempfile
-            from pathlib import Path
-            
-            # Geçici script oluştur
-            script_content = '''@echo off
-reg add "HKLM\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Policies\\DataCollection" /v AllowTelemetry /t REG_DWORD /d 0 /f >nul 2>&1
-reg add "HKLM\\SOFTWARE\\Policies\\Microsoft\\Windows\\DataCollection" /v AllowTelemetry /t REG_DWORD /d 0 /f >nul 2>&1
-reg add "HKLM\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Policies\\DataCollection" /v MaxTelemetryAllowed /t REG_DWORD /d 0 /f >nul 2>&1
-sc stop DiagTrack >nul 2>&1
-sc config DiagTrack start= disabled >nul 2>&1
-sc stop dmwappushservice >nul 2>&1
-sc config dmwappushservice start= disabled >nul 2>&1
-'''
-            
-            script_path = Path(tempfile.gettempdir()) / 'telemetry_blocker.bat'
-            with open(script_path, 'w', encoding='utf-8') as f:
-                f.write(script_content)
-            
-            # Mevcut task'ı kaldır (varsa)
-            subprocess.run(['schtasks', '/Delete', '/TN', 'TelemetryBlocker', '/F'], 
-                         capture_output=True, timeout=10, check=False)
-            
-            # Yeni task oluştur (her 5 dakikada bir)
-            result = subprocess.run(
-                ['schtasks', '/Create', '/TN', 'TelemetryBlocker', '/TR', f'"{script_path}"',
-                 '/SC', 'MINUTE', '/MO', '5', '/RU', 'SYSTEM', '/F'],
-                capture_output=True,
-                timeout=30,
-                check=False
-            )
-            
-            return result.returncode == 0
-        except:
+            return install_enforcer_task()
+        except Exception:
             return False  # Hata olursa sessizce devam et
     
     def disable_advertising_id(self):
         """Reklam ID'sini kapat"""
         try:
-            import winreg
-            
-            key_paths = [
-                "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\AdvertisingInfo",
-                "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Privacy",
-            ]
-            
-            for key_path in key_paths:
-                try:
-                    key = winreg.CreateKey(winreg.HKEY_LOCAL_MACHINE, key_path)
-                    winreg.SetValueEx(key, "Enabled", 0, winreg.REG_DWORD, 0)
-                    winreg.CloseKey(key)
-                except:
-                    pass
+            self._apply_categories("advertising")
             
             self.changes.append("Reklam ID kapatıldı")
             return True
@@ -149,14 +77,9 @@ sc config dmwappushservice start= disabled >nul 2>&1
     def disable_location_services(self):
         """Konum servislerini kapat"""
         try:
-            import winreg
-            
-            key = winreg.CreateKey(
-                winreg.HKEY_LOCAL_MACHINE,
-                "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\CapabilityAccessManager\\ConsentStore\\location"
-            )
-            winreg.SetValueEx(key, "Value", 0, winreg.REG_SZ, "Deny")
-            winreg.CloseKey(key)
+            _, errors = self._apply_categories("location")
+            if errors:
+                raise OSError(errors[0])
             
             self.changes.append("Konum servisleri kapatıldı")
             return True
@@ -167,14 +90,9 @@ sc config dmwappushservice start= disabled >nul 2>&1
     def disable_cortana(self):
         """Cortana'yı kapat"""
         try:
-            import winreg
-            
-            key = winreg.CreateKey(
-                winreg.HKEY_LOCAL_MACHINE,
-                "SOFTWARE\\Policies\\Microsoft\\Windows\\Windows Search"
-            )
-            winreg.SetValueEx(key, "AllowCortana", 0, winreg.REG_DWORD, 0)
-            winreg.CloseKey(key)
+            _, errors = self._apply_categories("cortana")
+            if errors:
+                raise OSError(errors[0])
             
             self.changes.append("Cortana kapatıldı")
             return True
@@ -185,37 +103,8 @@ sc config dmwappushservice start= disabled >nul 2>&1
     def disable_copilot(self):
         """Windows 11 25H2 Copilot'u kapat"""
         try:
-            import winreg
-            
             # Copilot'u devre dışı bırak
-            copilot_paths = [
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Explorer\\Advanced", "ShowCopilotButton"),
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Explorer\\Advanced", "CopilotTaskbarIcon"),
-                ("HKLM", "SOFTWARE\\Policies\\Microsoft\\Windows\\WindowsCopilot", "TurnOffWindowsCopilot"),
-            ]
-            
-            changes_count = 0
-            for hkey_name, key_path, value_name in copilot_paths:
-                try:
-                    hkey = winreg.HKEY_LOCAL_MACHINE if hkey_name == "HKLM" else winreg.HKEY_CURRENT_USER
-                    
-                    try:
-                        key = winreg.OpenKey(hkey, key_path, 0, winreg.KEY_WRITE)
-                    except FileNotFoundError:
-                        key_parts = key_path.split("\\")
-                        current_key = hkey
-                        for part in key_parts:
-                            try:
-                                current_key = winreg.OpenKey(current_key, part, 0, winreg.KEY_WRITE)
-                            except FileNotFoundError:
-                                current_key = winreg.CreateKey(current_key, part)
-                        key = winreg.OpenKey(hkey, key_path, 0, winreg.KEY_WRITE)
-                    
-                    winreg.SetValueEx(key, value_name, 0, winreg.REG_DWORD, 0)
-                    winreg.CloseKey(key)
-                    changes_count += 1
-                except:
-                    pass
+            changes_count, _ = self._apply_categories("copilot")
             
             self.changes.append(f"Copilot kapatıldı ({changes_count} konum)")
             return True
@@ -226,98 +115,12 @@ sc config dmwappushservice start= disabled >nul 2>&1
     def disable_background_data_collection(self):
         """Arka plan veri toplama özelliklerini kapat"""
         try:
-            import winreg
-            
-            # Arka plan veri toplama ayarları
-            background_paths = [
-                # Activity History (Timeline)
-                ("HKLM", "SOFTWARE\\Policies\\Microsoft\\Windows\\System", "EnableActivityFeed"),
-                ("HKLM", "SOFTWARE\\Policies\\Microsoft\\Windows\\System", "PublishUserActivities"),
-                ("HKLM", "SOFTWARE\\Policies\\Microsoft\\Windows\\System", "UploadUserActivities"),
-                
-                # App launch tracking
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Explorer\\Advanced", "Start_TrackProgs"),
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Explorer\\Advanced", "Start_IrisRecommendations"),
-                
-                # Start menu suggestions
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\ContentDeliveryManager", "SystemPaneSuggestionsEnabled"),
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\ContentDeliveryManager", "PreInstalledAppsEnabled"),
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\ContentDeliveryManager", "PreInstalledAppsEverEnabled"),
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\ContentDeliveryManager", "SubscribedContentEnabled"),
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\ContentDeliveryManager", "SubscribedContent-338393Enabled"),
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\ContentDeliveryManager", "SubscribedContent-338388Enabled"),
-                
-                # Windows Spotlight
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\ContentDeliveryManager", "RotatingLockScreenEnabled"),
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\ContentDeliveryManager", "RotatingLockScreenOverlayEnabled"),
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\ContentDeliveryManager", "SoftLandingEnabled"),
-                
-                # Lock screen suggestions
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\ContentDeliveryManager", "SubscribedContent-310093Enabled"),
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\ContentDeliveryManager", "SubscribedContent-338389Enabled"),
-                
-                # Tips & tricks
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\UserProfileEngagement", "ScoobeSystemSettingEnabled"),
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\UserProfileEngagement", "ScoobeSystemSettingEnabled"),
-                
-                # Background apps
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\BackgroundAccessApplications", "GlobalUserDisabled"),
-                
-                # Speech recognition
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Privacy", "AllowInputPersonalization"),
-                
-                # Inking & typing personalization
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Privacy", "AllowInputPersonalization"),
-                
-                # Error reporting
-                ("HKLM", "SOFTWARE\\Microsoft\\Windows\\Windows Error Reporting", "Disabled"),
-                ("HKLM", "SOFTWARE\\Policies\\Microsoft\\Windows\\Windows Error Reporting", "Disabled"),
-                
-                # Diagnostic data
-                ("HKLM", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Policies\\DataCollection", "AllowDeviceNameInTelemetry"),
-                ("HKLM", "SOFTWARE\\Policies\\Microsoft\\Windows\\DataCollection", "AllowDeviceNameInTelemetry"),
-                
-                # Windows Update Delivery Optimization (P2P)
-                ("HKLM", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\DeliveryOptimization\\Config", "DODownloadMode"),
-                ("HKLM", "SOFTWARE\\Policies\\Microsoft\\Windows\\DeliveryOptimization", "DODownloadMode"),
-                
-                # Widgets (Windows 11)
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Explorer\\Advanced", "TaskbarDa"),
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Explorer\\Advanced", "TaskbarMn"),
-                
-                # Feedback & suggestions
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\UserProfileEngagement", "ScoobeSystemSettingEnabled"),
-            ]
-            
-            changes_count = 0
-            for hkey_name, key_path, value_name in background_paths:
-                try:
-                    hkey = winreg.HKEY_LOCAL_MACHINE if hkey_name == "HKLM" else winreg.HKEY_CURRENT_USER
-                    
-                    try:
-                        key = winreg.OpenKey(hkey, key_path, 0, winreg.KEY_WRITE)
-                    except FileNotFoundError:
-                        key_parts = key_path.split("\\")
-                        current_key = hkey
-                        for part in key_parts:
-                            try:
-                                current_key = winreg.OpenKey(current_key, part, 0, winreg.KEY_WRITE)
-                            except FileNotFoundError:
-                                current_key = winreg.CreateKey(current_key, part)
-                        key = winreg.OpenKey(hkey, key_path, 0, winreg.KEY_WRITE)
-                    
-                    # Değer tipine göre ayarla
-                    if "DODownloadMode" in value_name:
-                        winreg.SetValueEx(key, value_name, 0, winreg.REG_DWORD, 0)  # 0 = Disabled
-                    elif "Disabled" in value_name or "Enabled" in value_name:
-                        winreg.SetValueEx(key, value_name, 0, winreg.REG_DWORD, 1 if "Disabled" in value_name else 0)
-                    else:
-                        winreg.SetValueEx(key, value_name, 0, winreg.REG_DWORD, 0)
-                    
-                    winreg.CloseKey(key)
-                    changes_count += 1
-                except:
-                    pass
+            # Arka plan veri toplama ayarları: Activity History, Start/Spotlight önerileri,
+            # arka plan uygulamaları, hata raporlama, Delivery Optimization (P2P), Widgets
+            changes_count, _ = self._apply_categories(
+                "activity_history", "content_delivery", "background_apps",
+                "error_reporting", "delivery_optimization", "widgets",
+            )
             
             self.changes.append(f"Arka plan veri toplama kapatıldı ({changes_count} ayar)")
             return True
@@ -328,43 +131,19 @@ sc config dmwappushservice start= disabled >nul 2>&1
     def disable_widgets(self):
         """Windows 11 Widgets'ı kapat"""
         try:
-            import winreg
-            import subprocess
-            
             # Widgets servislerini durdur (farklı isimlerle olabilir)
             widget_services = ["WidgetsService", "widgets", "Widgets"]
+            control = get_service_control()
             for service in widget_services:
                 try:
-                    # Servis var mı kontrol et
-                    result = subprocess.run(["sc", "query", service], capture_output=True, timeout=5, check=False)
-                    if result.returncode == 0:
-                        # Servis varsa durdur ve devre dışı bırak
-                        subprocess.run(["sc", "stop", service], capture_output=True, timeout=5, check=False)
-                        subprocess.run(["sc", "config", service, "start=", "disabled"], capture_output=True, timeout=5, check=False)
+                    # Servis varsa durdur ve devre dışı bırak
+                    if control.exists(service):
+                        control.disable(service)
                 except:
                     pass
             
             # Widgets kayıt defteri ayarları
-            widgets_paths = [
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Explorer\\Advanced", "TaskbarDa"),
-                ("HKCU", "SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Explorer\\Advanced", "TaskbarMn"),
-            ]
-            
-            changes_count = 0
-            for hkey_name, key_path, value_name in widgets_paths:
-                try:
-                    hkey = winreg.HKEY_CURRENT_USER
-                    try:
-                        key = winreg.OpenKey(hkey, key_path, 0, winreg.KEY_WRITE)
-                    except FileNotFoundError:
-                        key = winreg.CreateKey(hkey, key_path)
-                        key = winreg.OpenKey(hkey, key_path, 0, winreg.KEY_WRITE)
-                    
-                    winreg.SetValueEx(key, value_name, 0, winreg.REG_DWORD, 0)
-                    winreg.CloseKey(key)
-                    changes_count += 1
-                except:
-                    pass
+            changes_count, _ = self._apply_categories("widgets")
             
             self.changes.append(f"Widgets kapatıldı ({changes_count} ayar)")
             return True
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+.reg Derleyici / Ayrıştırıcı
+
+Kayıt defteri planını tek bir `.reg` belgesine derler; tek `reg import` çağrısıyla
+uygulanır (değer başına API çağrısı yok, pywin32/winreg yüklemeye gerek yok).
+- Tipler: dword, sz ("..."), hex(b) qword, hex(7) multi_sz, hex(2) expand_sz, hex binary
+- Kaçış: ad ve sz içinde \\ ve " kaçırılır; satır sonu içeren sz hex(1) olarak yazılır
+- Ters belge: backup_registry() çıktısından (eskiden yoksa "ad"=- ile silme)
+- Ayrıştırıcı: üretilen belge Linux'ta geri okunarak doğrulanır (round-trip)
+
+Kullanım:
+    python -m modules.reg_file --plan plan.reg [--scheduler]
+    python -m modules.reg_file --inverse backup.json restore.reg
+    python -m modules.reg_file --verify plan.reg
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import sys
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from modules.command_runner import CommandResult, CommandRunner, get_command_runner
+from modules.registry_batch import get_key_cache
+from modules.tweak_catalog import same_value, tweak_ident
+
+
+HEADER = "Windows Registry Editor Version 5.00"
+NEWLINE = "\r\n"
+LINE_WIDTH = 80
+
+# Değer tipleri (winreg.REG_* ile aynı sayılar)
+REG_SZ = 1
+REG_EXPAND_SZ = 2
+REG_BINARY = 3
+REG_DWORD = 4
+REG_MULTI_SZ = 7
+REG_QWORD = 11
+
+HIVE_NAMES = {
+    "HKLM": "HKEY_LOCAL_MACHINE",
+    "HKCU": "HKEY_CURRENT_USER",
+    "HKU": "HKEY_USERS",
+    "HKCR": "HKEY_CLASSES_ROOT",
+}
+_HIVE_SHORT = {long: short for short, long in HIVE_NAMES.items()}
+
+
+class RegFileError(ValueError):
+    """Ayrıştırılamayan .reg içeriği"""
+
+
+@dataclass
+class RegEntry:
+    """Tek .reg satırı (delete=True -> "ad"=- / [-anahtar])"""
+    key_path: str          # kısa hive ile: HKLM\\SOFTWARE\\...
+    name: Optional[str]    # None -> anahtarın kendisi (sadece [-anahtar] için)
+    vtype: Optional[int] = None
+    data: Any = None
+    delete: bool = False
+
+
+# --- Derleme ---
+
+def _long_key(key_path: str) -> str:
+    hive, _, subkey = key_path.partition("\\")
+    long_hive = HIVE_NAMES.get(hive.upper())
+    if long_hive is None:
+        raise RegFileError(f"Bilinmeyen hive: {key_path}")
+    return f"{long_hive}\\{subkey}" if subkey else long_hive
+
+
+def _quote(text: str) -> str:
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _name_token(name: str) -> str:
+    return "@" if name == "" else _quote(name)
+
+
+def _hex_lines(prefix: str, data: bytes) -> List[str]:
+    """regedit biçimi: virgülle ayrılmış hex, 80 sütunda ',\\' ile bölünmüş"""
+    tokens = [f"{b:02x}" for b in data]
+    lines: List[str] = []
+    line = prefix
+    for index, token in enumerate(tokens):
+        piece = token + ("," if index < len(tokens) - 1 else "")
+        if len(line) + len(piece) > LINE_WIDTH - 3 and line.strip() and line != prefix:
+            lines.append(line + "\\")
+            line = "  "
+        line += piece
+    lines.append(line)
+    return lines
+
+
+def _utf16z(text: str) -> bytes:
+    return (text + "\x00").encode("utf-16-le")
+
+
+def encode_value_lines(name: str, vtype: int, data: Any) -> List[str]:
+    """Tek değerin .reg satır(lar)ı"""
+    head = _name_token(name) + "="
+    if vtype == REG_DWORD:
+        return [f"{head}dword:{int(data) & 0xFFFFFFFF:08x}"]
+    if vtype == REG_SZ:
+        text = str(data)
+        if "\r" in text or "\n" in text or "\x00" in text:
+            return _hex_lines(f"{head}hex(1):", _utf16z(text))
+        return [head + _quote(text)]
+    if vtype == REG_EXPAND_SZ:
+        return _hex_lines(f"{head}hex(2):", _utf16z(str(data)))
+    if vtype == REG_MULTI_SZ:
+        payload = "".join(str(s) + "\x00" for s in (data or [])) + "\x00"
+        return _hex_lines(f"{head}hex(7):", payload.encode("utf-16-le"))
+    if vtype == REG_QWORD:
+        return _hex_lines(f"{head}hex(b):", struct.pack("<Q", int(data) & 0xFFFFFFFFFFFFFFFF))
+    raw = bytes(data or b"") if not isinstance(data, (list, tuple)) else bytes(data)
+    prefix = f"{head}hex:" if vtype == REG_BINARY else f"{head}hex({vtype:x}):"
+    return _hex_lines(prefix, raw)
+
+
+def compile_reg(optimizations: Iterable[Tuple[str, str, int, Any]]) -> str:
+    """(key_path, value_name, type, data) listesini anahtar bazında gruplanmış .reg'e derle"""
+    groups: Dict[str, Tuple[str, List[str]]] = {}
+    seen = set()
+    for key_path, value_name, value_type, value_data in optimizations:
+        ident = tweak_ident(key_path, value_name)
+        if ident in seen:
+            continue
+        seen.add(ident)
+        long_key = _long_key(key_path)
+        lines = groups.setdefault(long_key.lower(), (long_key, []))[1]
+        lines.extend(encode_value_lines(value_name, value_type, value_data))
+    return _render(groups)
+
+
+def compile_inverse(backup_items: Iterable[Dict[str, Any]]) -> str:
+    """
+    backup_registry() öğelerinden geri yükleme .reg'i:
+    eskiden vardı -> eski tip/veri, yoktu -> "ad"=- (değeri sil)
+    """
+    groups: Dict[str, Tuple[str, List[str]]] = {}
+    seen = set()
+    for item in backup_items:
+        key_path, value_name = item.get("path"), item.get("value")
+        if not key_path or value_name is None:
+            continue
+        ident = tweak_ident(key_path, value_name)
+        if ident in seen:
+            continue
+        seen.add(ident)
+        long_key = _long_key(key_path)
+        lines = groups.setdefault(long_key.lower(), (long_key, []))[1]
+        if item.get("exists") and item.get("type") is not None:
+            lines.extend(encode_value_lines(value_name, int(item["type"]), item.get("data")))
+        else:
+            lines.append(_name_token(value_name) + "=-")
+    return _render(groups)
+
+
+def _render(groups: Dict[str, Tuple[str, List[str]]]) -> str:
+    out = [HEADER, ""]
+    for long_key, lines in groups.values():
+        out.append(f"[{long_key}]")
+        out.extend(lines)
+        out.append("")
+    return NEWLINE.join(out) + NEWLINE
+
+
+def to_bytes(text: str) -> bytes:
+    """regedit biçimi: UTF-16 LE + BOM"""
+    return b"\xff\xfe" + text.encode("utf-16-le")
+
+
+def write_reg_file(path: str, text: str) -> str:
+    with open(path, "wb") as f:
+        f.write(to_bytes(text))
+    return path
+
+
+# --- Ayrıştırma ---
+
+def _decode(raw: bytes) -> str:
+    if raw.startswith(b"\xff\xfe"):
+        return raw[2:].decode("utf-16-le")
+    if raw.startswith(b"\xef\xbb\xbf"):
+        return raw[3:].decode("utf-8")
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return raw.decode("latin-1")
+
+
+def _logical_lines(text: str) -> List[str]:
+    """Hex devam satırlarını (',\\' ile biten) birleştir"""
+    lines: List[str] = []
+    pending = ""
+    for raw in text.splitlines():
+        line = raw.strip() if pending else raw.rstrip()
+        if line.endswith("\\") and not line.endswith('"') and "=hex" in (pending + line):
+            pending += line[:-1]
+            continue
+        lines.append(pending + line)
+        pending = ""
+    if pending:
+        lines.append(pending)
+    return lines
+
+
+def _read_quoted(text: str, start: int) -> Tuple[str, int]:
+    """text[start] == '"' -> (çözülmüş metin, kapanış tırnağından sonraki indeks)"""
+    out = []
+    i = start + 1
+    while i < len(text):
+        ch = text[i]
+        if ch == "\\" and i + 1 < len(text):
+            out.append(text[i + 1])
+            i += 2
+            continue
+        if ch == '"':
+            return "".join(out), i + 1
+        out.append(ch)
+        i += 1
+    raise RegFileError(f"Kapanmayan tırnak: {text}")
+
+
+def _decode_hex(vtype: int, hex_text: str) -> Any:
+    raw = bytes(int(b, 16) for b in hex_text.replace(" ", "").split(",") if b)
+    if vtype in (REG_SZ, REG_EXPAND_SZ):
+        return raw.decode("utf-16-le").split("\x00", 1)[0]
+    if vtype == REG_MULTI_SZ:
+        return [s for s in raw.decode("utf-16-le").split("\x00") if s]
+    if vtype == REG_QWORD:
+        return struct.unpack("<Q", raw.ljust(8, b"\x00")[:8])[0]
+    if vtype == REG_DWORD:
+        return struct.unpack("<I", raw.ljust(4, b"\x00")[:4])[0]
+    return raw
+
+
+def parse_reg(content) -> List[RegEntry]:
+    """.reg içeriğini (str veya bayt) ayrıştır"""
+    text = _decode(content) if isinstance(content, (bytes, bytearray)) else content
+    lines = _logical_lines(text)
+    if not lines or lines[0].lstrip("﻿").strip() not in (HEADER, "REGEDIT4"):
+        raise RegFileError("Geçersiz .reg başlığı")
+
+    entries: List[RegEntry] = []
+    key: Optional[str] = None
+    for line in lines[1:]:
+        line = line.strip()
+        if not line or line.startswith(";"):
+            continue
+        if line.startswith("["):
+            if not line.endswith("]"):
+                raise RegFileError(f"Geçersiz anahtar satırı: {line}")
+            body = line[1:-1]
+            delete = body.startswith("-")
+            long_hive, _, subkey = body.lstrip("-").partition("\\")
+            short = _HIVE_SHORT.get(long_hive.upper())
+            if short is None:
+                raise RegFileError(f"Bilinmeyen hive: {long_hive}")
+            key = f"{short}\\{subkey}" if subkey else short
+            if delete:
+                entries.append(RegEntry(key, None, delete=True))
+                key = None
+            continue
+        if key is None:
+            raise RegFileError(f"Anahtarsız değer satırı: {line}")
+
+        if line.startswith("@"):
+            name, rest = "", line[1:]
+        elif line.startswith('"'):
+            name, end = _read_quoted(line, 0)
+            rest = line[end:]
+        else:
+            raise RegFileError(f"Geçersiz değer satırı: {line}")
+        if not rest.startswith("="):
+            raise RegFileError(f"'=' bekleniyordu: {line}")
+        value = rest[1:].strip()
+
+        if value == "-":
+            entries.append(RegEntry(key, name, delete=True))
+        elif value.startswith('"'):
+            data, _ = _read_quoted(value, 0)
+            entries.append(RegEntry(key, name, REG_SZ, data))
+        elif value.lower().startswith("dword:"):
+            entries.append(RegEntry(key, name, REG_DWORD, int(value[6:], 16)))
+        elif value.lower().startswith("hex("):
+            close = value.index(")")
+            vtype = int(value[4:close], 16)
+            entries.append(RegEntry(key, name, vtype, _decode_hex(vtype, value[close + 2:])))
+        elif value.lower().startswith("hex:"):
+            entries.append(RegEntry(key, name, REG_BINARY, _decode_hex(REG_BINARY, value[4:])))
+        else:
+            raise RegFileError(f"Bilinmeyen değer biçimi: {line}")
+    return entries
+
+
+def roundtrip_errors(optimizations: Iterable[Tuple[str, str, int, Any]], content) -> List[str]:
+    """Derlenen belge geri okununca plana birebir eşit mi? Farkları döner (boş = doğru)"""
+    parsed = {tweak_ident(e.key_path, e.name): e for e in parse_reg(content) if e.name is not None}
+    errors: List[str] = []
+    expected = set()
+    for key_path, value_name, value_type, value_data in optimizations:
+        ident = tweak_ident(key_path, value_name)
+        expected.add(ident)
+        entry = parsed.get(ident)
+        if entry is None or entry.delete:
+            errors.append(f"Eksik: {key_path}\\{value_name}")
+        elif not same_value(entry.vtype, entry.data, value_type, value_data):
+            errors.append(f"Farklı: {key_path}\\{value_name}: {entry.vtype}/{entry.data!r} != {value_type}/{value_data!r}")
+    for ident in set(parsed) - expected:
+        errors.append(f"Fazla: {ident}")
+    return errors
+
+
+# --- Uygulama ---
+
+def import_reg_text(text: str, runner: Optional[CommandRunner] = None, timeout: float = 60.0) -> CommandResult:
+    """Belgeyi geçici dosyaya yazıp tek `reg import` ile uygula"""
+    fd, path = tempfile.mkstemp(suffix=".reg", prefix="optimizer_")
+    os.close(fd)
+    try:
+        write_reg_file(path, text)
+        return (runner or get_command_runner()).run(["reg", "import", path], timeout=timeout)
+    finally:
+        # reg import anahtar oluşturmuş olabilir: "yok" bilgisi artık geçersiz
+        try:
+            get_key_cache().forget_missing()
+        except (ImportError, OSError):
+            pass  # arka uç yüklenemedi: temizlenecek cache yok
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if len(argv) >= 2 and argv[0] == "--plan":
+        from modules.registry import RegistryOptimizer
+
+        optimizer = RegistryOptimizer()
+        optimizer.apply_scheduler_tweaks = "--scheduler" in argv
+        optimizations = optimizer._get_optimizations(include_scheduler=optimizer.apply_scheduler_tweaks)
+        text = compile_reg(optimizations)
+        write_reg_file(argv[1], text)
+        errors = roundtrip_errors(optimizations, to_bytes(text))
+        status = "✅" if not errors else "⚠️ "
+        print(f"   {status} {argv[1]}: {len(optimizations)} değer, round-trip {'OK' if not errors else 'HATA'}")
+        for error in errors:
+            print(f"      ⚠️  {error}")
+        return 1 if errors else 0
+
+    if len(argv) >= 3 and argv[0] == "--inverse":
+        with open(argv[1], "r", encoding="utf-8") as f:
+            backup = json.load(f)
+        items = (backup.get("registry") or backup).get("items") or []
+        write_reg_file(argv[2], compile_inverse(items))
+        print(f"   ✅ {argv[2]}: {len(items)} değer (geri yükleme)")
+        return 0
+
+    if len(argv) >= 2 and argv[0] == "--verify":
+        with open(argv[1], "rb") as f:
+            entries = parse_reg(f.read())
+        print(f"   ✅ {argv[1]}: {len(entries)} satır ayrıştırıldı")
+        return 0
+
+    print("Kullanım: python -m modules.reg_file --plan OUT.reg [--scheduler] | "
+          "--inverse BACKUP.json OUT.reg | --verify FILE.reg")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
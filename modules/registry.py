@@ -5,225 +5,114 @@ Windows Kayıt Defteri Optimizasyonu
 Performans ve gizlilik için kayıt defteri ayarları
 """
 
-# winreg modülü optimize() fonksiyonunda import ediliyor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from modules.registry_backend import get_registry_backend
+from modules.registry_batch import RegistryBatch, get_key_cache, split_key_path
+from modules.tweak_catalog import get_applied_tweaks, get_catalog, same_value
+
+
+# (key_path, value_name, value_type, value_data)
+Optimization = Tuple[str, str, int, Any]
+
+
+@dataclass
+class RegistryPlan:
+    """Hedef değerler ile mevcut değerlerin farkı (sadece `apply` yazılır)"""
+    apply: List[Optimization] = field(default_factory=list)
+    compliant: List[Optimization] = field(default_factory=list)
+
 
 class RegistryOptimizer:
     """Kayıt defteri optimizasyonu"""
     
+    # Bu modülün uyguladığı katalog kategorileri (modules/tweak_catalog.py)
+    CATEGORIES = (
+        "telemetry", "windows_update", "delivery_optimization", "activity_history",
+        "gaming", "game_dvr", "system", "advertising", "location", "background_apps",
+        "onedrive", "ui", "web_search", "scheduler",
+    )
+    
     def __init__(self):
         self.changes = []
         self.registry_backup = {}
         # Opt-in flags (optimize.py tarafında set edilebilir)
         self.apply_scheduler_tweaks = False
+        # Farklı değerleri değer başına API yerine tek `reg import` ile yaz (--reg-import).
+        # winreg arka ucu yüklenemezse zaten bu yola düşülür.
+        self.use_reg_import = False
+        # Son optimize() sayımları: zaten uygun / değiştirilen / başarısız
+        self.last_counts: Dict[str, int] = {"compliant": 0, "changed": 0, "failed": 0}
 
-    def _get_optimizations(self, include_scheduler: bool):
-        """Uygulanacak registry değişikliklerini tek yerden üret (backup/restore için)"""
-        import winreg
-
-        base = [
-            # Telemetri kapatma (tüm konumlar - Windows'un tekrar açmasını engellemek için)
-            ("HKLM\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Policies\\DataCollection",
-             "AllowTelemetry", winreg.REG_DWORD, 0),
-            ("HKLM\\SOFTWARE\\Policies\\Microsoft\\Windows\\DataCollection",
-             "AllowTelemetry", winreg.REG_DWORD, 0),
-            ("HKLM\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Policies\\DataCollection",
-             "MaxTelemetryAllowed", winreg.REG_DWORD, 0),
-            ("HKLM\\SOFTWARE\\Policies\\Microsoft\\Windows\\DataCollection",
-             "MaxTelemetryAllowed", winreg.REG_DWORD, 0),
-            ("HKLM\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Policies\\DataCollection",
-             "DoNotShowFeedbackNotifications", winreg.REG_DWORD, 1),
-            ("HKCU\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Privacy",
-             "TailoredExperiencesWithDiagnosticDataEnabled", winreg.REG_DWORD, 0),
-            ("HKCU\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Privacy",
-             "AllowInputPersonalization", winreg.REG_DWORD, 0),
-
-            # Windows Update UX
-            ("HKLM\\SOFTWARE\\Microsoft\\WindowsUpdate\\UX\\Settings",
-             "UxOption", winreg.REG_DWORD, 1),
-
-            # Windows Update Delivery Optimization (P2P - veri hortumlama)
-            ("HKLM\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\DeliveryOptimization\\Config",
-             "DODownloadMode", winreg.REG_DWORD, 0),
-            ("HKLM\\SOFTWARE\\Policies\\Microsoft\\Windows\\DeliveryOptimization",
-             "DODownloadMode", winreg.REG_DWORD, 0),
-
-            # Activity History (Timeline)
-            ("HKLM\\SOFTWARE\\Policies\\Microsoft\\Windows\\System",
-             "EnableActivityFeed", winreg.REG_DWORD, 0),
-            ("HKLM\\SOFTWARE\\Policies\\Microsoft\\Windows\\System",
-             "PublishUserActivities", winreg.REG_DWORD, 0),
-            ("HKLM\\SOFTWARE\\Policies\\Microsoft\\Windows\\System",
-             "UploadUserActivities", winreg.REG_DWORD, 0),
-
-            # Game Mode
-            ("HKCU\\SOFTWARE\\Microsoft\\GameBar",
-             "AllowAutoGameMode", winreg.REG_DWORD, 1),
-            ("HKCU\\SOFTWARE\\Microsoft\\GameBar",
-             "AutoGameModeEnabled", winreg.REG_DWORD, 1),
-
-            # GPU Scheduling
-            ("HKLM\\SYSTEM\\CurrentControlSet\\Control\\GraphicsDrivers",
-             "HwSchMode", winreg.REG_DWORD, 2),
-
-            # Windows Search start type (manual)
-            ("HKLM\\SYSTEM\\CurrentControlSet\\Services\\WSearch",
-             "Start", winreg.REG_DWORD, 3),
-
-            # Prefetch (SSD için)
-            ("HKLM\\SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Memory Management\\PrefetchParameters",
-             "EnableSuperfetch", winreg.REG_DWORD, 0),
-            ("HKLM\\SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Memory Management\\PrefetchParameters",
-             "EnablePrefetcher", winreg.REG_DWORD, 0),
-
-            # Advertising ID
-            ("HKCU\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\AdvertisingInfo",
-             "Enabled", winreg.REG_DWORD, 0),
-            ("HKLM\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\AdvertisingInfo",
-             "Enabled", winreg.REG_DWORD, 0),
-
-            # Location consent
-            ("HKLM\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\CapabilityAccessManager\\ConsentStore\\location",
-             "Value", winreg.REG_SZ, "Deny"),
-
-            # Network throttling kapatma (oyun)
-            ("HKLM\\SOFTWARE\\Microsoft\\Windows NT\\CurrentVersion\\Multimedia\\SystemProfile",
-             "NetworkThrottlingIndex", winreg.REG_DWORD, 0xFFFFFFFF),
-
-            # Timer resolution requests
-            ("HKLM\\SYSTEM\\CurrentControlSet\\Control\\Session Manager\\kernel",
-             "GlobalTimerResolutionRequests", winreg.REG_DWORD, 1),
-
-            # Fast startup kapatma
-            ("HKLM\\SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Power",
-             "HiberbootEnabled", winreg.REG_DWORD, 0),
+    def _profiles(self, include_scheduler: bool) -> List[str]:
+        return ["scheduler"] if include_scheduler else []
 
-            # GameDVR/Capture kapatma (clip kullanmıyorsanız)
-            ("HKLM\\SOFTWARE\\Policies\\Microsoft\\Windows\\GameDVR",
-             "AllowGameDVR", winreg.REG_DWORD, 0),
-            ("HKCU\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\GameDVR",
-             "AppCaptureEnabled", winreg.REG_DWORD, 0),
-            ("HKCU\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\GameDVR",
-             "AudioCaptureEnabled", winreg.REG_DWORD, 0),
-            ("HKCU\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\GameDVR",
-             "CursorCaptureEnabled", winreg.REG_DWORD, 0),
-            ("HKCU\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\GameDVR",
-             "HistoricalCaptureEnabled", winreg.REG_DWORD, 0),
-            ("HKCU\\SYSTEM\\GameConfigStore",
-             "GameDVR_Enabled", winreg.REG_DWORD, 0),
-
-            # Background apps policy
-            ("HKLM\\SOFTWARE\\Policies\\Microsoft\\Windows\\AppPrivacy",
-             "LetAppsRunInBackground", winreg.REG_DWORD, 2),
-
-            # OneDrive sync kapatma (policy)
-            ("HKLM\\SOFTWARE\\Policies\\Microsoft\\Windows\\OneDrive",
-             "DisableFileSyncNGSC", winreg.REG_DWORD, 1),
-
-            # Xbox Game Bar UI/overlay disable (kayıt/clip kullanılmıyorsa)
-            ("HKCU\\SOFTWARE\\Microsoft\\GameBar",
-             "ShowStartupPanel", winreg.REG_DWORD, 0),
-            ("HKCU\\SOFTWARE\\Microsoft\\GameBar",
-             "UseNexusForGameBarEnabled", winreg.REG_DWORD, 0),
-            ("HKCU\\SOFTWARE\\Microsoft\\GameBar",
-             "GamePanelStartupTipIndex", winreg.REG_DWORD, 3),
-
-            # Bildirim/toast kapatma (agresif)
-            ("HKCU\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\PushNotifications",
-             "ToastEnabled", winreg.REG_DWORD, 0),
-
-            # Focus Assist (Quiet Hours) - agresif şekilde kapalı/otomatik sessiz mod
-            ("HKCU\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Notifications\\Settings",
-             "NOC_GLOBAL_SETTING_TOASTS_ENABLED", winreg.REG_DWORD, 0),
-
-            # UI: transparanlık/animasyon kapatma
-            ("HKCU\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Themes\\Personalize",
-             "EnableTransparency", winreg.REG_DWORD, 0),
-            ("HKCU\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Explorer\\Advanced",
-             "TaskbarAnimations", winreg.REG_DWORD, 0),
-
-            # Search: web/bing arama kapatma (arka plan/network azaltır)
-            ("HKLM\\SOFTWARE\\Policies\\Microsoft\\Windows\\Windows Search",
-             "DisableWebSearch", winreg.REG_DWORD, 1),
-            ("HKLM\\SOFTWARE\\Policies\\Microsoft\\Windows\\Windows Search",
-             "ConnectedSearchUseWeb", winreg.REG_DWORD, 0),
-            ("HKLM\\SOFTWARE\\Policies\\Microsoft\\Windows\\Windows Search",
-             "ConnectedSearchPrivacy", winreg.REG_DWORD, 3),
-            ("HKCU\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Search",
-             "BingSearchEnabled", winreg.REG_DWORD, 0),
-        ]
-
-        if not include_scheduler:
-            return base
-
-        scheduler = [
-            ("HKLM\\SYSTEM\\CurrentControlSet\\Control\\PriorityControl",
-             "Win32PrioritySeparation", winreg.REG_DWORD, 0x26),
-            ("HKLM\\SOFTWARE\\Microsoft\\Windows NT\\CurrentVersion\\Multimedia\\SystemProfile",
-             "SystemResponsiveness", winreg.REG_DWORD, 10),
-            ("HKLM\\SOFTWARE\\Microsoft\\Windows NT\\CurrentVersion\\Multimedia\\SystemProfile\\Tasks\\Games",
-             "Scheduling Category", winreg.REG_SZ, "High"),
-            ("HKLM\\SOFTWARE\\Microsoft\\Windows NT\\CurrentVersion\\Multimedia\\SystemProfile\\Tasks\\Games",
-             "SFIO Priority", winreg.REG_SZ, "High"),
-            ("HKLM\\SOFTWARE\\Microsoft\\Windows NT\\CurrentVersion\\Multimedia\\SystemProfile\\Tasks\\Games",
-             "Priority", winreg.REG_DWORD, 6),
-            ("HKLM\\SOFTWARE\\Microsoft\\Windows NT\\CurrentVersion\\Multimedia\\SystemProfile\\Tasks\\Games",
-             "GPU Priority", winreg.REG_DWORD, 8),
-        ]
-        return base + scheduler
+    def _get_optimizations(self, include_scheduler: bool):
+        """Uygulanacak registry değişiklikleri (tek kaynak: tweak kataloğu)"""
+        tweaks = get_catalog().select(self.CATEGORIES, self._profiles(include_scheduler))
+        return [tweak.as_optimization() for tweak in tweaks]
 
     def _read_registry_value(self, key_path: str, value_name: str):
-        """Mevcut değeri oku. (exists, type, data) döndürür."""
-        import winreg
-        if key_path.startswith("HKLM\\"):
-            hkey = winreg.HKEY_LOCAL_MACHINE
-            subkey = key_path[5:]
-        elif key_path.startswith("HKCU\\"):
-            hkey = winreg.HKEY_CURRENT_USER
-            subkey = key_path[5:]
-        else:
+        """Mevcut değeri oku. (exists, type, data) döndürür. Anahtar handle'ı paylaşılan cache'ten."""
+        hive, subkey = split_key_path(key_path)
+        if hive not in ("HKLM", "HKCU"):
             return (False, None, None)
         try:
-            key = winreg.OpenKey(hkey, subkey, 0, winreg.KEY_READ)
-            data, vtype = winreg.QueryValueEx(key, value_name)
-            winreg.CloseKey(key)
+            cache = get_key_cache()
+            key = cache.open(hive, subkey, "r")
+            data, vtype = cache.backend.query_value(key, value_name)
             return (True, vtype, data)
         except FileNotFoundError:
             return (False, None, None)
         except OSError:
             return (False, None, None)
     
+    def plan(self, readout: Optional[List[Dict[str, Any]]] = None,
+             optimizations: Optional[List[Optimization]] = None,
+             reader=None) -> RegistryPlan:
+        """
+        Hedefleri mevcut değerlerle karşılaştır; sadece farklı olanlar `apply`'a girer.
+        readout: backup_registry() formatındaki okuma ({path, value, exists, type, data}).
+        Verilmezse (veya hedef okumada yoksa) değer şimdi okunur.
+        reader: (key_path, value_name) -> (exists, type, data); varsayılan canlı kayıt defteri
+        (çevrimdışı imaj için OfflineImage.read_value).
+        """
+        reader = reader or self._read_registry_value
+        if optimizations is None:
+            optimizations = self._get_optimizations(include_scheduler=bool(self.apply_scheduler_tweaks))
+        known = {
+            (item["path"].lower(), item["value"].lower()): item
+            for item in (readout or [])
+        }
+        
+        result = RegistryPlan()
+        for key_path, value_name, value_type, value_data in optimizations:
+            item = known.get((key_path.lower(), value_name.lower()))
+            if item is not None:
+                exists, vtype, data = item.get("exists"), item.get("type"), item.get("data")
+            else:
+                exists, vtype, data = reader(key_path, value_name)
+            entry = (key_path, value_name, value_type, value_data)
+            if exists and same_value(vtype, data, value_type, value_data):
+                result.compliant.append(entry)
+            else:
+                result.apply.append(entry)
+        return result
+    
     def set_registry_value(self, key_path, value_name, value_type, value_data):
-        """Kayıt defteri değeri ayarla"""
+        """Kayıt defteri değeri ayarla (tek değer; anahtar handle'ı paylaşılan cache'ten)"""
         try:
-            import winreg
-            
-            # HKEY_LOCAL_MACHINE için
-            if key_path.startswith("HKLM\\"):
-                hkey = winreg.HKEY_LOCAL_MACHINE
-                subkey = key_path[5:]  # "HKLM\\" kısmını kaldır
-            elif key_path.startswith("HKCU\\"):
-                hkey = winreg.HKEY_CURRENT_USER
-                subkey = key_path[5:]  # "HKCU\\" kısmını kaldır
-            else:
+            if split_key_path(key_path)[0] not in ("HKLM", "HKCU"):
                 return False
             
-            # Anahtarı aç veya oluştur
-            try:
-                key = winreg.OpenKey(hkey, subkey, 0, winreg.KEY_WRITE)
-            except FileNotFoundError:
-                # Anahtar yoksa oluştur
-                key_parts = subkey.split("\\")
-                for i in range(1, len(key_parts) + 1):
-                    partial_path = "\\".join(key_parts[:i])
-                    try:
-                        winreg.OpenKey(hkey, partial_path, 0, winreg.KEY_WRITE)
-                    except FileNotFoundError:
-                        winreg.CreateKey(hkey, partial_path)
-                key = winreg.OpenKey(hkey, subkey, 0, winreg.KEY_WRITE)
-            
-            # Değeri yaz
-            winreg.SetValueEx(key, value_name, 0, value_type, value_data)
-            winreg.CloseKey(key)
+            batch = RegistryBatch()
+            batch.add(key_path, value_name, value_type, value_data)
+            result = batch.commit()
+            error = result.error_for(key_path, value_name)
+            if error:
+                print(f"      ⚠️  {key_path}\\{value_name}: {error}")
+                return False
             
             self.changes.append({
                 "type": "registry",
@@ -238,9 +127,10 @@ class RegistryOptimizer:
     
     def backup_registry(self):
         """Kayıt defteri değerlerini yedekle"""
-        # Scheduler flag'inden bağımsız olarak tüm olası dokunacağımız değerleri yedekle
+        # Profil/modülden bağımsız olarak katalogdaki tüm değerleri yedekle (tek yetkili liste)
         backup_items = []
-        for key_path, value_name, _value_type, _value_data in self._get_optimizations(include_scheduler=True):
+        for tweak in get_catalog().select():
+            key_path, value_name = tweak.key_path, tweak.value
             exists, vtype, data = self._read_registry_value(key_path, value_name)
             backup_items.append({
                 "path": key_path,
@@ -254,21 +144,147 @@ class RegistryOptimizer:
         }
         return self.registry_backup
     
-    def optimize(self):
-        """Kayıt defteri optimizasyonlarını uygula"""
-        import winreg
+    def optimize(self, batch=None):
+        """
+        Kayıt defteri optimizasyonlarını uygula (önce fark, sonra sadece farklı değerler).
+        Değerler anahtar bazında gruplanıp tek commit ile yazılır; `batch` verilirse
+        değerler o batch'e eklenir (başka modüllerin yazmalarıyla birlikte commit edilir).
+        
+        Not: Fark, backup okumasıyla değil plan anında okunur; backup ile bu adım arasında
+        servis optimizasyonu (örn. WSearch\\Start) aynı değerleri değiştirebilir.
+        
+        use_reg_import açıksa (veya winreg arka ucu yüklenemiyorsa) farklı değerler tek
+        `reg import` ile yazılır (_optimize_reg_import); `batch` bu yolda kullanılmaz.
+        """
         changes = []
         
         print("   📋 Kayıt defteri ayarları uygulanıyor...")
-        optimizations = self._get_optimizations(include_scheduler=bool(self.apply_scheduler_tweaks))
+        readable = True
+        try:
+            get_registry_backend()
+        except (ImportError, OSError) as e:
+            readable = False
+            print(f"      ℹ️  Kayıt defteri arka ucu yüklenemedi ({e}); plan tek reg import ile uygulanacak")
         
-        for key_path, value_name, value_type, value_data in optimizations:
+        # Bu çalışmada başka modülün zaten uyguladığı değerler atlanır
+        catalog = get_catalog()
+        applied = get_applied_tweaks()
+        tweaks = applied.claim(catalog.select(self.CATEGORIES, self._profiles(bool(self.apply_scheduler_tweaks))))
+        if self.use_reg_import or not readable:
+            return self._optimize_reg_import([tweak.as_optimization() for tweak in tweaks], readable)
+        delta = self.plan(optimizations=[tweak.as_optimization() for tweak in tweaks])
+        self.last_counts = {"compliant": len(delta.compliant), "changed": 0, "failed": 0}
+        
+        own_batch = batch is None
+        batch = batch if batch is not None else RegistryBatch()
+        for key_path, value_name, value_type, value_data in delta.apply:
             try:
-                if self.set_registry_value(key_path, value_name, value_type, value_data):
-                    changes.append(f"{key_path}\\{value_name} = {value_data}")
-                    print(f"      ✅ {key_path}\\{value_name}")
+                batch.add(key_path, value_name, value_type, value_data, source="registry")
             except Exception as e:
+                self.last_counts["failed"] += 1
                 print(f"      ⚠️  {key_path}\\{value_name}: {e}")
+        if not own_batch:
+            self.last_counts["changed"] = len(delta.apply) - self.last_counts["failed"]
+            return changes  # Çağıran commit eder
         
+        result = batch.commit() if len(batch) else None
+        for write in (result.written if result else []):
+            self.changes.append({
+                "type": "registry",
+                "path": write.key_path,
+                "value": write.name,
+                "data": write.data
+            })
+            changes.append(f"{write.key_path}\\{write.name} = {write.data}")
+            print(f"      ✅ {write.key_path}\\{write.name}")
+        for write, error in (result.failed if result else []):
+            print(f"      ⚠️  {write.key_path}\\{write.name}: {error}")
+        if result and result.failed:
+            # Yazılamayanları bırak (sonraki modül tekrar deneyebilir)
+            applied.release(catalog.get(w.key_path, w.name) for w, _ in result.failed)
+        
+        if result:
+            self.last_counts["changed"] = result.ok_count
+            self.last_counts["failed"] += len(result.failed)
+            print(f"      ⏱️  {len(result.keys)} anahtar, {result.ok_count} değer, {result.duration_ms:.0f} ms")
+        self._print_counts()
         return changes
-
+    
+    def _print_counts(self):
+        print(f"      ℹ️  Zaten uygun: {self.last_counts['compliant']}, "
+              f"değiştirilen: {self.last_counts['changed']}, "
+              f"başarısız: {self.last_counts['failed']}")
+    
+    def _optimize_reg_import(self, optimizations: List[Optimization], readable: bool) -> List[str]:
+        """
+        optimize()'ın reg import yolu: okunabiliyorsa önce fark çıkarılır ve sadece farklı
+        değerler içe aktarılır; okunamıyorsa (winreg yok) planın tamamı içe aktarılır.
+        Sayımlar değer başına yol ile aynı şekilde last_counts'a yazılır.
+        """
+        changes = []
+        if readable:
+            delta = self.plan(optimizations=optimizations)
+        else:
+            delta = RegistryPlan(apply=list(optimizations))
+        self.last_counts = {"compliant": len(delta.compliant), "changed": 0, "failed": 0}
+        
+        if delta.apply:
+            if self.apply_reg_import(optimizations=delta.apply):
+                self.last_counts["changed"] = len(delta.apply)
+                for key_path, value_name, _, value_data in delta.apply:
+                    changes.append(f"{key_path}\\{value_name} = {value_data}")
+                    print(f"      ✅ {key_path}\\{value_name}")
+            else:
+                self.last_counts["failed"] = len(delta.apply)
+                # Yazılamayanları bırak (sonraki modül tekrar deneyebilir)
+                catalog = get_catalog()
+                get_applied_tweaks().release(catalog.get(k, n) for k, n, _, _ in delta.apply)
+        
+        self._print_counts()
+        return changes
+    
+    def compile_reg(self) -> str:
+        """Tüm planı (zamanlayıcı ayarları dahil, açıksa) tek .reg belgesine derle"""
+        from modules.reg_file import compile_reg
+        return compile_reg(self._get_optimizations(include_scheduler=bool(self.apply_scheduler_tweaks)))
+    
+    def apply_reg_import(self, runner=None, optimizations: Optional[List[Optimization]] = None) -> bool:
+        """
+        Planı (veya verilen değerleri) tek `reg import` çağrısıyla uygula (değer başına API
+        çağrısı yerine). Belge önce geri ayrıştırılarak doğrulanır; hatalıysa içe aktarılmaz.
+        """
+        from modules.reg_file import compile_reg, import_reg_text, roundtrip_errors, to_bytes
+        
+        if optimizations is None:
+            optimizations = self._get_optimizations(include_scheduler=bool(self.apply_scheduler_tweaks))
+        text = compile_reg(optimizations)
+        errors = roundtrip_errors(optimizations, to_bytes(text))
+        if errors:
+            for error in errors:
+                print(f"      ⚠️  .reg doğrulanamadı: {error}")
+            return False
+        
+        result = import_reg_text(text, runner=runner)
+        if not result.ok:
+            print(f"      ⚠️  reg import başarısız: {result.stderr.strip() or result.error or result.returncode}")
+            return False
+        for key_path, value_name, _, value_data in optimizations:
+            self.changes.append({
+                "type": "registry",
+                "path": key_path,
+                "value": value_name,
+                "data": value_data
+            })
+        print(f"      ⏱️  reg import: {len(optimizations)} değer, {result.duration_ms:.0f} ms")
+        return True
+    
+    def apply_offline(self, image_roots, max_workers=None):
+        """
+        Aynı planı bağlanmış (mount edilmiş) Windows imaj dizinlerine uygula (winreg yok).
+        Her imajda hive'lar bir kez açılır, sadece farklı değerler yazılır, bir kez kaydedilir;
+        birden fazla imaj paralel (imaj başına bir proses) servis edilir. ImageReport listesi döner.
+        """
+        from modules.offline_hive import service_images
+        
+        optimizations = self._get_optimizations(include_scheduler=bool(self.apply_scheduler_tweaks))
+        return service_images(list(image_roots), optimizations, max_workers=max_workers)
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Kayıt Defteri Arka Ucu (takılabilir)
+
+Modüller winreg yerine bu arayüzü kullanır; böylece aynı kod Windows dışında da
+çalıştırılabilir, ölçülebilir ve CI'da doğrulanabilir.
+- WinRegBackend:    winreg (varsayılan, Windows)
+- MemoryBackend:    bellekte hive modeli (hızlı, Linux'ta çalışır)
+- RecordingBackend: başka bir arka ucu sarar; her çağrıyı sayar ve süresini ölçer,
+                    gereksiz işlemleri (aynı değeri tekrar yazma, açık anahtarı tekrar açma) bulur
+
+Hata davranışı winreg ile aynıdır: olmayan anahtar/değer -> FileNotFoundError,
+diğer hatalar -> OSError. Çağıranların mevcut except blokları değişmeden çalışır.
+
+Seçim: set_registry_backend(...) veya OPTIMIZER_REGISTRY_BACKEND ortam değişkeni
+("winreg", "memory", "record", "record:memory").
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Değer tipleri (winreg.REG_* ile aynı sayılar)
+REG_SZ = 1
+REG_EXPAND_SZ = 2
+REG_BINARY = 3
+REG_DWORD = 4
+REG_MULTI_SZ = 7
+REG_QWORD = 11
+
+HIVE_NAMES = ("HKLM", "HKCU", "HKU", "HKCR")
+
+ENV_VAR = "OPTIMIZER_REGISTRY_BACKEND"
+
+
+class RegistryBackend(ABC):
+    """
+    Anahtarlar (hive, alt anahtar) ile açılır; dönen handle sadece aynı arka uçta geçerlidir.
+    hive: "HKLM" / "HKCU" / "HKU" / "HKCR"
+    """
+
+    name = "abstract"
+
+    @abstractmethod
+    def open_key(self, hive: str, subkey: str, write: bool = False) -> Any:
+        """Var olan anahtarı aç (yoksa FileNotFoundError)"""
+
+    @abstractmethod
+    def create_key(self, hive: str, subkey: str) -> Any:
+        """Anahtarı aç, yoksa oluştur (okuma + yazma)"""
+
+    @abstractmethod
+    def close_key(self, handle: Any) -> None:
+        """Handle'ı kapat"""
+
+    @abstractmethod
+    def query_value(self, handle: Any, name: str) -> Tuple[Any, int]:
+        """(data, type); değer yoksa FileNotFoundError"""
+
+    @abstractmethod
+    def set_value(self, handle: Any, name: str, vtype: int, data: Any) -> None:
+        """Değeri yaz"""
+
+    @abstractmethod
+    def delete_value(self, handle: Any, name: str) -> None:
+        """Değeri sil (yoksa FileNotFoundError)"""
+
+    @abstractmethod
+    def enum_values(self, handle: Any) -> List[Tuple[str, Any, int]]:
+        """Anahtardaki tüm değerler: [(name, data, type)]"""
+
+    @abstractmethod
+    def enum_keys(self, handle: Any) -> List[str]:
+        """Alt anahtar adları"""
+
+    @abstractmethod
+    def delete_key(self, hive: str, subkey: str) -> None:
+        """Alt anahtarı olmayan anahtarı sil (yoksa FileNotFoundError)"""
+
+    # --- Kısayollar ---
+
+    def read_value(self, hive: str, subkey: str, name: str) -> Tuple[bool, Optional[int], Any]:
+        """(exists, type, data); anahtar/değer yoksa (False, None, None)"""
+        try:
+            handle = self.open_key(hive, subkey)
+        except OSError:
+            return (False, None, None)
+        try:
+            data, vtype = self.query_value(handle, name)
+            return (True, vtype, data)
+        except OSError:
+            return (False, None, None)
+        finally:
+            self.close_key(handle)
+
+    def write_value(self, hive: str, subkey: str, name: str, vtype: int, data: Any) -> None:
+        """Anahtarı (gerekirse oluşturup) tek değer yaz"""
+        handle = self.create_key(hive, subkey)
+        try:
+            self.set_value(handle, name, vtype, data)
+        finally:
+            self.close_key(handle)
+
+
+class WinRegBackend(RegistryBackend):
+    """winreg üzerinden gerçek kayıt defteri"""
+
+    name = "winreg"
+
+    def __init__(self):
+        import winreg  # sadece Windows; diğer arka uçlar winreg olmadan yüklenir
+        self._winreg = winreg
+        self._roots = {
+            "HKLM": winreg.HKEY_LOCAL_MACHINE,
+            "HKCU": winreg.HKEY_CURRENT_USER,
+            "HKU": winreg.HKEY_USERS,
+            "HKCR": winreg.HKEY_CLASSES_ROOT,
+        }
+
+    def open_key(self, hive, subkey, write=False):
+        access = self._winreg.KEY_READ | (self._winreg.KEY_WRITE if write else 0)
+        return self._winreg.OpenKey(self._roots[hive], subkey, 0, access)
+
+    def create_key(self, hive, subkey):
+        return self._winreg.CreateKeyEx(self._roots[hive], subkey, 0,
+                                        self._winreg.KEY_READ | self._winreg.KEY_WRITE)
+
+    def close_key(self, handle):
+        self._winreg.CloseKey(handle)
+
+    def query_value(self, handle, name):
+        return self._winreg.QueryValueEx(handle, name)
+
+    def set_value(self, handle, name, vtype, data):
+        self._winreg.SetValueEx(handle, name, 0, vtype, data)
+
+    def delete_value(self, handle, name):
+        self._winreg.DeleteValue(handle, name)
+
+    def enum_values(self, handle):
+        values = []
+        count = self._winreg.QueryInfoKey(handle)[1]
+        for i in range(count):
+            values.append(tuple(self._winreg.EnumValue(handle, i)))
+        return values
+
+    def enum_keys(self, handle):
+        count = self._winreg.QueryInfoKey(handle)[0]
+        return [self._winreg.EnumKey(handle, i) for i in range(count)]
+
+    def delete_key(self, hive, subkey):
+        self._winreg.DeleteKey(self._roots[hive], subkey)
+
+
+class _MemoryKey:
+    """Bellekteki tek anahtar (adlar büyük/küçük harf duyarsız, orijinal yazım korunur)"""
+
+    __slots__ = ("name", "values", "subkeys")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.values: Dict[str, Tuple[str, int, Any]] = {}
+        self.subkeys: Dict[str, "_MemoryKey"] = {}
+
+
+@dataclass
+class _MemoryHandle:
+    key: _MemoryKey
+    path: str
+    writable: bool
+    closed: bool = False
+
+
+class MemoryBackend(RegistryBackend):
+    """
+    Bellekte hive modeli. winreg'in tip kontrollerinin temelini taklit eder
+    (DWORD/QWORD int, SZ str) ki Linux'ta yakalanan hata Windows'ta da hata olsun.
+    """
+
+    name = "memory"
+
+    def __init__(self, values: Optional[Dict[str, Dict[str, Tuple[int, Any]]]] = None):
+        self._lock = threading.RLock()
+        self._roots = {hive: _MemoryKey(hive) for hive in HIVE_NAMES}
+        for key_path, key_values in (values or {}).items():
+            hive, _, subkey = key_path.partition("\\")
+            handle = self.create_key(hive.upper(), subkey)
+            for name, (vtype, data) in key_values.items():
+                self.set_value(handle, name, vtype, data)
+
+    def _walk(self, hive: str, subkey: str, create: bool) -> _MemoryKey:
+        try:
+            node = self._roots[hive]
+        except KeyError:
+            raise OSError(f"Bilinmeyen hive: {hive}")
+        for part in (p for p in subkey.split("\\") if p):
+            child = node.subkeys.get(part.lower())
+            if child is None:
+                if not create:
+                    raise FileNotFoundError(f"{hive}\\{subkey}")
+                child = node.subkeys[part.lower()] = _MemoryKey(part)
+            node = child
+        return node
+
+    @staticmethod
+    def _check(handle: _MemoryHandle, write: bool = False) -> _MemoryKey:
+        if handle.closed:
+            raise OSError(f"Kapalı handle: {handle.path}")
+        if write and not handle.writable:
+            raise PermissionError(f"Salt okunur handle: {handle.path}")
+        return handle.key
+
+    def open_key(self, hive, subkey, write=False):
+        with self._lock:
+            return _MemoryHandle(self._walk(hive, subkey, False), f"{hive}\\{subkey}", write)
+
+    def create_key(self, hive, subkey):
+        with self._lock:
+            return _MemoryHandle(self._walk(hive, subkey, True), f"{hive}\\{subkey}", True)
+
+    def close_key(self, handle):
+        handle.closed = True
+
+    def query_value(self, handle, name):
+        with self._lock:
+            entry = self._check(handle).values.get(name.lower())
+        if entry is None:
+            raise FileNotFoundError(f"{handle.path}\\{name}")
+        return entry[2], entry[1]
+
+    def set_value(self, handle, name, vtype, data):
+        if vtype in (REG_DWORD, REG_QWORD) and not isinstance(data, int):
+            raise TypeError(f"{name}: DWORD/QWORD için int gerekli ({type(data).__name__})")
+        if vtype in (REG_SZ, REG_EXPAND_SZ) and not isinstance(data, str):
+            raise TypeError(f"{name}: SZ için str gerekli ({type(data).__name__})")
+        if vtype == REG_DWORD and not 0 <= data <= 0xFFFFFFFF:
+            raise OverflowError(f"{name}: DWORD aralık dışı ({data})")
+        with self._lock:
+            self._check(handle, write=True).values[name.lower()] = (name, int(vtype), data)
+
+    def delete_value(self, handle, name):
+        with self._lock:
+            if self._check(handle, write=True).values.pop(name.lower(), None) is None:
+                raise FileNotFoundError(f"{handle.path}\\{name}")
+
+    def enum_values(self, handle):
+        with self._lock:
+            return [(name, data, vtype) for name, vtype, data in self._check(handle).values.values()]
+
+    def enum_keys(self, handle):
+        with self._lock:
+            return [child.name for child in self._check(handle).subkeys.values()]
+
+    def delete_key(self, hive, subkey):
+        parent_path, _, leaf = subkey.rpartition("\\")
+        with self._lock:
+            parent = self._walk(hive, parent_path, False)
+            child = parent.subkeys.get(leaf.lower())
+            if child is None:
+                raise FileNotFoundError(f"{hive}\\{subkey}")
+            if child.subkeys:
+                raise PermissionError(f"Alt anahtarları var: {hive}\\{subkey}")
+            del parent.subkeys[leaf.lower()]
+
+    def dump(self) -> Dict[str, Dict[str, Tuple[int, Any]]]:
+        """Değeri olan tüm anahtarlar: {"HKLM\\...": {name: (type, data)}} (kurucuya geri verilebilir)"""
+        out: Dict[str, Dict[str, Tuple[int, Any]]] = {}
+        with self._lock:
+            stack = [(root.name, root) for root in self._roots.values()]
+            while stack:
+                path, node = stack.pop()
+                if node.values:
+                    out[path] = {name: (vtype, data) for name, vtype, data in node.values.values()}
+                stack.extend((f"{path}\\{child.name}", child) for child in node.subkeys.values())
+        return out
+
+
+@dataclass
+class RegistryCall:
+    """RecordingBackend'in kaydettiği tek çağrı"""
+    op: str
+    key_path: str
+    name: Optional[str]
+    duration_ms: float
+    error: Optional[str] = None
+
+
+class RecordingBackend(RegistryBackend):
+    """
+    Başka bir arka ucu sarar: her çağrıyı sayar ve süresini ölçer.
+    Gereksiz işlemler:
+      - redundant_writes: okunan/yazılan son değerle aynı değeri tekrar yazma
+      - redundant_opens:  aynı anahtar zaten açıkken tekrar açma
+    """
+
+    name = "record"
+
+    def __init__(self, inner: Optional[RegistryBackend] = None):
+        self.inner = inner if inner is not None else WinRegBackend()
+        self.name = f"record:{self.inner.name}"
+        self.calls: List[RegistryCall] = []
+        self.redundant_writes = 0
+        self.redundant_opens = 0
+        self._lock = threading.Lock()
+        self._paths: Dict[int, str] = {}          # id(handle) -> key_path
+        self._open_counts: Counter = Counter()    # key_path (küçük harf) -> açık handle sayısı
+        self._known: Dict[Tuple[str, str], Tuple[int, Any]] = {}
+
+    def _record(self, op: str, key_path: str, name: Optional[str], func, *args):
+        started = time.perf_counter()
+        error = None
+        try:
+            return func(*args)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            call = RegistryCall(op, key_path, name, (time.perf_counter() - started) * 1000, error)
+            with self._lock:
+                self.calls.append(call)
+
+    def _opened(self, handle, key_path: str):
+        with self._lock:
+            self._paths[id(handle)] = key_path
+            if self._open_counts[key_path.lower()]:
+                self.redundant_opens += 1
+            self._open_counts[key_path.lower()] += 1
+        return handle
+
+    def _path(self, handle) -> str:
+        return self._paths.get(id(handle), "?")
+
+    def open_key(self, hive, subkey, write=False):
+        path = f"{hive}\\{subkey}"
+        return self._opened(self._record("open", path, None, self.inner.open_key, hive, subkey, write), path)
+
+    def create_key(self, hive, subkey):
+        path = f"{hive}\\{subkey}"
+        return self._opened(self._record("create", path, None, self.inner.create_key, hive, subkey), path)
+
+    def close_key(self, handle):
+        path = self._path(handle)
+        try:
+            self._record("close", path, None, self.inner.close_key, handle)
+        finally:
+            with self._lock:
+                self._paths.pop(id(handle), None)
+                if self._open_counts[path.lower()] > 0:
+                    self._open_counts[path.lower()] -= 1
+
+    def query_value(self, handle, name):
+        path = self._path(handle)
+        data, vtype = self._record("query", path, name, self.inner.query_value, handle, name)
+        with self._lock:
+            self._known[(path.lower(), name.lower())] = (vtype, data)
+        return data, vtype
+
+    def set_value(self, handle, name, vtype, data):
+        path = self._path(handle)
+        ident = (path.lower(), name.lower())
+        self._record("set", path, name, self.inner.set_value, handle, name, vtype, data)
+        with self._lock:
+            if self._known.get(ident) == (int(vtype), data):
+                self.redundant_writes += 1
+            self._known[ident] = (int(vtype), data)
+
+    def delete_value(self, handle, name):
+        path = self._path(handle)
+        self._record("delete_value", path, name, self.inner.delete_value, handle, name)
+        with self._lock:
+            self._known.pop((path.lower(), name.lower()), None)
+
+    def enum_values(self, handle):
+        return self._record("enum_values", self._path(handle), None, self.inner.enum_values, handle)
+
+    def enum_keys(self, handle):
+        return self._record("enum_keys", self._path(handle), None, self.inner.enum_keys, handle)
+
+    def delete_key(self, hive, subkey):
+        self._record("delete_key", f"{hive}\\{subkey}", None, self.inner.delete_key, hive, subkey)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.redundant_writes = 0
+            self.redundant_opens = 0
+            self._known.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """İşlem başına sayı ve toplam süre + gereksiz işlem sayıları"""
+        with self._lock:
+            calls = list(self.calls)
+        ops: Dict[str, Dict[str, float]] = {}
+        for call in calls:
+            entry = ops.setdefault(call.op, {"count": 0, "errors": 0, "total_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += call.duration_ms
+            if call.error:
+                entry["errors"] += 1
+        return {
+            "backend": self.inner.name,
+            "calls": len(calls),
+            "total_ms": sum(call.duration_ms for call in calls),
+            "ops": ops,
+            "redundant_writes": self.redundant_writes,
+            "redundant_opens": self.redundant_opens,
+        }
+
+
+def create_backend(spec: str) -> RegistryBackend:
+    """"winreg" / "memory" / "record" / "record:memory" -> arka uç"""
+    spec = (spec or "winreg").strip().lower()
+    if spec.startswith("record"):
+        _, _, inner = spec.partition(":")
+        return RecordingBackend(create_backend(inner or "winreg"))
+    if spec == "memory":
+        return MemoryBackend()
+    if spec == "winreg":
+        return WinRegBackend()
+    raise ValueError(f"Bilinmeyen kayıt defteri arka ucu: {spec}")
+
+
+# Global arka uç (modüller arası paylaşılır)
+_backend: Optional[RegistryBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_registry_backend() -> RegistryBackend:
+    """Aktif arka ucu getir (ilk çağrıda ortam değişkenine göre oluşturulur)"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend(os.environ.get(ENV_VAR, "winreg"))
+        return _backend
+
+
+def set_registry_backend(backend: Optional[RegistryBackend]) -> Optional[RegistryBackend]:
+    """Arka ucu değiştir (None -> bir sonraki get'te varsayılan); öncekini döndürür"""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+        return previous
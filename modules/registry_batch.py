@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Toplu Kayıt Defteri Yazıcı (anahtar bazında gruplanmış)
+
+Her değer için anahtarı aç -> yaz -> kapat yerine:
+- Yazma işlemleri (hive, anahtar) bazında gruplanır, her anahtar bir kez açılıp
+  tüm değerleri yazılır
+- Açık handle'lar modüller arasında paylaşılan, sınırlı bir LRU cache'te tutulur
+  (aynı anahtara başka bir modül yazarken tekrar açılmaz)
+- Anahtar başına süre ve hatalar raporlanır
+
+Kullanım:
+    batch = RegistryBatch()
+    batch.add_dword("HKCU\\SOFTWARE\\Microsoft\\GameBar", "AllowAutoGameMode", 1)
+    batch.add("HKLM\\SOFTWARE\\...", "Value", REG_SZ, "Deny")
+    result = batch.commit()
+    result.succeeded("HKCU\\SOFTWARE\\Microsoft\\GameBar", "AllowAutoGameMode")
+
+Anahtarlar aktif kayıt defteri arka ucu üzerinden açılır (modules/registry_backend.py).
+"""
+
+from __future__ import annotations
+
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from modules.registry_backend import HIVE_NAMES, REG_DWORD, RegistryBackend, get_registry_backend
+
+
+HIVES = HIVE_NAMES
+
+
+def split_key_path(key_path: str) -> Tuple[Optional[str], str]:
+    """'HKLM\\SOFTWARE\\...' -> ('HKLM', 'SOFTWARE\\...'). Tanınmayan hive -> (None, path)"""
+    hive, _, subkey = key_path.partition("\\")
+    hive = hive.upper()
+    if hive not in HIVES:
+        return None, key_path
+    return hive, subkey
+
+
+def key_path_for(hive: str, subkey: str) -> str:
+    """('HKLM', 'SYSTEM\\...') -> 'HKLM\\SYSTEM\\...'"""
+    return f"{hive}\\{subkey}"
+
+
+# İstenen mod -> aynı işi görebilecek (zaten açık) handle modları
+_SHARED_MODES = {"r": ("rw", "w"), "w": ("rw",)}
+
+
+class KeyHandleCache:
+    """
+    Açık anahtar handle'ları için sınırlı LRU cache + çalışma boyunca olmadığı bilinen anahtarlar.
+    'rw' handle'ları create_key ile açılır (tam yol tek çağrıda, ara anahtarlar dahil),
+    'r' handle'ları sadece okuma içindir (anahtar yoksa FileNotFoundError), 'w' handle'ları
+    var olan anahtarı yazılabilir açar ama oluşturmaz (örn. sadece değer silme; yoksa FileNotFoundError).
+
+    - Açık bir 'rw' handle okuma ve 'w' için de, 'w' handle okuma için de kullanılır
+      (aynı anahtar iki kez açılmaz)
+    - Olmadığı görülen anahtarlar (ve altları) hatırlanır: tekrar okuma denemesi çağrı yapmadan
+      FileNotFoundError verir; anahtar bu cache üzerinden oluşturulunca kayıt silinir
+    - Dışarıdan (reg import, PowerShell vb.) anahtar oluşturan kod forget_missing() çağırmalı
+    """
+
+    def __init__(self, max_handles: int = 32, backend: Optional[RegistryBackend] = None):
+        self.backend = backend if backend is not None else get_registry_backend()
+        self.max_handles = max(1, int(max_handles))
+        self._handles: "OrderedDict[Tuple[str, str, str], Any]" = OrderedDict()
+        self._missing: Set[Tuple[str, str]] = set()   # olmadığı bilinen (hive, anahtar)
+        self._lock = threading.RLock()
+        self.opens = 0
+        self.creates = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _prefixes(subkey: str) -> List[str]:
+        parts = [p for p in subkey.lower().split("\\") if p]
+        return ["\\".join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+    def _known_missing(self, hive: str, subkey: str) -> bool:
+        return any((hive, prefix) in self._missing for prefix in self._prefixes(subkey))
+
+    def _mark_exists(self, hive: str, subkey: str) -> None:
+        for prefix in self._prefixes(subkey):
+            self._missing.discard((hive, prefix))
+
+    def open(self, hive: str, subkey: str, mode: str = "rw"):
+        lowered = subkey.lower()
+        with self._lock:
+            for cache_key in [(hive, lowered, m) for m in (mode,) + _SHARED_MODES.get(mode, ())]:
+                handle = self._handles.get(cache_key)
+                if handle is not None:
+                    self._handles.move_to_end(cache_key)
+                    self.hits += 1
+                    return handle
+
+            if mode == "rw":
+                handle = self.backend.create_key(hive, subkey)
+                self.creates += 1
+            else:
+                if self._known_missing(hive, subkey):
+                    self.negative_hits += 1
+                    raise FileNotFoundError(f"{hive}\\{subkey}")
+                try:
+                    handle = self.backend.open_key(hive, subkey, write=(mode == "w"))
+                except FileNotFoundError:
+                    self.opens += 1
+                    self._missing.add((hive, lowered))
+                    raise
+                self.opens += 1
+            self._mark_exists(hive, subkey)
+            self._handles[(hive, lowered, mode)] = handle
+
+            while len(self._handles) > self.max_handles:
+                _, old = self._handles.popitem(last=False)
+                self.evictions += 1
+                try:
+                    self.backend.close_key(old)
+                except Exception:
+                    pass
+            return handle
+
+    def ensure(self, hive: str, subkey: str):
+        """Anahtarı (ara anahtarlarla birlikte) tek çağrıda var et; yazılabilir handle döner"""
+        return self.open(hive, subkey, "rw")
+
+    def forget_missing(self) -> None:
+        """Olmadığı bilinen anahtarları unut (anahtarlar dışarıdan oluşturulmuş olabilir)"""
+        with self._lock:
+            self._missing.clear()
+
+    def invalidate(self, hive: str, subkey: str) -> None:
+        """Anahtar silindiyse / yeniden oluşturulduysa handle'ları ve bilinen durumu bırak"""
+        lowered = subkey.lower()
+        with self._lock:
+            self._missing.discard((hive, lowered))
+            for mode in ("rw", "w", "r"):
+                handle = self._handles.pop((hive, lowered, mode), None)
+                if handle is not None:
+                    try:
+                        self.backend.close_key(handle)
+                    except Exception:
+                        pass
+
+    def close_all(self) -> None:
+        with self._lock:
+            for handle in self._handles.values():
+                try:
+                    self.backend.close_key(handle)
+                except Exception:
+                    pass
+            self._handles.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """saved: cache'ten karşılanan (kayıt defterine gitmeyen) açma/oluşturma istekleri"""
+        with self._lock:
+            return {
+                "open_handles": len(self._handles),
+                "opens": self.opens,
+                "creates": self.creates,
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "saved": self.hits + self.negative_hits,
+                "evictions": self.evictions,
+            }
+
+
+@dataclass
+class RegistryWrite:
+    """Kuyruktaki tek yazma işlemi"""
+    hive: str
+    subkey: str
+    name: str
+    vtype: int
+    data: Any
+    source: str = ""
+
+    @property
+    def key_path(self) -> str:
+        return f"{self.hive}\\{self.subkey}"
+
+
+@dataclass
+class KeyReport:
+    """Tek anahtarın commit raporu"""
+    key_path: str
+    values: int = 0
+    written: int = 0
+    duration_ms: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+
+@dataclass
+class BatchResult:
+    """commit() sonucu"""
+    keys: List[KeyReport] = field(default_factory=list)
+    written: List[RegistryWrite] = field(default_factory=list)
+    failed: List[Tuple[RegistryWrite, str]] = field(default_factory=list)
+    duration_ms: float = 0.0
+
+    @property
+    def ok_count(self) -> int:
+        return len(self.written)
+
+    def succeeded(self, key_path: str, name: str) -> bool:
+        hive, subkey = split_key_path(key_path)
+        target = (hive, subkey.lower(), name.lower())
+        return any((w.hive, w.subkey.lower(), w.name.lower()) == target for w in self.written)
+
+    def error_for(self, key_path: str, name: str) -> Optional[str]:
+        hive, subkey = split_key_path(key_path)
+        target = (hive, subkey.lower(), name.lower())
+        for w, err in self.failed:
+            if (w.hive, w.subkey.lower(), w.name.lower()) == target:
+                return err
+        return None
+
+
+class RegistryBatch:
+    """
+    Yazma kuyruğu. add*/commit; birden fazla modül aynı batch'e yazabilir.
+    commit() sonrası kuyruk boşalır, batch yeniden kullanılabilir.
+    """
+
+    def __init__(self, cache: Optional[KeyHandleCache] = None):
+        self.cache = cache or get_key_cache()
+        self._pending: List[RegistryWrite] = []
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, key_path: str, name: str, vtype: int, data: Any, source: str = "") -> None:
+        hive, subkey = split_key_path(key_path)
+        if hive is None:
+            raise ValueError(f"Bilinmeyen hive: {key_path}")
+        self._pending.append(RegistryWrite(hive, subkey, name, int(vtype), data, source))
+
+    def add_dword(self, key_path: str, name: str, value: int, source: str = "") -> None:
+        self.add(key_path, name, REG_DWORD, int(value), source)
+
+    def commit(self) -> BatchResult:
+        """Kuyruğu anahtar bazında grupla ve yaz"""
+        started = time.perf_counter()
+        pending, self._pending = self._pending, []
+
+        # (hive, anahtar) -> yazmalar; ilk görülme sırası korunur
+        groups: "OrderedDict[Tuple[str, str], List[RegistryWrite]]" = OrderedDict()
+        for write in pending:
+            groups.setdefault((write.hive, write.subkey.lower()), []).append(write)
+
+        result = BatchResult()
+        for (hive, _), writes in groups.items():
+            key_started = time.perf_counter()
+            report = KeyReport(key_path=writes[0].key_path, values=len(writes))
+            try:
+                handle = self.cache.open(hive, writes[0].subkey, "rw")
+            except Exception as e:
+                for write in writes:
+                    result.failed.append((write, str(e)))
+                report.errors.append(str(e))
+                handle = None
+
+            if handle is not None:
+                for write in writes:
+                    try:
+                        self.cache.backend.set_value(handle, write.name, write.vtype, write.data)
+                        result.written.append(write)
+                        report.written += 1
+                    except Exception as e:
+                        result.failed.append((write, str(e)))
+                        report.errors.append(f"{write.name}: {e}")
+
+            report.duration_ms = (time.perf_counter() - key_started) * 1000
+            result.keys.append(report)
+
+        result.duration_ms = (time.perf_counter() - started) * 1000
+        return result
+
+
+# Global handle cache (modüller arası paylaşılır)
+_cache: Optional[KeyHandleCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_key_cache() -> KeyHandleCache:
+    """Paylaşılan handle cache'ini getir (arka uç değiştiyse eski handle'lar kapatılır)"""
+    global _cache
+    backend = get_registry_backend()
+    with _cache_lock:
+        if _cache is not None and _cache.backend is not backend:
+            _cache.close_all()
+            _cache = None
+        if _cache is None:
+            _cache = KeyHandleCache(backend=backend)
+        return _cache
+
+
+def shutdown_key_cache() -> None:
+    """Açık handle'ları kapat (çalışma sonunda)"""
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close_all()
+            _cache = None
+
+
+atexit.register(shutdown_key_cache)
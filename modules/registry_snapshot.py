@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Kayıt Defteri Alt Ağaç Anlık Görüntüsü (ikili, tembel yüklenen)
+
+backup_registry() sadece yazacağımız değerleri saklar; yoğun dokunduğumuz anahtarlardaki
+(ContentDeliveryManager, GameDVR, Explorer\\Advanced...) kardeş değerler yedekte yoktur.
+Bu modül listelenen anahtarların tüm alt ağacını yedekler:
+- Her anahtar tek EnumValue geçişiyle okunur (değer başına QueryValue yok), alt anahtarlar
+  EnumKey ile gezilir (derinlik / anahtar sayısı sınırlı)
+- Kodlama: alt ağaç başına bir blok; blok içinde adlar/yollar tekil string tablosunda
+  (anahtar = ebeveyn indeksi + ad indeksi), değerler yerel REG_* tipiyle, tamsayılar varint
+- Bloklar zlib ile sıkıştırılır (küçülüyorsa); dosya sonundaki indeks kök -> blok ofseti
+- Yükleme tembeldir: açılışta sadece indeks okunur, geri yükleme ihtiyaç duyduğu alt
+  ağacın bloğunu çözer
+- Geri yükleme SNAPSHOT_KEYS köklerini bütünüyle, katalogdan türetilen kökleri (snapshot_roots)
+  sadece katalog değerleriyle sınırlı döndürür (politika anahtarlarındaki diğer değerler kalır)
+
+Kullanım:
+    info = write_snapshot("backups/backup_x.snap")
+    snap = SnapshotFile.open("backups/backup_x.snap")
+    restore_subtree(snap.get("HKCU\\SOFTWARE\\Microsoft\\GameBar"))
+
+    python -m modules.registry_snapshot --capture out.snap
+    python -m modules.registry_snapshot --dump out.snap [KÖK]
+"""
+
+from __future__ import annotations
+
+import struct
+import sys
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from modules.registry_backend import REG_QWORD, RegistryBackend, get_registry_backend
+from modules.registry_batch import key_path_for, split_key_path
+from modules.tweak_catalog import get_catalog, same_value
+
+
+MAGIC = b"WOSNAP"
+VERSION = 1
+_HEADER = struct.Struct("<6sHI")  # magic, sürüm, indeks ofseti
+
+# Değer yükü türü (tip etiketinin alt 2 biti; üst bitler yerel REG_* tipi)
+_KIND_INT, _KIND_STR, _KIND_LIST, _KIND_RAW = 0, 1, 2, 3
+
+_FLAG_EXISTS = 0x01
+_FLAG_ZLIB = 0x02
+_FLAG_TRUNCATED = 0x04
+
+# Sadece tek tek değerleri değil, tüm alt ağacı yedeklenen anahtarlar
+SNAPSHOT_KEYS = [
+    r"HKCU\SOFTWARE\Microsoft\Windows\CurrentVersion\ContentDeliveryManager",
+    r"HKCU\SOFTWARE\Microsoft\Windows\CurrentVersion\GameDVR",
+    r"HKCU\SOFTWARE\Microsoft\Windows\CurrentVersion\Explorer\Advanced",
+    r"HKCU\SOFTWARE\Microsoft\GameBar",
+    r"HKCU\SYSTEM\GameConfigStore",
+]
+
+MAX_DEPTH = 4
+MAX_KEYS = 2000
+
+
+class SnapshotError(ValueError):
+    """Bozuk / desteklenmeyen anlık görüntü dosyası"""
+
+
+@dataclass
+class SnapshotValue:
+    name: str
+    vtype: int
+    data: Any
+
+
+@dataclass
+class Subtree:
+    """Tek kök altındaki anahtarlar: göreli yol ("" = kök) -> değerler"""
+    root: str
+    exists: bool = True
+    truncated: bool = False     # derinlik / anahtar sınırına takıldı (eksik alt anahtar olabilir)
+    max_depth: int = MAX_DEPTH
+    keys: Dict[str, List[SnapshotValue]] = field(default_factory=dict)
+
+    @property
+    def value_count(self) -> int:
+        return sum(len(values) for values in self.keys.values())
+
+    def key_path(self, relative: str) -> str:
+        return f"{self.root}\\{relative}" if relative else self.root
+
+
+@dataclass
+class IndexEntry:
+    root: str
+    offset: int
+    length: int
+    key_count: int
+    value_count: int
+    flags: int
+    max_depth: int
+
+
+@dataclass
+class SubtreeRestore:
+    """restore_subtree() sonucu"""
+    root: str
+    written: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    failed: List[str] = field(default_factory=list)
+
+
+# --- Varint / string tablosu ---
+
+def _put_varint(out: bytearray, value: int) -> None:
+    if value < 0:
+        raise SnapshotError(f"negatif varint: {value}")
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        if pos >= len(buf):
+            raise SnapshotError("beklenmeyen veri sonu")
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _put_bytes(out: bytearray, data: bytes) -> None:
+    _put_varint(out, len(data))
+    out += data
+
+
+def _get_bytes(buf: bytes, pos: int) -> Tuple[bytes, int]:
+    size, pos = _get_varint(buf, pos)
+    if pos + size > len(buf):
+        raise SnapshotError("beklenmeyen veri sonu")
+    return bytes(buf[pos:pos + size]), pos + size
+
+
+class _Strings:
+    """Tekil string tablosu (ilk görülme sırasıyla indekslenir)"""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.items: List[str] = []
+
+    def __call__(self, text: str) -> int:
+        idx = self.index.get(text)
+        if idx is None:
+            idx = self.index[text] = len(self.items)
+            self.items.append(text)
+        return idx
+
+
+# --- Yakalama ---
+
+def snapshot_roots(min_values: int = 3) -> List[str]:
+    """SNAPSHOT_KEYS + katalogda en az `min_values` değeri olan anahtarlar (iç içe kökler atılır)"""
+    counts = Counter(t.key_path for t in get_catalog().select())
+    candidates = list(SNAPSHOT_KEYS) + [k for k, n in counts.most_common() if n >= min_values]
+    roots: List[str] = []
+    seen = set()
+    for key_path in candidates:
+        folded = key_path.lower()
+        if folded not in seen:
+            seen.add(folded)
+            roots.append(key_path)
+    folded_roots = [r.lower() for r in roots]
+    return [r for r, f in zip(roots, folded_roots)
+            if not any(f != other and f.startswith(other + "\\") for other in folded_roots)]
+
+
+def is_explicit_root(root: str) -> bool:
+    """Kök SNAPSHOT_KEYS'te mi (tüm alt ağacı bize ait sayılır)"""
+    return root.lower() in {k.lower() for k in SNAPSHOT_KEYS}
+
+
+def catalog_values(root: str) -> Set[Tuple[str, str]]:
+    """Kök altında katalogun yazdığı değerler: (göreli yol, değer adı), küçük harf"""
+    folded = root.lower()
+    owned = set()
+    for tweak in get_catalog().select():
+        key = tweak.key_path.lower()
+        if key == folded:
+            owned.add(("", tweak.value.lower()))
+        elif key.startswith(folded + "\\"):
+            owned.add((key[len(folded) + 1:], tweak.value.lower()))
+    return owned
+
+
+def capture_subtree(key_path: str, backend: Optional[RegistryBackend] = None,
+                    max_depth: int = MAX_DEPTH, max_keys: int = MAX_KEYS) -> Subtree:
+    """Kök ve alt anahtarlarının tüm değerleri (anahtar başına tek enum_values)"""
+    backend = backend if backend is not None else get_registry_backend()
+    hive, subkey = split_key_path(key_path)
+    subtree = Subtree(root=key_path, max_depth=max_depth)
+    if hive is None:
+        subtree.exists = False
+        return subtree
+
+    pending = [("", 0)]
+    while pending:
+        relative, depth = pending.pop()
+        if len(subtree.keys) >= max_keys:
+            subtree.truncated = True
+            break
+        path = f"{subkey}\\{relative}" if relative else subkey
+        try:
+            handle = backend.open_key(hive, path)
+        except OSError:
+            if not relative:
+                subtree.exists = False
+            continue
+        try:
+            values = [SnapshotValue(name, vtype, data) for name, data, vtype in backend.enum_values(handle)]
+            children = backend.enum_keys(handle)
+        except OSError:
+            continue
+        finally:
+            backend.close_key(handle)
+        subtree.keys[relative] = values
+        if children and depth >= max_depth:
+            subtree.truncated = True
+            continue
+        # Yığın ters sırayla doldurulur ki anahtarlar derinlik öncelikli, ad sırasıyla gezilsin
+        for child in reversed(children):
+            pending.append((f"{relative}\\{child}" if relative else child, depth + 1))
+    return subtree
+
+
+def capture(roots: Optional[Iterable[str]] = None, backend: Optional[RegistryBackend] = None,
+            max_depth: int = MAX_DEPTH) -> List[Subtree]:
+    roots = snapshot_roots() if roots is None else roots
+    return [capture_subtree(root, backend, max_depth=max_depth) for root in roots]
+
+
+# --- Kodlama ---
+
+def _encode_value(out: bytearray, strings: _Strings, value: SnapshotValue) -> None:
+    data = value.data
+    if isinstance(data, int) and not isinstance(data, bool):
+        kind = _KIND_INT
+        if data < 0:  # winreg işaretsiz döner; elle verilen negatif DWORD/QWORD iki tümleyenle saklanır
+            data &= 0xFFFFFFFFFFFFFFFF if value.vtype == REG_QWORD else 0xFFFFFFFF
+    elif not isinstance(data, (str, list, tuple)):
+        kind = _KIND_RAW
+    elif isinstance(data, str):
+        kind = _KIND_STR
+    else:
+        kind = _KIND_LIST if all(isinstance(s, str) for s in data) else _KIND_RAW
+
+    _put_varint(out, strings(value.name))
+    _put_varint(out, (int(value.vtype) << 2) | kind)
+    if kind == _KIND_INT:
+        _put_varint(out, data)
+    elif kind == _KIND_STR:
+        _put_varint(out, strings(data))
+    elif kind == _KIND_LIST:
+        _put_varint(out, len(data))
+        for item in data:
+            _put_varint(out, strings(item))
+    elif data is None:
+        _put_varint(out, 0)
+    else:
+        raw = bytes(data) if isinstance(data, (bytes, bytearray, memoryview)) else str(data).encode("utf-8")
+        _put_varint(out, len(raw) + 1)  # 0 = None (boş REG_NONE / REG_BINARY)
+        out += raw
+
+
+def encode_subtree(subtree: Subtree) -> bytes:
+    """Blok: string tablosu + anahtarlar (ebeveyn, ad) + değerler"""
+    strings = _Strings()
+    body = bytearray()
+    _put_varint(body, len(subtree.keys))
+    positions: Dict[str, int] = {}
+    for relative, values in subtree.keys.items():
+        parent, _, leaf = relative.rpartition("\\")
+        # ebeveyn: 0 = kökün kendisi, n = n-1. anahtar (gezinme sırası ebeveyni önce yazar)
+        parent_ref = 0 if not relative else positions.get(parent, -1) + 1
+        if relative and parent_ref == 0:
+            raise SnapshotError(f"ebeveyni olmayan anahtar: {relative}")
+        positions[relative] = len(positions)
+        _put_varint(body, parent_ref)
+        _put_varint(body, strings(leaf))
+        _put_varint(body, len(values))
+        for value in values:
+            _encode_value(body, strings, value)
+
+    block = bytearray()
+    _put_varint(block, len(strings.items))
+    for text in strings.items:
+        _put_bytes(block, text.encode("utf-8", errors="surrogatepass"))
+    block += body
+    return bytes(block)
+
+
+def encode_snapshot(subtrees: Sequence[Subtree], compress: bool = True) -> bytes:
+    out = bytearray(_HEADER.size)
+    entries: List[IndexEntry] = []
+    for subtree in subtrees:
+        block = encode_subtree(subtree)
+        flags = (_FLAG_EXISTS if subtree.exists else 0) | (_FLAG_TRUNCATED if subtree.truncated else 0)
+        if compress:
+            packed = zlib.compress(block, 6)
+            if len(packed) < len(block):
+                block, flags = packed, flags | _FLAG_ZLIB
+        entries.append(IndexEntry(subtree.root, len(out), len(block), len(subtree.keys),
+                                  subtree.value_count, flags, subtree.max_depth))
+        out += block
+
+    index_offset = len(out)
+    _put_varint(out, len(entries))
+    for entry in entries:
+        _put_bytes(out, entry.root.encode("utf-8"))
+        for number in (entry.offset, entry.length, entry.key_count, entry.value_count, entry.flags, entry.max_depth):
+            _put_varint(out, number)
+    _HEADER.pack_into(out, 0, MAGIC, VERSION, index_offset)
+    return bytes(out)
+
+
+# --- Çözme (tembel) ---
+
+def decode_subtree(entry: IndexEntry, block: bytes) -> Subtree:
+    if entry.flags & _FLAG_ZLIB:
+        try:
+            block = zlib.decompress(block)
+        except zlib.error as e:
+            raise SnapshotError(f"{entry.root}: blok açılamadı ({e})") from None
+
+    count, pos = _get_varint(block, 0)
+    strings: List[str] = []
+    for _ in range(count):
+        raw, pos = _get_bytes(block, pos)
+        strings.append(raw.decode("utf-8", errors="surrogatepass"))
+
+    subtree = Subtree(root=entry.root, exists=bool(entry.flags & _FLAG_EXISTS),
+                      truncated=bool(entry.flags & _FLAG_TRUNCATED), max_depth=entry.max_depth)
+    paths: List[str] = []
+    key_count, pos = _get_varint(block, pos)
+    try:
+        for _ in range(key_count):
+            parent_ref, pos = _get_varint(block, pos)
+            leaf_idx, pos = _get_varint(block, pos)
+            if parent_ref == 0:
+                relative = strings[leaf_idx]
+            else:
+                parent = paths[parent_ref - 1]
+                relative = f"{parent}\\{strings[leaf_idx]}" if parent else strings[leaf_idx]
+            paths.append(relative)
+
+            values: List[SnapshotValue] = []
+            value_count, pos = _get_varint(block, pos)
+            for _ in range(value_count):
+                name_idx, pos = _get_varint(block, pos)
+                tag, pos = _get_varint(block, pos)
+                kind = tag & 0x03
+                if kind == _KIND_INT:
+                    data, pos = _get_varint(block, pos)
+                elif kind == _KIND_STR:
+                    idx, pos = _get_varint(block, pos)
+                    data = strings[idx]
+                elif kind == _KIND_LIST:
+                    n, pos = _get_varint(block, pos)
+                    data = []
+                    for _ in range(n):
+                        idx, pos = _get_varint(block, pos)
+                        data.append(strings[idx])
+                else:
+                    size, pos = _get_varint(block, pos)
+                    data = None if size == 0 else bytes(block[pos:pos + size - 1])
+                    pos += max(0, size - 1)
+                values.append(SnapshotValue(strings[name_idx], tag >> 2, data))
+            subtree.keys[relative] = values
+    except IndexError:
+        raise SnapshotError(f"{entry.root}: geçersiz string / anahtar referansı") from None
+    return subtree
+
+
+class SnapshotFile:
+    """Açılışta sadece indeks okunur; get() istenen kökün bloğunu çözer (sonuç cache'lenir)"""
+
+    def __init__(self, data: bytes):
+        if len(data) < _HEADER.size:
+            raise SnapshotError("dosya çok kısa")
+        magic, version, index_offset = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise SnapshotError("anlık görüntü dosyası değil")
+        if version != VERSION:
+            raise SnapshotError(f"desteklenmeyen sürüm: {version}")
+        self._data = data
+        self.entries: Dict[str, IndexEntry] = {}
+        count, pos = _get_varint(data, index_offset)
+        for _ in range(count):
+            root, pos = _get_bytes(data, pos)
+            numbers = []
+            for _ in range(6):
+                number, pos = _get_varint(data, pos)
+                numbers.append(number)
+            entry = IndexEntry(root.decode("utf-8"), *numbers)
+            if entry.offset + entry.length > index_offset:
+                raise SnapshotError(f"{entry.root}: blok dosya dışında")
+            self.entries[entry.root.lower()] = entry
+        self._decoded: Dict[str, Subtree] = {}
+
+    @classmethod
+    def open(cls, path: str) -> "SnapshotFile":
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def roots(self) -> List[str]:
+        return [entry.root for entry in self.entries.values()]
+
+    def __contains__(self, root: str) -> bool:
+        return root.lower() in self.entries
+
+    def get(self, root: str) -> Subtree:
+        folded = root.lower()
+        subtree = self._decoded.get(folded)
+        if subtree is None:
+            entry = self.entries.get(folded)
+            if entry is None:
+                raise KeyError(root)
+            subtree = decode_subtree(entry, self._data[entry.offset:entry.offset + entry.length])
+            self._decoded[folded] = subtree
+        return subtree
+
+    def find(self, key_path: str) -> Optional[Subtree]:
+        """key_path'i kapsayan kökün alt ağacı (yoksa None)"""
+        folded = key_path.lower()
+        for root, entry in self.entries.items():
+            if folded == root or folded.startswith(root + "\\"):
+                return self.get(entry.root)
+        return None
+
+
+def write_snapshot(path: str, roots: Optional[Iterable[str]] = None,
+                   backend: Optional[RegistryBackend] = None) -> Dict[str, Any]:
+    """Alt ağaçları yakala ve dosyaya yaz; yedek JSON'una konacak özet döner"""
+    started = time.perf_counter()
+    subtrees = capture(roots, backend)
+    data = encode_snapshot(subtrees)
+    with open(path, "wb") as f:
+        f.write(data)
+    return {
+        "subtrees": len(subtrees),
+        "keys": sum(len(s.keys) for s in subtrees),
+        "values": sum(s.value_count for s in subtrees),
+        "bytes": len(data),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+# --- Geri yükleme ---
+
+def restore_subtree(subtree: Subtree, backend: Optional[RegistryBackend] = None,
+                    delete_extra: bool = True) -> SubtreeRestore:
+    """
+    Alt ağacı anlık görüntüdeki hale döndür: farklı değerler yazılır, görüntüde olmayan değerler
+    (delete_extra) silinir. Sonradan oluşan anahtarların değerleri silinir, anahtarların kendisi kalır
+    (görüntü sınıra takıldıysa sadece görüntüdeki anahtarlara dokunulur).
+
+    Tüm alt ağaç sadece SNAPSHOT_KEYS köklerinde geri yüklenir. Katalogdan türetilen köklerde
+    (örn. Policies\\...\\System) sadece katalogun yazdığı değerlere dokunulur: Group Policy /
+    yöneticinin sonradan koyduğu değerler kalır, yedekte olmayan katalog değerleri silinir.
+    """
+    backend = backend if backend is not None else get_registry_backend()
+    report = SubtreeRestore(subtree.root)
+    hive, subkey = split_key_path(subtree.root)
+    if hive is None:
+        report.failed.append(f"{subtree.root}: tanınmayan hive")
+        return report
+
+    owned = None if is_explicit_root(subtree.root) else catalog_values(subtree.root)
+
+    current = capture_subtree(subtree.root, backend, max_depth=subtree.max_depth)
+    targets = dict(subtree.keys) if subtree.exists else {}
+    relatives = list(targets)
+    if not subtree.truncated:
+        # Kesilmiş görüntüde eksik anahtar "sonradan oluştu" sayılamaz
+        relatives += [r for r in current.keys if r not in targets]
+    for relative in relatives:
+        wanted = {v.name.lower(): v for v in targets.get(relative, [])}
+        present = {v.name.lower(): v for v in current.keys.get(relative, [])}
+        if owned is not None:
+            folded = relative.lower()
+            wanted = {k: v for k, v in wanted.items() if (folded, k) in owned}
+            present = {k: v for k, v in present.items() if (folded, k) in owned}
+        writes = [v for k, v in wanted.items()
+                  if k not in present or not same_value(present[k].vtype, present[k].data, v.vtype, v.data)]
+        deletes = [v for k, v in present.items() if k not in wanted] if delete_extra else []
+        report.unchanged += len(wanted) - len(writes)
+        if not writes and not deletes:
+            continue
+
+        path = f"{subkey}\\{relative}" if relative else subkey
+        key_path = key_path_for(hive, path)
+        try:
+            handle = backend.create_key(hive, path) if writes else backend.open_key(hive, path, write=True)
+        except OSError as e:
+            report.failed.append(f"{key_path}: {e}")
+            continue
+        try:
+            for value in writes:
+                try:
+                    backend.set_value(handle, value.name, value.vtype, value.data)
+                    report.written += 1
+                except Exception as e:
+                    report.failed.append(f"{key_path}\\{value.name}: {e}")
+            for value in deletes:
+                try:
+                    backend.delete_value(handle, value.name)
+                    report.deleted += 1
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    report.failed.append(f"{key_path}\\{value.name}: {e}")
+        finally:
+            backend.close_key(handle)
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if len(argv) >= 2 and argv[0] == "--capture":
+        info = write_snapshot(argv[1])
+        print(f"   ✅ {argv[1]}: {info['subtrees']} alt ağaç, {info['keys']} anahtar, {info['values']} değer, "
+              f"{info['bytes']} bayt ({info['duration_ms']:.0f} ms)")
+        return 0
+
+    if len(argv) >= 2 and argv[0] == "--dump":
+        started = time.perf_counter()
+        snap = SnapshotFile.open(argv[1])
+        roots = argv[2:] or snap.roots()
+        for root in roots:
+            subtree = snap.get(root)
+            state = "" if subtree.exists else " (yoktu)"
+            print(f"   📋 {subtree.root}{state}: {len(subtree.keys)} anahtar, {subtree.value_count} değer")
+            for relative, values in subtree.keys.items():
+                for value in values:
+                    print(f"      {subtree.key_path(relative)}\\{value.name} [{value.vtype}] = {value.data!r}")
+        print(f"   ⏱️  {(time.perf_counter() - started) * 1000:.1f} ms")
+        return 0
+
+    print("Kullanım: python -m modules.registry_snapshot --capture OUT.snap | --dump FILE.snap [KÖK...]")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Kayıt Defteri İzleyici (olay tabanlı telemetri koruması)
+
+5 dakikada bir .bat çalıştıran zamanlanmış görev yerine, açılışta bir kez başlayan
+hafif bir süreç:
+- İzlenen anahtarlar (ve servis yapılandırması) için değişiklik bildirimini bekler
+  (RegNotifyChangeKeyValue); beklerken CPU kullanmaz
+- Art arda gelen değişiklikleri toplar (debounce), sonra sadece değişen anahtarları okur
+- Sadece hedeften sapan değeri / servisi yeniden uygular
+- Seyrek tam kontrol (heartbeat) kaçan bildirimlere karşı güvenlik ağıdır
+
+Bildirim kaynağı takılabilir: Win32ChangeNotifier (Windows) veya QueueNotifier
+(elle tetiklenen; debounce ve yeniden uygulama mantığı Linux'ta denenebilir).
+Okuma/yazma aktif kayıt defteri arka ucuyla yapılır (modules/registry_backend.py).
+
+Kullanım:
+    python -m modules.registry_watcher --enforce   # sürekli (zamanlanmış görev bunu çalıştırır)
+    python -m modules.registry_watcher --once      # tek sefer düzelt
+    python -m modules.registry_watcher --check     # sadece raporla (0 = uygun, 1 = sapma var)
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from modules.registry_backend import RegistryBackend, get_registry_backend
+from modules.tweak_catalog import Tweak, get_catalog, same_value
+
+
+# Servis başlangıç tipi kayıt defterinde: HKLM\SYSTEM\CurrentControlSet\Services\<ad>\Start
+SERVICES_KEY = r"SYSTEM\CurrentControlSet\Services"
+SERVICE_DISABLED = 4
+
+# Görev adı eski 5 dakikalık görevle aynı (restore.py ve check_changes.bat onu arıyor)
+TASK_NAME = "TelemetryBlocker"
+
+KeyId = Tuple[str, str]  # (hive, alt anahtar)
+
+
+def _key_id(hive: str, subkey: str) -> KeyId:
+    return (hive.upper(), subkey.lower())
+
+
+# --- Bildirim kaynakları ---
+
+class ChangeNotifier(ABC):
+    """İzlenen anahtarlarda değişiklik olunca haber verir"""
+
+    @abstractmethod
+    def watch(self, keys: Sequence[KeyId]) -> None:
+        """İzlenecek anahtarları ayarla (öncekilerin yerine)"""
+
+    @abstractmethod
+    def wait(self, timeout: Optional[float]) -> List[KeyId]:
+        """Değişen anahtarlar; timeout dolarsa / interrupt() çağrılırsa boş liste"""
+
+    def interrupt(self) -> None:
+        """Bekleyen wait()'i uyandır"""
+
+    def close(self) -> None:
+        """Kaynakları bırak"""
+
+
+class QueueNotifier(ChangeNotifier):
+    """Elle tetiklenen bildirim kaynağı (notify() ile); Windows gerektirmez"""
+
+    _STOP = object()
+
+    def __init__(self):
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self.keys: List[KeyId] = []
+
+    def watch(self, keys):
+        self.keys = list(keys)
+
+    def notify(self, hive: str, subkey: str) -> None:
+        self._queue.put(_key_id(hive, subkey))
+
+    def wait(self, timeout):
+        try:
+            first = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return []
+        items = [first]
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return [item for item in items if item is not self._STOP]
+
+    def interrupt(self):
+        self._queue.put(self._STOP)
+
+
+class Win32ChangeNotifier(ChangeNotifier):
+    """
+    RegNotifyChangeKeyValue + WaitForMultipleObjects (ctypes; pywin32 gerekmez).
+    Olmayan anahtar için en yakın var olan üst anahtar alt ağaçla birlikte izlenir;
+    her bildirimden sonra izleme yeniden kurulur (bildirimler tek seferliktir).
+    """
+
+    MAXIMUM_WAIT_OBJECTS = 64
+    _ROOTS = {"HKCR": 0x80000000, "HKCU": 0x80000001, "HKLM": 0x80000002, "HKU": 0x80000003}
+    _KEY_NOTIFY = 0x0010
+    _KEY_WOW64_64KEY = 0x0100
+    _FILTER = 0x00000001 | 0x00000004 | 0x10000000  # NAME | LAST_SET | THREAD_AGNOSTIC
+    _WAIT_TIMEOUT = 0x102
+    _WAIT_FAILED = 0xFFFFFFFF
+    _INFINITE = 0xFFFFFFFF
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+
+        self._ctypes = ctypes
+        self._advapi32 = ctypes.WinDLL("advapi32", use_last_error=True)
+        self._kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        self._advapi32.RegOpenKeyExW.argtypes = [wintypes.HKEY, wintypes.LPCWSTR, wintypes.DWORD,
+                                                 wintypes.DWORD, ctypes.POINTER(wintypes.HKEY)]
+        self._advapi32.RegNotifyChangeKeyValue.argtypes = [wintypes.HKEY, wintypes.BOOL, wintypes.DWORD,
+                                                           wintypes.HANDLE, wintypes.BOOL]
+        self._advapi32.RegCloseKey.argtypes = [wintypes.HKEY]
+        self._kernel32.CreateEventW.restype = wintypes.HANDLE
+        self._kernel32.WaitForMultipleObjects.argtypes = [wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE),
+                                                          wintypes.BOOL, wintypes.DWORD]
+        self._kernel32.WaitForSingleObject.argtypes = [wintypes.HANDLE, wintypes.DWORD]
+        self._kernel32.SetEvent.argtypes = [wintypes.HANDLE]
+        self._kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        self._wintypes = wintypes
+
+        self._stop_event = self._kernel32.CreateEventW(None, False, False, None)
+        # izlenen yol -> {"targets", "event", "hkey", "subtree"}
+        self._watches: Dict[KeyId, Dict[str, Any]] = {}
+
+    def _root(self, hive: str):
+        value = self._ROOTS[hive]
+        bits = 8 * self._ctypes.sizeof(self._ctypes.c_void_p)
+        # Ön tanımlı HKEY'ler işaretli 32 bit değerlerdir (64 bit'te işaret genişletilir)
+        return self._wintypes.HKEY(self._ctypes.c_int32(value).value & ((1 << bits) - 1))
+
+    def _open(self, hive: str, subkey: str):
+        hkey = self._wintypes.HKEY()
+        status = self._advapi32.RegOpenKeyExW(self._root(hive), subkey, 0,
+                                              self._KEY_NOTIFY | self._KEY_WOW64_64KEY,
+                                              self._ctypes.byref(hkey))
+        return hkey if status == 0 else None
+
+    def _arm(self, path: KeyId, watch: Dict[str, Any]) -> None:
+        """Anahtarı (yoksa en yakın var olan üstünü) aç ve bildirimi kur"""
+        if watch.get("hkey") is not None:
+            self._advapi32.RegCloseKey(watch["hkey"])
+            watch["hkey"] = None
+        hive, subkey = path
+        parts = [p for p in subkey.split("\\") if p]
+        for depth in range(len(parts), -1, -1):
+            candidate = "\\".join(parts[:depth])
+            hkey = self._open(hive, candidate)
+            if hkey is None:
+                continue
+            subtree = watch["subtree"] or depth < len(parts)
+            status = self._advapi32.RegNotifyChangeKeyValue(hkey, subtree, self._FILTER, watch["event"], True)
+            if status == 0:
+                watch["hkey"] = hkey
+                return
+            self._advapi32.RegCloseKey(hkey)
+
+    def watch(self, keys):
+        self.close_watches()
+        paths: Set[KeyId] = {_key_id(h, s) for h, s in keys}
+        subtree = False
+        # Bekleme tutamacı sınırı (durdurma olayı dahil): gerekirse üst anahtarlarda birleştir
+        while len(paths) > self.MAXIMUM_WAIT_OBJECTS - 1:
+            paths = {(h, s.rpartition("\\")[0]) for h, s in paths}
+            subtree = True
+        targets = [_key_id(h, s) for h, s in keys]
+        for path in sorted(paths):
+            hive, prefix = path
+            watch = {
+                "targets": [t for t in targets if t[0] == hive and (not prefix or t[1] == prefix or t[1].startswith(prefix + "\\"))],
+                "event": self._kernel32.CreateEventW(None, False, False, None),
+                "hkey": None,
+                "subtree": subtree,
+            }
+            self._watches[path] = watch
+            self._arm(path, watch)
+
+    def wait(self, timeout):
+        paths = list(self._watches)
+        handles = [self._watches[p]["event"] for p in paths] + [self._stop_event]
+        array = (self._wintypes.HANDLE * len(handles))(*handles)
+        ms = self._INFINITE if timeout is None else max(0, int(timeout * 1000))
+        index = self._kernel32.WaitForMultipleObjects(len(handles), array, False, ms)
+        if index == self._WAIT_FAILED:
+            raise OSError(self._ctypes.get_last_error(), "WaitForMultipleObjects başarısız")
+        if index == self._WAIT_TIMEOUT or index >= len(handles) - 1:
+            return []
+
+        changed: List[KeyId] = []
+        for i, path in enumerate(paths):
+            # İlk sinyalli olay zaten sıfırlandı; diğerleri 0 ms beklemeyle toplanır
+            if i != index and self._kernel32.WaitForSingleObject(handles[i], 0) != 0:
+                continue
+            watch = self._watches[path]
+            changed.extend(watch["targets"])
+            self._arm(path, watch)
+        return changed
+
+    def interrupt(self):
+        self._kernel32.SetEvent(self._stop_event)
+
+    def close_watches(self) -> None:
+        for watch in self._watches.values():
+            if watch.get("hkey") is not None:
+                self._advapi32.RegCloseKey(watch["hkey"])
+            self._kernel32.CloseHandle(watch["event"])
+        self._watches.clear()
+
+    def close(self):
+        self.close_watches()
+        if self._stop_event:
+            self._kernel32.CloseHandle(self._stop_event)
+            self._stop_event = None
+
+
+# --- Sapma kontrolü ve yeniden uygulama ---
+
+@dataclass
+class Drift:
+    """Hedeften sapmış tek değer (servis için Start değeri)"""
+    key_path: str
+    name: str
+    expected: Any
+    actual: Any  # None -> değer yok
+    tweak: Optional[Tweak] = None
+    service: Optional[str] = None
+
+
+@dataclass
+class EnforceReport:
+    """Tek kontrol/düzeltme turunun sonucu"""
+    checked: int = 0
+    drifts: List[Drift] = field(default_factory=list)
+    fixed: List[Drift] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    duration_ms: float = 0.0
+
+
+def default_targets() -> Tuple[List[Tweak], List[str]]:
+    """
+    Varsayılan izleme listesi: katalogdaki telemetri değerleri + telemetri servisleri.
+    Görev SYSTEM olarak çalıştığı için sadece HKLM değerleri izlenir
+    (HKCU orada SYSTEM kullanıcısının hive'ı olurdu).
+    """
+    from modules.telemetry_blocker import TelemetryBlocker
+
+    tweaks = [t for t in get_catalog().select([TelemetryBlocker.TELEMETRY_CATEGORY]) if t.hive == "HKLM"]
+    return tweaks, list(TelemetryBlocker.TELEMETRY_SERVICES)
+
+
+def _disable_service(name: str) -> bool:
+    from modules.service_control import get_service_control
+    return get_service_control().disable(name)
+
+
+class DriftEnforcer:
+    """
+    İzlenen değerleri hedefte tutar.
+    Okumalar paylaşılan handle cache'ini kullanmaz: süreç uzun yaşar ve anahtarlar
+    dışarıdan silinip yeniden oluşturulabilir; her tur arka uçtan taze okunur.
+    """
+
+    def __init__(self, tweaks: Iterable[Tweak], services: Iterable[str] = (),
+                 notifier: Optional[ChangeNotifier] = None,
+                 backend: Optional[RegistryBackend] = None,
+                 service_fixer: Optional[Callable[[str], bool]] = None,
+                 debounce: float = 0.5, max_delay: float = 5.0, heartbeat: Optional[float] = 3600.0,
+                 log: Optional[Callable[[str], None]] = None):
+        self.tweaks = list(tweaks)
+        self.services = list(services)
+        self.notifier = notifier
+        self.backend = backend
+        self.service_fixer = service_fixer or _disable_service
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.heartbeat = heartbeat
+        self.log = log or (lambda msg: print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {msg}", flush=True))
+        self.cycles = 0
+        self.events = 0
+        self.fixed_total = 0
+        self._stopped = threading.Event()
+
+        self._tweaks_by_key: Dict[KeyId, List[Tweak]] = {}
+        for tweak in self.tweaks:
+            hive, _, subkey = tweak.key_path.partition("\\")
+            self._tweaks_by_key.setdefault(_key_id(hive, subkey), []).append(tweak)
+        self._services_by_key: Dict[KeyId, str] = {
+            _key_id("HKLM", f"{SERVICES_KEY}\\{name}"): name for name in self.services
+        }
+
+    def _backend(self) -> RegistryBackend:
+        return self.backend if self.backend is not None else get_registry_backend()
+
+    def watched_keys(self) -> List[KeyId]:
+        keys: List[KeyId] = []
+        for tweak in self.tweaks:
+            hive, _, subkey = tweak.key_path.partition("\\")
+            if _key_id(hive, subkey) not in {_key_id(*k) for k in keys}:
+                keys.append((hive, subkey))
+        keys.extend(("HKLM", f"{SERVICES_KEY}\\{name}") for name in self.services)
+        return keys
+
+    def _read_key(self, hive: str, subkey: str, names: Sequence[str]) -> Dict[str, Tuple[bool, Any, Any]]:
+        """Anahtarı bir kez açıp istenen değerleri oku: name -> (exists, type, data)"""
+        backend = self._backend()
+        out = {name: (False, None, None) for name in names}
+        try:
+            handle = backend.open_key(hive, subkey)
+        except OSError:
+            return out
+        try:
+            for name in names:
+                try:
+                    data, vtype = backend.query_value(handle, name)
+                    out[name] = (True, vtype, data)
+                except OSError:
+                    pass
+        finally:
+            backend.close_key(handle)
+        return out
+
+    def check(self, keys: Optional[Iterable[KeyId]] = None) -> EnforceReport:
+        """Verilen anahtarları (None -> hepsini) oku ve sapmaları bul (yazma yok)"""
+        started = time.perf_counter()
+        report = EnforceReport()
+        wanted = None if keys is None else {_key_id(*k) for k in keys}
+
+        for key, tweaks in self._tweaks_by_key.items():
+            if wanted is not None and key not in wanted:
+                continue
+            hive, _, subkey = tweaks[0].key_path.partition("\\")
+            current = self._read_key(hive, subkey, [t.value for t in tweaks])
+            for tweak in tweaks:
+                report.checked += 1
+                exists, vtype, data = current[tweak.value]
+                if not (exists and same_value(vtype, data, tweak.vtype, tweak.data)):
+                    report.drifts.append(Drift(tweak.key_path, tweak.value, tweak.data,
+                                               data if exists else None, tweak=tweak))
+
+        for key, service in self._services_by_key.items():
+            if wanted is not None and key not in wanted:
+                continue
+            report.checked += 1
+            exists, _, data = self._read_key("HKLM", f"{SERVICES_KEY}\\{service}", ["Start"])["Start"]
+            if exists and data != SERVICE_DISABLED:  # servis kurulu değilse sapma sayılmaz
+                report.drifts.append(Drift(f"HKLM\\{SERVICES_KEY}\\{service}", "Start",
+                                           SERVICE_DISABLED, data, service=service))
+
+        report.duration_ms = (time.perf_counter() - started) * 1000
+        return report
+
+    def enforce(self, keys: Optional[Iterable[KeyId]] = None) -> EnforceReport:
+        """Sapmaları bul ve sadece onları yeniden uygula"""
+        report = self.check(keys)
+        backend = self._backend()
+        for drift in report.drifts:
+            try:
+                if drift.service:
+                    if not self.service_fixer(drift.service):
+                        raise OSError("servis devre dışı bırakılamadı")
+                else:
+                    hive, _, subkey = drift.key_path.partition("\\")
+                    backend.write_value(hive, subkey, drift.name, drift.tweak.vtype, drift.tweak.data)
+                report.fixed.append(drift)
+            except Exception as e:
+                report.errors.append(f"{drift.key_path}\\{drift.name}: {e}")
+        self.fixed_total += len(report.fixed)
+        return report
+
+    def _collect(self, first: List[KeyId]) -> Set[KeyId]:
+        """Debounce: sessizlik `debounce` sürene kadar (en çok `max_delay`) değişiklikleri topla"""
+        changed = set(first)
+        deadline = time.monotonic() + self.max_delay
+        while not self._stopped.is_set():
+            remaining = min(self.debounce, deadline - time.monotonic())
+            if remaining <= 0:
+                break
+            more = self.notifier.wait(remaining)
+            if not more:
+                break
+            self.events += len(more)
+            changed.update(more)
+        return changed
+
+    def _report(self, report: EnforceReport, reason: str) -> None:
+        for drift in report.fixed:
+            self.log(f"Düzeltildi ({reason}): {drift.key_path}\\{drift.name}: {drift.actual} -> {drift.expected}")
+        for error in report.errors:
+            self.log(f"Hata ({reason}): {error}")
+
+    def run(self, max_cycles: Optional[int] = None) -> None:
+        """Bildirim bekle -> topla -> değişen anahtarları düzelt (stop() veya max_cycles'a kadar)"""
+        if self.notifier is None:
+            self.notifier = Win32ChangeNotifier()
+        self.notifier.watch(self.watched_keys())
+        # Başlangıçta bir tam tur (açılıştan önceki değişiklikler)
+        self._report(self.enforce(), "başlangıç")
+        try:
+            while not self._stopped.is_set() and (max_cycles is None or self.cycles < max_cycles):
+                first = self.notifier.wait(self.heartbeat)
+                if self._stopped.is_set():
+                    break
+                self.cycles += 1
+                if not first:
+                    self._report(self.enforce(), "periyodik")
+                    continue
+                self.events += len(first)
+                self._report(self.enforce(self._collect(first)), "değişiklik")
+        finally:
+            self.notifier.close()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self.notifier is not None:
+            self.notifier.interrupt()
+
+
+# --- Zamanlanmış görev ---
+
+def enforcer_command() -> Tuple[str, str, str]:
+    """(program, argümanlar, çalışma dizini): paketlenmiş exe veya `python -m`"""
+    if getattr(sys, "frozen", False):
+        # Windows11Optimizer.exe --enforce (optimize.py yönlendirir)
+        return sys.executable, "--enforce", str(Path(sys.executable).parent)
+    python = Path(sys.executable)
+    pythonw = python.with_name("pythonw.exe")
+    program = pythonw if pythonw.exists() else python
+    return str(program), "-m modules.registry_watcher --enforce", str(Path(__file__).resolve().parent.parent)
+
+
+def _xml_escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def task_xml(program: str, arguments: str, workdir: str) -> str:
+    """Açılışta SYSTEM olarak bir kez başlayan, süre sınırı olmayan, düşük öncelikli görev"""
+    return f'''<?xml version="1.0" encoding="UTF-16"?>
+<Task version="1.2" xmlns="http://schemas.microsoft.com/windows/2004/02/mit/task">
+  <Triggers>
+    <BootTrigger>
+      <Enabled>true</Enabled>
+    </BootTrigger>
+  </Triggers>
+  <Principals>
+    <Principal id="Author">
+      <UserId>S-1-5-18</UserId>
+      <RunLevel>HighestAvailable</RunLevel>
+    </Principal>
+  </Principals>
+  <Settings>
+    <MultipleInstancesPolicy>IgnoreNew</MultipleInstancesPolicy>
+    <DisallowStartIfOnBatteries>false</DisallowStartIfOnBatteries>
+    <StopIfGoingOnBatteries>false</StopIfGoingOnBatteries>
+    <AllowHardTerminate>true</AllowHardTerminate>
+    <StartWhenAvailable>true</StartWhenAvailable>
+    <RunOnlyIfNetworkAvailable>false</RunOnlyIfNetworkAvailable>
+    <IdleSettings>
+      <StopOnIdleEnd>false</StopOnIdleEnd>
+      <RestartOnIdle>false</RestartOnIdle>
+    </IdleSettings>
+    <AllowStartOnDemand>true</AllowStartOnDemand>
+    <Enabled>true</Enabled>
+    <Hidden>true</Hidden>
+    <RunOnlyIfIdle>false</RunOnlyIfIdle>
+    <WakeToRun>false</WakeToRun>
+    <ExecutionTimeLimit>PT0S</ExecutionTimeLimit>
+    <Priority>7</Priority>
+    <RestartOnFailure>
+      <Interval>PT1M</Interval>
+      <Count>3</Count>
+    </RestartOnFailure>
+  </Settings>
+  <Actions Context="Author">
+    <Exec>
+      <Command>"{_xml_escape(program)}"</Command>
+      <Arguments>{_xml_escape(arguments)}</Arguments>
+      <WorkingDirectory>{_xml_escape(workdir)}</WorkingDirectory>
+    </Exec>
+  </Actions>
+</Task>'''
+
+
+def install_enforcer_task(runner=None) -> bool:
+    """
+    TelemetryBlocker görevini izleyiciyle değiştir (eski 5 dakikalık görevin üzerine yazar)
+    ve hemen başlat (yeniden başlatmayı beklemeden).
+    """
+    from modules.command_runner import get_command_runner
+
+    runner = runner or get_command_runner()
+    fd, xml_path = tempfile.mkstemp(suffix=".xml", prefix="telemetry_watcher_")
+    os.close(fd)
+    try:
+        with open(xml_path, "w", encoding="utf-16") as f:
+            f.write(task_xml(*enforcer_command()))
+        created = runner.run(["schtasks", "/Create", "/TN", TASK_NAME, "/XML", xml_path, "/F"], timeout=30)
+    finally:
+        try:
+            os.remove(xml_path)
+        except OSError:
+            pass
+    if not created.ok:
+        return False
+    runner.run(["schtasks", "/Run", "/TN", TASK_NAME], timeout=30)
+    return True
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not any(flag in argv for flag in ("--enforce", "--once", "--check")):
+        print("Kullanım: python -m modules.registry_watcher --enforce | --once | --check")
+        return 2
+
+    tweaks, services = default_targets()
+    enforcer = DriftEnforcer(tweaks, services)
+
+    if "--check" in argv:
+        report = enforcer.check()
+        for drift in report.drifts:
+            print(f"   ⚠️  {drift.key_path}\\{drift.name}: {drift.actual} (hedef {drift.expected})")
+        print(f"   {'✅' if not report.drifts else '⚠️ '} {report.checked} değer, {len(report.drifts)} sapma")
+        return 1 if report.drifts else 0
+
+    if "--once" in argv:
+        report = enforcer.enforce()
+        enforcer._report(report, "tek sefer")
+        return 1 if report.errors else 0
+
+    try:
+        enforcer.run()
+    except KeyboardInterrupt:
+        enforcer.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,14 +14,27 @@ Bu yüzden optimize.py tarafında kullanıcı onayıyla çalıştırılması hed
 
 from __future__ import annotations
 
-import subprocess
-import winreg
 from typing import List
 
+from modules.command_runner import get_command_runner
+from modules.registry_batch import RegistryBatch, key_path_for
+from modules.tweak_catalog import get_catalog, write_tweaks
+
 
 class SecurityVirtualizationOptimizer:
     """VBS/HVCI/Credential Guard kapatma (opsiyonel)."""
 
+    # Katalog değeri -> (değişiklik kaydı, ekran mesajı)
+    TWEAK_MESSAGES = {
+        "EnableVirtualizationBasedSecurity": ("VBS kapatıldı: EnableVirtualizationBasedSecurity=0",
+                                              "VBS kapatıldı (EnableVirtualizationBasedSecurity)"),
+        # Bazı senaryolarda platform güvenlik özellikleri zorlanır
+        "RequirePlatformSecurityFeatures": ("VBS kapatıldı: RequirePlatformSecurityFeatures=0",
+                                            "VBS platform gereksinimleri kapatıldı"),
+        "Enabled": ("HVCI kapatıldı: HVCI Enabled=0", "Memory Integrity (HVCI) kapatıldı"),
+        "LsaCfgFlags": ("Credential Guard kapatıldı: LsaCfgFlags=0", "Credential Guard kapatıldı"),
+    }
+
     def __init__(self):
         self.changes: List[str] = []
 
@@ -33,35 +46,38 @@ class SecurityVirtualizationOptimizer:
         # Çok agresif: Hypervisor'ı boot seviyesinde kapatır (WSL2/Hyper-V'yi kırabilir).
         self.disable_hypervisor_launch: bool = False
 
-    def _set_reg_dword(self, root, subkey: str, name: str, value: int) -> bool:
-        try:
-            key = winreg.CreateKey(root, subkey)
-            winreg.SetValueEx(key, name, 0, winreg.REG_DWORD, int(value))
-            winreg.CloseKey(key)
+        # bcdedit çağrısı başına üst sınır (geçerli süre bütçesiyle ayrıca sınırlanır)
+        self.bcdedit_timeout: float = 30.0
+
+    def _set_reg_dword(self, hive: str, subkey: str, name: str, value: int,
+                       batch: RegistryBatch = None) -> bool:
+        """batch verilirse sadece kuyruğa ekler (commit çağırana ait)"""
+        own = batch is None
+        if own:
+            batch = RegistryBatch()
+        batch.add_dword(key_path_for(hive, subkey), name, value, source="security_virtualization")
+        if not own:
             return True
-        except Exception as e:
-            print(f"      ⚠️  REG {subkey}\\{name}: {e}")
+        error = batch.commit().error_for(key_path_for(hive, subkey), name)
+        if error:
+            print(f"      ⚠️  REG {subkey}\\{name}: {error}")
             return False
+        return True
 
     def _bcdedit_set(self, args: List[str]) -> bool:
         """
         bcdedit ile boot config değiştirir.
         Not: Yönetici gerekir. Bazı sistemlerde Secure Boot/BitLocker nedeniyle kısıtlanabilir.
         """
-        try:
-            result = subprocess.run(
-                ["bcdedit", *args],
-                capture_output=True,
-                text=True
-            )
-            if result.returncode == 0:
-                return True
-            # bcdedit bazen stderr'e yazar
-            print(f"      ⚠️  bcdedit {' '.join(args)}: {result.stderr.strip() or result.stdout.strip()}")
-            return False
-        except Exception as e:
-            print(f"      ⚠️  bcdedit {' '.join(args)}: {e}")
+        result = get_command_runner().run(["bcdedit", *args], timeout=self.bcdedit_timeout)
+        if result.ok:
+            return True
+        if result.timed_out:
+            print(f"      ⚠️  bcdedit {' '.join(args)}: zaman aşımı")
             return False
+        # bcdedit bazen stderr'e yazar
+        print(f"      ⚠️  bcdedit {' '.join(args)}: {result.error or result.stderr.strip() or result.stdout.strip()}")
+        return False
 
     def apply_vbs_off(self) -> List[str]:
         """
@@ -71,53 +87,25 @@ class SecurityVirtualizationOptimizer:
         changes: List[str] = []
         print("   📋 VBS/HVCI/Credential Guard ayarları uygulanıyor...")
 
-        # VBS
-        if self.disable_vbs:
-            # Device Guard / VBS
-            if self._set_reg_dword(
-                winreg.HKEY_LOCAL_MACHINE,
-                r"SYSTEM\CurrentControlSet\Control\DeviceGuard",
-                "EnableVirtualizationBasedSecurity",
-                0,
-            ):
-                changes.append("VBS kapatıldı: EnableVirtualizationBasedSecurity=0")
-                print("      ✅ VBS kapatıldı (EnableVirtualizationBasedSecurity)")
-
-            # Bazı senaryolarda platform güvenlik özellikleri zorlanır
-            if self._set_reg_dword(
-                winreg.HKEY_LOCAL_MACHINE,
-                r"SYSTEM\CurrentControlSet\Control\DeviceGuard",
-                "RequirePlatformSecurityFeatures",
-                0,
-            ):
-                changes.append("VBS kapatıldı: RequirePlatformSecurityFeatures=0")
-                print("      ✅ VBS platform gereksinimleri kapatıldı")
-
-        # HVCI (Memory Integrity)
-        if self.disable_hvci:
-            if self._set_reg_dword(
-                winreg.HKEY_LOCAL_MACHINE,
-                r"SYSTEM\CurrentControlSet\Control\DeviceGuard\Scenarios\HypervisorEnforcedCodeIntegrity",
-                "Enabled",
-                0,
-            ):
-                changes.append("HVCI kapatıldı: HVCI Enabled=0")
-                print("      ✅ Memory Integrity (HVCI) kapatıldı")
-
-        # Credential Guard
-        if self.disable_credential_guard:
-            # LsaCfgFlags:
-            # 0 = Disabled
-            # 1 = Enabled with UEFI lock
-            # 2 = Enabled without lock
-            if self._set_reg_dword(
-                winreg.HKEY_LOCAL_MACHINE,
-                r"SYSTEM\CurrentControlSet\Control\Lsa",
-                "LsaCfgFlags",
-                0,
-            ):
-                changes.append("Credential Guard kapatıldı: LsaCfgFlags=0")
-                print("      ✅ Credential Guard kapatıldı")
+        # Katalog kategorileri: vbs / hvci / credential_guard (modules/tweak_catalog.py)
+        # DeviceGuard altındakiler tek açılışta yazılır
+        categories = [
+            category for enabled, category in (
+                (self.disable_vbs, "vbs"),
+                (self.disable_hvci, "hvci"),
+                (self.disable_credential_guard, "credential_guard"),
+            ) if enabled
+        ]
+        if categories:
+            written, failed = write_tweaks(get_catalog().select(categories, profiles=categories),
+                                           source="security_virtualization")
+            for tweak in written:
+                change, message = self.TWEAK_MESSAGES.get(
+                    tweak.value, (f"{tweak.value}={tweak.data}", f"{tweak.value} kapatıldı"))
+                changes.append(change)
+                print(f"      ✅ {message}")
+            for tweak, error in failed:
+                print(f"      ⚠️  REG {tweak.key}\\{tweak.value}: {error}")
 
         # Boot-level hypervisor disable (aggressive)
         if self.disable_hypervisor_launch:
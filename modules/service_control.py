@@ -0,0 +1,601 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servis Kontrol Katmanı (Service Control Manager)
+
+`sc query/stop/config` her çağrıda yeni bir sc.exe prosesi başlatır (servis başına 2-3 proses).
+Bu modül SCM'yi çalışma başına bir kez açar, servis handle'larını cache'ler ve
+query / stop / start / set_start_type işlemlerini doğrudan Win32 API ile yapar.
+
+Tüm servis işlemlerinin süresi ve hataları tek yerde toplanır (stats()).
+
+stop_many(): durdurma isteğini tüm servislere aynı anda gönderir, başlangıç tiplerini
+ayarlar ve servisleri birlikte, her birinin bildirdiği wait hint / checkpoint'e göre
+yoklar. Toplam süre ≈ en yavaş tek servis (servislerin toplamı değil). Bekleme süresi
+geçerli süre bütçesiyle (modules.deadline) sınırlanır; bütçe iptal edilirse yoklama biter.
+
+dependency_graph() + plan_stop_waves(): bağımlılık grafiği SCM'den bir kez okunur,
+durdurma işlemleri topolojik dalgalara (wave) bölünür; önce bağımlılar durdurulur.
+"""
+
+from __future__ import annotations
+
+import atexit
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import win32service
+
+from modules.deadline import current_budget
+
+# Win32 hata kodları
+ERROR_ACCESS_DENIED = 5
+ERROR_SERVICE_ALREADY_RUNNING = 1056
+ERROR_SERVICE_DOES_NOT_EXIST = 1060
+ERROR_SERVICE_NOT_ACTIVE = 1062
+
+# Servis durumları (SERVICE_STATUS.dwCurrentState)
+STATE_NAMES = {
+    win32service.SERVICE_STOPPED: "STOPPED",
+    win32service.SERVICE_START_PENDING: "START_PENDING",
+    win32service.SERVICE_STOP_PENDING: "STOP_PENDING",
+    win32service.SERVICE_RUNNING: "RUNNING",
+    win32service.SERVICE_CONTINUE_PENDING: "CONTINUE_PENDING",
+    win32service.SERVICE_PAUSE_PENDING: "PAUSE_PENDING",
+    win32service.SERVICE_PAUSED: "PAUSED",
+}
+
+_FULL_ACCESS = (
+    win32service.SERVICE_QUERY_STATUS
+    | win32service.SERVICE_QUERY_CONFIG
+    | win32service.SERVICE_STOP
+    | win32service.SERVICE_START
+    | win32service.SERVICE_CHANGE_CONFIG
+    | win32service.SERVICE_ENUMERATE_DEPENDENTS
+)
+_READ_ACCESS = win32service.SERVICE_QUERY_STATUS | win32service.SERVICE_QUERY_CONFIG
+
+
+def _winerror(exc: Exception) -> Optional[int]:
+    """pywintypes.error -> Win32 hata kodu"""
+    code = getattr(exc, "winerror", None)
+    if code is None and getattr(exc, "args", None):
+        code = exc.args[0] if isinstance(exc.args[0], int) else None
+    return code
+
+
+@dataclass
+class ServiceState:
+    """Tek bir servisin anlık durumu"""
+    name: str
+    state: int
+    start_type: Optional[int] = None
+    checkpoint: int = 0
+    wait_hint_ms: int = 0
+
+    @property
+    def state_name(self) -> str:
+        return STATE_NAMES.get(self.state, str(self.state))
+
+    @property
+    def is_running(self) -> bool:
+        return self.state == win32service.SERVICE_RUNNING
+
+    @property
+    def is_stopped(self) -> bool:
+        return self.state == win32service.SERVICE_STOPPED
+
+    @property
+    def is_stop_pending(self) -> bool:
+        return self.state == win32service.SERVICE_STOP_PENDING
+
+    @property
+    def is_disabled(self) -> bool:
+        return self.start_type == win32service.SERVICE_DISABLED
+
+
+@dataclass
+class StopOutcome:
+    """stop_many() sonucu (servis başına)"""
+    name: str
+    stopped: bool
+    elapsed_ms: float = 0.0
+    start_type_set: Optional[bool] = None
+    timed_out: bool = False
+    refused: bool = False           # stop isteği reddedildi (erişim reddi / STOP kabul etmiyor)
+    state: Optional[ServiceState] = None
+
+
+@dataclass
+class ServiceDeps:
+    """Servisin bağımlılık bilgisi"""
+    name: str
+    dependents: List[str] = field(default_factory=list)    # bu servise bağlı (aktif) servisler
+    all_dependents: List[str] = field(default_factory=list)  # durmuş olanlar dahil tüm bağımlılar
+    dependencies: List[str] = field(default_factory=list)  # bu servisin bağlı olduğu servisler
+
+
+def plan_stop_waves(
+    targets: Iterable[str],
+    dependents_map: Dict[str, Iterable[str]],
+    keep: Iterable[str] = (),
+    blocking_map: Optional[Dict[str, Iterable[str]]] = None,
+) -> Tuple[List[List[str]], Dict[str, str]]:
+    """
+    Durdurma sırasını dalgalar halinde planla (saf fonksiyon, SCM'ye dokunmaz).
+
+    - dependents_map: servis -> ona bağlı (çalışan) servisler (dolaylı bağımlılar dahil olabilir)
+    - Bir hedefin bağımlıları ondan önceki dalgalarda durdurulur; aynı dalgadakiler paralel
+    - blocking_map: servis -> durmuş olanlar dahil tüm bağımlılar (verilmezse dependents_map).
+      Bunlardan biri `keep` içindeyse hedef atlanır (ve o hedefe bağlı diğer hedefler de):
+      şu an durmuş bir korunan servis de hedef devre dışıyken sonradan başlayamaz
+    - Hedef olmayan bağımlılar sadece durdurulmak üzere plana eklenir
+
+    Dönüş: (dalgalar, atlananlar {hedef: sebep}). İsim karşılaştırmaları büyük/küçük harf duyarsız.
+    """
+    names: Dict[str, str] = {}  # lower -> orijinal isim
+
+    def norm(name: str) -> str:
+        key = name.lower()
+        names.setdefault(key, name)
+        return key
+
+    deps = {norm(svc): {norm(d) for d in ds} for svc, ds in dependents_map.items()}
+    blocking = deps if blocking_map is None else {
+        norm(svc): {norm(d) for d in ds} for svc, ds in blocking_map.items()
+    }
+    keep_set = {norm(k) for k in keep}
+    target_list = [norm(t) for t in targets]
+
+    # 1) Korunan bir servisi durdurmayı gerektiren hedefleri atla (sabit noktaya kadar)
+    skipped: Dict[str, str] = {}
+    changed = True
+    while changed:
+        changed = False
+        for t in target_list:
+            if t in skipped:
+                continue
+            blockers = sorted(d for d in blocking.get(t, ()) if d in keep_set or d in skipped)
+            if t in keep_set:
+                skipped[t] = "korunan servis"
+            elif blockers:
+                skipped[t] = "bağımlı servis durdurulamaz: " + ", ".join(names[b] for b in blockers)
+            else:
+                continue
+            changed = True
+
+    # 2) Durdurulacak küme: kalan hedefler + (dolaylı) bağımlıları
+    to_stop: Set[str] = set()
+    frontier = [t for t in target_list if t not in skipped]
+    while frontier:
+        svc = frontier.pop()
+        if svc in to_stop:
+            continue
+        to_stop.add(svc)
+        frontier.extend(d for d in deps.get(svc, ()) if d not in to_stop)
+
+    # 3) Kahn: bağımlısı kalmayan servisler önce (dalga = paralel durdurulabilecekler)
+    remaining = {svc: {d for d in deps.get(svc, ()) if d in to_stop and d != svc} for svc in to_stop}
+    order = {t: i for i, t in enumerate(target_list)}
+    waves: List[List[str]] = []
+    while remaining:
+        ready = [svc for svc, ds in remaining.items() if not ds]
+        if not ready:
+            # Döngü (olmamalı) - kalanları tek dalgada dene
+            ready = list(remaining)
+        ready.sort(key=lambda svc: (order.get(svc, len(order)), svc))
+        waves.append([names[svc] for svc in ready])
+        for svc in ready:
+            del remaining[svc]
+        for ds in remaining.values():
+            ds.difference_update(ready)
+
+    return waves, {names[t]: reason for t, reason in skipped.items()}
+
+
+class ServiceControl:
+    """
+    SCM üzerinden servis kontrolü.
+    SCM handle'ı ilk kullanımda açılır; servis handle'ları close() çağrılana kadar cache'de tutulur.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._scm = None
+        self._handles: Dict[str, Any] = {}
+        self._missing: set = set()
+        self._deps: Dict[str, ServiceDeps] = {}
+
+        # İstatistikler: işlem -> (çağrı sayısı, toplam ms)
+        self._timings: Dict[str, List[float]] = {}
+        self.errors: List[Tuple[str, str, str]] = []  # (servis, işlem, mesaj)
+        # disable() çağrılıp zaten durmuş + devre dışı bulunan (dokunulmayan) servisler
+        self.already_compliant: List[str] = []
+
+    # ---------- Handle yönetimi ----------
+
+    def _manager(self):
+        if self._scm is None:
+            self._scm = win32service.OpenSCManager(
+                None, None,
+                win32service.SC_MANAGER_CONNECT | win32service.SC_MANAGER_ENUMERATE_SERVICE,
+            )
+        return self._scm
+
+    def _handle(self, name: str):
+        """Servis handle'ı (cache'li). Servis yoksa None."""
+        key = name.lower()
+        if key in self._handles:
+            return self._handles[key]
+        if key in self._missing:
+            return None
+
+        scm = self._manager()
+        try:
+            handle = win32service.OpenService(scm, name, _FULL_ACCESS)
+        except Exception as e:
+            code = _winerror(e)
+            if code == ERROR_SERVICE_DOES_NOT_EXIST:
+                self._missing.add(key)
+                return None
+            if code != ERROR_ACCESS_DENIED:
+                raise
+            # Korumalı servisler (örn. WinDefend) tam yetkiyle açılamayabilir; en azından okunabilsin
+            handle = win32service.OpenService(scm, name, _READ_ACCESS)
+
+        self._handles[key] = handle
+        return handle
+
+    def close(self) -> None:
+        """Tüm handle'ları kapat"""
+        with self._lock:
+            for handle in self._handles.values():
+                try:
+                    win32service.CloseServiceHandle(handle)
+                except Exception:
+                    pass
+            self._handles.clear()
+            self._missing.clear()
+            self._deps.clear()
+            if self._scm is not None:
+                try:
+                    win32service.CloseServiceHandle(self._scm)
+                except Exception:
+                    pass
+                self._scm = None
+
+    def _record(self, op: str, started: float) -> None:
+        entry = self._timings.setdefault(op, [0, 0.0])
+        entry[0] += 1
+        entry[1] += (time.perf_counter() - started) * 1000
+
+    def _error(self, name: str, op: str, exc: Exception) -> None:
+        self.errors.append((name, op, str(exc)))
+
+    # ---------- API ----------
+
+    def exists(self, name: str) -> bool:
+        with self._lock:
+            try:
+                return self._handle(name) is not None
+            except Exception:
+                return False
+
+    def query(self, name: str) -> Optional[ServiceState]:
+        """Servis durumu + başlangıç tipi. Servis yoksa / okunamazsa None."""
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                handle = self._handle(name)
+                if handle is None:
+                    return None
+                # (ServiceType, CurrentState, ControlsAccepted, Win32ExitCode,
+                #  ServiceSpecificExitCode, CheckPoint, WaitHint)
+                status = win32service.QueryServiceStatus(handle)
+                start_type = None
+                try:
+                    # (ServiceType, StartType, ErrorControl, BinaryPathName, ...)
+                    start_type = win32service.QueryServiceConfig(handle)[1]
+                except Exception as e:
+                    self._error(name, "query_config", e)
+                return ServiceState(
+                    name=name,
+                    state=status[1],
+                    start_type=start_type,
+                    checkpoint=status[5],
+                    wait_hint_ms=status[6],
+                )
+            except Exception as e:
+                self._error(name, "query", e)
+                return None
+            finally:
+                self._record("query", started)
+
+    def stop(self, name: str) -> bool:
+        """Durdurma isteği gönder (beklemez). Zaten durmuşsa True."""
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                handle = self._handle(name)
+                if handle is None:
+                    return False
+                win32service.ControlService(handle, win32service.SERVICE_CONTROL_STOP)
+                return True
+            except Exception as e:
+                if _winerror(e) == ERROR_SERVICE_NOT_ACTIVE:
+                    return True
+                self._error(name, "stop", e)
+                return False
+            finally:
+                self._record("stop", started)
+
+    def start(self, name: str) -> bool:
+        """Başlatma isteği gönder (beklemez). Zaten çalışıyorsa True."""
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                handle = self._handle(name)
+                if handle is None:
+                    return False
+                win32service.StartService(handle, None)
+                return True
+            except Exception as e:
+                if _winerror(e) == ERROR_SERVICE_ALREADY_RUNNING:
+                    return True
+                self._error(name, "start", e)
+                return False
+            finally:
+                self._record("start", started)
+
+    def set_start_type(self, name: str, start_type: int) -> bool:
+        """
+        Başlangıç tipini değiştir (örn. win32service.SERVICE_DISABLED).
+        Kilit sadece handle cache'i için tutulur; ChangeServiceConfig çağrıları
+        farklı thread'lerden aynı anda yapılabilir (set_start_types).
+        """
+        started = time.perf_counter()
+        try:
+            with self._lock:
+                handle = self._handle(name)
+            if handle is None:
+                return False
+            win32service.ChangeServiceConfig(
+                handle,
+                win32service.SERVICE_NO_CHANGE,  # ServiceType
+                int(start_type),                 # StartType
+                win32service.SERVICE_NO_CHANGE,  # ErrorControl
+                None, None, 0, None, None, None, None,
+            )
+            return True
+        except Exception as e:
+            with self._lock:
+                self._error(name, "set_start_type", e)
+            return False
+        finally:
+            with self._lock:
+                self._record("set_start_type", started)
+
+    def set_start_types(self, names: Iterable[str], start_type: int,
+                        max_workers: int = 8) -> Dict[str, bool]:
+        """Birden fazla servisin başlangıç tipini aynı anda değiştir; servis -> başarılı mı"""
+        names = list(names)
+        if len(names) <= 1:
+            return {name: self.set_start_type(name, start_type) for name in names}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(names)), thread_name_prefix="scm") as pool:
+            results = list(pool.map(lambda name: self.set_start_type(name, start_type), names))
+        return dict(zip(names, results))
+
+    def disable(self, name: str) -> bool:
+        """
+        Durdur + devre dışı bırak (`sc stop` + `sc config start= disabled` karşılığı).
+        Önce durum okunur: zaten durmuş + devre dışıysa yazma yapılmaz (already_compliant'a
+        eklenir); sadece eksik olan adım (stop / ChangeServiceConfig) gönderilir.
+        """
+        state = self.query(name)
+        if state is None:
+            return False
+        if state.is_stopped and state.is_disabled:
+            with self._lock:
+                if name not in self.already_compliant:
+                    self.already_compliant.append(name)
+            return True
+        if not state.is_stopped:
+            self.stop(name)
+        return state.is_disabled or self.set_start_type(name, win32service.SERVICE_DISABLED)
+
+    def dependencies(self, name: str) -> ServiceDeps:
+        """Servisin (tüm / aktif) bağımlıları ve bağımlılıkları (cache'li)"""
+        with self._lock:
+            key = name.lower()
+            if key in self._deps:
+                return self._deps[key]
+            started = time.perf_counter()
+            info = ServiceDeps(name=name)
+            try:
+                handle = self._handle(name)
+                if handle is not None:
+                    try:
+                        # Dolaylı ve durmuş bağımlılar dahil; (ServiceName, DisplayName, ServiceStatus)
+                        # ServiceStatus[1] = CurrentState; aktif olanlar durdurma dalgalarına girer
+                        rows = win32service.EnumDependentServices(handle, win32service.SERVICE_STATE_ALL)
+                        info.all_dependents = [row[0] for row in rows or ()]
+                        info.dependents = [row[0] for row in rows or ()
+                                           if row[2][1] != win32service.SERVICE_STOPPED]
+                    except Exception as e:
+                        self._error(name, "enum_dependents", e)
+                    try:
+                        # QueryServiceConfig()[6] = bağımlılıklar; '+' ile başlayanlar yükleme grubu
+                        deps = win32service.QueryServiceConfig(handle)[6] or ()
+                        info.dependencies = [d for d in deps if d and not d.startswith("+")]
+                    except Exception as e:
+                        self._error(name, "query_dependencies", e)
+            finally:
+                self._record("dependencies", started)
+            self._deps[key] = info
+            return info
+
+    def dependency_graph(self, names: Iterable[str]) -> Dict[str, ServiceDeps]:
+        """
+        Hedefler ve (dolaylı, durmuş olanlar dahil) bağımlıları için bağımlılık grafiği
+        (bir kez okunur). Graf içindeki bağımlılıklar bağımlı listelerine de yansıtılır.
+        """
+        graph: Dict[str, ServiceDeps] = {}
+        seen: Set[str] = set()
+        frontier = list(names)
+        while frontier:
+            name = frontier.pop(0)
+            if name.lower() in seen:
+                continue
+            seen.add(name.lower())
+            if not self.exists(name):
+                continue
+            info = self.dependencies(name)
+            graph[name] = info
+            frontier.extend(info.all_dependents)
+        by_key = {name.lower(): info for name, info in graph.items()}
+        active = {d.lower() for info in graph.values() for d in info.dependents}
+        for name, info in graph.items():
+            for dep in info.dependencies:
+                target = by_key.get(dep.lower())
+                if target is None:
+                    continue
+                if name.lower() not in {d.lower() for d in target.all_dependents}:
+                    target.all_dependents.append(name)
+                if name.lower() in active and name.lower() not in {d.lower() for d in target.dependents}:
+                    target.dependents.append(name)
+        return graph
+
+    def stop_many(self, names: List[str], start_type: Optional[int] = None,
+                  deadline_s: float = 60.0, min_poll_s: float = 0.1,
+                  max_poll_s: float = 2.0,
+                  start_type_for: Optional[Iterable[str]] = None) -> Dict[str, StopOutcome]:
+        """
+        Servisleri eşzamanlı durdur.
+
+        1) Tüm servislere stop kontrolü gönderilir (beklemeden)
+           Stop isteği reddedilen (erişim reddi, STOP kabul etmeyen) ve STOP_PENDING'e
+           geçmeyen servisler beklenmez: refused olarak döner
+        2) start_type verildiyse servisler kapanırken başlangıç tipleri aynı anda ayarlanır
+           (start_type_for verildiyse sadece o servislerde; reddedilenler dahil)
+        3) Bekleyen servisler birlikte yoklanır: her servis kendi wait hint'inin 1/10'u
+           kadar aralıkla (min_poll_s..max_poll_s) sorgulanır; checkpoint ilerlemesi izlenir
+        4) deadline_s (veya geçerli süre bütçesi) dolunca hâlâ durmamış olanlar timed_out olarak döner
+        """
+        perf_started = time.perf_counter()
+        started = time.monotonic()
+        budget = current_budget()
+        deadline = started + (budget.clamp(deadline_s) if budget is not None else deadline_s)
+        outcomes: Dict[str, StopOutcome] = {}
+
+        # 1) stop isteklerini gönder
+        pending: Dict[str, float] = {}  # servis -> sonraki yoklama zamanı
+        present: List[str] = []
+        for name in names:
+            outcomes[name] = StopOutcome(name=name, stopped=False)
+            if not self.exists(name):
+                continue
+            present.append(name)
+            if not self.stop(name):
+                # Reddedildi: servis RUNNING kalır (wait hint 0), yoklamak deadline'ı boşa harcar
+                state = self.query(name)
+                outcomes[name].state = state
+                if state is None or not (state.is_stop_pending or state.is_stopped):
+                    outcomes[name].refused = True
+                    outcomes[name].elapsed_ms = (time.monotonic() - started) * 1000
+                    continue
+            pending[name] = started
+
+        # 2) başlangıç tipleri (servisler kapanırken, aynı anda)
+        if start_type is not None:
+            only = None if start_type_for is None else {n.lower() for n in start_type_for}
+            targets = [name for name in present if only is None or name.lower() in only]
+            for name, ok in self.set_start_types(targets, start_type).items():
+                outcomes[name].start_type_set = ok
+
+        # 3) birlikte yokla
+        progress: Dict[str, Tuple[int, float]] = {}  # servis -> (son checkpoint, değiştiği an)
+        while pending:
+            now = time.monotonic()
+            for name, due in list(pending.items()):
+                if due > now:
+                    continue
+                state = self.query(name)
+                outcome = outcomes[name]
+                outcome.state = state
+                if state is None or state.is_stopped:
+                    outcome.stopped = state is not None
+                    outcome.elapsed_ms = (time.monotonic() - started) * 1000
+                    del pending[name]
+                    continue
+
+                hint_s = (state.wait_hint_ms or 0) / 1000.0
+                last_checkpoint, since = progress.get(name, (state.checkpoint, now))
+                if state.checkpoint != last_checkpoint:
+                    since = now
+                progress[name] = (state.checkpoint, since)
+                # Checkpoint wait hint süresince ilerlemediyse servis takılmış sayılır
+                if hint_s > 0 and now - since > hint_s:
+                    outcome.timed_out = True
+                    outcome.elapsed_ms = (now - started) * 1000
+                    del pending[name]
+                    continue
+                pending[name] = now + min(max(hint_s / 10.0, min_poll_s), max_poll_s)
+
+            if not pending:
+                break
+            now = time.monotonic()
+            if now >= deadline or (budget is not None and budget.cancelled):
+                for name in pending:
+                    outcomes[name].timed_out = True
+                    outcomes[name].elapsed_ms = (now - started) * 1000
+                break
+            time.sleep(max(0.0, min(min(pending.values()), deadline) - now))
+
+        with self._lock:
+            self._record("stop_many", perf_started)
+        return outcomes
+
+    def stats(self) -> Dict[str, Any]:
+        """İşlem başına çağrı sayısı/süre ve hatalar"""
+        with self._lock:
+            return {
+                "operations": {
+                    op: {"calls": int(calls), "total_ms": round(total, 1)}
+                    for op, (calls, total) in self._timings.items()
+                },
+                "open_handles": len(self._handles),
+                "already_compliant": list(self.already_compliant),
+                "errors": [
+                    {"service": svc, "operation": op, "error": msg}
+                    for svc, op, msg in self.errors
+                ],
+            }
+
+
+# Global instance
+_control: Optional[ServiceControl] = None
+_control_lock = threading.Lock()
+
+
+def get_service_control() -> ServiceControl:
+    """Paylaşılan ServiceControl'ü getir"""
+    global _control
+    with _control_lock:
+        if _control is None:
+            _control = ServiceControl()
+        return _control
+
+
+def shutdown_service_control() -> None:
+    """Handle'ları kapat (çalışma sonunda)"""
+    global _control
+    with _control_lock:
+        if _control is not None:
+            _control.close()
+            _control = None
+
+
+atexit.register(shutdown_service_control)
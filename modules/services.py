@@ -5,10 +5,11 @@ Windows Servis Optimizasyonu
 Gereksiz servisleri kapatır, yazılım geliştirme için gerekli olanları korur
 """
 
-import win32serviceutil
+import time
+
 import win32service
-import win32con
-import subprocess
+
+from modules.service_control import StopOutcome, get_service_control, plan_stop_waves
 
 class ServiceOptimizer:
     """Windows servis optimizasyonu"""
@@ -79,34 +80,59 @@ class ServiceOptimizer:
     def __init__(self):
         self.changes = []
         self.aggressive_trim = False
+        # True: tüm servislere aynı anda stop gönder, birlikte bekle (toplam ≈ en yavaş servis)
+        # False: servis servis durdur ve bekle
+        self.concurrent_stop = True
+        self.stop_deadline_s = 60.0
+        # Çalışma başına tek durum snapshot'ı (servis -> ServiceState); backup_services doldurur
+        self._snapshot = None
+        # Zaten hedef durumda olan (durmuş + devre dışı) servisler - son optimize() çağrısı
+        self.compliant_services = []
     
     def get_service_status(self, service_name):
         """Servis durumunu kontrol et"""
-        try:
-            status = win32serviceutil.QueryServiceStatus(service_name)[1]
-            return status == win32service.SERVICE_RUNNING
-        except:
+        state = get_service_control().query(service_name)
+        if state is None:
             return None
+        return state.is_running
+    
+    @staticmethod
+    def is_compliant(state):
+        """Hedef durum: durmuş + devre dışı"""
+        return state is not None and state.is_stopped and state.is_disabled
+    
+    def snapshot_states(self, refresh=False):
+        """Hedef servislerin durum + başlangıç tipi snapshot'ı (çalışma başına bir kez)"""
+        if self._snapshot is not None and not refresh:
+            return self._snapshot
+        control = get_service_control()
+        names = list(dict.fromkeys(self.SERVICES_TO_DISABLE + self._target_services()))
+        snapshot = {}
+        for service in names:
+            state = control.query(service)
+            if state is not None:
+                snapshot[service] = state
+        self._snapshot = snapshot
+        return snapshot
     
     def disable_service(self, service_name):
         """Servisi devre dışı bırak"""
         try:
-            # Servis durumunu kontrol et
-            current_status = self.get_service_status(service_name)
-            if current_status is None:
+            # Servis durumunu kontrol et (durum + başlangıç tipi)
+            control = get_service_control()
+            state = control.query(service_name)
+            if state is None:
                 return False
+            if self.is_compliant(state):
+                return True  # Zaten hedef durumda, yazma yok
             
-            # Servisi durdur
-            try:
-                win32serviceutil.StopService(service_name)
-            except:
-                pass  # Zaten durmuş olabilir
-            
-            # Servisi devre dışı bırak
-            win32serviceutil.ChangeServiceConfig(
-                service_name,
-                startType=win32service.SERVICE_DISABLED
-            )
+            # Servisi durdur + devre dışı bırak
+            if not state.is_stopped:
+                control.stop(service_name)
+            if not state.is_disabled and not control.set_start_type(service_name, win32service.SERVICE_DISABLED):
+                if control.errors:
+                    print(f"      ⚠️  {service_name}: {control.errors[-1][2]}")
+                return False
             
             self.changes.append({
                 "type": "service_disable",
@@ -121,73 +147,130 @@ class ServiceOptimizer:
     def backup_services(self):
         """Mevcut servis durumlarını yedekle"""
         backup = {}
+        # Snapshot optimize() tarafından da kullanılır (servisler ikinci kez sorgulanmaz)
+        snapshot = self.snapshot_states(refresh=True)
         for service in self.SERVICES_TO_DISABLE:
-            try:
-                # QueryServiceStatus() tuple yapısı:
-                # (ServiceType, CurrentState, ControlsAccepted, Win32ExitCode, ServiceSpecificExitCode, CheckPoint, WaitHint)
-                status = win32serviceutil.QueryServiceStatus(service)
-
-                # StartType için QueryServiceConfig gerekir (QueryServiceStatus içinde yok).
-                # win32serviceutil.QueryServiceConfig bazı ortamlarda yok/erişilemez olabiliyor,
-                # bu yüzden Win32 Service API ile doğrudan okuyoruz.
-                start_type = None
-                try:
-                    scm = win32service.OpenSCManager(None, None, win32service.SC_MANAGER_CONNECT)
-                    try:
-                        svc = win32service.OpenService(scm, service, win32service.SERVICE_QUERY_CONFIG)
-                        try:
-                            cfg = win32service.QueryServiceConfig(svc)
-                            # (ServiceType, StartType, ErrorControl, BinaryPathName, ...)
-                            start_type = cfg[1]
-                        finally:
-                            win32service.CloseServiceHandle(svc)
-                    finally:
-                        win32service.CloseServiceHandle(scm)
-                except Exception:
-                    # Fallback: sc qc parse
-                    try:
-                        result = subprocess.run(["sc", "qc", service], capture_output=True, text=True, timeout=10)
-                        out = (result.stdout or "")
-                        for line in out.splitlines():
-                            if "START_TYPE" in line:
-                                # örn: "        START_TYPE         : 2   AUTO_START"
-                                parts = line.split(":")
-                                if len(parts) >= 2:
-                                    right = parts[1].strip()
-                                    num = right.split()[0].strip()
-                                    if num.isdigit():
-                                        start_type = int(num)
-                                break
-                    except Exception:
-                        start_type = None
-                backup[service] = {
-                    "status": status[1],
-                    "start_type": start_type
-                }
-            except:
-                pass
+            state = snapshot.get(service)
+            if state is None:
+                continue
+            backup[service] = {
+                "status": state.state,
+                "start_type": state.start_type
+            }
         return backup
     
+    def _target_services(self):
+        services = list(self.SERVICES_TO_DISABLE)
+        if getattr(self, "aggressive_trim", False):
+            services.extend(self.TRIM_SERVICES_TO_DISABLE)
+        keep = set(self.SERVICES_TO_KEEP)
+        return [service for service in services if service not in keep]  # Korunacak servisleri atla
+    
+    def plan_stops(self, services):
+        """
+        SCM'den bağımlılık grafiğini bir kez okuyup durdurma dalgalarını planla.
+        Dönüş: (dalgalar, atlananlar {servis: sebep})
+        """
+        graph = get_service_control().dependency_graph(services)
+        dependents_map = {name: info.dependents for name, info in graph.items()}
+        # Korunan servis kontrolü durmuş bağımlıları da kapsar (sonradan başlayabilmeli)
+        blocking_map = {name: info.all_dependents for name, info in graph.items()}
+        targets = [service for service in services if service in graph]  # sistemde olmayanlar hariç
+        return plan_stop_waves(targets, dependents_map, keep=self.SERVICES_TO_KEEP, blocking_map=blocking_map)
+    
+    def _stop_and_disable(self, services, waves):
+        """
+        Dalgaları sırayla durdur (önce bağımlılar); hedefler devre dışı bırakılır,
+        hedef olmayan bağımlılar sadece durdurulur. servis -> StopOutcome
+        """
+        control = get_service_control()
+        deadline = time.monotonic() + self.stop_deadline_s
+        outcomes = {}
+        for wave in waves:
+            # eşzamanlı: dalga tek seferde; sıralı: dalga içi servis servis
+            groups = [wave] if self.concurrent_stop else [[service] for service in wave]
+            for group in groups:
+                outcomes.update(control.stop_many(
+                    group,
+                    start_type=win32service.SERVICE_DISABLED,
+                    start_type_for=services,
+                    deadline_s=max(0.0, deadline - time.monotonic()),
+                ))
+        return outcomes
+    
     def optimize(self):
         """Servis optimizasyonlarını uygula"""
         changes = []
         
         print("   📋 Servisler kontrol ediliyor...")
         
-        services = list(self.SERVICES_TO_DISABLE)
-        if getattr(self, "aggressive_trim", False):
-            services.extend(self.TRIM_SERVICES_TO_DISABLE)
-
+        control = get_service_control()
+        snapshot = self.snapshot_states()
+        targets = [service for service in self._target_services() if service in snapshot]  # sistemde olmayanlar hariç
+        
+        # Sadece hedef durumdan farklı olanlara dokun
+        self.compliant_services = [service for service in targets if self.is_compliant(snapshot[service])]
+        services = [service for service in targets if service not in self.compliant_services]
+        if self.compliant_services:
+            print(f"      ℹ️  {len(self.compliant_services)} servis zaten durmuş ve devre dışı (atlandı)")
+        if not services:
+            return changes
+        
+        to_disable = [service for service in services if not snapshot[service].is_disabled]
+        started = time.perf_counter()
+        try:
+            waves, skipped = self.plan_stops(services)
+            for service, reason in skipped.items():
+                print(f"      ⏭️  {service} atlandı ({reason})")
+            # Zaten durmuş hedefler dalgalardan çıkarılır (stop gönderilmez)
+            stopped = {service for service in services if snapshot[service].is_stopped}
+            waves = [[svc for svc in wave if svc not in stopped] for wave in waves]
+            waves = [wave for wave in waves if wave]
+            outcomes = self._stop_and_disable(to_disable, waves)
+            # Durmuş ama devre dışı olmayanlar: sadece başlangıç tipi
+            for service in to_disable:
+                if service in stopped and service not in skipped:
+                    outcomes[service] = StopOutcome(
+                        name=service, stopped=True,
+                        start_type_set=control.set_start_type(service, win32service.SERVICE_DISABLED),
+                    )
+        except Exception as e:
+            print(f"      ⚠️  Servisler: {e}")
+            return changes
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
         for service in services:
-            if service in self.SERVICES_TO_KEEP:
-                continue  # Korunacak servisleri atla
-            
-            try:
-                if self.disable_service(service):
-                    changes.append(f"Servis devre dışı: {service}")
-                    print(f"      ✅ {service} devre dışı bırakıldı")
-            except Exception as e:
-                print(f"      ⚠️  {service}: {str(e)}")
+            outcome = outcomes.get(service)
+            if outcome is None:
+                continue  # Atlandı
+            if service not in to_disable:
+                # Zaten devre dışıydı, sadece durduruldu
+                if outcome.stopped:
+                    changes.append(f"Servis durduruldu: {service}")
+                    print(f"      ✅ {service} durduruldu")
+            elif outcome.start_type_set:
+                self.changes.append({
+                    "type": "service_disable",
+                    "service": service,
+                    "action": "disabled"
+                })
+                changes.append(f"Servis devre dışı: {service}")
+                print(f"      ✅ {service} devre dışı bırakıldı")
+            else:
+                errors = [msg for svc, op, msg in control.errors if svc == service]
+                print(f"      ⚠️  {service}: {errors[-1] if errors else 'devre dışı bırakılamadı'}")
+            if outcome.refused:
+                errors = [msg for svc, op, msg in control.errors if svc == service and op == "stop"]
+                print(f"      ⚠️  {service}: durdurma reddedildi ({errors[-1] if errors else 'STOP kabul edilmiyor'})")
+            elif outcome.timed_out:
+                print(f"      ⚠️  {service}: süre içinde durmadı (yeniden başlatmada devre dışı olacak)")
+        
+        if outcomes:
+            slowest = max(outcomes.values(), key=lambda o: o.elapsed_ms)
+            mode = "eşzamanlı" if self.concurrent_stop else "sıralı"
+            print(f"      ⏱️  Servis durdurma ({mode}, {len(waves)} dalga): {elapsed_ms:.0f} ms "
+                  f"(en yavaş: {slowest.name} {slowest.elapsed_ms:.0f} ms)")
         
+        # Durumlar değişti; sonraki çalışma yeniden snapshot alsın
+        self._snapshot = None
         return changes
-
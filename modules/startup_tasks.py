@@ -14,11 +14,11 @@ Notlar:
 
 from __future__ import annotations
 
-import json
-import subprocess
-import winreg
 from typing import Any, Dict, List, Optional, Tuple
 
+from modules.powershell_host import get_powershell_host, ps_array
+from modules.registry_backend import get_registry_backend
+
 
 class StartupTasksOptimizer:
     def __init__(self):
@@ -38,6 +38,10 @@ class StartupTasksOptimizer:
             "scheduled_tasks": [],
         }
 
+        # Get-ScheduledTask sonucu (filtre -> task listesi). snapshot_backup ve
+        # _disable_scheduled_tasks aynı sorguyu paylaşır; çalışma başına bir kez sorgulanır.
+        self._task_query_cache: Dict[str, List[Dict[str, Any]]] = {}
+
     @staticmethod
     def _normalize_task_state(state_value: Any) -> str:
         """
@@ -69,11 +73,11 @@ class StartupTasksOptimizer:
         """
         # Startup targets
         targets = [
-            (winreg.HKEY_CURRENT_USER, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run", "HKCU"),
-            (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run", "HKLM"),
+            ("HKCU", r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run"),
+            ("HKLM", r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run"),
         ]
-        for root, subkey, hive_name in targets:
-            for name, value in self._iter_run_values(root, subkey):
+        for hive_name, subkey in targets:
+            for name, value in self._iter_run_values(hive_name, subkey):
                 if not self._should_disable_startup_entry(name, value):
                     continue
                 self.backup["startup_entries"].append({
@@ -83,75 +87,42 @@ class StartupTasksOptimizer:
                     "value": value,
                 })
 
-        # Scheduled task targets (state snapshot)
-        # _disable_scheduled_tasks içindeki filtre mantığını paylaşmak için aynı query’yi yeniden kuruyoruz
-        filters: List[str] = []
-        if self.disable_telemetry_tasks:
-            filters.extend([
-                r'($_.TaskPath -like "\Microsoft\Windows\Customer Experience Improvement Program\*")',
-                r'($_.TaskPath -like "\Microsoft\Windows\Application Experience\*")',
-                r'($_.TaskPath -like "\Microsoft\Windows\Autochk\*") -and ($_.TaskName -like "*Proxy*")',
-                r'($_.TaskPath -like "\Microsoft\Windows\DiskDiagnostic\*")',
-                r'($_.TaskPath -like "\Microsoft\Windows\Feedback\*") -or ($_.TaskPath -like "\Microsoft\Windows\FeedbackHub\*")',
-            ])
-        if self.disable_gamedvr_tasks:
-            filters.append(r'($_.TaskPath -like "\Microsoft\Windows\GameDVR\*")')
-        if self.disable_xbox_tasks:
-            filters.append(r'($_.TaskPath -like "\Microsoft\XblGameSave\*")')
-        if self.disable_onedrive_tasks:
-            filters.append(r'($_.TaskPath -like "\Microsoft\Windows\OneDrive\*")')
-        filters.append(r'($_.TaskPath -like "\Microsoft\Windows\Windows Error Reporting\*")')
-
-        if filters:
-            where = " -or ".join(filters)
-            query_cmd = (
-                f'$t = Get-ScheduledTask | Where-Object {{ {where} }} | '
-                'Select-Object TaskName,TaskPath,State; '
-                '$t | ConvertTo-Json -Depth 4'
-            )
-            tasks = self._powershell_json(query_cmd, timeout=90)
-            if isinstance(tasks, dict):
-                tasks = [tasks]
-            if isinstance(tasks, list):
-                for t in tasks:
-                    task_name = t.get("TaskName")
-                    task_path = t.get("TaskPath")
-                    state = self._normalize_task_state(t.get("State"))
-                    if not task_name or not task_path:
-                        continue
-                    self.backup["scheduled_tasks"].append({
-                        "task_name": task_name,
-                        "task_path": task_path,
-                        "state": state,
-                    })
+        # Scheduled task targets (state snapshot) - sorgu _disable_scheduled_tasks ile paylaşılır
+        for t in self._query_scheduled_tasks() or []:
+            self.backup["scheduled_tasks"].append({
+                "task_name": t["TaskName"],
+                "task_path": t["TaskPath"],
+                "state": self._normalize_task_state(t.get("State")),
+            })
 
         return self.backup
 
     # ---------- Startup (Run keys) ----------
-    def _iter_run_values(self, root, subkey: str) -> List[Tuple[str, str]]:
+    def _iter_run_values(self, hive: str, subkey: str) -> List[Tuple[str, str]]:
         values: List[Tuple[str, str]] = []
+        backend = get_registry_backend()
         try:
-            key = winreg.OpenKey(root, subkey, 0, winreg.KEY_READ)
+            key = backend.open_key(hive, subkey)
         except FileNotFoundError:
             return values
         try:
-            i = 0
-            while True:
-                name, value, _typ = winreg.EnumValue(key, i)
+            for name, value, _typ in backend.enum_values(key):
                 if isinstance(value, str):
                     values.append((name, value))
-                i += 1
         except OSError:
             pass
         finally:
-            winreg.CloseKey(key)
+            backend.close_key(key)
         return values
 
-    def _delete_run_value(self, root, subkey: str, name: str) -> bool:
+    def _delete_run_value(self, hive: str, subkey: str, name: str) -> bool:
+        backend = get_registry_backend()
         try:
-            key = winreg.OpenKey(root, subkey, 0, winreg.KEY_SET_VALUE)
-            winreg.DeleteValue(key, name)
-            winreg.CloseKey(key)
+            key = backend.open_key(hive, subkey, write=True)
+            try:
+                backend.delete_value(key, name)
+            finally:
+                backend.close_key(key)
             return True
         except Exception:
             return False
@@ -169,12 +140,12 @@ class StartupTasksOptimizer:
         print("   📋 Startup (Run) girdileri kontrol ediliyor...")
 
         targets = [
-            (winreg.HKEY_CURRENT_USER, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run", "HKCU"),
-            (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run", "HKLM"),
+            ("HKCU", r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run"),
+            ("HKLM", r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run"),
         ]
 
-        for root, subkey, hive_name in targets:
-            for name, value in self._iter_run_values(root, subkey):
+        for hive_name, subkey in targets:
+            for name, value in self._iter_run_values(hive_name, subkey):
                 if not self._should_disable_startup_entry(name, value):
                     continue
                 # Backup
@@ -184,7 +155,7 @@ class StartupTasksOptimizer:
                     "name": name,
                     "value": value,
                 })
-                if self._delete_run_value(root, subkey, name):
+                if self._delete_run_value(hive_name, subkey, name):
                     msg = f"Startup devre dışı: {hive_name}\\{subkey}\\{name}"
                     changes.append(msg)
                     print(f"      ✅ {name} (startup) kapatıldı")
@@ -194,26 +165,12 @@ class StartupTasksOptimizer:
     # ---------- Scheduled Tasks ----------
     def _powershell_json(self, command: str, timeout: int = 60) -> Optional[Any]:
         try:
-            result = subprocess.run(
-                ["powershell", "-NoProfile", "-ExecutionPolicy", "Bypass", "-Command", command],
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-            )
-            if result.returncode != 0:
-                return None
-            out = (result.stdout or "").strip()
-            if not out:
-                return None
-            return json.loads(out)
+            return get_powershell_host().run_json(command, timeout=timeout)
         except Exception:
             return None
 
-    def _disable_scheduled_tasks(self) -> List[str]:
-        changes: List[str] = []
-        print("   📋 Scheduled Tasks kontrol ediliyor...")
-
-        # Filtreler (dev-safe): telemetry/CEIP + GameDVR/Xbox task'ları
+    def _task_filters(self) -> List[str]:
+        """Hedef task'lar için Where-Object filtreleri (dev-safe): telemetry/CEIP + GameDVR/Xbox task'ları"""
         filters: List[str] = []
         if self.disable_telemetry_tasks:
             filters.extend([
@@ -231,12 +188,20 @@ class StartupTasksOptimizer:
             filters.append(r'($_.TaskPath -like "\Microsoft\Windows\OneDrive\*")')
         # Windows Error Reporting tasks (agresif, genelde güvenli)
         filters.append(r'($_.TaskPath -like "\Microsoft\Windows\Windows Error Reporting\*")')
+        return filters
 
+    def _query_scheduled_tasks(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Hedef task'ları (TaskName/TaskPath/State) getir.
+        Get-ScheduledTask 90 sn'ye kadar sürebildiği için sonuç filtre bazında cache'lenir.
+        """
+        filters = self._task_filters()
         if not filters:
-            return changes
-
+            return []
         where = " -or ".join(filters)
-        # 1) hedef task'ları JSON olarak al
+        if where in self._task_query_cache:
+            return self._task_query_cache[where]
+
         query_cmd = (
             f'$t = Get-ScheduledTask | Where-Object {{ {where} }} | '
             'Select-Object TaskName,TaskPath,State; '
@@ -244,42 +209,84 @@ class StartupTasksOptimizer:
         )
         tasks = self._powershell_json(query_cmd, timeout=90)
         if tasks is None:
-            return changes
+            return None
         if isinstance(tasks, dict):
             tasks = [tasks]
         if not isinstance(tasks, list):
-            return changes
+            return None
 
-        # 2) disable et (Disabled değilse)
-        for t in tasks:
-            try:
-                task_name = t.get("TaskName")
-                task_path = t.get("TaskPath")
-                state = self._normalize_task_state(t.get("State"))
-                if not task_name or not task_path:
-                    continue
+        valid = [t for t in tasks if isinstance(t, dict) and t.get("TaskName") and t.get("TaskPath")]
+        self._task_query_cache[where] = valid
+        return valid
 
-                # Backup
-                self.backup["scheduled_tasks"].append({
-                    "task_name": task_name,
-                    "task_path": task_path,
-                    "state": state,
-                })
+    def _disable_tasks_batch(self, tasks: List[Tuple[str, str]]) -> Dict[Tuple[str, str], bool]:
+        """
+        Task'ları tek PowerShell çağrısında devre dışı bırak.
+        (task_path, task_name) -> başarılı_mı döner.
+        """
+        if not tasks:
+            return {}
+        names = [name for name, _path in tasks]
+        paths = [path for _name, path in tasks]
+        cmd = (
+            f'$n = {ps_array(names)}; $p = {ps_array(paths)}; '
+            '$res = for ($i = 0; $i -lt $n.Count; $i++) { '
+            '$ok = $true; $err = $null; '
+            'try { Disable-ScheduledTask -TaskName $n[$i] -TaskPath $p[$i] -ErrorAction Stop | Out-Null } '
+            'catch { $ok = $false; $err = $_.Exception.Message }; '
+            '[pscustomobject]@{ TaskName = $n[$i]; TaskPath = $p[$i]; Disabled = $ok; Error = $err } }; '
+            'ConvertTo-Json -InputObject @($res) -Depth 3'
+        )
+        rows = self._powershell_json(cmd, timeout=max(60, 10 * len(tasks)))
+        if isinstance(rows, dict):
+            rows = [rows]
+        if not isinstance(rows, list):
+            # Toplu çağrı başarısızsa task task dene
+            statuses: Dict[Tuple[str, str], bool] = {}
+            for name, path in tasks:
+                disable_cmd = f'Disable-ScheduledTask -TaskName "{name}" -TaskPath "{path}" | Out-Null'
+                statuses[(path, name)] = get_powershell_host().run(disable_cmd, timeout=30).ok
+            return statuses
+
+        statuses = {}
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            statuses[(row.get("TaskPath"), row.get("TaskName"))] = bool(row.get("Disabled"))
+        return statuses
 
-                if self._is_task_disabled(state):
-                    continue
+    def _disable_scheduled_tasks(self) -> List[str]:
+        changes: List[str] = []
+        print("   📋 Scheduled Tasks kontrol ediliyor...")
 
-                disable_cmd = f'Disable-ScheduledTask -TaskName "{task_name}" -TaskPath "{task_path}" | Out-Null'
-                subprocess.run(
-                    ["powershell", "-NoProfile", "-ExecutionPolicy", "Bypass", "-Command", disable_cmd],
-                    capture_output=True,
-                    text=True,
-                    timeout=30,
-                    check=False,
-                )
-                changes.append(f"Task devre dışı: {task_path}{task_name}")
-            except Exception:
+        # 1) hedef task'ları al (snapshot_backup ile paylaşılan sorgu)
+        tasks = self._query_scheduled_tasks()
+        if not tasks:
+            return changes
+
+        # 2) Disabled olmayanları topla
+        to_disable: List[Tuple[str, str]] = []
+        for t in tasks:
+            task_name = t["TaskName"]
+            task_path = t["TaskPath"]
+            state = self._normalize_task_state(t.get("State"))
+
+            # Backup
+            self.backup["scheduled_tasks"].append({
+                "task_name": task_name,
+                "task_path": task_path,
+                "state": state,
+            })
+
+            if self._is_task_disabled(state):
                 continue
+            to_disable.append((task_name, task_path))
+
+        # 3) tek çağrıda disable et
+        statuses = self._disable_tasks_batch(to_disable)
+        for task_name, task_path in to_disable:
+            if statuses.get((task_path, task_name)):
+                changes.append(f"Task devre dışı: {task_path}{task_name}")
 
         if changes:
             print(f"      ✅ {len(changes)} task devre dışı bırakıldı")
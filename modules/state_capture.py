@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Paralel Durum Yakalama (yedekleme)
+
+Yedekleme kaynakları (servisler, kayıt defteri, özellikler, startup/task, OneDrive...)
+birbirinden bağımsızdır ve sadece okuma yapar. Sırayla çağrıldığında toplam süre
+PowerShell ağırlıklı kaynakların (Get-WindowsOptionalFeature, Get-ScheduledTask)
+toplamıdır; burada hepsi aynı anda çalışır ve süre en yavaş kaynağa iner.
+- Her kaynak kendi thread'inde, kendi PowerShell host'uyla çalışır
+  (paylaşılan host tek komut işler; aynı host'u kullanırlarsa yine sıraya girerler)
+- Bir kaynağın hatası diğerlerini etkilemez; her kaynak için süre + hata kaydedilir
+- Sonuçlar kaynak sırasıyla döner (yedek belgesi her çalışmada aynı düzende)
+- Geçerli süre bütçesi (modules.deadline) varsa her kaynak kendi alt bütçesinde çalışır;
+  süre dolunca bitmeyen kaynaklar iptal edilir (prosesleri öldürülür) ve timed_out döner
+
+Kullanım:
+    results = capture_sources({"services": svc.backup_services, "features": feat.backup_features})
+    data = {r.name: r.data for r in results if r.ok}
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from modules.deadline import CANCEL_GRACE_S, Budget, activate, current_budget
+from modules.powershell_host import dedicated_powershell_host
+
+
+@dataclass
+class SourceResult:
+    """Tek kaynağın sonucu"""
+    name: str
+    data: Any = None
+    error: Optional[str] = None
+    duration_ms: float = 0.0
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def timing(self) -> Dict[str, Any]:
+        """Yedek belgesine yazılan süre kaydı"""
+        return {"duration_ms": round(self.duration_ms, 1), "ok": self.ok, "error": self.error,
+                "timed_out": self.timed_out}
+
+
+def _capture(name: str, func: Callable[[], Any], dedicated: bool, budget: Optional[Budget]) -> SourceResult:
+    started = time.perf_counter()
+    try:
+        with activate(budget):
+            if dedicated:
+                with dedicated_powershell_host():
+                    data = func()
+            else:
+                data = func()
+        return SourceResult(name, data=data, duration_ms=(time.perf_counter() - started) * 1000)
+    except Exception as e:
+        return SourceResult(name, error=f"{type(e).__name__}: {e}",
+                            duration_ms=(time.perf_counter() - started) * 1000)
+    finally:
+        if budget is not None:
+            budget.finish()
+
+
+def capture_sources(sources: Dict[str, Callable[[], Any]], max_workers: Optional[int] = None,
+                    dedicated_powershell: bool = True) -> List[SourceResult]:
+    """Kaynakları aynı anda çalıştır; sonuçlar `sources` sırasıyla döner"""
+    if not sources:
+        return []
+    items = list(sources.items())
+    parent = current_budget()
+    budgets = [parent.child(name) if parent is not None else None for name, _ in items]
+    # Her kaynak çağıranın context'iyle çalışır (worker thread'in kendi context'i boş)
+    contexts = [contextvars.copy_context() for _ in items]
+    results: List[Optional[SourceResult]] = [None] * len(items)
+    queue = iter(range(len(items)))
+    queue_lock = threading.Lock()
+
+    def worker() -> None:
+        while True:
+            with queue_lock:
+                index = next(queue, None)
+            if index is None:
+                return
+            name, func = items[index]
+            results[index] = contexts[index].run(_capture, name, func, dedicated_powershell, budgets[index])
+
+    # Daemon thread: takılı kalan kaynak yorumlayıcının kapanışını da bekletmesin
+    # (ThreadPoolExecutor worker'ları çıkışta join edilir)
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, name=f"backup_{i}", daemon=True)
+               for i in range(min(max_workers or len(items), len(items)))]
+    for thread in threads:
+        thread.start()
+    _join_all(threads, parent.remaining() if parent is not None else None)
+    if any(thread.is_alive() for thread in threads):
+        # Süre doldu: bitmeyen kaynakların proseslerini öldür, toparlanmaları için kısa süre bekle
+        for index, budget in enumerate(budgets):
+            if results[index] is None and budget is not None:
+                budget.cancel("timeout")
+        _join_all(threads, CANCEL_GRACE_S)
+    # Hâlâ çalışan thread beklenmez (bütçesi bittiği için sonraki komutları başlamaz)
+
+    final = []
+    for index, (name, _) in enumerate(items):
+        result = results[index]
+        if result is not None:
+            result.timed_out = budgets[index] is not None and budgets[index].timed_out
+        else:
+            result = SourceResult(name, error="süre bütçesi doldu", timed_out=True,
+                                  duration_ms=(time.perf_counter() - started) * 1000)
+        final.append(result)
+    return final
+
+
+def _join_all(threads: List[threading.Thread], timeout: Optional[float]) -> None:
+    """Thread'leri ortak bir süre sınırıyla bekle (None = süresiz)"""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for thread in threads:
+        thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
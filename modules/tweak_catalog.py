@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Kayıt Defteri Tweak Kataloğu (tek kaynak)
+
+Registry / privacy / telemetry_blocker / security_virtualization modüllerinin yazdığı
+tüm değerler burada bir kez tanımlanır. Katalog bir kez derlenir:
+- Aynı (hive, anahtar, değer) için birebir aynı tanımlar tekilleştirilir
+- Aynı değer için farklı (tip, veri) tanımı varsa TweakConflictError
+- (hive, anahtar, değer) ve kategori bazında indekslenir
+
+Modüller kendi kategorilerini seçer; çalışma boyunca zaten uygulanmış (claim edilmiş)
+değerler tekrar yazılmaz. Backup tüm kataloğu okur.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+
+# Profil bayrakları: "base" her zaman aktif, diğerleri optimize.py profilinden açılır
+BASE_PROFILE = "base"
+
+_DC_CV = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Policies\DataCollection"
+_DC_POLICY = r"SOFTWARE\Policies\Microsoft\Windows\DataCollection"
+_PRIVACY = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Privacy"
+_CDM = r"SOFTWARE\Microsoft\Windows\CurrentVersion\ContentDeliveryManager"
+_EXPLORER_ADV = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Explorer\Advanced"
+_SYSTEM_POLICY = r"SOFTWARE\Policies\Microsoft\Windows\System"
+_GAMEBAR = r"SOFTWARE\Microsoft\GameBar"
+_GAMEDVR = r"SOFTWARE\Microsoft\Windows\CurrentVersion\GameDVR"
+_SEARCH_POLICY = r"SOFTWARE\Policies\Microsoft\Windows\Windows Search"
+_MM_PROFILE = r"SOFTWARE\Microsoft\Windows NT\CurrentVersion\Multimedia\SystemProfile"
+_MM_GAMES = _MM_PROFILE + r"\Tasks\Games"
+_PREFETCH = r"SYSTEM\CurrentControlSet\Control\Session Manager\Memory Management\PrefetchParameters"
+_DEVICE_GUARD = r"SYSTEM\CurrentControlSet\Control\DeviceGuard"
+
+# winreg.REG_DWORD / winreg.REG_SZ (katalog winreg olmadan da yüklenebilsin: çevrimdışı imajlar)
+DWORD = 4
+SZ = 1
+
+
+class TweakConflictError(ValueError):
+    """Aynı değer katalogda farklı (tip, veri) ile tanımlanmış"""
+
+
+@dataclass(frozen=True)
+class Tweak:
+    """Tek kayıt defteri değeri"""
+    hive: str
+    key: str
+    value: str
+    vtype: int
+    data: Any
+    category: str
+    profiles: FrozenSet[str] = frozenset({BASE_PROFILE})
+
+    @property
+    def key_path(self) -> str:
+        return f"{self.hive}\\{self.key}"
+
+    @property
+    def ident(self) -> Tuple[str, str, str]:
+        return tweak_ident(self.key_path, self.value)
+
+    def as_optimization(self) -> Tuple[str, str, int, Any]:
+        """(key_path, value_name, value_type, value_data) - RegistryOptimizer formatı"""
+        return (self.key_path, self.value, self.vtype, self.data)
+
+
+def tweak_ident(key_path: str, value_name: str) -> Tuple[str, str, str]:
+    """Karşılaştırma anahtarı (kayıt defteri büyük/küçük harf duyarsız)"""
+    hive, _, subkey = key_path.partition("\\")
+    return (hive.upper(), subkey.lower(), value_name.lower())
+
+
+def same_value(current_type, current_data, value_type, value_data) -> bool:
+    """Mevcut (tip, veri) hedefle aynı mı? DWORD'ler 32-bit işaretsiz karşılaştırılır."""
+    if current_type is None or int(current_type) != int(value_type):
+        return False
+    if isinstance(value_data, int) and isinstance(current_data, int):
+        return (current_data & 0xFFFFFFFF) == (value_data & 0xFFFFFFFF)
+    return current_data == value_data
+
+
+def _t(hive, key, value, vtype, data, category, *profiles) -> Tweak:
+    return Tweak(hive, key, value, vtype, data, category, frozenset(profiles or (BASE_PROFILE,)))
+
+
+# Kategori bazında tanımlar (modül sırası önemli değil; derleme indeksler)
+TWEAKS: List[Tweak] = [
+    # Telemetri (tüm konumlar - Windows'un tekrar açmasını engellemek için)
+    _t("HKLM", _DC_CV, "AllowTelemetry", DWORD, 0, "telemetry"),
+    _t("HKLM", _DC_POLICY, "AllowTelemetry", DWORD, 0, "telemetry"),
+    _t("HKLM", _DC_CV, "MaxTelemetryAllowed", DWORD, 0, "telemetry"),
+    _t("HKLM", _DC_POLICY, "MaxTelemetryAllowed", DWORD, 0, "telemetry"),
+    # 1 = geri bildirim bildirimlerini gösterme
+    _t("HKLM", _DC_CV, "DoNotShowFeedbackNotifications", DWORD, 1, "telemetry"),
+    _t("HKLM", _DC_POLICY, "DoNotShowFeedbackNotifications", DWORD, 1, "telemetry"),
+    _t("HKCU", _PRIVACY, "TailoredExperiencesWithDiagnosticDataEnabled", DWORD, 0, "telemetry"),
+    # Konuşma tanıma + mürekkep/yazma kişiselleştirme
+    _t("HKCU", _PRIVACY, "AllowInputPersonalization", DWORD, 0, "telemetry"),
+    _t("HKLM", _DC_CV, "AllowDeviceNameInTelemetry", DWORD, 0, "telemetry"),
+    _t("HKLM", _DC_POLICY, "AllowDeviceNameInTelemetry", DWORD, 0, "telemetry"),
+
+    # Windows Update UX
+    _t("HKLM", r"SOFTWARE\Microsoft\WindowsUpdate\UX\Settings", "UxOption", DWORD, 1, "windows_update"),
+    # Windows Update'in telemetri ayarlarını değiştirmesini engelle
+    _t("HKLM", r"SOFTWARE\Microsoft\Windows\CurrentVersion\WindowsUpdate\OSUpgrade",
+       "DisableOSUpgrade", DWORD, 1, "os_upgrade"),
+    _t("HKLM", r"SOFTWARE\Policies\Microsoft\Windows\WindowsUpdate", "DisableOSUpgrade", DWORD, 1, "os_upgrade"),
+
+    # Windows Update Delivery Optimization (P2P - veri hortumlama); 0 = Disabled
+    _t("HKLM", r"SOFTWARE\Microsoft\Windows\CurrentVersion\DeliveryOptimization\Config",
+       "DODownloadMode", DWORD, 0, "delivery_optimization"),
+    _t("HKLM", r"SOFTWARE\Policies\Microsoft\Windows\DeliveryOptimization",
+       "DODownloadMode", DWORD, 0, "delivery_optimization"),
+
+    # Activity History (Timeline)
+    _t("HKLM", _SYSTEM_POLICY, "EnableActivityFeed", DWORD, 0, "activity_history"),
+    _t("HKLM", _SYSTEM_POLICY, "PublishUserActivities", DWORD, 0, "activity_history"),
+    _t("HKLM", _SYSTEM_POLICY, "UploadUserActivities", DWORD, 0, "activity_history"),
+
+    # App launch tracking / Start önerileri / Spotlight / ipuçları
+    _t("HKCU", _EXPLORER_ADV, "Start_TrackProgs", DWORD, 0, "content_delivery"),
+    _t("HKCU", _EXPLORER_ADV, "Start_IrisRecommendations", DWORD, 0, "content_delivery"),
+    _t("HKCU", _CDM, "SystemPaneSuggestionsEnabled", DWORD, 0, "content_delivery"),
+    _t("HKCU", _CDM, "PreInstalledAppsEnabled", DWORD, 0, "content_delivery"),
+    _t("HKCU", _CDM, "PreInstalledAppsEverEnabled", DWORD, 0, "content_delivery"),
+    _t("HKCU", _CDM, "SubscribedContentEnabled", DWORD, 0, "content_delivery"),
+    _t("HKCU", _CDM, "SubscribedContent-338393Enabled", DWORD, 0, "content_delivery"),
+    _t("HKCU", _CDM, "SubscribedContent-338388Enabled", DWORD, 0, "content_delivery"),
+    _t("HKCU", _CDM, "RotatingLockScreenEnabled", DWORD, 0, "content_delivery"),
+    _t("HKCU", _CDM, "RotatingLockScreenOverlayEnabled", DWORD, 0, "content_delivery"),
+    _t("HKCU", _CDM, "SoftLandingEnabled", DWORD, 0, "content_delivery"),
+    _t("HKCU", _CDM, "SubscribedContent-310093Enabled", DWORD, 0, "content_delivery"),
+    _t("HKCU", _CDM, "SubscribedContent-338389Enabled", DWORD, 0, "content_delivery"),
+    _t("HKCU", r"SOFTWARE\Microsoft\Windows\CurrentVersion\UserProfileEngagement",
+       "ScoobeSystemSettingEnabled", DWORD, 0, "content_delivery"),
+
+    # Arka plan uygulamaları
+    _t("HKCU", r"SOFTWARE\Microsoft\Windows\CurrentVersion\BackgroundAccessApplications",
+       "GlobalUserDisabled", DWORD, 1, "background_apps"),
+    _t("HKLM", r"SOFTWARE\Policies\Microsoft\Windows\AppPrivacy", "LetAppsRunInBackground", DWORD, 2, "background_apps"),
+
+    # Hata raporlama
+    _t("HKLM", r"SOFTWARE\Microsoft\Windows\Windows Error Reporting", "Disabled", DWORD, 1, "error_reporting"),
+    _t("HKLM", r"SOFTWARE\Policies\Microsoft\Windows\Windows Error Reporting", "Disabled", DWORD, 1, "error_reporting"),
+
+    # Reklam ID
+    _t("HKCU", r"SOFTWARE\Microsoft\Windows\CurrentVersion\AdvertisingInfo", "Enabled", DWORD, 0, "advertising"),
+    _t("HKLM", r"SOFTWARE\Microsoft\Windows\CurrentVersion\AdvertisingInfo", "Enabled", DWORD, 0, "advertising"),
+    _t("HKLM", _PRIVACY, "Enabled", DWORD, 0, "advertising"),
+
+    # Konum izni
+    _t("HKLM", r"SOFTWARE\Microsoft\Windows\CurrentVersion\CapabilityAccessManager\ConsentStore\location",
+       "Value", SZ, "Deny", "location"),
+
+    # Cortana / Copilot / Widgets
+    _t("HKLM", _SEARCH_POLICY, "AllowCortana", DWORD, 0, "cortana"),
+    _t("HKCU", _EXPLORER_ADV, "ShowCopilotButton", DWORD, 0, "copilot"),
+    _t("HKCU", _EXPLORER_ADV, "CopilotTaskbarIcon", DWORD, 0, "copilot"),
+    _t("HKLM", r"SOFTWARE\Policies\Microsoft\Windows\WindowsCopilot", "TurnOffWindowsCopilot", DWORD, 0, "copilot"),
+    _t("HKCU", _EXPLORER_ADV, "TaskbarDa", DWORD, 0, "widgets"),
+    _t("HKCU", _EXPLORER_ADV, "TaskbarMn", DWORD, 0, "widgets"),
+
+    # Search: web/bing arama kapatma (arka plan/network azaltır)
+    _t("HKLM", _SEARCH_POLICY, "DisableWebSearch", DWORD, 1, "web_search"),
+    _t("HKLM", _SEARCH_POLICY, "ConnectedSearchUseWeb", DWORD, 0, "web_search"),
+    _t("HKLM", _SEARCH_POLICY, "ConnectedSearchPrivacy", DWORD, 3, "web_search"),
+    _t("HKCU", r"SOFTWARE\Microsoft\Windows\CurrentVersion\Search", "BingSearchEnabled", DWORD, 0, "web_search"),
+
+    # Game Mode + Xbox Game Bar UI/overlay (kayıt/clip kullanılmıyorsa)
+    _t("HKCU", _GAMEBAR, "AllowAutoGameMode", DWORD, 1, "gaming"),
+    _t("HKCU", _GAMEBAR, "AutoGameModeEnabled", DWORD, 1, "gaming"),
+    _t("HKCU", _GAMEBAR, "ShowStartupPanel", DWORD, 0, "gaming"),
+    _t("HKCU", _GAMEBAR, "UseNexusForGameBarEnabled", DWORD, 0, "gaming"),
+    _t("HKCU", _GAMEBAR, "GamePanelStartupTipIndex", DWORD, 3, "gaming"),
+
+    # GameDVR/Capture kapatma (clip kullanmıyorsanız)
+    _t("HKLM", r"SOFTWARE\Policies\Microsoft\Windows\GameDVR", "AllowGameDVR", DWORD, 0, "game_dvr"),
+    _t("HKCU", _GAMEDVR, "AppCaptureEnabled", DWORD, 0, "game_dvr"),
+    _t("HKCU", _GAMEDVR, "AudioCaptureEnabled", DWORD, 0, "game_dvr"),
+    _t("HKCU", _GAMEDVR, "CursorCaptureEnabled", DWORD, 0, "game_dvr"),
+    _t("HKCU", _GAMEDVR, "HistoricalCaptureEnabled", DWORD, 0, "game_dvr"),
+    _t("HKCU", r"SYSTEM\GameConfigStore", "GameDVR_Enabled", DWORD, 0, "game_dvr"),
+
+    # Sistem: GPU scheduling, Windows Search (manual), prefetch (SSD), ağ, timer, fast startup
+    _t("HKLM", r"SYSTEM\CurrentControlSet\Control\GraphicsDrivers", "HwSchMode", DWORD, 2, "system"),
+    _t("HKLM", r"SYSTEM\CurrentControlSet\Services\WSearch", "Start", DWORD, 3, "system"),
+    _t("HKLM", _PREFETCH, "EnableSuperfetch", DWORD, 0, "system"),
+    _t("HKLM", _PREFETCH, "EnablePrefetcher", DWORD, 0, "system"),
+    _t("HKLM", _MM_PROFILE, "NetworkThrottlingIndex", DWORD, 0xFFFFFFFF, "system"),
+    _t("HKLM", r"SYSTEM\CurrentControlSet\Control\Session Manager\kernel",
+       "GlobalTimerResolutionRequests", DWORD, 1, "system"),
+    _t("HKLM", r"SYSTEM\CurrentControlSet\Control\Session Manager\Power", "HiberbootEnabled", DWORD, 0, "system"),
+
+    # OneDrive sync kapatma (policy)
+    _t("HKLM", r"SOFTWARE\Policies\Microsoft\Windows\OneDrive", "DisableFileSyncNGSC", DWORD, 1, "onedrive"),
+
+    # Bildirimler / Focus Assist / UI (agresif)
+    _t("HKCU", r"SOFTWARE\Microsoft\Windows\CurrentVersion\PushNotifications", "ToastEnabled", DWORD, 0, "ui"),
+    _t("HKCU", r"SOFTWARE\Microsoft\Windows\CurrentVersion\Notifications\Settings",
+       "NOC_GLOBAL_SETTING_TOASTS_ENABLED", DWORD, 0, "ui"),
+    _t("HKCU", r"SOFTWARE\Microsoft\Windows\CurrentVersion\Themes\Personalize", "EnableTransparency", DWORD, 0, "ui"),
+    _t("HKCU", _EXPLORER_ADV, "TaskbarAnimations", DWORD, 0, "ui"),
+
+    # Scheduler (1% low / input lag) - opt-in
+    _t("HKLM", r"SYSTEM\CurrentControlSet\Control\PriorityControl",
+       "Win32PrioritySeparation", DWORD, 0x26, "scheduler", "scheduler"),
+    _t("HKLM", _MM_PROFILE, "SystemResponsiveness", DWORD, 10, "scheduler", "scheduler"),
+    _t("HKLM", _MM_GAMES, "Scheduling Category", SZ, "High", "scheduler", "scheduler"),
+    _t("HKLM", _MM_GAMES, "SFIO Priority", SZ, "High", "scheduler", "scheduler"),
+    _t("HKLM", _MM_GAMES, "Priority", DWORD, 6, "scheduler", "scheduler"),
+    _t("HKLM", _MM_GAMES, "GPU Priority", DWORD, 8, "scheduler", "scheduler"),
+
+    # VBS / HVCI / Credential Guard - opt-in (SecurityVirtualizationOptimizer)
+    _t("HKLM", _DEVICE_GUARD, "EnableVirtualizationBasedSecurity", DWORD, 0, "vbs", "vbs"),
+    _t("HKLM", _DEVICE_GUARD, "RequirePlatformSecurityFeatures", DWORD, 0, "vbs", "vbs"),
+    _t("HKLM", _DEVICE_GUARD + r"\Scenarios\HypervisorEnforcedCodeIntegrity", "Enabled", DWORD, 0, "hvci", "hvci"),
+    # LsaCfgFlags: 0 = Disabled, 1 = Enabled with UEFI lock, 2 = Enabled without lock
+    _t("HKLM", r"SYSTEM\CurrentControlSet\Control\Lsa", "LsaCfgFlags", DWORD, 0,
+       "credential_guard", "credential_guard"),
+]
+
+
+@dataclass
+class CompiledCatalog:
+    """Tekilleştirilmiş + indekslenmiş katalog"""
+    tweaks: List[Tweak] = field(default_factory=list)
+    index: Dict[Tuple[str, str, str], Tweak] = field(default_factory=dict)
+    by_category: Dict[str, List[Tweak]] = field(default_factory=dict)
+    duplicates: int = 0  # derlemede atılan birebir aynı tanımlar
+
+    def get(self, key_path: str, value_name: str) -> Optional[Tweak]:
+        return self.index.get(tweak_ident(key_path, value_name))
+
+    def select(self, categories: Optional[Iterable[str]] = None,
+               profiles: Optional[Iterable[str]] = None) -> List[Tweak]:
+        """
+        Kategori ve profil filtresi. categories=None -> tüm kategoriler;
+        profiles=None -> tüm profiller (backup için), aksi halde "base" + verilenler.
+        """
+        if categories is None:
+            pool = self.tweaks
+        else:
+            pool = [t for c in categories for t in self.by_category.get(c, [])]
+        if profiles is not None:
+            active = {BASE_PROFILE, *profiles}
+            pool = [t for t in pool if t.profiles & active]
+        return pool
+
+
+def compile_catalog(tweaks: Iterable[Tweak]) -> CompiledCatalog:
+    """Kataloğu tekilleştir ve indeksle; çelişkili tanımlarda TweakConflictError"""
+    compiled = CompiledCatalog()
+    for tweak in tweaks:
+        existing = compiled.index.get(tweak.ident)
+        if existing is not None:
+            if (existing.vtype, existing.data) != (tweak.vtype, tweak.data):
+                raise TweakConflictError(
+                    f"{tweak.key_path}\\{tweak.value}: "
+                    f"{existing.category}={existing.data!r} / {tweak.category}={tweak.data!r}"
+                )
+            compiled.duplicates += 1
+            continue
+        compiled.index[tweak.ident] = tweak
+        compiled.tweaks.append(tweak)
+        compiled.by_category.setdefault(tweak.category, []).append(tweak)
+    return compiled
+
+
+class AppliedTweaks:
+    """
+    Çalışma boyunca uygulanmış (veya zaten uygun bulunmuş) değerler.
+    Aynı değeri ikinci bir modülün tekrar yazmasını engeller.
+    """
+
+    def __init__(self):
+        self._applied: Set[Tuple[str, str, str]] = set()
+        self._lock = threading.Lock()
+
+    def claim(self, tweaks: Iterable[Tweak]) -> List[Tweak]:
+        """Henüz uygulanmamış olanları döner ve işaretler"""
+        with self._lock:
+            fresh = [t for t in tweaks if t.ident not in self._applied]
+            self._applied.update(t.ident for t in fresh)
+            return fresh
+
+    def release(self, tweaks: Iterable[Tweak]) -> None:
+        """Yazılamayanları bırak (başka modül tekrar deneyebilir)"""
+        with self._lock:
+            self._applied.difference_update(t.ident for t in tweaks if t is not None)
+
+    def __len__(self) -> int:
+        return len(self._applied)
+
+
+# Global instance'lar
+_catalog: Optional[CompiledCatalog] = None
+_applied: Optional[AppliedTweaks] = None
+_lock = threading.Lock()
+
+
+def get_catalog() -> CompiledCatalog:
+    """Derlenmiş kataloğu getir (ilk çağrıda derlenir)"""
+    global _catalog
+    with _lock:
+        if _catalog is None:
+            _catalog = compile_catalog(TWEAKS)
+        return _catalog
+
+
+def get_applied_tweaks() -> AppliedTweaks:
+    """Çalışma seviyesindeki uygulanmış değer kümesi"""
+    global _applied
+    with _lock:
+        if _applied is None:
+            _applied = AppliedTweaks()
+        return _applied
+
+
+def write_tweaks(tweaks: Iterable[Tweak], batch=None,
+                 source: str = "") -> Tuple[List[Tweak], List[Tuple[Tweak, str]]]:
+    """
+    Bu çalışmada henüz uygulanmamış tweak'leri yaz. (yazılan, [(başarısız, hata)]) döner.
+    batch verilirse sadece kuyruğa eklenir (commit çağırana ait; hepsi yazılan sayılır).
+    """
+    applied = get_applied_tweaks()
+    fresh = applied.claim(tweaks)
+    if not fresh:
+        return [], []
+
+    own = batch is None
+    if own:
+        from modules.registry_batch import RegistryBatch
+        batch = RegistryBatch()
+    for tweak in fresh:
+        batch.add(tweak.key_path, tweak.value, tweak.vtype, tweak.data, source=source)
+    if not own:
+        return fresh, []
+
+    result = batch.commit()
+    failed = [(tweak, result.error_for(tweak.key_path, tweak.value)) for tweak in fresh
+              if result.error_for(tweak.key_path, tweak.value)]
+    applied.release(tweak for tweak, _ in failed)
+    failed_ids = {tweak.ident for tweak, _ in failed}
+    return [t for t in fresh if t.ident not in failed_ids], failed
+
+
+def reset_applied_tweaks() -> None:
+    """Yeni çalışma (örn. testler / tekrar optimize)"""
+    global _applied
+    with _lock:
+        _applied = None
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Çok Kullanıcılı HKCU Dağıtımı
+
+HKCU ayarları normalde sadece aracı çalıştıran hesaba uygulanır. Bu modül planın HKCU
+kısmını bilgisayardaki tüm yerel profillere (ve yeni kullanıcıların kopyalandığı
+Default profile) uygular:
+- Profiller ProfileList anahtarından okunur (S-1-5-21-* kullanıcıları + Default)
+- Yüklü hive'lara (oturumu açık kullanıcılar) doğrudan HKU\\<SID> altından yazılır
+- Yüklü olmayan NTUSER.DAT'lar geçici HKU\\WinOpt_<SID> altına `reg load` ile bağlanır
+- Her profil için önce fark çıkarılır, sadece farklı değerler yazılır; eski değerler
+  geri yükleme için saklanır
+- Profiller iş parçacığı havuzunda işlenir, profil başına süre raporlanır
+- Bağlanan hive her durumda (hata olsa bile) kaldırılır: profilin handle'ları ayrı bir
+  cache'te tutulur ve `reg unload` öncesi kapatılır, başarısız olursa tekrar denenir
+
+Kullanım:
+    fanout = ProfileFanout(hkcu_optimizations(categories))
+    reports = fanout.run()
+"""
+
+from __future__ import annotations
+
+import contextvars
+import gc
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from modules.command_runner import CommandRunner, get_command_runner
+from modules.deadline import activate
+from modules.registry import RegistryOptimizer
+from modules.registry_backend import RegistryBackend, get_registry_backend
+from modules.registry_batch import KeyHandleCache, RegistryBatch, split_key_path
+from modules.tweak_catalog import get_catalog, tweak_ident
+
+
+PROFILE_LIST_KEY = r"SOFTWARE\Microsoft\Windows NT\CurrentVersion\ProfileList"
+USER_SID_PREFIX = "S-1-5-21-"
+DEFAULT_PROFILE = "Default"
+MOUNT_PREFIX = "WinOpt_"
+HIVE_FILE = "NTUSER.DAT"
+
+# (key_path, value_name, value_type, value_data)
+Optimization = Tuple[str, str, int, Any]
+
+
+@dataclass
+class UserProfile:
+    """ProfileList'teki tek profil (sid == "Default" -> varsayılan kullanıcı profili)"""
+    sid: str
+    path: str
+    loaded: bool = False
+
+    @property
+    def hive_file(self) -> str:
+        return os.path.join(self.path, HIVE_FILE)
+
+    @property
+    def mount_name(self) -> str:
+        return f"{MOUNT_PREFIX}{self.sid}"
+
+
+@dataclass
+class ProfileReport:
+    """Tek profilin sonucu"""
+    profile: UserProfile
+    mounted: bool = False           # bu çalışmada biz bağladık
+    compliant: int = 0
+    changed: int = 0
+    failed: List[str] = field(default_factory=list)
+    previous: List[Dict[str, Any]] = field(default_factory=list)  # backup_registry() formatı (HKCU yolları)
+    load_ms: float = 0.0
+    duration_ms: float = 0.0
+    unloaded: bool = True
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.failed and self.unloaded
+
+
+def hkcu_optimizations(categories: Sequence[str], profiles: Optional[Sequence[str]] = None,
+                       extra: Iterable[Optimization] = ()) -> List[Optimization]:
+    """Katalogdaki kategorilerin HKCU değerleri + ek HKCU değerleri (tekrarlar atılır)"""
+    out: List[Optimization] = []
+    seen = set()
+    items = [t.as_optimization() for t in get_catalog().select(categories, profiles) if t.hive == "HKCU"]
+    for key_path, value_name, value_type, value_data in items + list(extra):
+        if split_key_path(key_path)[0] != "HKCU":
+            continue
+        ident = tweak_ident(key_path, value_name)
+        if ident not in seen:
+            seen.add(ident)
+            out.append((key_path, value_name, value_type, value_data))
+    return out
+
+
+def list_profiles(backend: Optional[RegistryBackend] = None, include_default: bool = True) -> List[UserProfile]:
+    """ProfileList'ten kullanıcı profilleri (sistem hesapları hariç)"""
+    backend = backend if backend is not None else get_registry_backend()
+    profiles: List[UserProfile] = []
+    try:
+        root = backend.open_key("HKLM", PROFILE_LIST_KEY)
+    except OSError:
+        return profiles
+    try:
+        sids = backend.enum_keys(root)
+        default_path = None
+        if include_default:
+            try:
+                default_path = backend.query_value(root, DEFAULT_PROFILE)[0]
+            except OSError:
+                default_path = None
+    finally:
+        backend.close_key(root)
+
+    for sid in sids:
+        if not sid.startswith(USER_SID_PREFIX) or sid.endswith(".bak"):
+            continue
+        exists, _, path = backend.read_value("HKLM", f"{PROFILE_LIST_KEY}\\{sid}", "ProfileImagePath")
+        if not exists or not path:
+            continue
+        profiles.append(UserProfile(sid, os.path.expandvars(path), _is_loaded(backend, sid)))
+
+    if default_path:
+        profiles.append(UserProfile(DEFAULT_PROFILE, os.path.expandvars(default_path)))
+    return profiles
+
+
+def _is_loaded(backend: RegistryBackend, name: str) -> bool:
+    try:
+        backend.close_key(backend.open_key("HKU", name))
+        return True
+    except OSError:
+        return False
+
+
+class ProfileFanout:
+    """Planın HKCU kısmını profillere uygula / geri al"""
+
+    def __init__(self, optimizations: Iterable[Optimization],
+                 runner: Optional[CommandRunner] = None,
+                 backend: Optional[RegistryBackend] = None,
+                 max_workers: Optional[int] = None,
+                 unload_retries: int = 5,
+                 timeout: float = 60.0):
+        self.optimizations = list(optimizations)
+        self.runner = runner or get_command_runner()
+        self.backend = backend if backend is not None else get_registry_backend()
+        self.max_workers = max_workers
+        self.unload_retries = max(1, int(unload_retries))
+        self.timeout = timeout
+
+    # --- Bağlama / kaldırma ---
+
+    def _load(self, profile: UserProfile) -> None:
+        result = self.runner.run(["reg", "load", f"HKU\\{profile.mount_name}", profile.hive_file],
+                                 timeout=self.timeout)
+        if not result.ok:
+            raise OSError(f"reg load başarısız: {result.stderr.strip() or result.error or result.returncode}")
+
+    def _unload(self, mount_name: str) -> bool:
+        """
+        Açık handle kalmışsa unload başarısız olur: GC + artan beklemeyle tekrar dene.
+        Süre bütçesi dolmuş olsa da çalışır (bağlı hive bırakılmaz); kendi timeout'u geçerli.
+        """
+        with activate(None):
+            for attempt in range(self.unload_retries):
+                gc.collect()
+                result = self.runner.run(["reg", "unload", f"HKU\\{mount_name}"], timeout=self.timeout)
+                if result.ok:
+                    return True
+                time.sleep(0.2 * (attempt + 1))
+        return False
+
+    def cleanup_stale_mounts(self) -> List[str]:
+        """Önceki (yarıda kalmış) çalışmadan kalan HKU\\WinOpt_* bağlarını kaldır"""
+        removed: List[str] = []
+        try:
+            root = self.backend.open_key("HKU", "")
+        except OSError:
+            return removed
+        try:
+            names = self.backend.enum_keys(root)
+        finally:
+            self.backend.close_key(root)
+        for name in names:
+            if name.startswith(MOUNT_PREFIX) and self._unload(name):
+                removed.append(name)
+        return removed
+
+    @contextmanager
+    def _mounted(self, profile: UserProfile, report: ProfileReport) -> Iterator[Tuple[str, KeyHandleCache]]:
+        """(HKU altındaki kök, profile özel handle cache); çıkışta handle'lar kapatılır ve hive kaldırılır"""
+        cache = KeyHandleCache(backend=self.backend)
+        root = profile.sid
+        if not profile.loaded:
+            started = time.perf_counter()
+            self._load(profile)
+            report.mounted = True
+            report.load_ms = (time.perf_counter() - started) * 1000
+            root = profile.mount_name
+        try:
+            yield root, cache
+        finally:
+            cache.close_all()
+            if report.mounted:
+                report.unloaded = self._unload(profile.mount_name)
+
+    @staticmethod
+    def _remap(key_path: str, root: str) -> str:
+        """HKCU\\X -> HKU\\<kök>\\X"""
+        return f"HKU\\{root}\\{split_key_path(key_path)[1]}"
+
+    @staticmethod
+    def _read(cache: KeyHandleCache, key_path: str, value_name: str) -> Tuple[bool, Optional[int], Any]:
+        hive, subkey = split_key_path(key_path)
+        try:
+            data, vtype = cache.backend.query_value(cache.open(hive, subkey, "r"), value_name)
+            return (True, vtype, data)
+        except OSError:
+            return (False, None, None)
+
+    # --- Uygulama ---
+
+    def apply_profile(self, profile: UserProfile) -> ProfileReport:
+        """Tek profil: bağla -> oku -> sadece farklı değerleri yaz -> kaldır"""
+        report = ProfileReport(profile)
+        started = time.perf_counter()
+        try:
+            with self._mounted(profile, report) as (root, cache):
+                remapped = [(self._remap(k, root), n, t, d) for k, n, t, d in self.optimizations]
+                readout = []
+                for (key_path, value_name, _, _), (orig_path, _, _, _) in zip(remapped, self.optimizations):
+                    exists, vtype, data = self._read(cache, key_path, value_name)
+                    readout.append({"path": key_path, "value": value_name, "exists": exists,
+                                    "type": vtype, "data": data if exists else None})
+                    report.previous.append({"path": orig_path, "value": value_name, "exists": exists,
+                                            "type": vtype, "data": data if exists else None})
+
+                delta = RegistryOptimizer().plan(readout=readout, optimizations=remapped)
+                report.compliant = len(delta.compliant)
+                if delta.apply:
+                    batch = RegistryBatch(cache=cache)
+                    for key_path, value_name, value_type, value_data in delta.apply:
+                        batch.add(key_path, value_name, value_type, value_data, source="user_profiles")
+                    result = batch.commit()
+                    report.changed = result.ok_count
+                    report.failed = [f"{w.key_path}\\{w.name}: {err}" for w, err in result.failed]
+        except Exception as e:
+            report.error = str(e)
+        report.duration_ms = (time.perf_counter() - started) * 1000
+        return report
+
+    def restore_profile(self, profile: UserProfile, items: List[Dict[str, Any]]) -> ProfileReport:
+        """apply_profile()'ın sakladığı eski değerleri geri yaz (yoktuysa sil)"""
+        report = ProfileReport(profile)
+        started = time.perf_counter()
+        try:
+            with self._mounted(profile, report) as (root, cache):
+                for item in items:
+                    hive, subkey = split_key_path(self._remap(item["path"], root))
+                    try:
+                        if item.get("exists"):
+                            handle = cache.open(hive, subkey, "rw")
+                            cache.backend.set_value(handle, item["value"], int(item["type"]), item.get("data"))
+                        else:
+                            # Sadece silme: anahtar yoksa oluşturma (her profilde boş anahtar kalmasın)
+                            try:
+                                handle = cache.open(hive, subkey, "w")
+                                cache.backend.delete_value(handle, item["value"])
+                            except FileNotFoundError:
+                                continue  # anahtar / değer zaten yok
+                        report.changed += 1
+                    except Exception as e:
+                        report.failed.append(f"{item['path']}\\{item['value']}: {e}")
+        except Exception as e:
+            report.error = str(e)
+        report.duration_ms = (time.perf_counter() - started) * 1000
+        return report
+
+    def _pool(self, func, jobs: List[Tuple]) -> List[ProfileReport]:
+        if not jobs:
+            return []
+        workers = self.max_workers or min(4, len(jobs))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Geçerli süre bütçesi (modules.deadline) iş parçacıklarına taşınır
+            futures = [pool.submit(contextvars.copy_context().run, func, *job) for job in jobs]
+            return [future.result() for future in futures]
+
+    def run(self, profiles: Optional[List[UserProfile]] = None) -> List[ProfileReport]:
+        """Tüm profillere uygula (sırası korunur)"""
+        self.cleanup_stale_mounts()
+        profiles = list_profiles(self.backend) if profiles is None else profiles
+        return self._pool(self.apply_profile, [(p,) for p in profiles])
+
+    def restore(self, previous: Dict[str, List[Dict[str, Any]]],
+                profiles: Optional[List[UserProfile]] = None) -> List[ProfileReport]:
+        """previous: {sid: eski değerler} (run() raporlarından)"""
+        self.cleanup_stale_mounts()
+        profiles = list_profiles(self.backend) if profiles is None else profiles
+        return self._pool(self.restore_profile, [(p, previous[p.sid]) for p in profiles if p.sid in previous])
@@ -3,6 +3,20 @@
 """
 Windows 11 Optimizer - Balanced Edition
 Oyun ve yazılım geliştirme için dengeli optimizasyonlar
+
+Gözetimsiz (filo) kullanım:
+    optimize.exe --headless [--all-profiles] [--deadline SANİYE] [--reg-import]
+    - Animasyon, bekleme ve tuş beklemesi yok
+    - stdout: satır başına bir JSON olay (start/backup/step/user_profiles/summary),
+      insan okunur çıktı stderr'e gider
+    - Çıkış kodu: 0 başarılı, 1 yönetici hakkı yok, 2 bazı adımlar hata verdi,
+      3 çalışma yarıda kesildi (hata), 130 kullanıcı durdurdu
+    - --deadline: tüm çalışmanın süre sınırı (varsayılan 1800, 0 = sınırsız). Yedekleme ve
+      her adımın ayrıca kendi bütçesi var; süresi dolan adım iptal edilir (prosesleri
+      öldürülür), hata olarak işaretlenir ve sonraki adıma geçilir
+    - --reg-import: kayıt defteri planı (zamanlayıcı ayarları dahil) değer başına API
+      yerine tek `reg import` ile uygulanır (winreg/pywin32 yavaş veya yoksa); winreg
+      hiç yüklenemiyorsa bu yol kendiliğinden kullanılır
 """
 
 import os
@@ -50,6 +64,60 @@ except ImportError:
     Fore = type('Fore', (), {'CYAN': '', 'GREEN': '', 'YELLOW': '', 'RED': '', 'MAGENTA': '', 'WHITE': ''})()
     Style = type('Style', (), {'RESET_ALL': ''})()
 
+# Gözetimsiz mod: JSON olayları asıl stdout'a, diğer her şey stderr'e yazılır
+HEADLESS = "--headless" in sys.argv[1:]
+EXIT_OK, EXIT_NOT_ADMIN, EXIT_STEP_ERRORS, EXIT_FATAL, EXIT_INTERRUPTED = 0, 1, 2, 3, 130
+
+# Süre bütçeleri (saniye): tüm çalışma, yedekleme, adım başına, kullanıcı profilleri
+RUN_DEADLINE_S = 1800.0
+BACKUP_BUDGET_S = 300.0
+STEP_BUDGET_S = 600.0
+PROFILES_BUDGET_S = 300.0
+
+
+def deadline_arg(argv, default=RUN_DEADLINE_S):
+    """--deadline SANİYE / --deadline=SANİYE (0 = sınırsız -> None)"""
+    value = default
+    for i, arg in enumerate(argv):
+        if arg == "--deadline" and i + 1 < len(argv):
+            value = argv[i + 1]
+        elif arg.startswith("--deadline="):
+            value = arg.split("=", 1)[1]
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        seconds = default
+    return seconds if seconds and seconds > 0 else None
+
+
+class ProgressWriter:
+    """Makine okunur ilerleme: satır başına bir JSON olay (stream yoksa hiçbir şey yazmaz)"""
+    
+    def __init__(self, stream=None):
+        self.stream = stream
+    
+    def emit(self, event, **data):
+        if self.stream is None:
+            return
+        record = {"event": event, "time": datetime.now().isoformat(timespec="milliseconds")}
+        record.update(data)
+        self.stream.write(json.dumps(record, default=str) + "\n")
+        self.stream.flush()
+
+
+def enable_headless():
+    """Animasyon / ilerleme çubuğu / tuş beklemesini kapat, insan okunur çıktıyı stderr'e yönlendir"""
+    UI.loading_animation = staticmethod(lambda message, duration=1.0: None)
+    UI.print_progress_bar = staticmethod(lambda current, total, width=50: None)
+    UI.wait_for_key = staticmethod(lambda message="": None)
+    UI.print_banner = staticmethod(lambda: None)
+    events = ProgressWriter(sys.stdout)
+    sys.stdout = sys.stderr
+    return events
+
+
+progress = enable_headless() if HEADLESS else ProgressWriter()
+
 """
 Profil yaklaşımı (tek yapı):
 - Kullanıcıdan seçim istemiyoruz
@@ -69,8 +137,15 @@ def is_admin():
 if not is_admin():
     UI.print_error("Bu script yönetici haklarıyla çalıştırılmalıdır!")
     UI.print_warning("Lütfen PowerShell veya CMD'yi 'Yönetici olarak çalıştır' ile açın.")
-    input("\nDevam etmek için bir tuşa basın...")
-    sys.exit(1)
+    progress.emit("error", message="administrator rights required", exit_code=EXIT_NOT_ADMIN)
+    if not HEADLESS:
+        input("\nDevam etmek için bir tuşa basın...")
+    sys.exit(EXIT_NOT_ADMIN)
+
+# Açılış görevi: paketlenmiş exe `--enforce` ile telemetri izleyicisini çalıştırır (UI yok)
+if "--enforce" in sys.argv[1:]:
+    from modules.registry_watcher import main as watcher_main
+    sys.exit(watcher_main(["--enforce"]))
 
 # Modülleri import et
 from modules.services import ServiceOptimizer
@@ -82,6 +157,13 @@ from modules.apps_remover import AppsRemover
 from modules.security_virtualization import SecurityVirtualizationOptimizer
 from modules.startup_tasks import StartupTasksOptimizer
 from modules.onedrive_optimizer import OneDriveOptimizer
+from modules.powershell_host import shutdown_powershell_host
+from modules.service_control import get_service_control, shutdown_service_control
+from modules.deadline import Budget, activate, run_with_budget
+from modules.registry_batch import get_key_cache, shutdown_key_cache
+from modules.registry_snapshot import write_snapshot
+from modules.state_capture import capture_sources
+from modules.user_profiles import ProfileFanout, hkcu_optimizations
 
 class WindowsOptimizer:
     """Ana optimizasyon sınıfı"""
@@ -102,6 +184,26 @@ class WindowsOptimizer:
         self.security_virtualization_optimizer = SecurityVirtualizationOptimizer()
         self.startup_tasks_optimizer = StartupTasksOptimizer()
         self.onedrive_optimizer = OneDriveOptimizer()
+        
+        # Servis işlemlerinin süre/hata özeti (ServiceControl.stats())
+        self.service_stats = {}
+        # Kayıt defteri anahtar açma/oluşturma sayıları (KeyHandleCache.stats())
+        self.registry_key_stats = {}
+        # --all-profiles: HKCU ayarlarını tüm yerel profillere (ve Default'a) da uygula
+        self.all_user_profiles = False
+        self.profile_reports = []
+        
+        # Gözetimsiz mod: yapay beklemeler yok, olaylar `progress` ile yazılır
+        self.headless = HEADLESS
+        self.progress = progress
+        # Adım bazında sonuç (ad, değişiklik sayısı, süre, hata)
+        self.step_results = []
+        # Yedekleme süresi ve kaynak başına süre/hata
+        self.backup_timing = {}
+        # Çalışma süre bütçesi; aşamalar (yedekleme, optimizasyon, profiller) ve adımlar alt bütçeleri
+        self.run_budget = Budget("Çalışma", deadline_arg(sys.argv[1:]))
+        # Süresi dolup bekleme payında bitmeyen adım (thread'i hâlâ çalışıyor olabilir)
+        self.abandoned_step = None
     
     def print_header(self):
         """Başlık yazdır"""
@@ -136,27 +238,61 @@ class WindowsOptimizer:
         self.startup_tasks_optimizer.disable_onedrive_tasks = True
     
     def backup_current_settings(self):
-        """Mevcut ayarları yedekle"""
+        """Mevcut ayarları yedekle (bağımsız kaynaklar aynı anda okunur)"""
         UI.print_step(1, 3, "Mevcut Ayarlar Yedekleniyor")
-        UI.print_info("Servis durumları kaydediliyor...")
-        UI.loading_animation("Servisler yedekleniyor", 0.3)
+        UI.print_info("Servis, kayıt defteri, özellik ve task durumları kaydediliyor...")
+        UI.loading_animation("Ayarlar yedekleniyor", 0.3)
         
-        backup_data = {
-            "timestamp": datetime.now().isoformat(),
-            "services": self.service_optimizer.backup_services(),
-            "registry": self.registry_optimizer.backup_registry(),
-            "features": self.features_optimizer.backup_features(),
+        # Yoğun dokunulan anahtarların tüm alt ağacı (kardeş değerler dahil), ikili dosyada
+        snapshot_file = self.backup_file.with_suffix(".snap")
+        sources = {
+            "services": self.service_optimizer.backup_services,
+            "registry": self.registry_optimizer.backup_registry,
+            "registry_snapshot": lambda: dict(write_snapshot(str(snapshot_file)), file=snapshot_file.name),
+            "features": self.features_optimizer.backup_features,
             # Startup/Tasks trimming yedeği (restore için) - optimize() öncesi snapshot
-            "startup_tasks": self.startup_tasks_optimizer.snapshot_backup(),
-            "onedrive": self.onedrive_optimizer.backup_state(),
+            "startup_tasks": self.startup_tasks_optimizer.snapshot_backup,
+            "onedrive": self.onedrive_optimizer.backup_state,
         }
+        started = time.perf_counter()
+        budget = self.run_budget.child("Yedekleme", BACKUP_BUDGET_S)
+        with activate(budget):
+            results = capture_sources(sources)
+        budget.finish()
         
-        UI.print_info("Kayıt defteri ayarları kaydediliyor...")
-        UI.loading_animation("Kayıt defteri yedekleniyor", 0.3)
+        backup_data = {"timestamp": datetime.now().isoformat()}
+        backup_data.update({r.name: r.data for r in results if r.ok and not r.timed_out})
+        # Kaynak başına süre/hata (hata veren / süresi dolan kaynak yedekte yok, diğerleri kaydedildi)
+        backup_data["backup_sources"] = {r.name: r.timing() for r in results}
+        self.backup_timing = {
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "sources": backup_data["backup_sources"],
+            "budget": budget.report(),
+        }
+        
+        for r in results:
+            if r.timed_out:
+                UI.print_warning(f"Yedeklenemedi ({r.name}): süre bütçesi doldu, iptal edildi")
+            elif not r.ok:
+                UI.print_warning(f"Yedeklenemedi ({r.name}): {r.error}")
+        info = backup_data.get("registry_snapshot")
+        if info:
+            UI.print_info(
+                f"Alt ağaç görüntüsü: {info['subtrees']} anahtar grubu, {info['values']} değer, "
+                f"{info['bytes'] / 1024:.1f} KB"
+            )
+        slowest = max(results, key=lambda r: r.duration_ms)
+        UI.print_info(
+            f"Yedekleme: {self.backup_timing['duration_ms']:.0f} ms "
+            f"(kaynakların toplamı {sum(r.duration_ms for r in results):.0f} ms, en yavaş: {slowest.name})"
+        )
         
         with open(self.backup_file, 'w', encoding='utf-8') as f:
             json.dump(backup_data, f, indent=2, ensure_ascii=False)
         
+        self.progress.emit("backup", file=str(self.backup_file),
+                           snapshot=(backup_data.get("registry_snapshot") or {}).get("file"),
+                           **self.backup_timing)
         UI.print_success(f"Yedek oluşturuldu: {self.backup_file.name}")
         UI.print_info(f"Konum: {self.backup_file}")
     
@@ -186,24 +322,114 @@ class WindowsOptimizer:
             ("Gereksiz Uygulamalar", lambda: self.apps_remover.optimize(remove_mode=True), "Gereksiz uygulamalar kaldırılıyor...")
         ]
         
+        # Her adım kendi bütçesinde, ayrı thread'de: süre dolarsa adım iptal edilir, sonrakine geçilir
+        phase = self.run_budget.child("Optimizasyon")
         total_optimizers = len(optimizers)
         for idx, (name, optimizer_func, desc) in enumerate(optimizers, 1):
             UI.print_section_header(f"{name} Optimizasyonu ({idx}/{total_optimizers})")
             UI.print_info(desc)
             
-            try:
-                changes = optimizer_func()
+            step = {"name": name, "index": idx, "total": total_optimizers, "changes": 0, "error": None,
+                    "timed_out": False}
+            started = time.perf_counter()
+            self.wait_abandoned_step(phase)
+            budget = phase.child(name, STEP_BUDGET_S)
+            if budget.expired:
+                step["timed_out"] = True
+                step["error"] = "çalışma süresi doldu, adım başlatılmadı"
+                UI.print_error(f"Atlandı: {step['error']}")
+            else:
+                outcome = run_with_budget(budget, optimizer_func)
+                if outcome.abandoned:
+                    self.abandoned_step = (name, outcome)
+                changes = outcome.value if outcome.error is None else None
                 if changes:
                     self.changes.extend(changes)
+                    step["changes"] = len(changes)
+                if outcome.timed_out:
+                    step["timed_out"] = True
+                    step["error"] = f"süre bütçesi doldu ({budget.used_ms / 1000:.0f} s), adım iptal edildi"
+                    UI.print_error(f"Zaman aşımı: {step['error']}")
+                elif outcome.error is not None:
+                    step["error"] = str(outcome.error)
+                    UI.print_error(f"Hata: {outcome.error}")
+                elif changes:
                     UI.print_success(f"{len(changes)} değişiklik başarıyla uygulandı")
                 else:
                     UI.print_info("Değişiklik gerekmedi (zaten optimize edilmiş)")
-            except Exception as e:
-                UI.print_error(f"Hata: {e}")
+            budget.finish()
+            step["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            step["budget"] = budget.report()
+            self.step_results.append(step)
+            self.progress.emit("step", **step)
             
             # İlerleme çubuğu
             UI.print_progress_bar(idx, total_optimizers)
-            time.sleep(0.2)  # Kısa bir gecikme
+            if not self.headless:
+                time.sleep(0.2)  # Kısa bir gecikme
+        phase.finish()
+    
+    def wait_abandoned_step(self, budget):
+        """
+        Süresi dolan adımın thread'i hâlâ çalışıyorsa (saf Python kısmı, örn. kayıt defteri
+        yazımı) bitmesini bekle: sonraki adım onunla aynı anda çalışmasın.
+        En fazla `budget` dolana kadar beklenir; dolarsa sonraki adımlar başlatılmaz.
+        """
+        if self.abandoned_step is None:
+            return
+        name, outcome = self.abandoned_step
+        if not outcome.done.is_set():
+            UI.print_warning(f"Önceki adım ({name}) hâlâ kapanıyor, bitmesi bekleniyor...")
+            while not outcome.done.wait(0.25) and not budget.expired:
+                pass
+        if outcome.done.is_set():
+            self.abandoned_step = None
+    
+    def apply_user_profiles(self):
+        """Planın HKCU kısmını diğer profillere uygula; eski değerleri yedeğe ekle"""
+        UI.print_section_header("Kullanıcı Profilleri (HKCU)")
+        optimizations = hkcu_optimizations(
+            RegistryOptimizer.CATEGORIES + PrivacyOptimizer.CATEGORIES,
+            self.registry_optimizer._profiles(bool(self.registry_optimizer.apply_scheduler_tweaks)),
+            extra=self.apps_remover.hkcu_optimizations(),
+        )
+        self.wait_abandoned_step(self.run_budget)
+        budget = self.run_budget.child("Kullanıcı profilleri", PROFILES_BUDGET_S)
+        outcome = run_with_budget(budget, ProfileFanout(optimizations).run)
+        if outcome.timed_out:
+            UI.print_warning("Kullanıcı profilleri: süre bütçesi doldu, işlem iptal edildi")
+        elif outcome.error is not None:
+            UI.print_warning(f"Kullanıcı profilleri: {outcome.error}")
+        self.profile_reports = outcome.value if outcome.error is None and outcome.value else []
+        self.progress.emit("user_profiles", timed_out=outcome.timed_out, budget=budget.report(), profiles=[
+            {"sid": r.profile.sid, "changed": r.changed, "compliant": r.compliant, "ok": r.ok,
+             "error": r.error, "duration_ms": round(r.duration_ms, 1)}
+            for r in self.profile_reports
+        ])
+        
+        for report in self.profile_reports:
+            label = report.profile.sid
+            timing = f"{report.duration_ms:.0f} ms" + (f", yükleme {report.load_ms:.0f} ms" if report.mounted else "")
+            if report.error:
+                print(f"      ⚠️  {label}: {report.error} ({timing})")
+                continue
+            print(f"      ✅ {label}: {report.changed} değiştirildi, {report.compliant} zaten uygun ({timing})")
+            for error in report.failed:
+                print(f"      ⚠️  {label}: {error}")
+            if not report.unloaded:
+                print(f"      ⚠️  {label}: hive kaldırılamadı (HKU\\{report.profile.mount_name})")
+        
+        # Geri yükleme için profil başına eski değerler
+        previous = {r.profile.sid: r.previous for r in self.profile_reports if r.previous and r.error is None}
+        if previous:
+            try:
+                with open(self.backup_file, 'r', encoding='utf-8') as f:
+                    backup_data = json.load(f)
+                backup_data["user_profiles"] = previous
+                with open(self.backup_file, 'w', encoding='utf-8') as f:
+                    json.dump(backup_data, f, indent=2, ensure_ascii=False)
+            except Exception as e:
+                UI.print_warning(f"Profil yedeği yazılamadı: {e}")
     
     def print_summary(self):
         """Özet yazdır"""
@@ -212,6 +438,45 @@ class WindowsOptimizer:
         summary_items = [
             f"Toplam {len(self.changes)} değişiklik uygulandı",
             f"Yedek dosyası: {self.backup_file.name}",
+        ]
+        
+        registry_counts = self.registry_optimizer.last_counts
+        if any(registry_counts.values()):
+            summary_items.append(
+                f"Kayıt defteri: {registry_counts['compliant']} zaten uygun, "
+                f"{registry_counts['changed']} değiştirildi, {registry_counts['failed']} başarısız"
+            )
+        
+        key_stats = self.registry_key_stats
+        if key_stats:
+            summary_items.append(
+                f"Kayıt defteri anahtarları: {key_stats['opens']} açma, {key_stats['creates']} oluşturma, "
+                f"{key_stats['saved']} çağrı cache'ten karşılandı"
+            )
+        
+        if self.profile_reports:
+            ok = sum(1 for r in self.profile_reports if r.ok)
+            changed = sum(r.changed for r in self.profile_reports)
+            summary_items.append(f"Kullanıcı profilleri: {ok}/{len(self.profile_reports)} başarılı, {changed} değer değiştirildi")
+        
+        compliant = self.compliant_services
+        if compliant:
+            summary_items.append(f"Zaten uygun servis: {len(compliant)} (dokunulmadı)")
+        
+        ops = self.service_stats.get("operations") or {}
+        if ops:
+            calls = sum(op["calls"] for op in ops.values())
+            total_ms = sum(op["total_ms"] for op in ops.values())
+            errors = len(self.service_stats.get("errors") or [])
+            summary_items.append(f"Servis işlemleri: {calls} çağrı, {total_ms:.0f} ms, {errors} hata")
+        
+        # Süre bütçeleri: çalışma, aşamalar ve adımlar (kullanılan / toplam)
+        summary_items += ["", "SÜRE BÜTÇELERİ:", f"• {self.run_budget.summary()}"]
+        for phase in self.run_budget.children:
+            summary_items.append(f"  • {phase.summary()}")
+            summary_items += [f"      {step.summary()}" for step in phase.children]
+        
+        summary_items += [
             "",
             "ÖNEMLİ NOTLAR:",
             "• Bazı değişiklikler için sistem yeniden başlatma gerekebilir",
@@ -220,14 +485,55 @@ class WindowsOptimizer:
         ]
         
         UI.print_summary_box("Optimizasyon Özeti", summary_items)
+        self.progress.emit("summary", **self.summary_data())
         
         UI.print_success("Tüm optimizasyonlar başarıyla tamamlandı!")
         UI.print_info("Sistem performansı ve gizlilik ayarları optimize edildi.")
 
+    @property
+    def failed_steps(self):
+        return [step["name"] for step in self.step_results if step["error"]]
+
+    @property
+    def timed_out_steps(self):
+        return [step["name"] for step in self.step_results if step.get("timed_out")]
+    
+    @property
+    def compliant_services(self):
+        """Zaten uygun servisler: servis adımı + diğer adımların disable() çağrıları"""
+        names = list(self.service_optimizer.compliant_services or [])
+        names += self.service_stats.get("already_compliant") or []
+        return list(dict.fromkeys(names))
+    
+    def summary_data(self):
+        """print_summary() ile aynı bilgiler, makine okunur"""
+        return {
+            "changes": len(self.changes),
+            "backup_file": str(self.backup_file),
+            "backup": self.backup_timing,
+            "steps": self.step_results,
+            "failed_steps": self.failed_steps,
+            "timed_out_steps": self.timed_out_steps,
+            "budget": self.run_budget.report(),
+            "registry": self.registry_optimizer.last_counts,
+            "registry_keys": self.registry_key_stats,
+            "compliant_services": len(self.compliant_services),
+            "service_errors": len(self.service_stats.get("errors") or []),
+            "user_profiles": {
+                "total": len(self.profile_reports),
+                "ok": sum(1 for r in self.profile_reports if r.ok),
+            },
+        }
+
 def main():
-    """Ana fonksiyon"""
+    """Ana fonksiyon; çıkış kodunu döndürür"""
+    started = time.perf_counter()
     try:
         optimizer = WindowsOptimizer()
+        progress.emit("start", headless=HEADLESS, backup_file=str(optimizer.backup_file),
+                      deadline_s=optimizer.run_budget.seconds)
+        optimizer.all_user_profiles = "--all-profiles" in sys.argv[1:]
+        optimizer.registry_optimizer.use_reg_import = "--reg-import" in sys.argv[1:]
         optimizer.print_header()
         optimizer.configure_profile()
         
@@ -239,25 +545,46 @@ def main():
         
         # Yedekle
         optimizer.backup_current_settings()
-        time.sleep(0.5)
+        if not HEADLESS:
+            time.sleep(0.5)
         
         # Optimize et
         optimizer.optimize_all()
+        if optimizer.all_user_profiles:
+            optimizer.apply_user_profiles()
+        
+        # PowerShell host'u, SCM ve kayıt defteri handle'larını kapat (tüm işler bitti)
+        shutdown_powershell_host()
+        optimizer.service_stats = get_service_control().stats()
+        shutdown_service_control()
+        optimizer.registry_key_stats = get_key_cache().stats()
+        shutdown_key_cache()
+        optimizer.run_budget.finish()
         
         # Özet
         optimizer.print_summary()
         
+        exit_code = EXIT_STEP_ERRORS if optimizer.failed_steps else EXIT_OK
+        progress.emit("finished", exit_code=exit_code,
+                      duration_ms=round((time.perf_counter() - started) * 1000, 1))
         UI.wait_for_key("\nİşlem tamamlandı. Çıkmak için bir tuşa basın...")
+        return exit_code
         
     except KeyboardInterrupt:
         UI.print_error("\nİşlem kullanıcı tarafından durduruldu!")
         UI.print_warning("Kısmi değişiklikler uygulanmış olabilir.")
+        progress.emit("finished", exit_code=EXIT_INTERRUPTED, error="interrupted",
+                      duration_ms=round((time.perf_counter() - started) * 1000, 1))
         UI.wait_for_key()
+        return EXIT_INTERRUPTED
     except Exception as e:
         UI.print_error(f"Hata oluştu: {e}")
         UI.print_info("Lütfen yedek dosyasını kontrol edin.")
+        progress.emit("finished", exit_code=EXIT_FATAL, error=str(e),
+                      duration_ms=round((time.perf_counter() - started) * 1000, 1))
         UI.wait_for_key()
+        return EXIT_FATAL
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
@@ -5,11 +5,13 @@ Windows Defender Optimizer Plugin
 İsteğe bağlı: Defender'ı kapatma veya optimize etme
 """
 
-import subprocess
-import winreg
-from typing import Dict, Any
+from typing import Dict, Any, List
 
+from modules.registry_backend import REG_DWORD, get_registry_backend
+from modules.service_control import get_service_control
 from plugins.base import OptimizerPlugin, OptimizationResult, OptimizationStatus
+from plugins import resources
+from plugins.resources import ResourceClaim
 from core.config import Config, SecurityConfig
 from core.events import EventBus, Event, EventType, get_event_bus
 from datetime import datetime
@@ -18,6 +20,8 @@ from datetime import datetime
 class DefenderOptimizer(OptimizerPlugin):
     """Windows Defender optimization plugin"""
     
+    DEFENDER_SERVICES = ["WinDefend", "WdNisSvc", "Sense"]
+    
     def __init__(self, event_bus: EventBus = None):
         super().__init__(
             name="DefenderOptimizer",
@@ -66,38 +70,33 @@ class DefenderOptimizer(OptimizerPlugin):
         """Check if can optimize with config"""
         return config.security.disable_windows_defender or config.security.disable_defender_realtime
     
+    def get_resources(self) -> List[ResourceClaim]:
+        """Defender services + the Defender policy key"""
+        return [resources.service(name) for name in self.DEFENDER_SERVICES] + [
+            resources.registry_key("HKLM\\SOFTWARE\\Policies\\Microsoft\\Windows Defender"),
+        ]
+    
     def backup(self) -> Dict[str, Any]:
         """Backup current Defender settings"""
         backup = {}
         
         # Real-time protection durumu
-        try:
-            key = winreg.OpenKey(
-                winreg.HKEY_LOCAL_MACHINE,
-                "SOFTWARE\\Policies\\Microsoft\\Windows Defender\\Real-Time Protection",
-                0,
-                winreg.KEY_READ
-            )
-            backup["realtime_monitoring"] = winreg.QueryValueEx(key, "DisableRealtimeMonitoring")[0]
-            winreg.CloseKey(key)
-        except:
-            backup["realtime_monitoring"] = None
+        exists, _, data = get_registry_backend().read_value(
+            "HKLM",
+            "SOFTWARE\\Policies\\Microsoft\\Windows Defender\\Real-Time Protection",
+            "DisableRealtimeMonitoring"
+        )
+        backup["realtime_monitoring"] = data if exists else None
         
         # Servis durumları
-        services = ["WinDefend", "WdNisSvc", "Sense"]
+        services = self.DEFENDER_SERVICES
         backup["services"] = {}
+        control = get_service_control()
         for service in services:
             try:
-                result = subprocess.run(
-                    ["sc", "query", service],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                if "STOPPED" in result.stdout:
-                    backup["services"][service] = "STOPPED"
-                elif "RUNNING" in result.stdout:
-                    backup["services"][service] = "RUNNING"
+                state = control.query(service)
+                if state is not None and state.state_name in ("STOPPED", "RUNNING"):
+                    backup["services"][service] = state.state_name
             except:
                 pass
         
@@ -108,26 +107,22 @@ class DefenderOptimizer(OptimizerPlugin):
         try:
             # Real-time protection geri yükle
             if "realtime_monitoring" in backup_data and backup_data["realtime_monitoring"] is not None:
-                key = winreg.CreateKey(
-                    winreg.HKEY_LOCAL_MACHINE,
-                    "SOFTWARE\\Policies\\Microsoft\\Windows Defender\\Real-Time Protection"
-                )
-                winreg.SetValueEx(
-                    key,
+                get_registry_backend().write_value(
+                    "HKLM",
+                    "SOFTWARE\\Policies\\Microsoft\\Windows Defender\\Real-Time Protection",
                     "DisableRealtimeMonitoring",
-                    0,
-                    winreg.REG_DWORD,
+                    REG_DWORD,
                     backup_data["realtime_monitoring"]
                 )
-                winreg.CloseKey(key)
             
             # Servisleri geri yükle
             if "services" in backup_data:
+                control = get_service_control()
                 for service_name, state in backup_data["services"].items():
                     if state == "RUNNING":
-                        subprocess.run(["sc", "start", service_name], check=False)
+                        control.start(service_name)
                     elif state == "STOPPED":
-                        subprocess.run(["sc", "stop", service_name], check=False)
+                        control.stop(service_name)
             
             return True
         except Exception as e:
@@ -136,12 +131,11 @@ class DefenderOptimizer(OptimizerPlugin):
     def _disable_realtime_protection(self, result: OptimizationResult) -> None:
         """Disable real-time protection"""
         try:
-            key = winreg.CreateKey(
-                winreg.HKEY_LOCAL_MACHINE,
-                "SOFTWARE\\Policies\\Microsoft\\Windows Defender\\Real-Time Protection"
+            get_registry_backend().write_value(
+                "HKLM",
+                "SOFTWARE\\Policies\\Microsoft\\Windows Defender\\Real-Time Protection",
+                "DisableRealtimeMonitoring", REG_DWORD, 1
             )
-            winreg.SetValueEx(key, "DisableRealtimeMonitoring", 0, winreg.REG_DWORD, 1)
-            winreg.CloseKey(key)
             
             result.add_change({
                 "type": "defender_realtime",
@@ -159,14 +153,15 @@ class DefenderOptimizer(OptimizerPlugin):
     
     def _disable_defender_services(self, result: OptimizationResult) -> None:
         """Disable Defender services"""
-        services = ["WinDefend", "WdNisSvc", "Sense"]
+        services = self.DEFENDER_SERVICES
+        control = get_service_control()
         
         for service in services:
             try:
-                # Servisi durdur
-                subprocess.run(["sc", "stop", service], check=False, timeout=10)
-                # Servisi devre dışı bırak
-                subprocess.run(["sc", "config", service, "start=", "disabled"], check=False)
+                # Stop + disable; already stopped and disabled services are not written
+                control.disable(service)
+                if service in control.already_compliant:
+                    continue
                 
                 result.add_change({
                     "type": "defender_service",
@@ -179,13 +174,13 @@ class DefenderOptimizer(OptimizerPlugin):
     def _disable_cloud_protection(self, result: OptimizationResult) -> None:
         """Disable cloud protection"""
         try:
-            key = winreg.CreateKey(
-                winreg.HKEY_LOCAL_MACHINE,
-                "SOFTWARE\\Policies\\Microsoft\\Windows Defender"
-            )
-            winreg.SetValueEx(key, "DisableRealtimeMonitoring", 0, winreg.REG_DWORD, 1)
-            winreg.SetValueEx(key, "DisableIOAVProtection", 0, winreg.REG_DWORD, 1)
-            winreg.CloseKey(key)
+            backend = get_registry_backend()
+            key = backend.create_key("HKLM", "SOFTWARE\\Policies\\Microsoft\\Windows Defender")
+            try:
+                backend.set_value(key, "DisableRealtimeMonitoring", REG_DWORD, 1)
+                backend.set_value(key, "DisableIOAVProtection", REG_DWORD, 1)
+            finally:
+                backend.close_key(key)
             
             result.add_change({
                 "type": "defender_cloud",
@@ -5,11 +5,12 @@ Services Optimizer Plugin
 Refactored from modules/services.py
 """
 
-import win32serviceutil
-import win32service
 from typing import Dict, Any, List
 
+from modules.service_control import get_service_control
 from plugins.base import OptimizerPlugin, OptimizationResult, OptimizationStatus
+from plugins import resources
+from plugins.resources import ResourceClaim
 from core.config import Config, ServiceConfig
 from core.events import EventBus, Event, EventType, get_event_bus
 from datetime import datetime
@@ -128,31 +129,32 @@ class ServicesOptimizer(OptimizerPlugin):
         """Check if can optimize with config"""
         return config.services.disable_telemetry or config.services.disable_xbox_services
     
+    def get_resources(self) -> List[ResourceClaim]:
+        """Only the services it reconfigures"""
+        return [resources.service(name) for name in self.SERVICES_TO_DISABLE if name not in self.SERVICES_TO_KEEP]
+    
     def backup(self) -> Dict[str, Any]:
         """Backup current service states"""
         backup = {}
+        control = get_service_control()
         for service in self.SERVICES_TO_DISABLE:
-            try:
-                status = win32serviceutil.QueryServiceStatus(service)
+            state = control.query(service)
+            if state is not None:
                 backup[service] = {
-                    "status": status[1],
-                    "start_type": status[4]
+                    "status": state.state,
+                    "start_type": state.start_type
                 }
-            except:
-                pass
         self._backup_data = backup
         return backup
     
     def restore(self, backup_data: Dict[str, Any]) -> bool:
         """Restore service states"""
         try:
+            control = get_service_control()
             for service_name, service_data in backup_data.items():
                 start_type = service_data.get("start_type")
                 if start_type is not None:
-                    win32serviceutil.ChangeServiceConfig(
-                        service_name,
-                        startType=start_type
-                    )
+                    control.set_start_type(service_name, start_type)
             return True
         except Exception as e:
             return False
@@ -160,18 +162,8 @@ class ServicesOptimizer(OptimizerPlugin):
     def _disable_service(self, service_name: str) -> bool:
         """Disable a service"""
         try:
-            # Stop service
-            try:
-                win32serviceutil.StopService(service_name)
-            except:
-                pass
-            
-            # Disable service
-            win32serviceutil.ChangeServiceConfig(
-                service_name,
-                startType=win32service.SERVICE_DISABLED
-            )
-            return True
+            # Stop + disable service
+            return get_service_control().disable(service_name)
         except:
             return False
 
@@ -5,6 +5,7 @@ Optimizers as plugins with strategy pattern
 
 from .base import OptimizerPlugin, OptimizationResult, OptimizationStatus
 from .registry import PluginRegistry
+from .resources import ResourceClaim, ResourceLockManager
 from .loader import PluginLoader
 
 __all__ = [
@@ -12,6 +13,8 @@ __all__ = [
     'OptimizationResult',
     'OptimizationStatus',
     'PluginRegistry',
+    'ResourceClaim',
+    'ResourceLockManager',
     'PluginLoader',
 ]
 
@@ -11,6 +11,8 @@ from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from .resources import ResourceClaim, exclusive
+
 
 class OptimizationStatus(Enum):
     """Optimization status"""
@@ -20,6 +22,7 @@ class OptimizationStatus(Enum):
     FAILED = "failed"
     SKIPPED = "skipped"
     PARTIAL = "partial"
+    TIMED_OUT = "timed_out"
 
 
 @dataclass
@@ -70,6 +73,7 @@ class OptimizerPlugin(ABC):
         self.description = description
         self.enabled = True
         self.priority = 0  # Lower number = higher priority
+        self.timeout: Optional[float] = None  # Seconds; None = ExecutionConfig.plugin_timeout
     
     @abstractmethod
     def optimize(self, config: Any) -> OptimizationResult:
@@ -139,6 +143,18 @@ class OptimizerPlugin(ABC):
         """
         return []
     
+    def get_resources(self) -> List[ResourceClaim]:
+        """
+        Get resources this plugin reads or writes
+        
+        Used by parallel execution: plugins with conflicting claims never run at the
+        same time. Plugins that do not declare anything run exclusively.
+        
+        Returns:
+            List of resource claims (see plugins.resources)
+        """
+        return [exclusive()]
+    
     def get_info(self) -> Dict[str, Any]:
         """Get plugin information"""
         return {
@@ -146,6 +162,8 @@ class OptimizerPlugin(ABC):
             "description": self.description,
             "enabled": self.enabled,
             "priority": self.priority,
+            "timeout": self.timeout,
             "dependencies": self.get_dependencies(),
+            "resources": [str(claim) for claim in self.get_resources()],
         }
 
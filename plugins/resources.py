@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Plugin Resource Claims
+Declares what a plugin touches and provides read/write locks for parallel execution
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+import threading
+import time
+
+
+@dataclass(frozen=True)
+class ResourceClaim:
+    """
+    Claim on a node of the resource tree
+
+    Resources are hierarchical paths, e.g. ("registry", "hklm", "software", ...),
+    ("scm", "diagtrack") or ("powershell",). Two claims conflict when one path is a
+    prefix of the other (same node, ancestor or descendant) and at least one of
+    them is a write. The empty path is the whole system.
+    """
+    path: Tuple[str, ...]
+    write: bool = True
+
+    def conflicts_with(self, other: "ResourceClaim") -> bool:
+        if not (self.write or other.write):
+            return False
+        shorter, longer = sorted((self.path, other.path), key=len)
+        return longer[:len(shorter)] == shorter
+
+    def __str__(self) -> str:
+        return f"{'/'.join(self.path) or '*'} ({'write' if self.write else 'read'})"
+
+
+def exclusive() -> ResourceClaim:
+    """Whole-system write claim (conflicts with every other claim)"""
+    return ResourceClaim((), True)
+
+
+def scm(write: bool = True) -> ResourceClaim:
+    """Service Control Manager as a whole (every service)"""
+    return ResourceClaim(("scm",), write)
+
+
+def service(name: str, write: bool = True) -> ResourceClaim:
+    """Single service (names are case-insensitive)"""
+    return ResourceClaim(("scm", name.lower()), write)
+
+
+def registry_key(key_path: str, write: bool = True) -> ResourceClaim:
+    """Registry key and everything below it, e.g. 'HKLM\\SOFTWARE\\Policies\\...'"""
+    parts = tuple(p.lower() for p in key_path.strip("\\").split("\\") if p)
+    return ResourceClaim(("registry",) + parts, write)
+
+
+def powershell(write: bool = True) -> ResourceClaim:
+    """Shared PowerShell host process"""
+    return ResourceClaim(("powershell",), write)
+
+
+class ResourceLockManager:
+    """
+    Read/write locks on resource claims
+    A set of claims is acquired all-or-nothing, so holders never deadlock each other.
+    Thread-safe implementation
+    """
+
+    def __init__(self):
+        self._held: Dict[str, List[ResourceClaim]] = {}
+        self._cond = threading.Condition(threading.RLock())
+
+    def conflicts(self, owner: str, claims: Iterable[ResourceClaim]) -> List[str]:
+        """Owners currently holding a claim that conflicts with `claims`"""
+        claims = list(claims)
+        with self._cond:
+            return [
+                holder for holder, held in self._held.items()
+                if holder != owner and any(c.conflicts_with(h) for c in claims for h in held)
+            ]
+
+    def try_acquire(self, owner: str, claims: Iterable[ResourceClaim]) -> bool:
+        """Acquire all claims if none conflicts, without waiting"""
+        claims = list(claims)
+        with self._cond:
+            if self.conflicts(owner, claims):
+                return False
+            self._held.setdefault(owner, []).extend(claims)
+            return True
+
+    def acquire(self, owner: str, claims: Iterable[ResourceClaim], timeout: Optional[float] = None) -> float:
+        """
+        Wait until all claims can be acquired
+
+        Returns:
+            Time spent waiting in milliseconds
+
+        Raises:
+            TimeoutError: if the claims could not be acquired within `timeout` seconds
+        """
+        claims = list(claims)
+        started = time.perf_counter()
+        deadline = None if timeout is None else started + timeout
+        with self._cond:
+            while not self.try_acquire(owner, claims):
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"Timed out waiting for resources: {', '.join(map(str, claims))}")
+                self._cond.wait(remaining)
+        return (time.perf_counter() - started) * 1000
+
+    def release(self, owner: str) -> None:
+        """Release every claim held by owner"""
+        with self._cond:
+            if self._held.pop(owner, None) is not None:
+                self._cond.notify_all()
+
+    def wait_for_release(self, timeout: Optional[float] = None) -> None:
+        """Block until some owner releases its claims (or `timeout` seconds pass)"""
+        with self._cond:
+            self._cond.wait(timeout)
+
+    def holders(self) -> Dict[str, List[ResourceClaim]]:
+        """Current holders and their claims"""
+        with self._cond:
+            return {owner: list(claims) for owner, claims in self._held.items()}
@@ -45,17 +45,20 @@ if not is_admin():
     UI.wait_for_key()
     sys.exit(1)
 
-import win32serviceutil
-import win32service
-import winreg
+from modules.features import FeaturesOptimizer
+from modules.powershell_host import get_powershell_host, ps_array, shutdown_powershell_host
+from modules.service_control import get_service_control, shutdown_service_control
+from modules.registry_backend import REG_SZ, get_registry_backend
+from modules.registry_batch import shutdown_key_cache
+from modules.reg_file import compile_inverse, import_reg_text
+from modules.registry_snapshot import SnapshotFile, restore_subtree
+from modules.user_profiles import ProfileFanout
 
 
 def _set_run_value(hive_name: str, path: str, name: str, value: str) -> bool:
     try:
-        root = winreg.HKEY_CURRENT_USER if hive_name == "HKCU" else winreg.HKEY_LOCAL_MACHINE
-        key = winreg.CreateKey(root, path)
-        winreg.SetValueEx(key, name, 0, winreg.REG_SZ, value)
-        winreg.CloseKey(key)
+        hive = "HKCU" if hive_name == "HKCU" else "HKLM"
+        get_registry_backend().write_value(hive, path, name, REG_SZ, value)
         return True
     except Exception:
         return False
@@ -99,8 +102,7 @@ def restore_startup_tasks(backup_data):
             if task_name and task_path and prev_state not in ("disabled", "1"):
                 try:
                     cmd = f'Enable-ScheduledTask -TaskName "{task_name}" -TaskPath "{task_path}" | Out-Null'
-                    subprocess.run(["powershell", "-NoProfile", "-ExecutionPolicy", "Bypass", "-Command", cmd],
-                                   capture_output=True, text=True, timeout=30, check=False)
+                    get_powershell_host().run(cmd, timeout=30)
                     restored += 1
                 except Exception:
                     pass
@@ -117,6 +119,7 @@ def restore_services(backup_data):
     services = backup_data["services"]
     total = len(services)
     restored = 0
+    control = get_service_control()
     
     for idx, (service_name, service_data) in enumerate(services.items(), 1):
         try:
@@ -124,10 +127,8 @@ def restore_services(backup_data):
             start_type = service_data.get("start_type")
             
             if start_type is not None:
-                win32serviceutil.ChangeServiceConfig(
-                    service_name,
-                    startType=start_type
-                )
+                if not control.set_start_type(service_name, start_type):
+                    raise RuntimeError(control.errors[-1][2] if control.errors else "başlangıç tipi değiştirilemedi")
                 UI.print_success(f"{service_name} geri yüklendi ({idx}/{total})")
                 restored += 1
             UI.print_progress_bar(idx, total)
@@ -150,13 +151,24 @@ def restore_registry(backup_data):
         UI.print_info("Registry yedeği boş (atlandı).")
         return
 
+    # Önce tek `reg import` ile ters belgeyi uygula; olmazsa değer değer geri yükle
+    try:
+        result = import_reg_text(compile_inverse(items))
+        if result.ok:
+            UI.print_success(f"Registry geri yüklendi: {total}/{total} (reg import, {result.duration_ms:.0f} ms)")
+            return
+        UI.print_warning("reg import başarısız, değerler tek tek geri yükleniyor...")
+    except Exception as e:
+        UI.print_warning(f"Geri yükleme .reg'i oluşturulamadı ({e}), değerler tek tek geri yükleniyor...")
+
     def _parse_hive(key_path: str):
         if key_path.startswith("HKLM\\"):
-            return winreg.HKEY_LOCAL_MACHINE, key_path[5:]
+            return "HKLM", key_path[5:]
         if key_path.startswith("HKCU\\"):
-            return winreg.HKEY_CURRENT_USER, key_path[5:]
+            return "HKCU", key_path[5:]
         return None, None
 
+    backend = get_registry_backend()
     restored = 0
     for idx, item in enumerate(items, 1):
         try:
@@ -174,17 +186,17 @@ def restore_registry(backup_data):
             if not exists:
                 # Eskiden yoktu -> value'yu silmeye çalış
                 try:
-                    key = winreg.OpenKey(hive, subkey, 0, winreg.KEY_SET_VALUE)
-                    winreg.DeleteValue(key, value_name)
-                    winreg.CloseKey(key)
+                    key = backend.open_key(hive, subkey, write=True)
+                    try:
+                        backend.delete_value(key, value_name)
+                    finally:
+                        backend.close_key(key)
                 except Exception:
                     pass
             else:
                 # Eskiden vardı -> eski değere döndür
                 try:
-                    key = winreg.CreateKey(hive, subkey)
-                    winreg.SetValueEx(key, value_name, 0, int(vtype), vdata)
-                    winreg.CloseKey(key)
+                    backend.write_value(hive, subkey, value_name, int(vtype), vdata)
                 except Exception:
                     pass
 
@@ -196,6 +208,39 @@ def restore_registry(backup_data):
     UI.print_success(f"Registry geri yüklendi: {restored}/{total}")
 
 
+def restore_registry_snapshot(backup_data, backup_dir, roots=None):
+    """Alt ağaç görüntüsünü geri yükle (roots verilirse sadece o alt ağaçlar çözülür)"""
+    info = backup_data.get("registry_snapshot") if isinstance(backup_data, dict) else None
+    if not info or not isinstance(info, dict) or not info.get("file"):
+        return
+    path = Path(backup_dir) / info["file"]
+    if not path.exists():
+        UI.print_warning(f"Alt ağaç görüntüsü bulunamadı: {path.name} (atlandı)")
+        return
+
+    UI.print_info("Kayıt defteri alt ağaçları geri yükleniyor...")
+    try:
+        snapshot = SnapshotFile.open(str(path))
+    except Exception as e:
+        UI.print_warning(f"Alt ağaç görüntüsü okunamadı: {e}")
+        return
+
+    roots = [r for r in (roots or snapshot.roots()) if r in snapshot]
+    written = deleted = 0
+    for idx, root in enumerate(roots, 1):
+        try:
+            report = restore_subtree(snapshot.get(root))
+        except Exception as e:
+            UI.print_warning(f"{root}: {e}")
+            continue
+        written += report.written
+        deleted += report.deleted
+        for error in report.failed:
+            UI.print_warning(error)
+        UI.print_progress_bar(idx, len(roots))
+    UI.print_success(f"Alt ağaçlar geri yüklendi: {len(roots)} anahtar grubu, {written} yazıldı, {deleted} silindi")
+
+
 def restore_features(backup_data):
     """Windows Optional Feature'ları geri yükle (sadece dokunulanlar)"""
     features = backup_data.get("features") if isinstance(backup_data, dict) else None
@@ -204,22 +249,37 @@ def restore_features(backup_data):
         return
 
     UI.print_info("Windows özellikleri geri yükleniyor...")
-    restored = 0
-    total = len(features)
+    optimizer = FeaturesOptimizer()
+    # Tek envanter: zaten yedekteki durumda olanlar atlanır
+    current = optimizer.query_feature_states() or {}
+
+    to_enable = []
+    to_disable = []
     for name, state in features.items():
+        if not (state or "").strip():
+            continue
+        if current and name not in current:
+            continue  # Sistemde olmayan özellik tüm toplu işlemi bozmasın
+        if FeaturesOptimizer.is_enabled_state(state):
+            if not FeaturesOptimizer.is_enabled_state(current.get(name)):
+                to_enable.append(name)
+        elif not FeaturesOptimizer.is_disabled_state(current.get(name)):
+            to_disable.append(name)
+
+    restored = len(features) - len(to_enable) - len(to_disable)
+    total = len(features)
+    # Her grup tek servicing işlemi olarak gönderilir
+    batches = [
+        (to_enable, "Enable-WindowsOptionalFeature", "-NoRestart -All"),
+        (to_disable, "Disable-WindowsOptionalFeature", "-NoRestart"),
+    ]
+    for names, cmdlet, flags in batches:
+        if not names:
+            continue
         try:
-            state_norm = (state or "").strip().lower()
-            if not state_norm:
-                continue
-            if state_norm.startswith("enabled"):
-                cmd = f'Enable-WindowsOptionalFeature -Online -FeatureName "{name}" -NoRestart -All -ErrorAction SilentlyContinue | Out-Null'
-            else:
-                cmd = f'Disable-WindowsOptionalFeature -Online -FeatureName "{name}" -NoRestart -ErrorAction SilentlyContinue | Out-Null'
-            subprocess.run(
-                ["powershell", "-NoProfile", "-ExecutionPolicy", "Bypass", "-Command", cmd],
-                capture_output=True, text=True, timeout=60, check=False
-            )
-            restored += 1
+            cmd = f'{cmdlet} -Online -FeatureName {ps_array(names)} {flags} -ErrorAction SilentlyContinue | Out-Null'
+            get_powershell_host().run(cmd, timeout=max(120, 60 * len(names)))
+            restored += len(names)
             UI.print_progress_bar(restored, total)
         except Exception:
             pass
@@ -227,12 +287,27 @@ def restore_features(backup_data):
 
 
 def restore_telemetry_blocker():
-    """TelemetryBlocker task'ını kaldır (varsa)"""
-    try:
-        subprocess.run(["schtasks", "/Delete", "/TN", "TelemetryBlocker", "/F"],
-                       capture_output=True, text=True, timeout=20, check=False)
-    except Exception:
-        pass
+    """TelemetryBlocker task'ını durdur ve kaldır (varsa)"""
+    for args in (["schtasks", "/End", "/TN", "TelemetryBlocker"],
+                 ["schtasks", "/Delete", "/TN", "TelemetryBlocker", "/F"]):
+        try:
+            subprocess.run(args, capture_output=True, text=True, timeout=20, check=False)
+        except Exception:
+            pass
+
+
+def restore_user_profiles(backup_data):
+    """--all-profiles ile diğer profillere yazılan HKCU değerlerini geri al"""
+    previous = backup_data.get("user_profiles") if isinstance(backup_data, dict) else None
+    if not previous or not isinstance(previous, dict):
+        return
+    UI.print_info("Kullanıcı profilleri geri yükleniyor...")
+    reports = ProfileFanout([]).restore(previous)
+    for report in reports:
+        if report.error or report.failed or not report.unloaded:
+            UI.print_warning(f"{report.profile.sid}: {report.error or '; '.join(report.failed) or 'hive kaldırılamadı'}")
+    ok = sum(1 for r in reports if r.ok)
+    UI.print_success(f"Kullanıcı profilleri geri yüklendi: {ok}/{len(previous)}")
 
 
 def restore_onedrive(backup_data):
@@ -323,12 +398,18 @@ def main():
     # Geri yükle
     try:
         UI.print_section_header("Geri Yükleme İşlemi")
+        # Önce izleyiciyi durdur: çalışırken geri yüklenen telemetri ayarlarını tekrar kapatır
+        restore_telemetry_blocker()
         restore_services(backup_data)
         restore_registry(backup_data)
+        restore_registry_snapshot(backup_data, backup_dir)
+        restore_user_profiles(backup_data)
         restore_features(backup_data)
-        restore_telemetry_blocker()
         restore_startup_tasks(backup_data)
         restore_onedrive(backup_data)
+        shutdown_powershell_host()
+        shutdown_service_control()
+        shutdown_key_cache()
         
         UI.print_summary_box("Geri Yükleme Tamamlandı", [
             "Servisler geri yüklendi",
@@ -6,6 +6,7 @@ Manages backup operations with event-driven architecture
 """
 
 import json
+import time
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any, Optional
@@ -14,6 +15,8 @@ from core.events import EventBus, Event, EventType, get_event_bus
 from core.config import Config, BackupConfig
 from core.logger import Logger, get_logger
 from plugins.registry import PluginRegistry, get_registry
+from modules.deadline import Budget, activate
+from modules.state_capture import capture_sources
 
 
 class BackupService:
@@ -71,15 +74,31 @@ class BackupService:
             "plugins": {}
         }
         
-        # Backup each plugin
+        # Backup all plugins concurrently (pure reads); a failing plugin does not stop the others
+        # Plugins still running when the backup budget runs out are cancelled and left out
         plugins = self.plugin_registry.get_all()
-        for plugin in plugins:
-            try:
-                plugin_backup = plugin.backup()
-                if plugin_backup:
-                    backup_data["plugins"][plugin.name] = plugin_backup
-            except Exception as e:
-                self.logger.warning(f"Failed to backup plugin {plugin.name}: {e}")
+        execution = getattr(config, "execution", None)
+        budget = Budget("backup", execution.backup_timeout if execution is not None else None)
+        started = time.perf_counter()
+        with activate(budget):
+            results = capture_sources({plugin.name: plugin.backup for plugin in plugins})
+        budget.finish()
+        for result in results:
+            if result.timed_out:
+                self.logger.warning(f"Plugin {result.name} backup timed out", error=result.error)
+            elif not result.ok:
+                self.logger.warning(f"Failed to backup plugin {result.name}: {result.error}")
+            elif result.data:
+                backup_data["plugins"][result.name] = result.data
+        backup_data["backup_sources"] = {result.name: result.timing() for result in results}
+        backup_data["backup_budget"] = budget.report()
+        duration_ms = (time.perf_counter() - started) * 1000
+        self.logger.info(
+            "Plugin state captured",
+            plugins=len(results),
+            duration_ms=round(duration_ms, 1),
+            plugin_duration_ms=round(sum(r.duration_ms for r in results), 1)
+        )
         
         # Save backup file
         try:
@@ -95,7 +114,8 @@ class BackupService:
                 source="BackupService",
                 data={
                     "backup_file": str(backup_file),
-                    "plugins_backed_up": len(backup_data["plugins"])
+                    "plugins_backed_up": len(backup_data["plugins"]),
+                    "duration_ms": duration_ms
                 }
             ))
             
@@ -5,15 +5,21 @@ Optimization Service
 Orchestrates optimization process using event-driven architecture
 """
 
-from typing import List, Optional
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Set
 from datetime import datetime
+import heapq
 import time
 
 from core.events import EventBus, Event, EventType, get_event_bus
 from core.config import Config
 from core.logger import Logger, get_logger
+from modules.deadline import Budget, run_with_budget
 from plugins.base import OptimizerPlugin, OptimizationResult, OptimizationStatus
 from plugins.registry import PluginRegistry, get_registry
+from plugins.resources import ResourceLockManager
 
 
 class OptimizationService:
@@ -22,6 +28,9 @@ class OptimizationService:
     Coordinates optimization process with event-driven architecture
     """
     
+    # Poll interval while ready plugins wait for an abandoned plugin's claims
+    _RELEASE_POLL_S = 0.25
+    
     def __init__(
         self,
         event_bus: Optional[EventBus] = None,
@@ -32,6 +41,12 @@ class OptimizationService:
         self.plugin_registry = plugin_registry or get_registry()
         self.logger = logger or get_logger()
         self.results: List[OptimizationResult] = []
+        # Wall time vs. sum of plugin times of the last run
+        self.last_timing: Dict[str, Any] = {}
+        # Read/write locks on plugin resource claims (parallel execution)
+        self.resource_locks = ResourceLockManager()
+        # Run deadline of the last run (plugin budgets are its children)
+        self.last_budget: Optional[Budget] = None
     
     def optimize(self, config: Config) -> List[OptimizationResult]:
         """
@@ -65,26 +80,129 @@ class OptimizationService:
         
         self.logger.info(f"Found {len(plugins)} plugins to execute")
         
-        # Execute each plugin
-        for idx, plugin in enumerate(plugins, 1):
-            if not plugin.can_optimize(config):
-                self.logger.info(f"Skipping plugin {plugin.name} (cannot optimize)")
-                continue
+        # Run deadline: every plugin runs under a child budget of it
+        execution = getattr(config, "execution", None)
+        run_budget = Budget("run", execution.run_timeout if execution is not None else None)
+        self.last_budget = run_budget
+        
+        # Execute plugins (sequentially, or as a dependency DAG when parallel execution is enabled)
+        if execution is not None and execution.parallel and len(plugins) > 1:
+            self.results.extend(self._execute_parallel(plugins, config, max(1, int(execution.max_workers)), run_budget))
+        else:
+            for idx, plugin in enumerate(plugins, 1):
+                result = self._execute_sequential(plugin, config, idx, len(plugins), run_budget)
+                if result is not None:
+                    self.results.append(result)
+        run_budget.finish()
+        
+        # Calculate totals
+        total_duration = (time.time() - start_time) * 1000
+        plugin_duration = sum(r.duration_ms for r in self.results)
+        self.last_timing = {
+            "parallel": bool(execution is not None and execution.parallel),
+            "duration_ms": total_duration,
+            "plugin_duration_ms": plugin_duration,
+            "lock_wait_ms": sum(r.metadata.get("lock_wait_ms", 0.0) for r in self.results),
+            "budget": run_budget.report(),
+        }
+        total_changes = sum(r.changes_count for r in self.results)
+        successful = sum(1 for r in self.results if r.is_success())
+        failed = sum(1 for r in self.results if r.status == OptimizationStatus.FAILED)
+        timed_out = sum(1 for r in self.results if r.status == OptimizationStatus.TIMED_OUT)
+        
+        # Publish optimization completed event
+        self.event_bus.publish(Event(
+            event_type=EventType.OPTIMIZATION_COMPLETED,
+            timestamp=datetime.now(),
+            source="OptimizationService",
+            data={
+                "total_plugins": len(plugins),
+                "successful": successful,
+                "failed": failed,
+                "timed_out": timed_out,
+                "total_changes": total_changes,
+                "duration_ms": total_duration,
+                "plugin_duration_ms": plugin_duration,
+                "lock_wait_ms": self.last_timing["lock_wait_ms"],
+                "parallel": self.last_timing["parallel"],
+                "budget": self.last_timing["budget"]
+            }
+        ))
+        
+        self.logger.info(
+            "Optimization completed",
+            total_plugins=len(plugins),
+            successful=successful,
+            failed=failed,
+            timed_out=timed_out,
+            total_changes=total_changes,
+            duration_ms=total_duration,
+            plugin_duration_ms=plugin_duration
+        )
+        
+        return self.results
+    
+    def _execute_plugin(
+        self,
+        plugin: OptimizerPlugin,
+        config: Config,
+        idx: int,
+        total: int,
+        run_budget: Optional[Budget] = None,
+        release: Optional[Callable[[], None]] = None
+    ) -> Optional[OptimizationResult]:
+        """
+        Validate and run a single plugin, publishing its started/completed events
+        
+        The plugin runs under its own budget (plugin.timeout, else
+        ExecutionConfig.plugin_timeout), capped by the run deadline. When the budget
+        runs out the plugin is cancelled: processes it started are killed, its
+        remaining commands fail fast, and it is reported as TIMED_OUT.
+        
+        `release` frees the plugin's resource claims. It is called once the plugin
+        has really stopped: right away when it finished in time, or later from its
+        own thread when a timed-out plugin was abandoned while still running, so
+        conflicting plugins cannot start alongside it.
+        
+        Returns:
+            OptimizationResult, or None if the plugin was skipped
+        """
+        handed_off = False
+        try:
+            run_budget = run_budget or Budget("run")
+            if run_budget.expired:
+                self.logger.error(f"Plugin {plugin.name} not started (run deadline exceeded)")
+                return OptimizationResult(
+                    plugin_name=plugin.name,
+                    status=OptimizationStatus.TIMED_OUT,
+                    errors=["Run deadline exceeded before the plugin started"],
+                    metadata={"budget": run_budget.child(plugin.name, 0).report()}
+                )
             
-            # Validate plugin
-            validation_errors = plugin.validate(config)
+            try:
+                if not plugin.can_optimize(config):
+                    self.logger.info(f"Skipping plugin {plugin.name} (cannot optimize)")
+                    return None
+                
+                # Validate plugin
+                validation_errors = plugin.validate(config)
+            except Exception as e:
+                self.logger.exception(f"Error validating plugin {plugin.name}", exc_info=e)
+                return OptimizationResult(
+                    plugin_name=plugin.name,
+                    status=OptimizationStatus.FAILED,
+                    errors=[str(e)]
+                )
             if validation_errors:
                 self.logger.error(
                     f"Plugin {plugin.name} validation failed",
                     errors=validation_errors
                 )
-                result = OptimizationResult(
+                return OptimizationResult(
                     plugin_name=plugin.name,
                     status=OptimizationStatus.FAILED,
                     errors=validation_errors
                 )
-                self.results.append(result)
-                continue
             
             # Publish optimizer started event
             self.event_bus.publish(Event(
@@ -94,17 +212,46 @@ class OptimizationService:
                 data={
                     "plugin_name": plugin.name,
                     "index": idx,
-                    "total": len(plugins)
+                    "total": total
                 }
             ))
             
             # Execute optimization
+            execution = getattr(config, "execution", None)
+            timeout = plugin.timeout if plugin.timeout is not None else (
+                execution.plugin_timeout if execution is not None else None
+            )
+            budget = run_budget.child(plugin.name, timeout)
             plugin_start_time = time.time()
             try:
-                result = plugin.optimize(config)
+                handed_off = True  # from here on run_with_budget calls release
+                outcome = run_with_budget(budget, plugin.optimize, config, on_exit=release)
+                if outcome.timed_out:
+                    result = outcome.value if isinstance(outcome.value, OptimizationResult) else OptimizationResult(
+                        plugin_name=plugin.name,
+                        status=OptimizationStatus.TIMED_OUT
+                    )
+                    result.status = OptimizationStatus.TIMED_OUT
+                    result.errors.append(
+                        f"Timed out after {budget.used_ms / 1000:.1f} s "
+                        f"(budget {budget.report()['budget_s']} s), step cancelled"
+                    )
+                elif outcome.error is not None:
+                    raise outcome.error
+                else:
+                    result = outcome.value
                 result.duration_ms = (time.time() - plugin_start_time) * 1000
+                result.metadata["budget"] = budget.report()
+                result.metadata["abandoned"] = outcome.abandoned
                 
-                if result.status == OptimizationStatus.SUCCESS:
+                if result.status == OptimizationStatus.TIMED_OUT:
+                    self.logger.error(
+                        f"Plugin {plugin.name} timed out",
+                        duration_ms=result.duration_ms,
+                        budget_s=result.metadata["budget"]["budget_s"],
+                        still_running=outcome.abandoned
+                    )
+                elif result.status == OptimizationStatus.SUCCESS:
                     self.logger.info(
                         f"Plugin {plugin.name} completed successfully",
                         changes=result.changes_count,
@@ -121,18 +268,17 @@ class OptimizationService:
                         f"Plugin {plugin.name} failed",
                         errors=result.errors
                     )
-                
+            
             except Exception as e:
                 self.logger.exception(f"Error executing plugin {plugin.name}", exc_info=e)
                 result = OptimizationResult(
                     plugin_name=plugin.name,
                     status=OptimizationStatus.FAILED,
                     errors=[str(e)],
-                    duration_ms=(time.time() - plugin_start_time) * 1000
+                    duration_ms=(time.time() - plugin_start_time) * 1000,
+                    metadata={"budget": budget.report()}
                 )
             
-            self.results.append(result)
-            
             # Publish optimizer completed event
             self.event_bus.publish(Event(
                 event_type=EventType.OPTIMIZER_COMPLETED,
@@ -142,40 +288,207 @@ class OptimizationService:
                     "plugin_name": plugin.name,
                     "status": result.status.value,
                     "changes_count": result.changes_count,
-                    "errors_count": len(result.errors)
+                    "errors_count": len(result.errors),
+                    "duration_ms": result.duration_ms
                 }
             ))
+            
+            return result
+        finally:
+            # Claims of a plugin that never reached run_with_budget (not started,
+            # skipped, invalid or raising in can_optimize/validate) are freed here
+            if not handed_off and release is not None:
+                release()
+    
+    def _execute_parallel(
+        self,
+        plugins: List[OptimizerPlugin],
+        config: Config,
+        max_workers: int,
+        run_budget: Optional[Budget] = None
+    ) -> List[OptimizationResult]:
+        """
+        Run plugins as a dependency DAG on a bounded worker pool
         
-        # Calculate totals
-        total_duration = (time.time() - start_time) * 1000
-        total_changes = sum(r.changes_count for r in self.results)
-        successful = sum(1 for r in self.results if r.is_success())
-        failed = sum(1 for r in self.results if r.status == OptimizationStatus.FAILED)
+        A plugin starts as soon as all of its dependencies (get_dependencies) have
+        finished; when several are ready, they start in get_sorted() order (priority).
+        Results are returned in get_sorted() order regardless of completion order.
         
-        # Publish optimization completed event
-        self.event_bus.publish(Event(
-            event_type=EventType.OPTIMIZATION_COMPLETED,
-            timestamp=datetime.now(),
-            source="OptimizationService",
-            data={
-                "total_plugins": len(plugins),
-                "successful": successful,
-                "failed": failed,
-                "total_changes": total_changes,
-                "duration_ms": total_duration
-            }
-        ))
+        A ready plugin whose resource claims (get_resources) conflict with a running
+        plugin is held back until the conflicting plugin finishes; other ready plugins
+        start in the meantime. The time spent held back is recorded per plugin in
+        result.metadata ("lock_wait_ms", "blocked_by"). A timed-out plugin that is
+        still unwinding keeps its claims until its thread ends; once the run deadline
+        has passed, remaining plugins are reported TIMED_OUT without taking locks.
         
-        self.logger.info(
-            "Optimization completed",
-            total_plugins=len(plugins),
-            successful=successful,
-            failed=failed,
-            total_changes=total_changes,
-            duration_ms=total_duration
+        A plugin whose dependency FAILED or TIMED_OUT (or was itself skipped for that
+        reason) does not run; it is reported SKIPPED naming the dependency.
+        """
+        run_budget = run_budget or Budget("run")
+        total = len(plugins)
+        index = {plugin.name: i for i, plugin in enumerate(plugins)}
+        claims = {plugin.name: plugin.get_resources() for plugin in plugins}
+        blocked_since: Dict[str, float] = {}
+        blocked_by: Dict[str, Set[str]] = defaultdict(set)
+        lock_wait: Dict[str, float] = {}
+        waiting_on: Dict[str, Set[str]] = {
+            plugin.name: {dep for dep in plugin.get_dependencies() if dep in index and dep != plugin.name}
+            for plugin in plugins
+        }
+        failed_deps: Dict[str, Set[str]] = defaultdict(set)
+        dependents: Dict[str, List[str]] = defaultdict(list)
+        for name, deps in waiting_on.items():
+            for dep in deps:
+                dependents[dep].append(name)
+        
+        ready = [(index[name], name) for name, deps in waiting_on.items() if not deps]
+        heapq.heapify(ready)
+        finished: Dict[int, Optional[OptimizationResult]] = {}
+        running: Dict[Future, str] = {}
+        
+        def complete(name: str, result: Optional[OptimizationResult]) -> None:
+            """Record a result and release the dependents waiting on it"""
+            finished[index[name]] = result
+            failed = self._blocks_dependents(result)
+            for dependent in dependents[name]:
+                waiting_on[dependent].discard(name)
+                if failed:
+                    failed_deps[dependent].add(name)
+                if waiting_on[dependent]:
+                    continue
+                if failed_deps[dependent]:
+                    complete(dependent, self._skip_for_dependencies(dependent, failed_deps[dependent], finished, index))
+                else:
+                    heapq.heappush(ready, (index[dependent], dependent))
+        
+        self.logger.info("Running plugins in parallel", plugins=total, max_workers=max_workers)
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="optimizer") as pool:
+            while ready or running:
+                held_back = []
+                while ready and len(running) < max_workers:
+                    i, name = heapq.heappop(ready)
+                    if run_budget.expired:
+                        # Reported as not started; touches nothing, so no claims are needed
+                        future = pool.submit(self._execute_plugin, plugins[i], config, i + 1, total, run_budget)
+                        running[future] = name
+                        continue
+                    if not self.resource_locks.try_acquire(name, claims[name]):
+                        blocked_since.setdefault(name, time.time())
+                        blocked_by[name].update(self.resource_locks.conflicts(name, claims[name]))
+                        held_back.append((i, name))
+                        continue
+                    since = blocked_since.pop(name, None)
+                    lock_wait[name] = (time.time() - since) * 1000 if since is not None else 0.0
+                    future = pool.submit(
+                        self._execute_plugin, plugins[i], config, i + 1, total, run_budget,
+                        partial(self.resource_locks.release, name)
+                    )
+                    running[future] = name
+                for item in held_back:
+                    heapq.heappush(ready, item)
+                
+                if not running:
+                    if held_back and self.resource_locks.holders():
+                        # Only abandoned (timed-out, still unwinding) plugins hold the claims
+                        self.resource_locks.wait_for_release(self._RELEASE_POLL_S)
+                        continue
+                    break  # Nothing holds a conflicting lock; cannot happen unless claims are inconsistent
+                
+                # Claims are released by the plugin itself (see _execute_plugin), possibly by
+                # an abandoned plugin's thread; poll so held-back plugins notice that too
+                done, _ = wait(running, timeout=self._RELEASE_POLL_S if held_back else None,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result = future.result()
+                    if result is not None:
+                        result.metadata["lock_wait_ms"] = lock_wait.get(name, 0.0)
+                        result.metadata["blocked_by"] = sorted(blocked_by.get(name, ()))
+                        if lock_wait.get(name):
+                            self.logger.info(
+                                f"Plugin {name} waited for resources",
+                                lock_wait_ms=lock_wait[name],
+                                blocked_by=", ".join(result.metadata["blocked_by"])
+                            )
+                    complete(name, result)
+        
+        # Dependency cycle: whatever never started runs sequentially in sorted order
+        # (still skipped when a dependency failed, in or outside the cycle)
+        leftover = [i for i in range(total) if i not in finished]
+        cycle = [plugins[i].name for i in leftover if waiting_on[plugins[i].name]]
+        if cycle:
+            self.logger.warning(
+                "Dependency cycle detected, running remaining plugins sequentially",
+                plugins=cycle
+            )
+        for i in leftover:
+            name = plugins[i].name
+            if failed_deps[name]:
+                finished[i] = self._skip_for_dependencies(name, failed_deps[name], finished, index)
+            else:
+                finished[i] = self._execute_sequential(plugins[i], config, i + 1, total, run_budget)
+            if self._blocks_dependents(finished[i]):
+                for dependent in dependents[name]:
+                    failed_deps[dependent].add(name)
+        
+        return [finished[i] for i in range(total) if finished[i] is not None]
+    
+    @staticmethod
+    def _blocks_dependents(result: Optional[OptimizationResult]) -> bool:
+        """Failed, timed out, or skipped because of its own dependencies"""
+        return result is not None and (
+            result.status in (OptimizationStatus.FAILED, OptimizationStatus.TIMED_OUT)
+            or bool(result.metadata.get("failed_dependencies"))
+        )
+    
+    def _skip_for_dependencies(
+        self,
+        name: str,
+        deps: Set[str],
+        finished: Dict[int, Optional[OptimizationResult]],
+        index: Dict[str, int]
+    ) -> OptimizationResult:
+        """SKIPPED result for a plugin whose dependencies failed, timed out or were skipped"""
+        reasons = []
+        for dep in sorted(deps, key=index.get):
+            result = finished[index[dep]]
+            reasons.append(f"{dep} ({result.status.value})")
+        self.logger.warning(f"Skipping plugin {name} (dependency did not succeed)", dependencies=", ".join(reasons))
+        return OptimizationResult(
+            plugin_name=name,
+            status=OptimizationStatus.SKIPPED,
+            warnings=[f"Skipped: dependency {', '.join(reasons)} did not succeed"],
+            metadata={"failed_dependencies": sorted(deps, key=index.get)}
         )
+    
+    def _execute_sequential(
+        self,
+        plugin: OptimizerPlugin,
+        config: Config,
+        idx: int,
+        total: int,
+        run_budget: Budget
+    ) -> Optional[OptimizationResult]:
+        """
+        Run one plugin after the previous one, holding its resource claims
         
-        return self.results
+        Normally nothing else holds claims. The exception is a timed-out plugin that
+        is still unwinding: a conflicting plugin waits for it (until the run deadline).
+        """
+        claims = plugin.get_resources()
+        try:
+            lock_wait = self.resource_locks.acquire(plugin.name, claims, timeout=run_budget.remaining())
+        except TimeoutError:
+            # Run deadline passed while waiting; reported as not started
+            return self._execute_plugin(plugin, config, idx, total, run_budget)
+        result = self._execute_plugin(
+            plugin, config, idx, total, run_budget,
+            partial(self.resource_locks.release, plugin.name)
+        )
+        if result is not None and lock_wait >= 1.0:
+            result.metadata["lock_wait_ms"] = lock_wait
+        return result
     
     def get_results(self) -> List[OptimizationResult]:
         """Get optimization results"""
@@ -188,6 +501,7 @@ class OptimizationService:
                 "total_plugins": 0,
                 "successful": 0,
                 "failed": 0,
+                "timed_out": 0,
                 "total_changes": 0
             }
         
@@ -195,8 +509,13 @@ class OptimizationService:
             "total_plugins": len(self.results),
             "successful": sum(1 for r in self.results if r.is_success()),
             "failed": sum(1 for r in self.results if r.status == OptimizationStatus.FAILED),
+            "timed_out": sum(1 for r in self.results if r.status == OptimizationStatus.TIMED_OUT),
             "total_changes": sum(r.changes_count for r in self.results),
             "total_errors": sum(len(r.errors) for r in self.results),
-            "total_warnings": sum(len(r.warnings) for r in self.results)
+            "total_warnings": sum(len(r.warnings) for r in self.results),
+            "duration_ms": self.last_timing.get("duration_ms", 0.0),
+            "plugin_duration_ms": self.last_timing.get("plugin_duration_ms", 0.0),
+            "lock_wait_ms": self.last_timing.get("lock_wait_ms", 0.0),
+            "budget": self.last_timing.get("budget")
         }
 
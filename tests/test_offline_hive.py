@@ -0,0 +1,72 @@
+"""Offline REGF hive: create, write, save and reopen without winreg"""
+
+import os
+import struct
+import tempfile
+import unittest
+
+from modules.offline_hive import (
+    REG_BINARY, REG_DWORD, REG_MULTI_SZ, REG_QWORD, REG_SZ, MAX_CELL_DATA,
+    OfflineHive, OfflineHiveError,
+)
+
+
+class OfflineHiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "NTUSER.DAT")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_new_hive_roundtrip(self):
+        hive = OfflineHive.new(path=self.path)
+        hive.set_dword(r"Software\Policies\Microsoft\Windows\DataCollection", "AllowTelemetry", 0)
+        hive.set_sz(r"Control Panel\Desktop", "MenuShowDelay", "0")
+        hive.set_value(r"Software\Test", "Qword", REG_QWORD, 2 ** 40)
+        hive.set_value(r"Software\Test", "Multi", REG_MULTI_SZ, ["a", "b"])
+        hive.set_value(r"Software\Test", "Blob", REG_BINARY, bytes(range(256)) * 40)
+        hive.save()
+
+        reopened = OfflineHive.open(self.path)
+        self.assertEqual(reopened.check(), [])
+        value = reopened.get_value(r"SOFTWARE\policies\Microsoft\Windows\DataCollection", "allowtelemetry")
+        self.assertEqual((value.vtype, value.data), (REG_DWORD, 0))
+        self.assertEqual(reopened.get_value(r"Control Panel\Desktop", "MenuShowDelay").data, "0")
+        self.assertEqual(reopened.get_value(r"Software\Test", "Qword").data, 2 ** 40)
+        self.assertEqual(reopened.get_value(r"Software\Test", "Multi").data, ["a", "b"])
+        self.assertEqual(reopened.get_value(r"Software\Test", "Blob").data, bytes(range(256)) * 40)
+        self.assertIsNone(reopened.open_key(r"Software\Missing"))
+
+    def test_overwrite_and_many_subkeys_stay_valid(self):
+        hive = OfflineHive.new(path=self.path)
+        names = [f"Key{i:04d}" for i in range(1100)]
+        for name in reversed(names):
+            hive.create_key(rf"Software\{name}")
+        for i in range(20):
+            hive.set_sz(r"Software\Key0001", "Value", "x" * i)
+        hive.save()
+
+        reopened = OfflineHive.open(self.path)
+        self.assertEqual(reopened.check(), [])
+        software = reopened.open_key("Software")
+        self.assertEqual(software.subkey_count, len(names))
+        self.assertEqual([key.name for key in software.subkeys()], names)
+        self.assertEqual(reopened.get_value(r"Software\Key0001", "Value").data, "x" * 19)
+        self.assertEqual(len(reopened.open_key(r"Software\Key0001").values()), 1)
+
+    def test_oversized_value_is_rejected(self):
+        hive = OfflineHive.new(path=self.path)
+        with self.assertRaises(OfflineHiveError):
+            hive.set_value(r"Software\Test", "Big", REG_BINARY, bytes(MAX_CELL_DATA + 1))
+
+    def test_dirty_hive_is_rejected(self):
+        data = bytearray(OfflineHive.new(path=self.path).to_bytes())
+        struct.pack_into("<I", data, 8, struct.unpack_from("<I", data, 4)[0] + 1)
+        with self.assertRaises(OfflineHiveError):
+            OfflineHive(bytes(data))
+
+
+if __name__ == "__main__":
+    unittest.main()
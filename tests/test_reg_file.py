@@ -0,0 +1,66 @@
+"""Registry plan -> .reg -> parse round-trip (no reg.exe, no winreg)"""
+
+import unittest
+
+from modules.reg_file import (
+    REG_BINARY, REG_DWORD, REG_EXPAND_SZ, REG_MULTI_SZ, REG_QWORD, REG_SZ,
+    compile_inverse, compile_reg, parse_reg, roundtrip_errors, to_bytes,
+)
+from modules.registry import RegistryOptimizer
+from modules.tweak_catalog import same_value, tweak_ident
+
+
+class RegFileTest(unittest.TestCase):
+
+    def test_registry_plan_roundtrip(self):
+        plan = RegistryOptimizer()._get_optimizations(True)
+        self.assertTrue(plan)
+        text = compile_reg(plan)
+        self.assertEqual(roundtrip_errors(plan, text), [])
+        # reg import'a giden biçim: UTF-16 LE + BOM
+        self.assertEqual(roundtrip_errors(plan, to_bytes(text)), [])
+
+    def test_value_types_and_escaping(self):
+        key = r"HKCU\Software\Optimizer Test"
+        plan = [
+            (key, "Dword", REG_DWORD, 0xFFFFFFFF),
+            (key, "Qword", REG_QWORD, 2 ** 40 + 7),
+            (key, 'Quote "and" back\\slash', REG_SZ, 'C:\\Path\\"x"'),
+            (key, "Lines", REG_SZ, "first\nsecond"),
+            (key, "Expand", REG_EXPAND_SZ, "%SystemRoot%\\System32"),
+            (key, "Multi", REG_MULTI_SZ, ["one", "two"]),
+            (key, "Binary", REG_BINARY, bytes(range(64))),
+            (key, "", REG_SZ, "default value"),
+        ]
+        entries = parse_reg(compile_reg(plan))
+        parsed = {tweak_ident(e.key_path, e.name): e for e in entries}
+        self.assertEqual(len(parsed), len(plan))
+        for key_path, name, vtype, data in plan:
+            entry = parsed[tweak_ident(key_path, name)]
+            self.assertFalse(entry.delete)
+            self.assertTrue(same_value(entry.vtype, entry.data, vtype, data), name)
+
+    def test_inverse_restores_and_deletes(self):
+        backup = [
+            {"path": r"HKCU\Software\Test", "value": "Existed", "exists": True, "type": REG_DWORD, "data": 3},
+            {"path": r"HKCU\Software\Test", "value": "Created", "exists": False},
+            {"path": r"HKLM\SOFTWARE\Policies\Test", "value": 'Odd "name"', "exists": False},
+        ]
+        text = compile_inverse(backup)
+        self.assertIn('"Created"=-', text)
+        entries = {tweak_ident(e.key_path, e.name): e for e in parse_reg(text)}
+        existed = entries[tweak_ident(r"HKCU\Software\Test", "Existed")]
+        self.assertFalse(existed.delete)
+        self.assertEqual((existed.vtype, existed.data), (REG_DWORD, 3))
+        self.assertTrue(entries[tweak_ident(r"HKCU\Software\Test", "Created")].delete)
+        self.assertTrue(entries[tweak_ident(r"HKLM\SOFTWARE\Policies\Test", 'Odd "name"')].delete)
+
+    def test_roundtrip_reports_differences(self):
+        key = r"HKCU\Software\Test"
+        text = compile_reg([(key, "A", REG_DWORD, 1), (key, "Extra", REG_DWORD, 2)])
+        errors = roundtrip_errors([(key, "A", REG_DWORD, 0), (key, "Missing", REG_SZ, "x")], text)
+        self.assertEqual(len(errors), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Registry plan against the in-memory backend (CI: no winreg)"""
+
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+from modules.registry import RegistryOptimizer
+from modules.registry_backend import (
+    REG_DWORD, REG_SZ, MemoryBackend, RecordingBackend, create_backend, set_registry_backend,
+)
+from modules.registry_batch import shutdown_key_cache
+from modules.tweak_catalog import AppliedTweaks
+
+
+class MemoryBackendTest(unittest.TestCase):
+
+    def test_winreg_error_semantics(self):
+        backend = MemoryBackend({r"HKCU\Software\Test": {"Value": (REG_DWORD, 1)}})
+        with self.assertRaises(FileNotFoundError):
+            backend.open_key("HKCU", r"Software\Missing")
+        handle = backend.open_key("HKCU", r"software\TEST")
+        self.assertEqual(backend.query_value(handle, "value"), (1, REG_DWORD))
+        with self.assertRaises(PermissionError):
+            backend.set_value(handle, "Value", REG_DWORD, 2)  # read-only handle
+        with self.assertRaises(FileNotFoundError):
+            backend.query_value(handle, "Missing")
+        backend.close_key(handle)
+
+        handle = backend.create_key("HKCU", r"Software\Test")
+        with self.assertRaises(TypeError):
+            backend.set_value(handle, "Value", REG_DWORD, "1")
+        with self.assertRaises(TypeError):
+            backend.set_value(handle, "Name", REG_SZ, 1)
+        with self.assertRaises(OverflowError):
+            backend.set_value(handle, "Value", REG_DWORD, 2 ** 32)
+        backend.close_key(handle)
+        self.assertEqual(MemoryBackend(backend.dump()).dump(), backend.dump())
+
+    def test_create_backend_spec(self):
+        self.assertIsInstance(create_backend("memory"), MemoryBackend)
+        recording = create_backend("record:memory")
+        self.assertIsInstance(recording, RecordingBackend)
+        self.assertIsInstance(recording.inner, MemoryBackend)
+        with self.assertRaises(ValueError):
+            create_backend("nope")
+
+
+class RegistryPlanOnMemoryBackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = RecordingBackend(MemoryBackend())
+        self.previous = set_registry_backend(self.backend)
+        shutdown_key_cache()
+
+    def tearDown(self):
+        shutdown_key_cache()
+        set_registry_backend(self.previous)
+
+    def _optimize(self):
+        optimizer = RegistryOptimizer()
+        optimizer.apply_scheduler_tweaks = True
+        # Fresh claim set per run, so the global one does not leak between tests
+        with mock.patch("modules.registry.get_applied_tweaks", return_value=AppliedTweaks()), \
+                contextlib.redirect_stdout(io.StringIO()):
+            optimizer.optimize()
+        return optimizer
+
+    def test_apply_then_replan_is_empty(self):
+        optimizer = self._optimize()
+        total = len(optimizer._get_optimizations(True))
+        self.assertEqual(optimizer.last_counts, {"compliant": 0, "changed": total, "failed": 0})
+        self.assertEqual(self.backend.stats()["ops"]["set"]["count"], total)
+
+        plan = optimizer.plan(optimizations=optimizer._get_optimizations(True))
+        self.assertEqual(plan.apply, [])
+        self.assertEqual(len(plan.compliant), total)
+
+        self.backend.reset()
+        again = self._optimize()
+        self.assertEqual(again.last_counts, {"compliant": total, "changed": 0, "failed": 0})
+        self.assertEqual(again.changes, [])
+        ops = self.backend.stats()["ops"]
+        self.assertNotIn("set", ops)
+        self.assertEqual(self.backend.redundant_writes, 0)
+
+    def test_only_drifted_value_is_rewritten(self):
+        optimizer = self._optimize()
+        key_path, name, vtype, data = optimizer._get_optimizations(True)[0]
+        hive, _, subkey = key_path.partition("\\")
+        handle = self.backend.inner.create_key(hive, subkey)
+        self.backend.inner.set_value(handle, name, vtype, data + 1 if isinstance(data, int) else data + "x")
+        self.backend.inner.close_key(handle)
+
+        again = self._optimize()
+        self.assertEqual(again.last_counts["changed"], 1)
+        self.assertEqual([(c["path"], c["value"]) for c in again.changes], [(key_path, name)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""DriftEnforcer with QueueNotifier: debounce and targeted re-apply (no Windows)"""
+
+import threading
+import time
+import unittest
+
+from modules.registry_backend import MemoryBackend, RecordingBackend
+from modules.registry_watcher import SERVICES_KEY, SERVICE_DISABLED, DriftEnforcer, QueueNotifier
+from modules.tweak_catalog import get_catalog
+
+
+class DriftEnforcerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tweaks = [t for t in get_catalog().select(["telemetry"]) if t.hive == "HKLM"]
+        self.assertGreater(len(self.tweaks), 1)
+        self.backend = RecordingBackend(MemoryBackend())
+        self.fixed_services = []
+        self.started = threading.Event()
+        self.notifier = QueueNotifier()
+        self.enforcer = DriftEnforcer(
+            self.tweaks, ["DiagTrack"], notifier=self.notifier, backend=self.backend,
+            service_fixer=self._fix_service, debounce=0.3, max_delay=5.0, heartbeat=None,
+            log=self._log,
+        )
+
+    def _log(self, message):
+        if "başlangıç" in message:
+            self.started.set()
+
+    def _fix_service(self, name):
+        self.fixed_services.append(name)
+        self._write(f"HKLM\\{SERVICES_KEY}\\{name}", "Start", 4, SERVICE_DISABLED)
+        return True
+
+    def _write(self, key_path, name, vtype, data):
+        hive, _, subkey = key_path.partition("\\")
+        self.backend.inner.write_value(hive, subkey, name, vtype, data)
+
+    def _drift(self, tweak):
+        self._write(tweak.key_path, tweak.value, tweak.vtype,
+                    tweak.data + 1 if isinstance(tweak.data, int) else f"{tweak.data}x")
+
+    def _set_values(self):
+        return [call for call in self.backend.calls if call.op == "set"]
+
+    def test_initial_pass_fixes_everything(self):
+        report = self.enforcer.enforce()
+        self.assertEqual(len(report.fixed), len(self.tweaks))
+        self.assertEqual(self.enforcer.check().drifts, [])
+        self.backend.reset()
+        self.assertEqual(self.enforcer.enforce().fixed, [])
+        self.assertEqual(self._set_values(), [])
+
+    def test_burst_is_one_cycle_and_only_drifted_value_is_rewritten(self):
+        self._write(f"HKLM\\{SERVICES_KEY}\\DiagTrack", "Start", 4, SERVICE_DISABLED)
+        thread = threading.Thread(target=self.enforcer.run, kwargs={"max_cycles": 1}, daemon=True)
+        thread.start()
+        self.assertTrue(self.started.wait(5), "initial pass did not run")
+        self.backend.reset()
+
+        drifted = self.tweaks[0]
+        self._drift(drifted)
+        hive, _, subkey = drifted.key_path.partition("\\")
+        other = next(t for t in self.tweaks if t.key_path.lower() != drifted.key_path.lower())
+        other_hive, _, other_subkey = other.key_path.partition("\\")
+        for _ in range(5):  # gaps shorter than the debounce window
+            self.notifier.notify(hive, subkey)
+            self.notifier.notify(other_hive, other_subkey)
+            time.sleep(0.05)
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+        self.assertEqual(self.enforcer.cycles, 1)
+        self.assertEqual(self.enforcer.events, 10)
+        writes = self._set_values()
+        self.assertEqual([(c.key_path.lower(), c.name) for c in writes],
+                         [(drifted.key_path.lower(), drifted.value)])
+        self.assertEqual(self.enforcer.check().drifts, [])
+        self.assertEqual(self.fixed_services, [])
+
+    def test_service_drift_uses_service_fixer(self):
+        self.enforcer.enforce()
+        self._write(f"HKLM\\{SERVICES_KEY}\\DiagTrack", "Start", 4, 2)
+        report = self.enforcer.enforce([("HKLM", f"{SERVICES_KEY}\\DiagTrack")])
+        self.assertEqual([d.service for d in report.fixed], ["DiagTrack"])
+        self.assertEqual(self.fixed_services, ["DiagTrack"])
+        self.assertEqual(report.checked, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()